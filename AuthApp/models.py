@@ -23,6 +23,8 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from TechReform.idgen import next_code
+
 
 class UserProfile(models.Model):
     """
@@ -382,7 +384,7 @@ class SupportTicket(models.Model):
         Custom save method with automatic ID generation and timestamp management.
 
         This method handles:
-        - Automatic ticket ID generation using UUID if not already set
+        - Automatic ticket ID generation from a snowflake ID if not already set
         - Automatic timestamp setting for resolved_at when status changes to 'resolved'
         - Automatic timestamp setting for closed_at when status changes to 'closed'
 
@@ -391,14 +393,13 @@ class SupportTicket(models.Model):
             **kwargs: Arbitrary keyword arguments passed to parent save()
 
         Note:
-            Ticket IDs are generated in format "TR{8-char-UUID}" for uniqueness
+            Ticket IDs are "TR" followed by 13 base32 characters of a
+            snowflake ID (TechReform.idgen), unique across processes
             Timestamps are only set once when status first changes to resolved/closed
         """
         if not self.ticket_id:
             # Generate unique ticket ID
-            import uuid
-
-            self.ticket_id = f"TR{str(uuid.uuid4())[:8].upper()}"
+            self.ticket_id = next_code("TR")
 
         # Auto-set timestamps based on status changes
         if self.status == "resolved" and not self.resolved_at:
@@ -1,3 +1,45 @@
+"""
+Test cases for AuthApp.
+
+Ticket tracking:
+    Customers find their ticket with the code typed in lower case, with
+    hyphens or with look-alike letters, but only together with the email
+    address the ticket was opened with.
+"""
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import SupportTicket
+
+
+class TrackTicketTests(TestCase):
+    """
+    Public ticket lookup by code and email.
+    """
+
+    def setUp(self):
+        customer = User.objects.create_user("customer", "customer@example.com", "pw")
+        self.ticket = SupportTicket.objects.create(
+            customer=customer,
+            subject="Order arrived damaged",
+            description="The GPU box was crushed.",
+            customer_email="customer@example.com",
+        )
+
+    def track(self, ticket_id, email="customer@example.com"):
+        return self.client.post(
+            reverse("track_ticket"), {"ticket_id": ticket_id, "email": email}
+        )
+
+    def test_typed_code_variants(self):
+        code = self.ticket.ticket_id
+        typed = f"{code[:7]}-{code[7:]}".lower().replace("1", "l").replace("0", "o")
+
+        response = self.track(typed)
+        self.assertEqual(response.context["ticket"], self.ticket)
 
-# Create your tests here.
+        response = self.track(typed, email="someone@example.com")
+        self.assertNotIn("ticket", response.context)
+        self.assertTrue(response.context["error_message"])
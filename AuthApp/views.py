@@ -54,6 +54,7 @@ from django.db.models import Q, Count
 from django.http import JsonResponse
 from django.utils import timezone
 from django.core.paginator import Paginator
+from TechReform.idgen import normalize_code
 from .models import UserProfile, SupportTicket, SupportResponse, SupportCategory
 from .forms import CustomUserCreationForm, CustomAuthenticationForm, UserProfileForm
 from .decorators import admin_required, staff_required
@@ -598,7 +599,8 @@ def track_ticket(request):
     error_message = None
 
     if request.method == "POST":
-        ticket_id = request.POST.get("ticket_id", "").strip()
+        # Accept codes typed in any case, with hyphens or look-alike letters
+        ticket_id = normalize_code(request.POST.get("ticket_id", ""), prefix="TR")
         email = request.POST.get("email", "").strip()
 
         if not ticket_id or not email:
@@ -11,6 +11,7 @@ Registered Models:
 - Order: Customer orders with complete order lifecycle
 - OrderItem: Products within customer orders
 - ShippingAddress: Delivery addresses for orders
+- StockReservation: Stock holds of carts awaiting checkout
 
 The admin interface allows staff to:
 - View and manage customer carts and cart items
@@ -24,7 +25,14 @@ Access through Django admin at /admin/ with appropriate permissions.
 """
 
 from django.contrib import admin
-from .models import Cart, CartItem, Order, OrderItem, ShippingAddress
+from .models import (
+    Cart,
+    CartItem,
+    Order,
+    OrderItem,
+    ShippingAddress,
+    StockReservation,
+)
 
 # Register cart and checkout models for admin management
 admin.site.register(Cart)
@@ -32,3 +40,4 @@ admin.site.register(CartItem)
 admin.site.register(Order)
 admin.site.register(OrderItem)
 admin.site.register(ShippingAddress)
+admin.site.register(StockReservation)
@@ -5,20 +5,21 @@ across all templates in the TechReform application. It handles both authenticate
 user carts and anonymous session-based carts, ensuring seamless shopping cart
 functionality regardless of user authentication status.
 
-The context processor automatically creates and manages cart sessions for
-anonymous users and links carts to user accounts for authenticated users.
-This enables persistent cart functionality and smooth user experience transitions
-between anonymous browsing and logged-in shopping.
+The context values are lazy and read-only: a page that does not show the
+cart runs no query, and a page that does reads the counts with one query
+shared with the compare and wishlist processors.
 
 Key Features:
 - Global cart context availability in all templates
-- Automatic cart creation for new users/sessions
+- Lazy values that only hit the database when a template reads them
 - Session-based cart tracking for anonymous users
 - User-based cart persistence for authenticated users
-- Error handling with graceful fallbacks
 """
 
-import uuid
+from django.utils.functional import SimpleLazyObject
+
+from TechReform.counters import lazy_count
+
 from ..models import Cart
 
 
@@ -29,14 +30,17 @@ def cart_processor(request):
     template without requiring individual views to pass cart data. It handles
     both authenticated and anonymous users with different cart tracking strategies.
 
+    Every value is lazy: nothing is read until a template uses it. The counts
+    come from TechReform.counters.header_counts, which reads the cart, compare
+    and wishlist counts together with a single query per request.
+
     For authenticated users:
-        - Links cart to user account for persistence across sessions
-        - Automatically creates a cart if none exists for the user
+        - Reads the cart linked to the user account
 
     For anonymous users:
-        - Uses session-based tracking with UUID session identifiers
-        - Creates new session ID if none exists
-        - Maintains cart state across page loads during session
+        - Reads the cart of the ``cart_session_id`` session value
+        - Never creates a session ID or a cart; the cart views do that when
+          the first item is added
 
     Args:
         request (HttpRequest): The Django request object containing user and session data
@@ -45,42 +49,24 @@ def cart_processor(request):
         dict: Context dictionary containing cart data with keys:
             - cart_count (int): Total number of items in the cart
             - cart_total (Decimal): Total monetary value of cart contents
-            - cart (Cart|None): The complete Cart model instance for template access
-
-    Error Handling:
-        Returns safe default values (0 counts, None cart) if any exceptions occur
-        during cart retrieval or creation to prevent template rendering failures.
-
-    Session Management:
-        Automatically manages session modification flags to ensure session
-        persistence when creating new session IDs for anonymous users.
+            - cart (Cart|None): The complete Cart model instance for template access,
+              or None if the visitor has no cart
 
     Note:
         This context processor must be registered in Django settings.py under
         TEMPLATES['OPTIONS']['context_processors'] to function globally.
     """
-    try:
+
+    def get_cart():
         if request.user.is_authenticated:
-            # If user is logged in, get or create their cart
-            cart, created = Cart.objects.get_or_create(user=request.user)
-        else:
-            # If anonymous user, use session ID to track cart
-            session_id = request.session.get("cart_session_id")
-            if not session_id:
-                # Create a new session ID if one doesn't exist
-                session_id = str(uuid.uuid4())
-                request.session["cart_session_id"] = session_id
-                # Make sure session is saved
-                request.session.modified = True
-
-            # Get or create cart with the session ID
-            cart, created = Cart.objects.get_or_create(session_id=session_id)
-
-        return {
-            "cart_count": cart.get_cart_items_count,
-            "cart_total": cart.get_cart_total,
-            "cart": cart,  # Include the entire cart object for more flexibility in templates
-        }
-    except Exception:
-        # Return empty dict if any errors occur
-        return {"cart_count": 0, "cart_total": 0, "cart": None}
+            return Cart.objects.filter(user=request.user).first()
+        session_id = request.session.get("cart_session_id")
+        if not session_id:
+            return None
+        return Cart.objects.filter(session_id=session_id).first()
+
+    return {
+        "cart_count": lazy_count(request, "cart_count"),
+        "cart_total": lazy_count(request, "cart_total"),
+        "cart": SimpleLazyObject(get_cart),
+    }
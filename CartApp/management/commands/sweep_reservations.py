@@ -0,0 +1,33 @@
+"""
+Management command to delete expired stock reservations.
+
+Expired holds (CartApp.reservations) no longer count against the stock of
+their products, but their rows stay in the StockReservation table until
+this command deletes them. Rows are deleted in batches so the table stays
+available to concurrent checkouts. Run it periodically, e.g. from cron
+every few minutes.
+
+Usage:
+    python manage.py sweep_reservations
+    python manage.py sweep_reservations --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from CartApp.reservations import sweep_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired cart stock reservations in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of reservations deleted per DELETE statement",
+        )
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired reservations"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-17 03:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CartApp', '0004_alter_order_payment_status_delete_orderreview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('product_id', models.UUIDField()),
+                ('product_category', models.CharField(max_length=50)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='CartApp.cart')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product_id', 'expires_at'], name='stockreservation_active_idx'), models.Index(fields=['expires_at'], name='stockreservation_expiry_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product_category', 'product_id', 'cart'), name='stockreservation_unique_hold')],
+            },
+        ),
+    ]
@@ -8,6 +8,7 @@ account integration, and comprehensive order tracking.
 The models include:
 - Cart: Shopping cart for both authenticated and anonymous users
 - CartItem: Individual items within a shopping cart
+- StockReservation: Time-boxed stock holds of a cart
 - Order: Customer orders with status tracking and payment information
 - OrderItem: Individual products within an order
 - ShippingAddress: Delivery address information for orders
@@ -26,7 +27,8 @@ All models use UUID primary keys for enhanced security and scalability.
 from django.db import models
 from django.contrib.auth.models import User
 import uuid
-from django.utils import timezone
+
+from TechReform.idgen import next_code
 
 
 class Cart(models.Model):
@@ -254,6 +256,62 @@ class CartItem(models.Model):
         return None
 
 
+class StockReservation(models.Model):
+    """Time-boxed hold on the stock of a product for one cart.
+
+    While a hold is active its quantity is not available to other carts,
+    so a buyer who has added a product or opened the checkout page does not
+    lose it to someone else before placing the order. Holds expire after
+    CART_RESERVATION_TTL seconds unless renewed; expired rows are ignored
+    and deleted in batches by the sweep_reservations command.
+
+    Attributes:
+        id (UUIDField): Unique identifier for the hold
+        cart (ForeignKey): Cart holding the stock
+        product_id (UUIDField): ID of the held product
+        product_category (CharField): Category of the held product
+        quantity (PositiveIntegerField): Units held, the cart's full quantity
+        expires_at (DateTimeField): End of the hold
+        created_at (DateTimeField): Hold creation timestamp
+
+    Indexes:
+        - One hold per (category, product, cart)
+        - (product_id, expires_at) serves the active-holds aggregate
+        - expires_at serves the sweep of expired holds
+
+    Usage:
+        # Use CartApp.reservations rather than writing rows directly
+        hold(cart, "GPU", product.id, 2)
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE)
+    product_id = models.UUIDField()
+    product_category = models.CharField(max_length=50)
+    quantity = models.PositiveIntegerField(default=1)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product_category", "product_id", "cart"],
+                name="stockreservation_unique_hold",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["product_id", "expires_at"],
+                name="stockreservation_active_idx",
+            ),
+            models.Index(fields=["expires_at"], name="stockreservation_expiry_idx"),
+        ]
+
+    def __str__(self):
+        """Return string representation of the hold."""
+        return f"{self.quantity} x {self.product_category} held for Cart {self.cart_id}"
+
+
 class Order(models.Model):
     """Customer order model with complete order lifecycle management.
 
@@ -374,8 +432,9 @@ class Order(models.Model):
     def save(self, *args, **kwargs):
         """Override save method to auto-generate order number.
 
-        Automatically generates a unique order number using timestamp
-        if one is not already provided. Format: TR{timestamp}
+        Automatically generates a unique order number from a snowflake ID
+        (TechReform.idgen) if one is not already provided. Format: TR
+        followed by 13 base32 characters; numbers sort by creation time.
 
         Args:
             *args: Positional arguments passed to parent save method
@@ -385,12 +444,11 @@ class Order(models.Model):
             >>> order = Order()
             >>> order.save()
             >>> print(order.order_number)
-            'TR1703123456'
+            'TR0C3QX7N2R0001'
         """
         # Generate order number if not provided
         if not self.order_number:
-            timestamp = int(timezone.now().timestamp())
-            self.order_number = f"TR{timestamp}"
+            self.order_number = next_code("TR")
         super().save(*args, **kwargs)
 
     @property
@@ -0,0 +1,221 @@
+"""
+Time-boxed stock holds for carts.
+
+Adding a product to the cart, changing its quantity and opening the
+checkout page hold the cart's quantity of the product for
+CART_RESERVATION_TTL seconds. A product's available-to-sell quantity is its
+stock minus the active holds of other carts, so a popular product that is
+already held by other buyers is refused when it is added, not when the
+order is placed.
+
+Every check reads the product row and the sum of its active holds in one
+query. The row is locked with SELECT ... FOR UPDATE, so concurrent holds on
+the same product are serialized and cannot together exceed its stock. The
+sum is served by the (product_id, expires_at) index of StockReservation.
+
+Expired holds are ignored by every check and deleted in batches by
+``sweep_expired``, run periodically with ``manage.py sweep_reservations``.
+
+Functions:
+    available_to_sell: Stock of a product not held by other carts
+    hold: Hold the cart's quantity of one product
+    hold_cart: Hold the quantities of every line of a cart
+    release: Drop the holds of a cart
+    sweep_expired: Delete expired holds in batches
+
+Example:
+    from CartApp.reservations import hold, release
+    from ProductsApp.inventory import OutOfStock
+
+    try:
+        hold(cart, "GPU", product.id, 2)
+    except OutOfStock:
+        ...
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ProductsApp.inventory import OutOfStock
+from ProductsApp.models import PRODUCT_MODELS
+
+from .models import StockReservation
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, "CART_RESERVATION_TTL", 900))
+
+
+def _stock_and_held(category, product_id, cart, now, lock):
+    """
+    Read a product's stock and the active holds of other carts in one query.
+
+    Returns:
+        tuple: (stock, held), or None if the product does not exist.
+    """
+    model = PRODUCT_MODELS.get(category)
+    if model is None:
+        return None
+
+    holds = StockReservation.objects.filter(
+        product_id=OuterRef("pk"), expires_at__gt=now
+    )
+    if cart is not None:
+        holds = holds.exclude(cart=cart)
+    held = (
+        holds.order_by()
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+
+    products = model.objects.filter(pk=product_id)
+    if lock:
+        products = products.select_for_update()
+    return (
+        products.annotate(held=Coalesce(Subquery(held), 0))
+        .values_list("stock", "held")
+        .first()
+    )
+
+
+def available_to_sell(category, product_id, cart=None):
+    """
+    Return the stock of a product that is not held by other carts.
+
+    Args:
+        category (str): Category of the product, a key of PRODUCT_MODELS.
+        product_id (UUID): Primary key of the product.
+        cart (Cart, optional): Cart whose own holds count as available.
+
+    Returns:
+        int: Units that can be sold, 0 for unknown products.
+    """
+    row = _stock_and_held(category, product_id, cart, timezone.now(), lock=False)
+    if row is None:
+        return 0
+    stock, held = row
+    return max(stock - held, 0)
+
+
+def hold_cart(cart, lines, replace=True):
+    """
+    Hold the quantities of a cart's lines, renewing their expiry.
+
+    Products are locked in (category, ID) order, like
+    ProductsApp.inventory.decrement_stock, so concurrent carts cannot
+    deadlock. Either every line is held or, if one is short, nothing
+    changes.
+
+    Args:
+        cart (Cart): Saved cart to hold the stock for.
+        lines (iterable): (category, product ID, quantity) triples; the
+            quantities of the same product are added up.
+        replace (bool): Also drop the cart's holds on products that are not
+            in lines. False changes only the given products.
+
+    Raises:
+        OutOfStock: A product is missing or has less available stock than
+            the cart asks for.
+    """
+    quantities = defaultdict(int)
+    for category, product_id, quantity in lines:
+        quantities[(category, str(product_id))] += quantity
+
+    now = timezone.now()
+    expires_at = now + _ttl()
+    with transaction.atomic():
+        holds = []
+        for (category, product_id), quantity in sorted(quantities.items()):
+            if quantity <= 0:
+                continue
+            row = _stock_and_held(category, product_id, cart, now, lock=True)
+            if row is None or row[0] - row[1] < quantity:
+                raise OutOfStock(category, product_id, quantity)
+            holds.append(
+                StockReservation(
+                    cart=cart,
+                    product_category=category,
+                    product_id=product_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+            )
+
+        stale = StockReservation.objects.filter(cart=cart)
+        if not replace:
+            stale = stale.filter(product_id__in=[pid for _, pid in quantities])
+        stale.exclude(
+            product_id__in=[hold.product_id for hold in holds]
+        ).delete()
+        StockReservation.objects.bulk_create(
+            holds,
+            update_conflicts=True,
+            unique_fields=["product_category", "product_id", "cart"],
+            update_fields=["quantity", "expires_at"],
+        )
+
+
+def hold(cart, category, product_id, quantity):
+    """
+    Hold the cart's quantity of one product, renewing its expiry.
+
+    Args:
+        cart (Cart): Saved cart to hold the stock for.
+        category (str): Category of the product, a key of PRODUCT_MODELS.
+        product_id (UUID): Primary key of the product.
+        quantity (int): The cart's full quantity of the product; 0 drops
+            the hold.
+
+    Raises:
+        OutOfStock: The product has less available stock than quantity.
+    """
+    hold_cart(cart, [(category, product_id, quantity)], replace=False)
+
+
+def release(cart, product_id=None):
+    """
+    Drop the holds of a cart.
+
+    Args:
+        cart (Cart): The cart.
+        product_id (UUID, optional): Only drop the hold on this product.
+    """
+    holds = StockReservation.objects.filter(cart=cart)
+    if product_id is not None:
+        holds = holds.filter(product_id=product_id)
+    holds.delete()
+
+
+def sweep_expired(batch_size=1000):
+    """
+    Delete expired holds, batch_size rows per statement.
+
+    Short statements keep the table available to concurrent checkouts
+    while a large backlog is cleared.
+
+    Args:
+        batch_size (int): Rows deleted per statement.
+
+    Returns:
+        int: Number of holds deleted.
+    """
+    deleted = 0
+    now = timezone.now()
+    while True:
+        batch = list(
+            StockReservation.objects.filter(expires_at__lte=now).values_list(
+                "pk", flat=True
+            )[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += StockReservation.objects.filter(pk__in=batch).delete()[0]
+        if len(batch) < batch_size:
+            return deleted
@@ -1,3 +1,415 @@
-from django.test import TestCase
+"""
+Test cases for CartApp.
 
-# Create your tests here.
+Header counters:
+    The cart, compare and wishlist context processors are lazy: building
+    them runs no query, reading any number of counts runs exactly one, and
+    anonymous visitors without a cart, compare list or wishlist get zeros
+    without any rows or sessions being created.
+
+Anonymous browsing:
+    With VIRTUAL_ANONYMOUS_STATE on, anonymous visitors can open the cart,
+    compare, wishlist and PC builder pages without a session or any row
+    being written; the first item they add creates them.
+
+Cart page:
+    The cart page loads the products of its lines with one query per
+    category, however many lines the cart has.
+
+Checkout:
+    Placing an order takes the stock, writes the order items and empties
+    the cart in one transaction; a line that cannot be served rolls back
+    the whole order.
+
+Stock reservations:
+    A cart holds the quantity it adds, other carts can only take what is
+    left, each availability check is one query, and expired holds stop
+    counting and are swept in batches. EXPLAIN shows the availability sum
+    and the sweep both served by an index of StockReservation.
+"""
+
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from CompareApp.context_processors.compare import compare_processor
+from CompareApp.models import CompareItem, CompareList
+from PCBuilderApp.models import PCBuilder
+from ProductsApp.models import CPU, GPU
+from WishlistApp.context_processors.wishlist import wishlist_processor
+from WishlistApp.models import WishList, WishlistItem
+
+from .context_processors.cart import cart_processor
+from .models import (
+    Cart,
+    CartItem,
+    Order,
+    OrderItem,
+    ShippingAddress,
+    StockReservation,
+)
+from .reservations import available_to_sell, hold, sweep_expired
+
+
+HEADER = Template(
+    "{{ cart_count|default:0 }}/{{ cart_total }}/"
+    "{{ compare_count|default:0 }}/{{ wishlist_count|default:0 }}"
+)
+
+
+class HeaderCounterTests(TestCase):
+    """
+    The header counts come from one lazy aggregate query.
+    """
+
+    def request(self, user=None):
+        request = RequestFactory().get("/about-us/")
+        request.user = user or AnonymousUser()
+        request.session = SessionStore()
+        return request
+
+    def context(self, request):
+        context = {}
+        for processor in (cart_processor, compare_processor, wishlist_processor):
+            context.update(processor(request))
+        return context
+
+    def test_counts_are_lazy_and_read_with_one_query(self):
+        user = User.objects.create_user("counter", password="secret")
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(
+            cart=cart,
+            product_id=uuid.uuid4(),
+            product_category="CPU",
+            quantity=2,
+            price=Decimal("1500.50"),
+        )
+        CartItem.objects.create(
+            cart=cart,
+            product_id=uuid.uuid4(),
+            product_category="GPU",
+            quantity=1,
+            price=Decimal("999"),
+        )
+        compare_list = CompareList.objects.create(user=user)
+        for category in ("CPU", "GPU"):
+            CompareItem.objects.create(
+                compare_list=compare_list, product_id=str(uuid.uuid4()), category=category
+            )
+        wishlist = WishList.objects.create(user=user)
+        WishlistItem.objects.create(
+            wishlist=wishlist, product_id=str(uuid.uuid4()), category="RAM"
+        )
+
+        request = self.request(user)
+        with self.assertNumQueries(0):
+            context = self.context(request)
+        with self.assertNumQueries(1):
+            rendered = HEADER.render(Context(context))
+        self.assertEqual(rendered, "3/4000.00/2/1")
+
+        # The cart and items are only loaded when a template asks for them
+        with self.assertNumQueries(2):
+            self.assertEqual(context["cart"], cart)
+            self.assertEqual(context["compare_items"].count(), 2)
+
+    def test_anonymous_visitor_writes_nothing(self):
+        request = self.request()
+        with self.assertNumQueries(0):
+            rendered = HEADER.render(Context(self.context(request)))
+
+        self.assertEqual(rendered, "0/0.00/0/0")
+        self.assertIsNone(request.session.session_key)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CompareList.objects.exists())
+        self.assertFalse(WishList.objects.exists())
+
+    def test_anonymous_cart_is_found_by_session(self):
+        cart = Cart.objects.create(session_id="anonymous-cart")
+        CartItem.objects.create(
+            cart=cart,
+            product_id=uuid.uuid4(),
+            product_category="SSD",
+            quantity=4,
+            price=Decimal("25"),
+        )
+        request = self.request()
+        request.session["cart_session_id"] = "anonymous-cart"
+
+        self.assertEqual(
+            HEADER.render(Context(self.context(request))), "4/100.00/0/0"
+        )
+
+
+class AnonymousBrowsingTests(TestCase):
+    """
+    Read-only pages keep an anonymous visitor's state virtual.
+    """
+
+    PAGES = [
+        ("index", []),
+        ("view_cart", []),
+        ("view_compare_list", []),
+        ("view_wishlist", []),
+        ("pc_builder", []),
+        ("select_component", ["CPU"]),
+    ]
+
+    def setUp(self):
+        self.cpu = CPU.objects.create(
+            brand="Test", model="Virtual CPU", price=Decimal("30000"), stock=5
+        )
+
+    def assertNothingStored(self):
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CompareList.objects.exists())
+        self.assertFalse(WishList.objects.exists())
+        self.assertFalse(PCBuilder.objects.exists())
+
+    def test_read_only_pages_write_nothing(self):
+        for name, args in self.PAGES:
+            with self.subTest(page=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("sessionid", response.cookies)
+        self.assertNothingStored()
+
+    def test_first_change_creates_the_cart(self):
+        self.client.get(reverse("view_cart"))
+        self.assertNothingStored()
+
+        self.client.post(
+            reverse("add_to_cart"),
+            {"product_id": self.cpu.pk, "product_category": "CPU"},
+        )
+        cart = Cart.objects.get()
+        self.assertEqual(cart.cartitem_set.get().product_id, self.cpu.pk)
+        self.assertTrue(Session.objects.exists())
+
+        response = self.client.get(reverse("view_cart"))
+        self.assertEqual(response.context["cart"], cart)
+        self.assertContains(response, "Virtual CPU")
+
+    @override_settings(VIRTUAL_ANONYMOUS_STATE=False)
+    def test_mode_off_creates_rows_on_view(self):
+        self.client.get(reverse("pc_builder"))
+        self.client.get(reverse("view_wishlist"))
+
+        self.assertTrue(PCBuilder.objects.exists())
+        self.assertTrue(WishList.objects.exists())
+
+
+class CartPageTests(TestCase):
+    """
+    The cart page loads its products in batches.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("shopper", password="secret")
+        self.client.force_login(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+
+    def add(self, model, count):
+        for number in range(count):
+            product = model.objects.create(
+                brand="Test", model=f"Cart {number}", price=Decimal("1000")
+            )
+            CartItem.objects.create(
+                cart=self.cart,
+                product_id=product.pk,
+                product_category=model.__name__,
+                quantity=1,
+                price=product.price,
+            )
+
+    def queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("view_cart"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        self.add(CPU, 1)
+        self.add(GPU, 1)
+        baseline = self.queries()
+
+        self.add(CPU, 5)
+        self.add(GPU, 5)
+        self.assertEqual(self.queries(), baseline)
+
+
+class CheckoutTests(TestCase):
+    """
+    Checkout is all or nothing.
+    """
+
+    SHIPPING = {
+        "full_name": "Test Buyer",
+        "email": "buyer@example.com",
+        "phone": "01700000000",
+        "address_line1": "House 1, Road 2",
+        "city": "Dhaka",
+        "state": "Dhaka",
+        "postal_code": "1207",
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="secret")
+        self.client.force_login(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        self.cpu = CPU.objects.create(
+            brand="Test", model="Checkout CPU", price=Decimal("25000"), stock=3
+        )
+
+    def add(self, quantity):
+        CartItem.objects.create(
+            cart=self.cart,
+            product_id=self.cpu.pk,
+            product_category="CPU",
+            quantity=quantity,
+            price=self.cpu.price,
+        )
+
+    def test_order_takes_stock_and_empties_cart(self):
+        self.add(2)
+        response = self.client.post(reverse("checkout"), self.SHIPPING)
+
+        order = Order.objects.get()
+        self.assertRedirects(
+            response,
+            reverse("order_complete", args=[order.id]),
+            fetch_redirect_response=False,
+        )
+        item = OrderItem.objects.get(order=order)
+        self.assertEqual((item.quantity, item.product_name), (2, "Test Checkout CPU"))
+        self.cpu.refresh_from_db()
+        self.assertEqual(self.cpu.stock, 1)
+        self.assertFalse(self.cart.cartitem_set.exists())
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_short_stock_rolls_back_the_order(self):
+        # Each line fits the stock on its own, together they do not
+        self.add(2)
+        self.add(2)
+        response = self.client.post(reverse("checkout"), self.SHIPPING)
+
+        self.assertRedirects(
+            response, reverse("view_cart"), fetch_redirect_response=False
+        )
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(ShippingAddress.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.cpu.refresh_from_db()
+        self.assertEqual(self.cpu.stock, 3)
+        self.assertEqual(self.cart.cartitem_set.count(), 2)
+
+
+class StockReservationTests(TestCase):
+    """
+    Carts hold stock until they check out or their holds expire.
+    """
+
+    def setUp(self):
+        self.gpu = GPU.objects.create(
+            brand="Test", model="Popular GPU", price=Decimal("90000"), stock=3
+        )
+
+    def add(self, client, quantity):
+        return client.post(
+            reverse("add_to_cart"),
+            {"product_id": self.gpu.pk, "product_category": "GPU", "quantity": quantity},
+        ).json()
+
+    def test_holds_limit_other_carts(self):
+        first, second = Client(), Client()
+        self.assertEqual(self.add(first, 1)["status"], "success")
+        self.assertEqual(self.add(first, 1)["status"], "success")
+        first_cart = Cart.objects.get()
+        self.assertEqual(StockReservation.objects.get(cart=first_cart).quantity, 2)
+
+        self.assertEqual(self.add(second, 2)["status"], "error")
+        self.assertEqual(self.add(second, 1)["status"], "success")
+        second_cart = Cart.objects.exclude(pk=first_cart.pk).get()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(available_to_sell("GPU", self.gpu.pk), 0)
+        self.assertEqual(available_to_sell("GPU", self.gpu.pk, first_cart), 2)
+
+        # Lowering the first cart's quantity frees stock for the second
+        item = first_cart.cartitem_set.get()
+        response = first.post(reverse("update_cart"), {"item_id": item.pk, "quantity": 1})
+        self.assertEqual(response.json()["status"], "success")
+        self.assertEqual(self.add(second, 1)["status"], "success")
+        self.assertEqual(StockReservation.objects.get(cart=second_cart).quantity, 2)
+
+        response = first.post(reverse("remove_from_cart"), {"item_id": item.pk})
+        self.assertFalse(StockReservation.objects.filter(cart=first_cart).exists())
+        self.assertEqual(available_to_sell("GPU", self.gpu.pk), 1)
+
+    def test_expired_holds_are_ignored_and_swept(self):
+        carts = [Cart.objects.create(session_id=f"cart-{i}") for i in range(3)]
+        for cart in carts:
+            hold(cart, "GPU", self.gpu.pk, 1)
+        self.assertEqual(available_to_sell("GPU", self.gpu.pk), 0)
+
+        StockReservation.objects.filter(cart__in=carts[:2]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(available_to_sell("GPU", self.gpu.pk), 2)
+
+        self.assertEqual(sweep_expired(batch_size=1), 2)
+        self.assertEqual(StockReservation.objects.get().cart, carts[2])
+
+        StockReservation.objects.update(expires_at=timezone.now())
+        out = StringIO()
+        call_command("sweep_reservations", stdout=out)
+        self.assertIn("Deleted 1 expired reservations", out.getvalue())
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert that the query plan of a queryset goes through an index."""
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+        self.assertIn(index_name, plan)
+
+    def test_holds_use_indexes(self):
+        now = timezone.now()
+        carts = [Cart.objects.create(session_id=f"cart-{i}") for i in range(50)]
+        StockReservation.objects.bulk_create(
+            StockReservation(
+                cart=cart,
+                product_category="GPU",
+                product_id=uuid.uuid4(),
+                quantity=1,
+                expires_at=now + timedelta(minutes=i - 25),
+            )
+            for i, cart in enumerate(carts)
+        )
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        active = StockReservation.objects.filter(
+            product_id=uuid.uuid4(), expires_at__gt=now
+        )
+        self.assertUsesIndex(active, "stockreservation_active_idx")
+        self.assertUsesIndex(
+            StockReservation.objects.filter(expires_at__lte=now),
+            "stockreservation_expiry_idx",
+        )
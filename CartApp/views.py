@@ -28,6 +28,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Sum
 from django.core.paginator import Paginator
 from decimal import Decimal
@@ -35,24 +37,13 @@ import uuid
 
 from .models import Cart, CartItem, Order, OrderItem, ShippingAddress
 from AuthApp.decorators import staff_required
-from ProductsApp.models import (
-    CPU,
-    Cooler,
-    Motherboard,
-    RAM,
-    SSD,
-    HDD,
-    GPU,
-    PowerSupply,
-    Casing,
-    Monitor,
-    Keyboard,
-    Mouse,
-    Headphone,
-)
-
-
-def get_cart(request):
+from ProductsApp.registry import product_registry
+from ProductsApp.catalog import get_product_loader
+from ProductsApp.inventory import OutOfStock, decrement_stock
+from .reservations import available_to_sell, hold, hold_cart, release
+
+
+def get_cart(request, create=True):
     """Get or create a cart for the current user or session.
 
     Handles cart retrieval for both authenticated and anonymous users.
@@ -62,6 +53,10 @@ def get_cart(request):
     Args:
         request (HttpRequest): The HTTP request object containing user
                               and session information
+        create (bool): Whether a missing anonymous cart may be created.
+                       Views that only read the cart pass False; with
+                       VIRTUAL_ANONYMOUS_STATE on they then get an unsaved,
+                       empty cart and nothing is written
 
     Returns:
         Cart: The cart instance for the current user/session
@@ -79,6 +74,13 @@ def get_cart(request):
     if request.user.is_authenticated:
         # If user is logged in, get or create their cart
         cart, created = Cart.objects.get_or_create(user=request.user)
+    elif not create and getattr(settings, "VIRTUAL_ANONYMOUS_STATE", True):
+        # Read-only view: find the visitor's cart, but keep it virtual until
+        # something is added to it
+        session_id = request.session.get("cart_session_id")
+        cart = Cart.objects.filter(session_id=session_id).first() if session_id else None
+        if cart is None:
+            cart = Cart(session_id=session_id)
     else:
         # If anonymous user, use session ID to track cart
         session_id = request.session.get("cart_session_id")
@@ -117,29 +119,8 @@ def get_product_by_category(category, product_id):
         >>> print(product.name)
         'Intel Core i7-12700K'
     """
-    model_dict = {
-        "CPU": CPU,
-        "Cooler": Cooler,
-        "Motherboard": Motherboard,
-        "RAM": RAM,
-        "SSD": SSD,
-        "HDD": HDD,
-        "GPU": GPU,
-        "Power Supply": PowerSupply,
-        "Casing": Casing,
-        "Monitor": Monitor,
-        "Keyboard": Keyboard,
-        "Mouse": Mouse,
-        "Headphone": Headphone,
-    }
-
-    if category in model_dict:
-        model = model_dict[category]
-        try:
-            return model.objects.get(id=product_id)
-        except model.DoesNotExist:
-            return None
-    return None
+    # Unknown categories are resolved through the product registry
+    return product_registry.get_product(product_id, category)
 
 
 def add_to_cart(request):
@@ -165,7 +146,9 @@ def add_to_cart(request):
     Validation:
         - Verifies product exists and is available
         - Checks stock availability before adding
-        - Prevents adding more than available stock
+        - Prevents adding more than available stock, i.e. the stock not
+          held by other carts; the cart's new quantity is held for it
+          (CartApp.reservations)
 
     Example:
         POST data: {
@@ -200,23 +183,35 @@ def add_to_cart(request):
         # Get or create cart
         cart = get_cart(request)
 
-        # Check if item already in cart
-        try:
-            cart_item = CartItem.objects.get(
+        with transaction.atomic():
+            # Check if item already in cart
+            cart_item = CartItem.objects.filter(
                 cart=cart, product_id=product_id, product_category=product_category
-            )
-            # Update quantity if already in cart
-            cart_item.quantity += quantity
-            cart_item.save()
-        except CartItem.DoesNotExist:
-            # Create new cart item
-            CartItem.objects.create(
-                cart=cart,
-                product_id=product_id,
-                product_category=product_category,
-                quantity=quantity,
-                price=product.price,
-            )  # Return success response
+            ).first()
+            in_cart = cart_item.quantity if cart_item else 0
+
+            # Hold the new quantity; fails if other carts hold the stock
+            try:
+                hold(cart, product_category, product.pk, in_cart + quantity)
+            except OutOfStock:
+                return JsonResponse(
+                    {"status": "error", "message": "Not enough stock available"}
+                )
+
+            if cart_item:
+                # Update quantity if already in cart
+                cart_item.quantity += quantity
+                cart_item.save()
+            else:
+                # Create new cart item
+                CartItem.objects.create(
+                    cart=cart,
+                    product_id=product_id,
+                    product_category=product_category,
+                    quantity=quantity,
+                    price=product.price,
+                )
+        # Return success response
         messages.success(request, f"{product.brand} {product.model} added to cart.")
         return JsonResponse(
             {
@@ -252,7 +247,8 @@ def update_cart(request):
 
     Security:
         - Verifies cart item belongs to current user/session
-        - Validates stock availability before updating
+        - Validates stock availability before updating, and holds the new
+          quantity for the cart (CartApp.reservations)
         - Prevents unauthorized cart modifications
 
     Example:
@@ -283,11 +279,16 @@ def update_cart(request):
                     {"status": "error", "message": "Cart item not found"}
                 )
 
-            # Check product stock
-            product = get_product_by_category(
-                cart_item.product_category, cart_item.product_id
-            )
-            if product and quantity > product.stock:
+            # Hold the new quantity, checking it against the stock not
+            # held by other carts
+            try:
+                hold(
+                    cart,
+                    cart_item.product_category,
+                    cart_item.product_id,
+                    max(quantity, 0),
+                )
+            except OutOfStock:
                 return JsonResponse(
                     {"status": "error", "message": "Not enough stock available"}
                 )
@@ -364,8 +365,9 @@ def remove_from_cart(request):
                     {"status": "error", "message": "Cart item not found"}
                 )
 
-            # Delete the cart item
+            # Delete the cart item and its stock hold
             cart_item.delete()
+            release(cart, cart_item.product_id)
 
             # Return updated cart data
             return JsonResponse(
@@ -385,13 +387,10 @@ def remove_from_cart(request):
 
 def view_cart(request):
     """Display the cart contents"""
-    cart = get_cart(request)
-    cart_items = cart.cartitem_set.all()
+    cart = get_cart(request, create=False)
 
-    # Get the actual product instances for each cart item
-    for item in cart_items:
-        product = get_product_by_category(item.product_category, item.product_id)
-        item.product = product
+    # Load the products for all cart items in one batch
+    cart_items = get_product_loader(request).attach(cart.cartitem_set.all())
 
     context = {
         "cart": cart,
@@ -401,6 +400,33 @@ def view_cart(request):
     return render(request, "cart/cart.html", context)
 
 
+def out_of_stock(request, cart, lines, error):
+    """Send the buyer back to the cart after a line ran out of stock.
+
+    Args:
+        request (HttpRequest): The checkout request
+        cart (Cart): The buyer's cart
+        lines (list): Cart items with their products attached
+        error (OutOfStock): The failed line
+
+    Returns:
+        HttpResponseRedirect: Redirect to the cart page with a warning
+    """
+    product = next(
+        (item.product for item in lines if str(item.product_id) == str(error.product_id)),
+        None,
+    )
+    if product is None:
+        messages.warning(request, "A product in your cart is no longer available.")
+    else:
+        available = available_to_sell(error.category, error.product_id, cart)
+        messages.warning(
+            request,
+            f"Not enough stock for {product.brand} {product.model}. Only {available} available.",
+        )
+    return redirect("view_cart")
+
+
 @login_required
 def checkout(request):
     """Process checkout"""
@@ -412,18 +438,19 @@ def checkout(request):
         messages.warning(request, "Your cart is empty.")
         return redirect("view_cart")
 
-    # Get the actual product instances for each cart item
-    for item in cart_items:
-        product = get_product_by_category(item.product_category, item.product_id)
-        item.product = product
+    # Load the products for all cart items in one batch
+    cart_lines = get_product_loader(request).attach(cart_items)
+    lines = [item for item in cart_lines if item.product]
 
-        # Check product stock
-        if product and item.quantity > product.stock:
-            messages.warning(
-                request,
-                f"Not enough stock for {product.brand} {product.model}. Only {product.stock} available.",
-            )
-            return redirect("view_cart")
+    # Hold the stock of every line while the buyer fills in the form; this
+    # also renews the holds made when the products were added
+    try:
+        hold_cart(
+            cart,
+            [(item.product_category, item.product_id, item.quantity) for item in lines],
+        )
+    except OutOfStock as error:
+        return out_of_stock(request, cart, lines, error)
 
     # Process the order
     if request.method == "POST":
@@ -450,50 +477,60 @@ def checkout(request):
         # Calculate subtotal
         subtotal = cart.get_cart_total
 
-        # Create the order
-        order = Order.objects.create(
-            user=request.user,
-            payment_method=payment_method,
-            shipping_cost=shipping_cost,
-            total_price=subtotal + shipping_cost,  # Remove tax from total
-            notes=notes,
-            ip_address=request.META.get("REMOTE_ADDR", ""),
-        )
-
-        # Create shipping address
-        ShippingAddress.objects.create(
-            order=order,
-            user=request.user,
-            full_name=full_name,
-            phone=phone,
-            email=email,
-            address_line1=address_line1,
-            address_line2=address_line2,
-            city=city,
-            state=state,
-            postal_code=postal_code,
-        )
+        # The order, its items, the stock and the cart change together: if
+        # any line is out of stock by now, nothing is written
+        try:
+            with transaction.atomic():
+                # Create the order
+                order = Order.objects.create(
+                    user=request.user,
+                    payment_method=payment_method,
+                    shipping_cost=shipping_cost,
+                    total_price=subtotal + shipping_cost,  # Remove tax from total
+                    notes=notes,
+                    ip_address=request.META.get("REMOTE_ADDR", ""),
+                )
 
-        # Create order items and adjust inventory
-        for item in cart_items:
-            product = get_product_by_category(item.product_category, item.product_id)
-            if product:
-                # Create order item
-                OrderItem.objects.create(
+                # Create shipping address
+                ShippingAddress.objects.create(
                     order=order,
-                    product_id=item.product_id,
-                    product_category=item.product_category,
-                    product_name=f"{product.brand} {product.model}",
-                    quantity=item.quantity,
-                    price=item.price,
+                    user=request.user,
+                    full_name=full_name,
+                    phone=phone,
+                    email=email,
+                    address_line1=address_line1,
+                    address_line2=address_line2,
+                    city=city,
+                    state=state,
+                    postal_code=postal_code,
                 )
 
-                # Adjust inventory
-                product.stock -= item.quantity
-                product.save()
+                # Take the stock with one conditional UPDATE per product
+                decrement_stock(
+                    (item.product_category, item.product_id, item.quantity)
+                    for item in lines
+                )
 
-        # Clear the cart
-        cart_items.delete()
+                # Create all order items in one insert
+                OrderItem.objects.bulk_create(
+                    [
+                        OrderItem(
+                            order=order,
+                            product_id=item.product_id,
+                            product_category=item.product_category,
+                            product_name=f"{item.product.brand} {item.product.model}",
+                            quantity=item.quantity,
+                            price=item.price,
+                        )
+                        for item in lines
+                    ]
+                )
+
+                # Clear the cart; the stock it held is now sold
+                cart_items.delete()
+                release(cart)
+        except OutOfStock as error:
+            return out_of_stock(request, cart, lines, error)
 
         # Redirect to order confirmation
         return redirect("order_complete", order_id=order.id)
@@ -505,7 +542,7 @@ def checkout(request):
 
     context = {
         "cart": cart,
-        "cart_items": cart_items,
+        "cart_items": cart_lines,
         "subtotal": subtotal,
         "shipping": shipping,
         "grand_total": grand_total,
@@ -6,14 +6,14 @@ globally available across all templates in the TechReform application. It
 handles both authenticated user comparison lists and anonymous session-based
 comparison lists, enabling seamless product comparison functionality.
 
-The context processor automatically creates and manages comparison sessions
-for anonymous users and links comparison lists to user accounts for authenticated
-users. This ensures persistent comparison functionality and smooth transitions
-between anonymous browsing and logged-in shopping experiences.
+The context values are lazy and read-only: nothing is queried until a
+template reads them, and the count shares one query with the cart and
+wishlist counts. Comparison lists are created by the compare views when
+the first product is added.
 
 Key Features:
     - Global comparison context availability in all templates
-    - Automatic comparison list creation for new users/sessions
+    - Lazy values that only hit the database when a template reads them
     - Session-based comparison tracking for anonymous users
     - User-based comparison persistence for authenticated users
     - Real-time comparison count for UI elements
@@ -22,41 +22,33 @@ Key Features:
 The processor provides:
     - compare_count: Number of items in comparison list
     - compare_items: QuerySet of items in the comparison list
-    - compare_list: The comparison list object itself
 
 This enables templates to display comparison indicators, counts, and
 quick access to comparison functionality without requiring explicit
 view-level context management.
 """
 
-from ..models import CompareList, CompareItem
+from TechReform.counters import lazy_count, visitor_filters
+
+from ..models import CompareItem
 
 
 def compare_processor(request):
     """
-    Context processor to make compare data available to all templates
+    Context processor to make compare data available to all templates.
+
+    Both values are lazy: ``compare_count`` comes from the single header
+    counts query (TechReform.counters) and ``compare_items`` is an
+    unevaluated QuerySet. No session or compare list is created.
     """
-    compare_count = 0
-    compare_items = []
-
-    # Try to get the compare list for the current user/session
-    if request.user.is_authenticated:
-        # For authenticated users
-        compare_list, created = CompareList.objects.get_or_create(user=request.user)
-        compare_items = CompareItem.objects.filter(compare_list=compare_list)
+    compare_filter = visitor_filters(request)["compare"]
+    if compare_filter is None:
+        compare_items = CompareItem.objects.none()
     else:
-        # For anonymous users
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-
-        compare_list, created = CompareList.objects.get_or_create(
-            session_id=session_key
-        )
-        compare_items = CompareItem.objects.filter(compare_list=compare_list)
-
-    compare_count = compare_items.count()
+        compare_items = CompareItem.objects.filter(compare_filter)
 
     # Return the context variables
-    return {"compare_count": compare_count, "compare_items": compare_items}
+    return {
+        "compare_count": lazy_count(request, "compare_count"),
+        "compare_items": compare_items,
+    }
@@ -20,25 +20,14 @@ Author: TechReform-BD Development Team
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
+from django.conf import settings
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from .models import CompareList, CompareItem
-from ProductsApp.models import (
-    CPU,
-    GPU,
-    RAM,
-    SSD,
-    HDD,
-    Motherboard,
-    PowerSupply,
-    Casing,
-    Cooler,
-    Monitor,
-    Keyboard,
-    Mouse,
-    Headphone,
-)
+from ProductsApp.models import PRODUCT_MODELS
+from ProductsApp.registry import product_registry
+from ProductsApp.catalog import get_product_loader
 
 
 def get_product_by_id_and_category(product_id, category):
@@ -58,37 +47,17 @@ def get_product_by_id_and_category(product_id, category):
     Raises:
         Http404: If the product with the given ID doesn't exist in the specified category.
     """
-    if category == "CPU":
-        return get_object_or_404(CPU, id=product_id)
-    elif category == "GPU":
-        return get_object_or_404(GPU, id=product_id)
-    elif category == "RAM":
-        return get_object_or_404(RAM, id=product_id)
-    elif category == "SSD":
-        return get_object_or_404(SSD, id=product_id)
-    elif category == "HDD":
-        return get_object_or_404(HDD, id=product_id)
-    elif category == "Power Supply":
-        return get_object_or_404(PowerSupply, id=product_id)
-    elif category == "Casing":
-        return get_object_or_404(Casing, id=product_id)
-    elif category == "Cooler":
-        return get_object_or_404(Cooler, id=product_id)
-    elif category == "Monitor":
-        return get_object_or_404(Monitor, id=product_id)
-    elif category == "Motherboard":
-        return get_object_or_404(Motherboard, id=product_id)
-    elif category == "Keyboard":
-        return get_object_or_404(Keyboard, id=product_id)
-    elif category == "Mouse":
-        return get_object_or_404(Mouse, id=product_id)
-    elif category == "Headphone":
-        return get_object_or_404(Headphone, id=product_id)
-    else:
+    if category not in PRODUCT_MODELS:
         return None
 
+    # One query against the category's own table
+    product = product_registry.get_product(product_id, category)
+    if product is None:
+        raise Http404("No product matches the given query.")
+    return product
+
 
-def get_compare_list(request):
+def get_compare_list(request, create=True):
     """Get or create a compare list for the current user or session.
 
     This helper function handles both authenticated and anonymous users by
@@ -98,6 +67,9 @@ def get_compare_list(request):
 
     Args:
         request (HttpRequest): The Django request object containing user and session information.
+        create (bool): Whether a missing anonymous compare list may be created. Read-only
+            views pass False; with VIRTUAL_ANONYMOUS_STATE on they then get an unsaved,
+            empty list and no session is created.
 
     Returns:
         CompareList: The user's or session's compare list instance.
@@ -107,6 +79,15 @@ def get_compare_list(request):
             compare_list = CompareList.objects.get(user=request.user)
         except CompareList.DoesNotExist:
             compare_list = CompareList.objects.create(user=request.user)
+    elif not create and getattr(settings, "VIRTUAL_ANONYMOUS_STATE", True):
+        # Read-only view: no session or CompareList is created until the
+        # visitor adds an item
+        session_id = request.session.session_key
+        compare_list = None
+        if session_id:
+            compare_list = CompareList.objects.filter(session_id=session_id).first()
+        if compare_list is None:
+            compare_list = CompareList(session_id=session_id)
     else:
         if not request.session.session_key:
             request.session.create()
@@ -341,23 +322,14 @@ def view_compare_list(request):
 
     Features:
         - Handles both authenticated and anonymous users
-        - Creates sessions for anonymous users if needed
+        - Creates no session or compare list for anonymous visitors without one
         - Dynamically loads category-specific specifications
         - Supports comparison of up to 4 products
         - Provides detailed spec comparisons for same-category products
         - Fallback to basic comparison for mixed-category products
     """
     # Get the compare list for the current user/session
-    if request.user.is_authenticated:
-        compare_list, created = CompareList.objects.get_or_create(user=request.user)
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        compare_list, created = CompareList.objects.get_or_create(
-            session_id=session_key
-        )
+    compare_list = get_compare_list(request, create=False)
 
     # Get all items in the compare list
     compare_items = CompareItem.objects.filter(compare_list=compare_list)
@@ -375,9 +347,9 @@ def view_compare_list(request):
         "discount_percentage": "Discount Percentage",
     }  # Common specs for all products
 
-    # Process the items to get the actual product objects
-    for item in compare_items:
-        product = item.get_product()
+    # Load the products for all items in one batch
+    for item in get_product_loader(request).attach(compare_items, category_attr="category"):
+        product = item.product
         if product:
             # Add the compare item ID to the product for later reference
             product.compare_item_id = item.id
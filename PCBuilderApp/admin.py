@@ -26,10 +26,10 @@ class PCBuilderAdmin(admin.ModelAdmin):
     including filtering, searching, and bulk operations for administrators.
     """
 
-    list_display = ('name', 'user', 'is_public', 'get_item_count', 'get_total_price', 'created_at', 'updated_at')
-    list_filter = ('is_public', 'created_at', 'updated_at')
+    list_display = ('name', 'user', 'is_public', 'item_count', 'total_price', 'created_at', 'updated_at')
+    list_filter = ('is_public', 'has_essentials', 'created_at', 'updated_at')
     search_fields = ('name', 'user__username', 'user__email')
-    readonly_fields = ('id', 'created_at', 'updated_at', 'get_total_price', 'get_item_count', 'get_recommended_wattage', 'is_complete')
+    readonly_fields = ('id', 'created_at', 'updated_at', 'total_price', 'peripherals_price', 'total_tdp', 'item_count', 'get_recommended_wattage', 'has_essentials', 'is_buildable')
     ordering = ('-created_at',)
 
     fieldsets = (
@@ -40,7 +40,7 @@ class PCBuilderAdmin(admin.ModelAdmin):
             'fields': ('is_public',)
         }),
         ('Calculated Properties', {
-            'fields': ('get_total_price', 'get_item_count', 'get_recommended_wattage', 'is_complete'),
+            'fields': ('total_price', 'peripherals_price', 'total_tdp', 'item_count', 'get_recommended_wattage', 'has_essentials', 'is_buildable'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -0,0 +1,766 @@
+"""
+Budget-constrained automatic PC builds for the PCBuilderApp.
+
+Given a budget, a use case and optionally some pinned parts, AutoBuilder
+picks the CPU, motherboard, RAM, GPU, storage, power supply, case and
+cooler that give the highest use-case score without exceeding the budget,
+and whose parts pass every compatibility rule.
+
+Scoring:
+    CPU, GPU, RAM and storage get a raw performance figure from their specs
+    (cores x clock, capacity x frequency, ...), normalized to 0..1 within
+    the category and weighted by the use case. Motherboard, case, cooler
+    and power supply do not score; for them the cheapest compatible part is
+    always the best choice.
+
+Search:
+    1. Candidates are read from the live catalog (available, in stock,
+       priced) and kept in memory per category. When the category's
+       catalog cache generation moves, only the changed rows are read.
+    2. Within every compatibility group (CPU socket, RAM type) only the
+       Pareto-optimal candidates survive: a part is dropped when another
+       part of the same group is no more expensive, scores at least as
+       high and draws no more power.
+    3. Each (socket, memory type) pair is a platform, priced as its cheapest
+       motherboard plus the cheapest case that board fits in plus the
+       cheapest cooler for the socket.
+    4. Branch-and-bound runs over the platforms and then the price-sorted
+       CPU, RAM, GPU and storage lists. A branch is cut as soon as the
+       best score it could still reach, given the money left, cannot beat
+       the best complete build found so far.
+    5. The power supply is the cheapest one covering the summed TDP plus
+       POWER_HEADROOM, looked up with a binary search.
+
+    A node limit keeps pathological catalogs interactive; when it is hit the
+    best build found so far is returned with ``exhaustive`` set to False.
+
+Classes:
+    UseCase: Score weights of a use case
+    CandidateCatalog: In-memory candidate tables per category
+    AutoBuilder: The search itself
+
+Functions:
+    apply_auto_build: Write a result into a PCBuilder's items
+
+Attributes:
+    USE_CASES (dict): Available use cases by name
+    candidate_catalog (CandidateCatalog): Shared instance
+
+Example:
+    result = AutoBuilder(Decimal("150000"), "gaming").run()
+    if result is not None:
+        apply_auto_build(pc_build, result)
+"""
+
+import bisect
+import itertools
+import re
+import threading
+from collections import namedtuple
+from decimal import Decimal
+
+from django.utils import timezone
+
+from ProductsApp.caching import catalog_cache
+from ProductsApp.models import PRODUCT_CATEGORIES, PRODUCT_MODELS
+
+from .compatibility import POWER_HEADROOM, _cooler_fits, _fits_case
+from .models import CORE_TYPES
+from .services import SlotValue, assign_slots
+
+
+UseCase = namedtuple("UseCase", "name label weights")
+UseCase.__doc__ = """
+Score weights of a use case.
+
+``weights`` maps the scored slots (CPU, GPU, RAM, Storage) to their share
+of the total score. A use case without a GPU weight builds on integrated
+graphics.
+"""
+
+USE_CASES = {
+    "gaming": UseCase(
+        "gaming", "Gaming", {"CPU": 0.3, "GPU": 0.5, "RAM": 0.1, "Storage": 0.1}
+    ),
+    "workstation": UseCase(
+        "workstation",
+        "Workstation",
+        {"CPU": 0.45, "GPU": 0.2, "RAM": 0.25, "Storage": 0.1},
+    ),
+    "office": UseCase("office", "Office", {"CPU": 0.5, "RAM": 0.3, "Storage": 0.2}),
+}
+
+# Categories the search reads, and the spec columns it needs from each
+CANDIDATE_FIELDS = {
+    "CPU": ("socket", "processor_graphics", "cores", "boost_frequency", "base_frequency"),
+    "Motherboard": ("socket", "memory_type", "form_factor"),
+    "RAM": ("ram_type", "memory_capacity", "frequency"),
+    "GPU": ("cores", "core_clock", "vram_capacity"),
+    "SSD": ("storage_capacity",),
+    "HDD": ("storage_capacity",),
+    "Power Supply": ("wattage",),
+    "Casing": ("form_factor",),
+    "Cooler": ("socket_support",),
+}
+
+# Explored search nodes before the best build so far is returned
+MAX_NODES = 200000
+
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# processor_graphics values that mean "no integrated graphics"
+NO_GRAPHICS = {"", "none", "no", "n/a", "-"}
+
+
+def _amount(text):
+    """Return the first number in a spec string such as '16 GB', or 0."""
+    match = NUMBER_RE.search(str(text or ""))
+    return float(match.group()) if match else 0.0
+
+
+def _capacity_gb(text):
+    """Return a capacity such as '512 GB' or '2 TB' in gigabytes."""
+    amount = _amount(text)
+    return amount * 1024 if "TB" in str(text or "").upper() else amount
+
+
+def _raw_score(category, spec):
+    """Raw performance figure of a scored part; higher is better."""
+    if category == "CPU":
+        clock = spec["boost_frequency"] or spec["base_frequency"] or 1.0
+        return (spec["cores"] or 1) * clock
+    if category == "GPU":
+        if spec["cores"]:
+            return spec["cores"] * (spec["core_clock"] or 1.0)
+        return _capacity_gb(spec["vram_capacity"]) * 1000
+    if category == "RAM":
+        return _capacity_gb(spec["memory_capacity"]) * (_amount(spec["frequency"]) or 1000)
+    if category == "SSD":
+        return _capacity_gb(spec["storage_capacity"]) * 2
+    if category == "HDD":
+        return _capacity_gb(spec["storage_capacity"])
+    return 0.0
+
+
+def has_integrated_graphics(spec):
+    """Whether a CPU spec can drive a display without a graphics card."""
+    return str(spec.get("processor_graphics") or "").strip().lower() not in NO_GRAPHICS
+
+
+Candidate = namedtuple("Candidate", "pk category name price tdp raw spec")
+Candidate.__doc__ = """
+One purchasable part as the search sees it.
+
+``raw`` is the unnormalized performance figure and ``spec`` the dict of
+CANDIDATE_FIELDS columns.
+"""
+
+
+def candidate_for(product):
+    """
+    Build a Candidate from a product instance, e.g. a pinned part.
+
+    Args:
+        product (BaseProduct): Instance of one of the CANDIDATE_FIELDS models.
+
+    Returns:
+        Candidate: The product as a search candidate.
+    """
+    category = PRODUCT_CATEGORIES[type(product)]
+    spec = {field: getattr(product, field, None) for field in CANDIDATE_FIELDS[category]}
+    return Candidate(
+        product.pk,
+        category,
+        f"{product.brand} {product.model}",
+        product.price or Decimal("0"),
+        product.tdp or 0,
+        _raw_score(category, spec),
+        spec,
+    )
+
+
+class _CandidateTable:
+    """Candidates of one category; guarded by CandidateCatalog's lock."""
+
+    def __init__(self, revision):
+        self.by_id = {}  # product_id -> Candidate
+        self.candidates = []
+        self.generation = None
+        self.refreshed_at = None
+        self.revision = revision
+
+
+class CandidateCatalog:
+    """
+    Candidate tables per category, kept current with catalog generations.
+
+    Product saves and deletes bump their category's generation in
+    ``catalog_cache``, in any worker process. A table is loaded with one
+    query the first time it is used. After its generation moves, only the
+    products whose ``updated_at`` changed since the last refresh are read
+    again; a count of the eligible rows then reveals products that were
+    deleted or sold out by ``decrement_stock``, which does not touch
+    ``updated_at``, and only in that case are the eligible IDs compared.
+
+    Structures derived from the tables (frontiers, platforms, power supply
+    lookups) are kept alongside and rebuilt when one of their tables has
+    actually changed, so a checkout that leaves every part in stock costs
+    no rebuild.
+
+    Methods:
+        candidates(categories): Return the current table of each category.
+        prepared(name, categories, build): Return memoized derived data.
+        clear(): Drop every table.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables = {}
+        self._prepared = {}
+        self._revisions = itertools.count()
+
+    def clear(self):
+        """Drop every loaded table; they are reloaded on next use."""
+        with self._lock:
+            self._tables = {}
+            self._prepared = {}
+
+    @staticmethod
+    def _eligible(category):
+        return PRODUCT_MODELS[category].objects.filter(
+            is_available=True, stock__gt=0, price__isnull=False
+        )
+
+    @staticmethod
+    def _candidate(category, row):
+        """Build a Candidate from an id, brand, model, price, tdp, *spec row."""
+        spec = dict(zip(CANDIDATE_FIELDS[category], row[5:]))
+        return Candidate(
+            row[0],
+            category,
+            f"{row[1]} {row[2]}",
+            row[3],
+            row[4] or 0,
+            _raw_score(category, spec),
+            spec,
+        )
+
+    def _load(self, category):
+        table = _CandidateTable(next(self._revisions))
+        table.refreshed_at = timezone.now()
+        rows = self._eligible(category).values_list(
+            "id", "brand", "model", "price", "tdp", *CANDIDATE_FIELDS[category]
+        )
+        for row in rows:
+            table.by_id[row[0]] = self._candidate(category, row)
+        table.candidates = list(table.by_id.values())
+        return table
+
+    def _refresh(self, category, table):
+        """
+        Bring a table up to date after its generation moved.
+
+        Returns:
+            _CandidateTable: The updated table, or a freshly loaded one.
+        """
+        started_at = timezone.now()
+        changed = False
+        rows = (
+            PRODUCT_MODELS[category]
+            .objects.filter(updated_at__gte=table.refreshed_at)
+            .values_list(
+                "id",
+                "brand",
+                "model",
+                "price",
+                "tdp",
+                *CANDIDATE_FIELDS[category],
+                "is_available",
+                "stock",
+            )
+        )
+        for row in rows:
+            product_id, price, is_available, stock = row[0], row[3], row[-2], row[-1]
+            if is_available and stock > 0 and price is not None:
+                candidate = self._candidate(category, row[:-2])
+                if table.by_id.get(product_id) != candidate:
+                    table.by_id[product_id] = candidate
+                    changed = True
+            elif table.by_id.pop(product_id, None) is not None:
+                changed = True
+
+        # Deletes and queryset updates (decrement_stock) leave no updated_at
+        eligible = self._eligible(category)
+        if eligible.count() != len(table.by_id):
+            live = set(eligible.values_list("id", flat=True))
+            for product_id in [pk for pk in table.by_id if pk not in live]:
+                del table.by_id[product_id]
+                changed = True
+            if len(live) != len(table.by_id):
+                # Became eligible without a save, e.g. restocked in bulk
+                return self._load(category)
+
+        table.refreshed_at = started_at
+        if changed:
+            table.candidates = list(table.by_id.values())
+            table.revision = next(self._revisions)
+        return table
+
+    def candidates(self, categories):
+        """
+        Return the candidates of each category, refreshing stale tables.
+
+        Args:
+            categories (iterable): CANDIDATE_FIELDS keys.
+
+        Returns:
+            dict: Category -> list of Candidate.
+        """
+        categories = list(categories)
+        generations = catalog_cache.generations(categories)
+        tables = {}
+        with self._lock:
+            for category in categories:
+                table = self._tables.get(category)
+                if table is None:
+                    table = self._load(category)
+                elif table.generation != generations[category]:
+                    table = self._refresh(category, table)
+                table.generation = generations[category]
+                self._tables[category] = table
+                tables[category] = table.candidates
+        return tables
+
+    def prepared(self, name, categories, build):
+        """
+        Return data derived from candidate tables, rebuilt when they change.
+
+        Args:
+            name (hashable): Identifies what ``build`` computes, including
+                any parameter it depends on.
+            categories (tuple): Categories the data is derived from.
+            build (callable): Called with the tables dict on a miss.
+
+        Returns:
+            Whatever ``build`` returns.
+        """
+        with self._lock:
+            tables = self.candidates(categories)
+            version = tuple(self._tables[category].revision for category in categories)
+            entry = self._prepared.get(name)
+            if entry is None or entry[0] != version:
+                entry = self._prepared[name] = (version, build(tables))
+            return entry[1]
+
+
+candidate_catalog = CandidateCatalog()
+
+
+def _frontier(candidates, score):
+    """
+    Return the Pareto-optimal candidates, sorted by price.
+
+    A candidate is dropped when another one costs no more, scores at least
+    as high and draws no more power.
+    """
+    kept = []
+    for candidate in sorted(candidates, key=lambda c: (c.price, -score(c), c.tdp)):
+        candidate_score = score(candidate)
+        if not any(
+            score(other) >= candidate_score and other.tdp <= candidate.tdp
+            for other in kept
+        ):
+            kept.append(candidate)
+    return kept
+
+
+def _cheapest(candidates):
+    return min(candidates, key=lambda c: (c.price, c.tdp), default=None)
+
+
+class _Level:
+    """A price-sorted candidate list with prefix maxima of the score."""
+
+    def __init__(self, slot, candidates, score):
+        self.slot = slot
+        self.candidates = candidates  # price ascending
+        self.scores = [score(candidate) for candidate in candidates]
+        self.prices = [candidate.price for candidate in candidates]
+        self.best_upto = []
+        best = 0.0
+        for value in self.scores:
+            best = max(best, value)
+            self.best_upto.append(best)
+        self.by_score = sorted(
+            zip(self.scores, candidates), key=lambda pair: (-pair[0], pair[1].price)
+        )
+        self.min_price = self.prices[0] if self.prices else None
+
+    def best_within(self, money):
+        """Highest score among candidates costing at most ``money``."""
+        index = bisect.bisect_right(self.prices, money)
+        return self.best_upto[index - 1] if index else None
+
+
+Platform = namedtuple("Platform", "socket memory_type board case cooler price tdp")
+
+AutoBuild = namedtuple(
+    "AutoBuild",
+    "use_case budget parts total_price total_tdp required_wattage score exhaustive nodes",
+)
+AutoBuild.__doc__ = """
+Result of an automatic build.
+
+``parts`` maps PCBuilderItem component types to Candidates;
+``required_wattage`` is the summed TDP plus POWER_HEADROOM and ``score``
+the weighted use-case score (0..1). ``exhaustive`` is False when the node
+limit stopped the search early.
+"""
+
+
+class AutoBuilder:
+    """
+    Branch-and-bound search for the best build within a budget.
+
+    Args:
+        budget (Decimal): Maximum total price of the searched parts,
+            including pinned ones.
+        use_case (str): Key of USE_CASES.
+        pinned (dict, optional): Component type -> product instance that
+            must be part of the build.
+        max_nodes (int): Search node limit, MAX_NODES by default.
+        catalog (CandidateCatalog, optional): Candidate source, the shared
+            candidate_catalog by default.
+
+    Raises:
+        ValueError: For an unknown use case or a negative budget.
+
+    Methods:
+        run(): Return the best AutoBuild, or None when nothing fits.
+    """
+
+    def __init__(self, budget, use_case="gaming", pinned=None, max_nodes=MAX_NODES,
+                 catalog=None):
+        if use_case not in USE_CASES:
+            raise ValueError(f"Unknown use case: {use_case}")
+        budget = Decimal(budget)
+        if budget < 0:
+            raise ValueError("Budget must not be negative")
+        self.budget = budget
+        self.use_case = USE_CASES[use_case]
+        self.pinned = {
+            component_type: candidate_for(product)
+            for component_type, product in (pinned or {}).items()
+            if component_type in CANDIDATE_FIELDS and product is not None
+        }
+        self.max_nodes = max_nodes
+        self.catalog = catalog or candidate_catalog
+        self.nodes = 0
+
+    # ------------------------------------------------------------------
+    # Candidate preparation
+    # ------------------------------------------------------------------
+
+    def _prepare(self, name, categories, build):
+        """
+        Return ``build(tables)`` for the given categories.
+
+        Without pinned parts the result is memoized by the catalog; a pinned
+        category replaces its table with the pinned part and is built fresh.
+        """
+        if not any(category in self.pinned for category in categories):
+            return self.catalog.prepared(name, categories, build)
+        tables = self.catalog.candidates(
+            [category for category in categories if category not in self.pinned]
+        )
+        for category in categories:
+            if category in self.pinned:
+                tables[category] = [self.pinned[category]]
+        return build(tables)
+
+    def score(self, candidate):
+        """Weighted use-case score of a part, normalized to the catalog."""
+        if candidate.category in ("SSD", "HDD"):
+            slot, scale = "Storage", max(self._maxima["SSD"], self._maxima["HDD"])
+        else:
+            slot, scale = candidate.category, self._maxima.get(candidate.category, 0)
+        weight = self.use_case.weights.get(slot, 0)
+        if not weight or not scale:
+            return 0.0
+        # A pinned part can be off the catalog's scale
+        return weight * min(candidate.raw / scale, 1.0)
+
+    def _levels(self, groups, slot, key):
+        """Build one _Level per compatibility group."""
+        grouped = {}
+        for candidate in groups:
+            grouped.setdefault(candidate.spec[key] if key else None, []).append(candidate)
+        return {
+            group: _Level(slot, _frontier(candidates, self.score), self.score)
+            for group, candidates in grouped.items()
+        }
+
+    def _platforms(self, tables):
+        """Cheapest board, case and cooler for every (socket, memory type)."""
+        cases = {}
+        coolers = {}
+        platforms = {}
+        for board in tables["Motherboard"]:
+            form_factor = board.spec["form_factor"]
+            if form_factor not in cases:
+                cases[form_factor] = _cheapest(
+                    case
+                    for case in tables["Casing"]
+                    if _fits_case(form_factor, case.spec["form_factor"])
+                )
+            socket = board.spec["socket"]
+            if socket not in coolers:
+                coolers[socket] = _cheapest(
+                    cooler
+                    for cooler in tables["Cooler"]
+                    if _cooler_fits(socket, cooler.spec["socket_support"])
+                )
+            case, cooler = cases[form_factor], coolers[socket]
+            if case is None or cooler is None:
+                continue
+            key = (socket, board.spec["memory_type"])
+            price = board.price + case.price + cooler.price
+            if key not in platforms or price < platforms[key].price:
+                platforms[key] = Platform(
+                    socket,
+                    board.spec["memory_type"],
+                    board,
+                    case,
+                    cooler,
+                    price,
+                    board.tdp + case.tdp + cooler.tdp,
+                )
+        return list(platforms.values())
+
+    @staticmethod
+    def _power_supplies(tables):
+        """Wattages ascending and the cheapest supply from each index on."""
+        supplies = sorted(
+            (c for c in tables["Power Supply"] if c.spec["wattage"]),
+            key=lambda c: c.spec["wattage"],
+        )
+        cheapest = [None] * len(supplies)
+        best = None
+        for index in range(len(supplies) - 1, -1, -1):
+            if best is None or supplies[index].price < best.price:
+                best = supplies[index]
+            cheapest[index] = best
+        return [supply.spec["wattage"] for supply in supplies], cheapest
+
+    def power_supply_for(self, tdp):
+        """Return the cheapest power supply for a summed TDP, or None."""
+        wattages, cheapest = self._supplies
+        index = bisect.bisect_left(wattages, tdp + POWER_HEADROOM)
+        if index == len(wattages):
+            return None
+        return cheapest[index]
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def run(self):
+        """
+        Search for the best build.
+
+        Returns:
+            AutoBuild or None: None when no compatible build fits the budget.
+        """
+        name = self.use_case.name
+        self._maxima = self.catalog.prepared(
+            "maxima",
+            ("CPU", "RAM", "GPU", "SSD", "HDD"),
+            lambda tables: {
+                category: max((c.raw for c in candidates), default=0)
+                for category, candidates in tables.items()
+            },
+        )
+        self._supplies = self._prepare(
+            "power supplies", ("Power Supply",), self._power_supplies
+        )
+        platforms = self._prepare(
+            "platforms", ("Motherboard", "Casing", "Cooler"), self._platforms
+        )
+        needs_gpu = "GPU" in self.use_case.weights or "GPU" in self.pinned
+
+        def cpu_levels(tables):
+            cpus = tables["CPU"]
+            if not needs_gpu and "CPU" not in self.pinned:
+                cpus = [c for c in cpus if has_integrated_graphics(c.spec)]
+            return self._levels(cpus, "CPU", "socket")
+
+        cpu_levels = self._prepare(("cpu", name, needs_gpu), ("CPU",), cpu_levels)
+        ram_levels = self._prepare(
+            ("ram", name), ("RAM",), lambda t: self._levels(t["RAM"], "RAM", "ram_type")
+        )
+        shared_levels = []
+        if needs_gpu:
+            shared_levels.append(
+                self._prepare(
+                    ("gpu", name), ("GPU",), lambda t: self._levels(t["GPU"], "GPU", None)
+                ).get(None, _Level("GPU", [], self.score))
+            )
+        # Storage is one slot filled by an SSD or an HDD; a pinned SSD wins
+        # the slot and a pinned HDD next to it is a fixed extra
+        fixed = []
+        if "SSD" in self.pinned:
+            storage = self._levels([self.pinned["SSD"]], "Storage", None)
+            if "HDD" in self.pinned:
+                fixed.append(self.pinned["HDD"])
+        elif "HDD" in self.pinned:
+            storage = self._levels([self.pinned["HDD"]], "Storage", None)
+        else:
+            storage = self.catalog.prepared(
+                ("storage", name),
+                ("SSD", "HDD"),
+                lambda t: self._levels(t["SSD"] + t["HDD"], "Storage", None),
+            )
+        shared_levels.append(storage.get(None, _Level("Storage", [], self.score)))
+        fixed_price = sum((c.price for c in fixed), Decimal("0"))
+        fixed_tdp = sum(c.tdp for c in fixed)
+        fixed_score = sum(self.score(c) for c in fixed)
+
+        self.nodes = 0
+        self._best = None
+        self._best_score = -1.0
+        self._best_price = None
+
+        groups = []
+        for platform in platforms:
+            cpu_level = cpu_levels.get(platform.socket)
+            ram_level = ram_levels.get(platform.memory_type)
+            if cpu_level is None or ram_level is None:
+                continue
+            levels = [cpu_level, ram_level] + shared_levels
+            if not all(level.candidates for level in levels):
+                continue
+            money = self.budget - platform.price - fixed_price
+            bound = self._optimistic(levels, 0, money, platform.tdp + fixed_tdp)
+            if bound is not None:
+                groups.append((bound, platform, levels))
+
+        # Most promising platforms first, so later ones are cut early
+        groups.sort(key=lambda group: -group[0])
+        for bound, platform, levels in groups:
+            if fixed_score + bound <= self._best_score or self.nodes >= self.max_nodes:
+                break
+            self._search(
+                platform,
+                levels,
+                0,
+                self.budget - platform.price - fixed_price,
+                fixed_score,
+                platform.tdp + fixed_tdp,
+                [],
+            )
+
+        if self._best is None:
+            return None
+        platform, chosen, supply = self._best
+        parts = {
+            "Motherboard": platform.board,
+            "Casing": platform.case,
+            "Cooler": platform.cooler,
+            "Power Supply": supply,
+        }
+        for candidate in chosen + fixed:
+            parts[candidate.category] = candidate
+        total_tdp = sum(c.tdp for c in parts.values())
+        return AutoBuild(
+            self.use_case.name,
+            self.budget,
+            parts,
+            sum((c.price for c in parts.values()), Decimal("0")),
+            total_tdp,
+            total_tdp + POWER_HEADROOM,
+            round(self._best_score, 4),
+            self.nodes < self.max_nodes,
+            self.nodes,
+        )
+
+    def _optimistic(self, levels, start, money, tdp):
+        """
+        Upper bound of the score levels[start:] can add with ``money`` left.
+
+        Every level gets the best part it could afford if all the other
+        remaining levels (and the power supply) took their cheapest part.
+        Returns None when even the cheapest parts do not fit.
+        """
+        supply = self.power_supply_for(tdp)
+        if supply is None:
+            return None
+        minimum = sum(level.min_price for level in levels[start:]) + supply.price
+        if minimum > money:
+            return None
+        bound = 0.0
+        for level in levels[start:]:
+            bound += level.best_within(money - minimum + level.min_price)
+        return bound
+
+    def _search(self, platform, levels, depth, money, score, tdp, chosen):
+        self.nodes += 1
+        if depth == len(levels):
+            supply = self.power_supply_for(tdp)
+            if supply is None or supply.price > money:
+                return
+            price = self.budget - money + supply.price
+            if score > self._best_score or (
+                score == self._best_score and price < self._best_price
+            ):
+                self._best = (platform, list(chosen), supply)
+                self._best_score = score
+                self._best_price = price
+            return
+
+        level = levels[depth]
+        # What the deeper levels can add at most, whichever part is taken here
+        rest = self._optimistic(levels, depth + 1, money - level.min_price, tdp)
+        if rest is None:
+            return
+        for part_score, candidate in level.by_score:
+            if score + part_score + rest <= self._best_score:
+                break  # by_score is descending: no later part can do better
+            if candidate.price > money:
+                continue
+            if self._optimistic(
+                levels, depth + 1, money - candidate.price, tdp + candidate.tdp
+            ) is None:
+                continue
+            chosen.append(candidate)
+            self._search(
+                platform,
+                levels,
+                depth + 1,
+                money - candidate.price,
+                score + part_score,
+                tdp + candidate.tdp,
+                chosen,
+            )
+            chosen.pop()
+            if self.nodes >= self.max_nodes:
+                return
+
+
+def apply_auto_build(pc_build, result):
+    """
+    Write an auto-build result into a PC build.
+
+    Every core slot (CORE_TYPES) is set to the chosen part or cleared, so
+    the build matches the result; peripherals and the monitor are kept.
+
+    Args:
+        pc_build (PCBuilder): Build to update.
+        result (AutoBuild): Result of AutoBuilder.run().
+    """
+    values = {}
+    for component_type in CORE_TYPES:
+        part = result.parts.get(component_type)
+        values[component_type] = (
+            SlotValue(part.pk, part.name, part.price, part.tdp) if part else None
+        )
+    assign_slots(pc_build, values)
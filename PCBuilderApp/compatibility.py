@@ -0,0 +1,448 @@
+"""
+Declarative compatibility rules for the PCBuilderApp.
+
+Every hardware compatibility rule is declared once in ``RULES`` and used by
+all the places that check a build: the PC builder page, the component
+selection pages, add-to-build and the PDF export.
+
+Rules:
+    Pair rules relate one field of two component types, e.g. the CPU socket
+    and the motherboard socket. They apply in both directions: when a CPU is
+    a candidate and a motherboard is selected, and the other way round.
+
+    The power rule checks that a power supply covers the summed TDP of the
+    rest of the build plus a safety margin, and that a candidate component
+    does not push the build past the selected power supply.
+
+Evaluation:
+    A CompatibilityEngine is built from the selected components of a build.
+    ``compile(candidate_type)`` resolves the rules that apply to one
+    candidate type into checks with their reference values already looked
+    up. ``evaluate()`` then runs each check column-wise over a whole list of
+    candidates: the candidate field is read once per product and the
+    verdict is computed once per distinct value, which keeps a 10k product
+    list in the low milliseconds.
+
+    Every rule also has an ORM form. ``compatible_filter()`` turns the
+    compiled checks into a Q object, so "compatible products only" listings
+    can be filtered, sorted and paginated in the database and only the
+    products on the page need ``evaluate()`` for their messages.
+
+Classes:
+    PairRule: Declaration of a two-component field relation
+    PowerRule: Declaration of the power supply headroom rule
+    CompatibilityEngine: Rules compiled against the selected components
+
+Functions:
+    annotate: Set compatibility_issues and is_compatible on products
+
+Example:
+    engine = CompatibilityEngine(snapshot.selected())
+    for product, issues in zip(products, engine.evaluate("RAM", products)):
+        ...
+"""
+
+from collections import namedtuple
+
+from django.db.models import Q
+
+
+# Watts added on top of the summed TDP when sizing a power supply
+POWER_HEADROOM = 100
+
+# Motherboard form factors that fit in a case of each form factor
+CASE_FORM_FACTORS = {
+    "E-ATX": ("E-ATX", "ATX", "Micro-ATX", "Mini-ITX"),
+    "ATX": ("ATX", "Micro-ATX", "Mini-ITX"),
+    "Micro-ATX": ("Micro-ATX", "Mini-ITX"),
+    "Mini-ITX": ("Mini-ITX",),
+}
+
+
+def split_values(value):
+    """Split a comma separated field such as Cooler.socket_support."""
+    if not value:
+        return []
+    return [part.strip() for part in str(value).split(",") if part.strip()]
+
+
+def normalize_socket(socket):
+    """Compare sockets regardless of spacing and case ('LGA 1700' == 'lga1700')."""
+    return str(socket).replace(" ", "").upper() if socket else socket
+
+
+def supported_form_factors(case_form_factor):
+    """
+    Return the motherboard form factors a case accepts.
+
+    Args:
+        case_form_factor (str): Casing.form_factor, optionally a comma
+            separated list.
+
+    Returns:
+        set: Accepted motherboard form factors.
+    """
+    supported = set()
+    for form_factor in split_values(case_form_factor):
+        supported.update(CASE_FORM_FACTORS.get(form_factor, (form_factor,)))
+    return supported
+
+
+def _same(first, second):
+    return first == second
+
+
+def _fits_case(motherboard_form_factor, case_form_factor):
+    return motherboard_form_factor in supported_form_factors(case_form_factor)
+
+
+def _cooler_fits(cpu_socket, socket_support):
+    return normalize_socket(cpu_socket) in {
+        normalize_socket(socket) for socket in split_values(socket_support)
+    }
+
+
+# ORM counterparts of the tests above. Each returns the Q object selecting
+# the candidates (of ``model``, through ``field``) that pass against the
+# selected component's ``reference`` value.
+
+
+def _same_filter(model, field, reference):
+    return Q(**{field: reference})
+
+
+def _board_in_case_filter(model, field, case_form_factor):
+    return Q(**{f"{field}__in": sorted(supported_form_factors(case_form_factor))})
+
+
+def _case_for_board_filter(model, field, board_form_factor):
+    cases = [
+        case
+        for case, boards in CASE_FORM_FACTORS.items()
+        if board_form_factor in boards
+    ]
+    return Q(**{f"{field}__in": cases + [board_form_factor]})
+
+
+def _cpu_for_cooler_filter(model, field, socket_support):
+    supported = {normalize_socket(socket) for socket in split_values(socket_support)}
+    # Match the model's socket spellings that normalize to a supported socket
+    choices = [value for value, _ in model._meta.get_field(field).choices or ()]
+    sockets = [value for value in choices if normalize_socket(value) in supported]
+    return Q(**{f"{field}__in": sockets + split_values(socket_support)})
+
+
+def _cooler_for_cpu_filter(model, field, cpu_socket):
+    if not cpu_socket:
+        return Q(pk__in=[])
+    condition = Q()
+    for spelling in {cpu_socket, cpu_socket.replace(" ", "")}:
+        condition |= Q(**{f"{field}__icontains": spelling})
+    return condition
+
+
+PairRule = namedtuple(
+    "PairRule",
+    "name first first_field second second_field test first_message second_message "
+    "first_filter second_filter",
+)
+PairRule.__doc__ = """
+Relation between a field of two component types.
+
+``test(first_value, second_value)`` returns True when compatible.
+``first_message`` is shown when the first type is the candidate,
+``second_message`` when the second type is; both are formatted with
+``first`` and ``second`` (the two field values). ``first_filter`` and
+``second_filter`` build the equivalent ORM filter for first or second type
+candidates, given the model, the candidate field and the other value.
+"""
+
+PowerRule = namedtuple("PowerRule", "name supply supply_field headroom supply_message")
+PowerRule.__doc__ = """
+Power supply headroom rule.
+
+The supply must provide at least the summed TDP of the other components
+plus ``headroom`` watts. ``supply_message`` is formatted with ``required``
+and ``wattage``.
+"""
+
+RULES = (
+    PairRule(
+        "socket",
+        "CPU",
+        "socket",
+        "Motherboard",
+        "socket",
+        _same,
+        "Socket mismatch: CPU uses {first} but motherboard has {second}",
+        "Socket mismatch: Motherboard has {second} but CPU uses {first}",
+        _same_filter,
+        _same_filter,
+    ),
+    PairRule(
+        "memory_type",
+        "RAM",
+        "ram_type",
+        "Motherboard",
+        "memory_type",
+        _same,
+        "Memory type mismatch: RAM is {first} but motherboard supports {second}",
+        "Memory type mismatch: Motherboard supports {second} but RAM is {first}",
+        _same_filter,
+        _same_filter,
+    ),
+    PairRule(
+        "form_factor",
+        "Motherboard",
+        "form_factor",
+        "Casing",
+        "form_factor",
+        _fits_case,
+        "Form factor mismatch: Motherboard is {first} but case supports {second}",
+        "Form factor mismatch: Case supports {second} but motherboard is {first}",
+        _board_in_case_filter,
+        _case_for_board_filter,
+    ),
+    PairRule(
+        "cooler_socket",
+        "CPU",
+        "socket",
+        "Cooler",
+        "socket_support",
+        _cooler_fits,
+        "Socket mismatch: CPU uses {first} but cooler supports {second}",
+        "Socket mismatch: Cooler supports {second} but CPU uses {first}",
+        _cpu_for_cooler_filter,
+        _cooler_for_cpu_filter,
+    ),
+    PowerRule(
+        "wattage",
+        "Power Supply",
+        "wattage",
+        POWER_HEADROOM,
+        "Insufficient wattage: Your components need at least {required}W, "
+        "but this PSU provides {wattage}W",
+    ),
+)
+
+# A check compiled for one candidate type: ``verdict(value)`` returns an
+# issue message or None for a value of the candidate's ``field``, and
+# ``condition(model)`` the Q object selecting the passing candidates
+_Check = namedtuple("_Check", "rule field verdict condition")
+
+
+def _tdp(product):
+    return getattr(product, "tdp", 0) or 0
+
+
+class CompatibilityEngine:
+    """
+    Compatibility rules compiled against the selected components of a build.
+
+    Args:
+        selected (dict): Component type -> selected product, e.g.
+            ``BuildSnapshot.selected()``.
+        rules (tuple, optional): Rule declarations, RULES by default.
+
+    Methods:
+        compile(candidate_type): Return the checks for one candidate type.
+        evaluate(candidate_type, candidates): Return per-candidate issues.
+        compatible_filter(candidate_type, model): Return the rules as a Q.
+        check(candidate_type, product): Return the issues of one product.
+        check_build(include_power=True): Return the issues of the build.
+    """
+
+    def __init__(self, selected, rules=RULES):
+        self.selected = dict(selected)
+        self.rules = rules
+        self._compiled = {}
+
+    def other_tdp(self, candidate_type):
+        """Summed TDP of the selected components other than candidate_type."""
+        return sum(
+            _tdp(product)
+            for component_type, product in self.selected.items()
+            if component_type != candidate_type
+        )
+
+    def compile(self, candidate_type):
+        """
+        Resolve the rules that apply to one candidate type.
+
+        Args:
+            candidate_type (str): Component type of the candidates.
+
+        Returns:
+            list: _Check tuples, in rule order.
+        """
+        if candidate_type in self._compiled:
+            return self._compiled[candidate_type]
+
+        checks = []
+        for rule in self.rules:
+            if isinstance(rule, PowerRule):
+                checks.extend(self._compile_power(rule, candidate_type))
+                continue
+
+            if candidate_type == rule.first and rule.second in self.selected:
+                reference = getattr(self.selected[rule.second], rule.second_field, None)
+
+                def verdict(value, rule=rule, reference=reference):
+                    if rule.test(value, reference):
+                        return None
+                    return rule.first_message.format(first=value, second=reference)
+
+                def condition(model, rule=rule, reference=reference):
+                    return rule.first_filter(model, rule.first_field, reference)
+
+                checks.append(_Check(rule, rule.first_field, verdict, condition))
+
+            elif candidate_type == rule.second and rule.first in self.selected:
+                reference = getattr(self.selected[rule.first], rule.first_field, None)
+
+                def verdict(value, rule=rule, reference=reference):
+                    if rule.test(reference, value):
+                        return None
+                    return rule.second_message.format(first=reference, second=value)
+
+                def condition(model, rule=rule, reference=reference):
+                    return rule.second_filter(model, rule.second_field, reference)
+
+                checks.append(_Check(rule, rule.second_field, verdict, condition))
+
+        self._compiled[candidate_type] = checks
+        return checks
+
+    def _compile_power(self, rule, candidate_type):
+        """Compile the power rule for one candidate type."""
+        if candidate_type == rule.supply:
+            required = self.other_tdp(candidate_type) + rule.headroom
+
+            def verdict(wattage):
+                if (wattage or 0) >= required:
+                    return None
+                return rule.supply_message.format(required=required, wattage=wattage)
+
+            def condition(model):
+                return Q(**{f"{rule.supply_field}__gte": required})
+
+            return [_Check(rule, rule.supply_field, verdict, condition)]
+
+        supply = self.selected.get(rule.supply)
+        if supply is None:
+            return []
+        wattage = getattr(supply, rule.supply_field, None) or 0
+        # Watts left for the candidate once the rest of the build is powered
+        budget = wattage - self.other_tdp(candidate_type) - rule.headroom
+
+        def verdict(tdp):
+            if not tdp or tdp <= budget:
+                return None
+            return (
+                f"Insufficient wattage: Your power supply provides {wattage}W, "
+                f"which leaves {max(budget, 0)}W for this {tdp}W component"
+            )
+
+        def condition(model):
+            return Q(tdp__isnull=True) | Q(tdp=0) | Q(tdp__lte=budget)
+
+        return [_Check(rule, "tdp", verdict, condition)]
+
+    def evaluate(self, candidate_type, candidates):
+        """
+        Evaluate every applicable rule over a list of candidates.
+
+        Each check reads its field from all candidates in one pass and
+        computes the verdict once per distinct value.
+
+        Args:
+            candidate_type (str): Component type of the candidates.
+            candidates (list): Product instances of that type.
+
+        Returns:
+            list: One list of issue messages per candidate, in input order.
+        """
+        issues = [[] for _ in candidates]
+        for check in self.compile(candidate_type):
+            field = check.field
+            verdicts = {}
+            for index, value in enumerate(
+                [getattr(candidate, field, None) for candidate in candidates]
+            ):
+                try:
+                    message = verdicts[value]
+                except KeyError:
+                    message = verdicts[value] = check.verdict(value)
+                if message is not None:
+                    issues[index].append(message)
+        return issues
+
+    def compatible_filter(self, candidate_type, model):
+        """
+        Return an ORM filter selecting the compatible candidates.
+
+        The filter mirrors evaluate(): it selects the products for which
+        evaluate() reports no issues.
+
+        Args:
+            candidate_type (str): Component type of the candidates.
+            model (Model): Product model of that component type.
+
+        Returns:
+            Q: Conjunction of the applicable rules; empty when none apply.
+        """
+        condition = Q()
+        for check in self.compile(candidate_type):
+            condition &= check.condition(model)
+        return condition
+
+    def check(self, candidate_type, product):
+        """Return the compatibility issues of a single candidate product."""
+        return self.evaluate(candidate_type, [product])[0]
+
+    def check_build(self, include_power=True):
+        """
+        Check the selected components against each other.
+
+        Every pair rule is reported once, from the point of view of its
+        first component type.
+
+        Args:
+            include_power (bool): Also check the selected power supply
+                against the rest of the build.
+
+        Returns:
+            list: Issue messages.
+        """
+        issues = []
+        for rule in self.rules:
+            if isinstance(rule, PowerRule):
+                if include_power and rule.supply in self.selected:
+                    issues.extend(
+                        self.check(rule.supply, self.selected[rule.supply])
+                    )
+                continue
+            if rule.first in self.selected and rule.second in self.selected:
+                first = getattr(self.selected[rule.first], rule.first_field, None)
+                second = getattr(self.selected[rule.second], rule.second_field, None)
+                if not rule.test(first, second):
+                    issues.append(rule.first_message.format(first=first, second=second))
+        return issues
+
+
+def annotate(products, issues):
+    """
+    Attach evaluation results to products for the selection templates.
+
+    Args:
+        products (list): Candidate products.
+        issues (list): Matching per-product issue lists from evaluate().
+
+    Returns:
+        list: The products, each with ``compatibility_issues`` and
+        ``is_compatible`` set.
+    """
+    for product, product_issues in zip(products, issues):
+        product.compatibility_issues = product_issues
+        product.is_compatible = not product_issues
+    return products
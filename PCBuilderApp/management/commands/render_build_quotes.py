@@ -0,0 +1,148 @@
+"""
+Management command to render PDF quotes for many saved builds at once.
+
+Uses the same layout as the export_build_pdf view (PCBuilderApp.pdf). The
+builds and their products are loaded up front with a few queries. The
+documents are then rendered in a pool of worker processes, one per CPU
+core by default. Each worker builds the paragraph styles and loads the
+fonts once, when it starts.
+
+The quotes go into a directory, or into a zip archive when the output path
+ends in ``.zip``. The render time of every build is reported, slowest last,
+so pathological builds stand out.
+
+Usage:
+    python manage.py render_build_quotes --output quotes.zip
+    python manage.py render_build_quotes --output quotes/ --user alice
+    python manage.py render_build_quotes <build_id> <build_id> --output quotes.zip
+"""
+
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+
+from ProductsApp.catalog import ProductLoader
+from PCBuilderApp.models import PCBuilder
+from PCBuilderApp.pdf import build_quote, render_timed, warm_worker
+
+
+class Command(BaseCommand):
+    help = "Render PDF quotes for saved PC builds into a directory or zip archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "build_ids",
+            nargs="*",
+            help="Builds to render (defaults to every saved build)",
+        )
+        parser.add_argument(
+            "--output",
+            required=True,
+            help="Directory to write, or a path ending in .zip for an archive",
+        )
+        parser.add_argument(
+            "--user", default=None, help="Only render the builds of this username"
+        )
+        parser.add_argument(
+            "--public", action="store_true", help="Only render public builds"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of rendering processes (defaults to the CPU count)",
+        )
+
+    def builds(self, options):
+        """Return the selected builds with their items prefetched."""
+        builds = PCBuilder.objects.prefetch_related("pcbuilderitem_set").order_by(
+            "created_at"
+        )
+        if options["build_ids"]:
+            try:
+                builds = builds.filter(pk__in=options["build_ids"])
+            except ValidationError as error:
+                raise CommandError(f"Invalid build ID: {error.messages[0]}")
+        else:
+            builds = builds.filter(name__isnull=False)
+        if options["user"]:
+            builds = builds.filter(user__username=options["user"])
+        if options["public"]:
+            builds = builds.filter(is_public=True)
+        return list(builds)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        builds = self.builds(options)
+        if not builds:
+            raise CommandError("No builds match the selection")
+
+        # Load every selected product of every build at once; the snapshots
+        # below then find them in the loader's identity map
+        loader = ProductLoader()
+        loader.load_many(
+            (item.component_type, item.product_id)
+            for build in builds
+            for item in build.pcbuilderitem_set.all()
+            if item.product_id
+        )
+        quotes = {
+            build.pk: build_quote(build, build.snapshot(loader=loader))
+            for build in builds
+        }
+        names = {
+            build.pk: f"{slugify(build.name or 'build') or 'build'}-{build.pk}.pdf"
+            for build in builds
+        }
+
+        output = options["output"]
+        if output.endswith(".zip"):
+            archive = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED)
+            write = archive.writestr
+        else:
+            archive = None
+            os.makedirs(output, exist_ok=True)
+
+            def write(name, pdf):
+                with open(os.path.join(output, name), "wb") as handle:
+                    handle.write(pdf)
+
+        timings = []
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max(1, options["workers"]),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_worker,
+            ) as executor:
+                futures = {
+                    executor.submit(render_timed, quote): build_id
+                    for build_id, quote in quotes.items()
+                }
+                for future in as_completed(futures):
+                    build_id = futures[future]
+                    pdf, seconds = future.result()
+                    write(names[build_id], pdf)
+                    timings.append((seconds, build_id, len(pdf)))
+        finally:
+            if archive is not None:
+                archive.close()
+
+        titles = {build.pk: build.name or "Custom PC Build" for build in builds}
+        for seconds, build_id, size in sorted(timings):
+            self.stdout.write(
+                f"{seconds * 1000:8.1f} ms  {size / 1024:7.1f} KiB  "
+                f"{build_id}  {titles[build_id]}"
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {len(timings)} quotes in {elapsed:.2f}s "
+                f"with {options['workers']} workers to {output}"
+            )
+        )
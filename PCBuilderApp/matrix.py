@@ -0,0 +1,403 @@
+"""
+Precomputed compatibility matrix for the PCBuilderApp.
+
+The pair rules in ``compatibility.RULES`` only look at a handful of
+attribute classes: socket families, DDR generations, motherboard form
+factors and case form-factor sets. Every distinct value of such a field is
+a class with a dense class ID. This module keeps, per category, a bitset of
+the products in each class, and per rule a matrix row for each reference
+value: a bitset of the candidate classes the rule accepts against it.
+
+"Which motherboards still fit this partial build" is then, per applicable
+rule, an OR of the member bitsets of the accepted classes, AND-ed across
+rules and with the available products. Rows are computed once per
+reference value and extended lazily when a new class appears, so a lookup
+is a few bitwise operations on Python ints.
+
+The power rule depends on summed TDP rather than on a class and is not part
+of the matrix; use ``CompatibilityEngine`` for wattage checks.
+
+Index lifecycle:
+    - A category is loaded with a single query the first time it is used.
+    - Product saves and deletes in the same process update the class
+      bitsets through the receivers in PCBuilderApp.models once their
+      transaction commits. A save that changes neither a rule field nor
+      availability leaves them untouched.
+    - Every ``settings.PRODUCT_SEARCH_REFRESH_INTERVAL`` seconds a lookup
+      re-reads the products of that category whose ``updated_at`` moved,
+      which picks up changes made by other worker processes. If the
+      category's row count then differs from the loaded products, deleted
+      products are dropped by comparing IDs, and products that appeared
+      without a save, e.g. through bulk_create, reload the category.
+
+Classes:
+    CompatibilityMatrix: Class bitsets and rule rows for every category
+
+Attributes:
+    compatibility_matrix (CompatibilityMatrix): Shared instance
+
+Example:
+    from PCBuilderApp.matrix import compatibility_matrix
+
+    count = compatibility_matrix.count("Motherboard", snapshot.selected())
+    ids = compatibility_matrix.valid_ids("RAM", snapshot.selected())
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from ProductsApp.models import PRODUCT_CATEGORIES, PRODUCT_MODELS
+
+from .compatibility import RULES, PairRule
+
+
+MATRIX_RULES = tuple(rule for rule in RULES if isinstance(rule, PairRule))
+
+
+def matrix_fields(category):
+    """
+    Return the fields of a category that matrix rules look at.
+
+    Args:
+        category (str): Category key of PRODUCT_MODELS.
+
+    Returns:
+        list: Field names, in rule order and without duplicates.
+    """
+    fields = []
+    for rule in MATRIX_RULES:
+        if rule.first == category and rule.first_field not in fields:
+            fields.append(rule.first_field)
+        if rule.second == category and rule.second_field not in fields:
+            fields.append(rule.second_field)
+    return fields
+
+
+def _bitmap(docs):
+    """Build a bitset with the given document numbers set."""
+    docs = list(docs)
+    if not docs:
+        return 0
+    buffer = bytearray(max(docs) // 8 + 1)
+    for doc in docs:
+        buffer[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _set_bits(bits):
+    """Yield the positions of the set bits of a bitset, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class _CategoryClasses:
+    """Class bitsets for one category; guarded by CompatibilityMatrix's lock."""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.class_ids = {field: {} for field in fields}  # value -> class ID
+        self.class_values = {field: [] for field in fields}  # class ID -> value
+        self.members = {field: [] for field in fields}  # class ID -> bitset
+        self.product_ids = []  # document -> product_id or None
+        self.doc_numbers = {}  # product_id -> document
+        self.doc_classes = []  # document -> tuple of class IDs, per field
+        self.free_docs = []
+        self.live = 0
+        self.available = 0
+        self.refreshed_at = None
+        self.last_refresh_check = 0.0
+
+    def columns(self):
+        return ["id", "is_available"] + self.fields
+
+    def class_id(self, field, value):
+        """Return the class ID of a field value, creating the class if new."""
+        class_ids = self.class_ids[field]
+        class_id = class_ids.get(value)
+        if class_id is None:
+            class_id = class_ids[value] = len(self.class_values[field])
+            self.class_values[field].append(value)
+            self.members[field].append(0)
+        return class_id
+
+    def _classes(self, field_values):
+        return tuple(
+            self.class_id(field, value)
+            for field, value in zip(self.fields, field_values)
+        )
+
+    def load(self, rows):
+        """Build all bitsets at once from ``columns()`` value rows."""
+        members = {field: {} for field in self.fields}
+        live, available = [], []
+        for row in rows:
+            doc = len(self.product_ids)
+            classes = self._classes(row[2:])
+            self.product_ids.append(row[0])
+            self.doc_numbers[row[0]] = doc
+            self.doc_classes.append(classes)
+            live.append(doc)
+            if row[1]:
+                available.append(doc)
+            for field, class_id in zip(self.fields, classes):
+                members[field].setdefault(class_id, []).append(doc)
+
+        self.live = _bitmap(live)
+        self.available = _bitmap(available)
+        for field, classes in members.items():
+            for class_id, docs in classes.items():
+                self.members[field][class_id] = _bitmap(docs)
+
+    def add(self, product_id, is_available, field_values):
+        """Add or refresh one product."""
+        classes = self._classes(field_values)
+        doc = self.doc_numbers.get(product_id)
+        if doc is not None and self.doc_classes[doc] == classes:
+            # Only the availability can have changed
+            bit = 1 << doc
+            self.available = self.available | bit if is_available else self.available & ~bit
+            return
+
+        self.remove(product_id)
+        if self.free_docs:
+            doc = self.free_docs.pop()
+            self.product_ids[doc] = product_id
+        else:
+            doc = len(self.product_ids)
+            self.product_ids.append(product_id)
+            self.doc_classes.append(())
+        bit = 1 << doc
+        self.doc_numbers[product_id] = doc
+        self.doc_classes[doc] = classes
+        self.live |= bit
+        if is_available:
+            self.available |= bit
+        for field, class_id in zip(self.fields, classes):
+            self.members[field][class_id] |= bit
+
+    def remove(self, product_id):
+        """Drop one product. Its classes stay, possibly without members."""
+        doc = self.doc_numbers.pop(product_id, None)
+        if doc is None:
+            return
+        mask = ~(1 << doc)
+        self.live &= mask
+        self.available &= mask
+        for field, class_id in zip(self.fields, self.doc_classes[doc]):
+            self.members[field][class_id] &= mask
+        self.product_ids[doc] = None
+        self.doc_classes[doc] = ()
+        self.free_docs.append(doc)
+
+    def union(self, field, classes):
+        """OR of the member bitsets of the classes set in a class bitset."""
+        members = self.members[field]
+        bits = 0
+        for class_id in _set_bits(classes):
+            bits |= members[class_id]
+        return bits
+
+
+class CompatibilityMatrix:
+    """
+    Compatibility of attribute classes, as bitsets keyed by class ID.
+
+    A matrix row is keyed by (rule, candidate category, reference value) and
+    holds the bitset of candidate classes that pass the rule against that
+    value, together with how many classes it has tested. Classes created
+    after the row was built are tested the next time the row is used.
+
+    Methods:
+        valid_bits(category, selected, available_only): Bitset of products
+            that pass every matrix rule against the selected components.
+        valid_ids(category, selected, available_only): Their product IDs.
+        count(category, selected, available_only): How many there are.
+        add_product(product) / remove_product(product_id, category): Keep
+            the class bitsets current.
+        clear(): Drop all loaded categories and rows.
+    """
+
+    def __init__(self, rules=MATRIX_RULES):
+        self.rules = rules
+        self._lock = threading.RLock()
+        self._categories = {}
+        self._rows = {}
+
+    def clear(self):
+        """Drop all loaded categories and rows; they are rebuilt on next use."""
+        with self._lock:
+            self._categories = {}
+            self._rows = {}
+
+    def _load(self, category):
+        """Load the classes of a category with one query; needs the lock."""
+        model = PRODUCT_MODELS[category]
+        classes = _CategoryClasses(model, matrix_fields(category))
+        started_at = timezone.now()
+        classes.load(model.objects.values_list(*classes.columns()))
+        classes.refreshed_at = started_at
+        classes.last_refresh_check = time.monotonic()
+        self._categories[category] = classes
+        return classes
+
+    def _refresh(self, category, classes):
+        """
+        Apply changes made since the last refresh; needs the lock.
+
+        Returns:
+            _CategoryClasses: The updated classes, or freshly loaded ones.
+        """
+        model = classes.model
+        started_at = timezone.now()
+        changed = model.objects.filter(
+            updated_at__gte=classes.refreshed_at
+        ).values_list(*classes.columns())
+        for row in changed:
+            classes.add(row[0], row[1], row[2:])
+
+        # Deletes leave no updated_at behind
+        if model.objects.count() != classes.live.bit_count():
+            existing = set(model.objects.values_list("id", flat=True))
+            for product_id in [pk for pk in classes.doc_numbers if pk not in existing]:
+                classes.remove(product_id)
+            if len(existing) != classes.live.bit_count():
+                # Created without a save signal, e.g. by bulk_create
+                return self._load(category)
+
+        classes.refreshed_at = started_at
+        classes.last_refresh_check = time.monotonic()
+        return classes
+
+    def _category(self, category):
+        """Return the loaded classes of a category, loading or refreshing them."""
+        classes = self._categories.get(category)
+        if classes is None:
+            with self._lock:
+                classes = self._categories.get(category)
+                if classes is None:
+                    classes = self._load(category)
+            return classes
+
+        interval = getattr(settings, "PRODUCT_SEARCH_REFRESH_INTERVAL", 60)
+        if time.monotonic() - classes.last_refresh_check >= interval:
+            with self._lock:
+                classes = self._refresh(category, classes)
+        return classes
+
+    def add_product(self, product):
+        """
+        Add or refresh a product in its category, if that category is loaded.
+
+        Args:
+            product (BaseProduct): Saved instance of one of PRODUCT_MODELS.
+        """
+        category = PRODUCT_CATEGORIES[type(product)]
+        with self._lock:
+            classes = self._categories.get(category)
+            if classes is not None:
+                classes.add(
+                    product.pk,
+                    product.is_available,
+                    [getattr(product, field) for field in classes.fields],
+                )
+
+    def remove_product(self, product_id, category):
+        """
+        Remove a product from its category, if that category is loaded.
+
+        Args:
+            product_id (UUID): Primary key of the product.
+            category (str): Category of the product.
+        """
+        with self._lock:
+            classes = self._categories.get(category)
+            if classes is not None:
+                classes.remove(product_id)
+
+    def _row(self, rule, category, field, reference, classes):
+        """Return the accepted class bitset of a rule against a reference value."""
+        key = (rule.name, category, reference)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = [0, 0]
+        values = classes.class_values[field]
+        if row[1] < len(values):
+            accepted = row[0]
+            for class_id in range(row[1], len(values)):
+                if category == rule.first:
+                    passes = rule.test(values[class_id], reference)
+                else:
+                    passes = rule.test(reference, values[class_id])
+                if passes:
+                    accepted |= 1 << class_id
+            row[0], row[1] = accepted, len(values)
+        return row[0]
+
+    def valid_bits(self, category, selected, available_only=True):
+        """
+        Return the products of a category that fit the selected components.
+
+        Args:
+            category (str): Candidate category key of PRODUCT_MODELS.
+            selected (dict): Component type -> selected product, e.g.
+                ``BuildSnapshot.selected()``.
+            available_only (bool): Start from available products only.
+
+        Returns:
+            int: Bitset over the category's document numbers.
+        """
+        with self._lock:
+            classes = self._category(category)
+            bits = classes.available if available_only else classes.live
+            for rule in self.rules:
+                if category == rule.first and rule.second in selected:
+                    field = rule.first_field
+                    reference = getattr(selected[rule.second], rule.second_field, None)
+                elif category == rule.second and rule.first in selected:
+                    field = rule.second_field
+                    reference = getattr(selected[rule.first], rule.first_field, None)
+                else:
+                    continue
+                accepted = self._row(rule, category, field, reference, classes)
+                bits &= classes.union(field, accepted)
+            return bits
+
+    def valid_ids(self, category, selected, available_only=True):
+        """
+        Return the IDs of the products that fit the selected components.
+
+        Args:
+            category (str): Candidate category key of PRODUCT_MODELS.
+            selected (dict): Component type -> selected product.
+            available_only (bool): Only return available products.
+
+        Returns:
+            list: Product IDs, in document order.
+        """
+        with self._lock:
+            bits = self.valid_bits(category, selected, available_only)
+            product_ids = self._categories[category].product_ids
+            return [product_ids[doc] for doc in _set_bits(bits)]
+
+    def count(self, category, selected, available_only=True):
+        """
+        Return how many products fit the selected components.
+
+        Args:
+            category (str): Candidate category key of PRODUCT_MODELS.
+            selected (dict): Component type -> selected product.
+            available_only (bool): Only count available products.
+
+        Returns:
+            int: Number of matching products.
+        """
+        return self.valid_bits(category, selected, available_only).bit_count()
+
+
+compatibility_matrix = CompatibilityMatrix()
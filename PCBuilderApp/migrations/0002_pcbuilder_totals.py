@@ -0,0 +1,87 @@
+# Generated by Django 5.1.4 on 2026-10-17 03:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Mirror PCBuilderApp.models at the time of this migration
+PERIPHERAL_TYPES = ("Keyboard", "Mouse", "Headphone")
+ESSENTIAL_TYPES = ("CPU", "Motherboard", "RAM", "Power Supply")
+BUILDABLE_TYPES = ("CPU", "Motherboard", "RAM", "Power Supply", "Casing")
+
+
+def backfill_totals(apps, schema_editor):
+    """
+    Compute the denormalized totals of every existing build.
+    """
+    PCBuilder = apps.get_model("PCBuilderApp", "PCBuilder")
+    PCBuilderItem = apps.get_model("PCBuilderApp", "PCBuilderItem")
+    totals = {}
+    for build_id, component_type, price, tdp in PCBuilderItem.objects.filter(
+        product_id__isnull=False
+    ).values_list("pc_builder_id", "component_type", "product_price", "product_tdp"):
+        build = totals.setdefault(
+            build_id, {"price": 0, "peripherals": 0, "tdp": 0, "count": 0, "types": set()}
+        )
+        build["price"] += price or 0
+        if component_type in PERIPHERAL_TYPES:
+            build["peripherals"] += price or 0
+        build["tdp"] += tdp or 0
+        build["count"] += 1
+        build["types"].add(component_type)
+
+    for build_id, build in totals.items():
+        PCBuilder.objects.filter(pk=build_id).update(
+            total_price=build["price"],
+            peripherals_price=build["peripherals"],
+            total_tdp=build["tdp"],
+            item_count=build["count"],
+            has_essentials=build["types"].issuperset(ESSENTIAL_TYPES),
+            is_buildable=build["types"].issuperset(BUILDABLE_TYPES),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PCBuilderApp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pcbuilder',
+            name='has_essentials',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pcbuilder',
+            name='is_buildable',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pcbuilder',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pcbuilder',
+            name='peripherals_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='pcbuilder',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='pcbuilder',
+            name='total_tdp',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='pcbuilder',
+            index=models.Index(fields=['user', 'total_price'], name='pcbuilder_user_price_idx'),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
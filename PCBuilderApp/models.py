@@ -4,12 +4,30 @@ This module contains Django models for managing PC build configurations,
 including PC builds and their associated components. Users can create
 builds with various hardware components and track their total cost,
 power requirements, and completeness status.
+
+Pages that show a whole build read it through ``PCBuilder.snapshot()``,
+which loads every component slot with one query and the selected products
+with one query per category, and precomputes totals, wattage and
+completion into an immutable BuildSnapshot.
+
+The receivers at the bottom keep the in-process compatibility matrix
+(PCBuilderApp.matrix) in step with product saves and deletes, and the
+denormalized totals on PCBuilder in step with item saves and deletes.
 """
 
-from django.db import models
+from collections import namedtuple
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 import uuid
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from ProductsApp.catalog import ProductLoader
 from ProductsApp.models import (
+    PRODUCT_CATEGORIES,
     CPU,
     Cooler,
     Motherboard,
@@ -26,6 +44,100 @@ from ProductsApp.models import (
 )
 
 
+# Component types priced as peripherals rather than system components
+PERIPHERAL_TYPES = ("Keyboard", "Mouse", "Headphone")
+
+# Components a build needs before it can be assembled
+BUILDABLE_TYPES = ("CPU", "Motherboard", "RAM", "Power Supply", "Casing")
+
+# Components counted towards the completion percentage
+CORE_TYPES = (
+    "CPU",
+    "Cooler",
+    "Motherboard",
+    "RAM",
+    "SSD",
+    "HDD",
+    "GPU",
+    "Power Supply",
+    "Casing",
+)
+
+# Components required for PCBuilder.is_complete
+ESSENTIAL_TYPES = ("CPU", "Motherboard", "RAM", "Power Supply")
+
+# Safety margin added to the summed TDP when recommending a power supply
+WATTAGE_HEADROOM = 100
+
+BuildSlot = namedtuple(
+    "BuildSlot",
+    "component_type product_id product_name product_price product_tdp product",
+)
+
+
+class BuildSnapshot(
+    namedtuple(
+        "BuildSnapshot",
+        [
+            "build_id",
+            "slots",
+            "products",
+            "components_price",
+            "peripherals_price",
+            "total_price",
+            "total_wattage",
+            "recommended_wattage",
+            "selected_count",
+            "core_selected_count",
+            "is_buildable",
+            "is_complete",
+        ],
+    )
+):
+    """
+    Immutable, fully loaded view of a PC build.
+
+    Attributes:
+        build_id (UUID): Primary key of the build.
+        slots (Mapping): Component type -> BuildSlot for every stored item.
+        products (Mapping): Component type -> product for every selected
+            component whose product still exists.
+        components_price (Decimal): Price of the system components.
+        peripherals_price (Decimal): Price of keyboard, mouse and headphone.
+        total_price (Decimal): Price of all selected components.
+        total_wattage (int): Summed TDP of the selected components.
+        recommended_wattage (int): total_wattage plus headroom, or 0 when
+            nothing draws power.
+        selected_count (int): Number of selected components.
+        core_selected_count (int): Selected components among CORE_TYPES.
+        is_buildable (bool): All BUILDABLE_TYPES are selected.
+        is_complete (bool): All ESSENTIAL_TYPES are selected.
+    """
+
+    __slots__ = ()
+
+    def product(self, component_type):
+        """Return the selected product of a component type, or None."""
+        return self.products.get(component_type)
+
+    def selected(self, exclude=None):
+        """
+        Return the selected products as a new dict.
+
+        Args:
+            exclude (str, optional): Component type to leave out, e.g. the
+                slot that is about to be replaced.
+
+        Returns:
+            dict: Component type -> product.
+        """
+        return {
+            component_type: product
+            for component_type, product in self.products.items()
+            if component_type != exclude
+        }
+
+
 class PCBuilder(models.Model):
     """PC build configuration model.
 
@@ -41,7 +153,29 @@ class PCBuilder(models.Model):
         created_at (DateTimeField): Timestamp when the build was created.
         updated_at (DateTimeField): Timestamp when the build was last modified.
         session_id (CharField): Session identifier for anonymous users.
+        total_price (DecimalField): Price of all selected components.
+        peripherals_price (DecimalField): Price of the selected peripherals.
+        total_tdp (IntegerField): Summed TDP of the selected components.
+        item_count (PositiveIntegerField): Number of selected components.
+        has_essentials (BooleanField): All ESSENTIAL_TYPES are selected.
+        is_buildable (BooleanField): All BUILDABLE_TYPES are selected.
+
+    The total and flag columns are denormalized from the build's items and
+    kept current by update_totals(), which the PCBuilderItem signals call on
+    every save and delete. Bulk item changes (queryset.update(),
+    bulk_create, bulk_update) must call update_totals() themselves.
     """
+
+    # Columns maintained by update_totals()
+    TOTAL_FIELDS = (
+        "total_price",
+        "peripherals_price",
+        "total_tdp",
+        "item_count",
+        "has_essentials",
+        "is_buildable",
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         User,
@@ -61,6 +195,22 @@ class PCBuilder(models.Model):
     session_id = models.CharField(
         max_length=255, blank=True, null=True, help_text="For non-logged in users"
     )
+    total_price = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False
+    )
+    peripherals_price = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False
+    )
+    total_tdp = models.IntegerField(default=0, editable=False)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    has_essentials = models.BooleanField(default=False, editable=False)
+    is_buildable = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            # Saved build lists sorted by price
+            models.Index(fields=["user", "total_price"], name="pcbuilder_user_price_idx"),
+        ]
 
     def __str__(self):
         """Return string representation of the PC build.
@@ -70,64 +220,181 @@ class PCBuilder(models.Model):
         """
         return f"PC Build {self.name or self.id}"
 
+    def snapshot(self, loader=None, items=None):
+        """Load the whole build into an immutable BuildSnapshot.
+
+        Reads every PCBuilderItem of the build with a single query and the
+        selected products with at most one query per category.
+
+        Args:
+            loader (ProductLoader, optional): Loader used to fetch products,
+                typically the one bound to the current request.
+            items (list, optional): Unsaved PCBuilderItems to use instead of
+                the stored ones, e.g. a build decoded from a share link. An
+                unsaved build has no stored items and runs no item query.
+
+        Returns:
+            BuildSnapshot: Build contents with totals and completion computed.
+        """
+        loader = loader or ProductLoader()
+        if items is None:
+            items = [] if self._state.adding else list(self.pcbuilderitem_set.all())
+        loaded = loader.load_many(
+            (item.component_type, item.product_id) for item in items if item.product_id
+        )
+
+        slots = {}
+        products = {}
+        components_price = Decimal("0")
+        peripherals_price = Decimal("0")
+        total_wattage = 0
+        for item in items:
+            product = None
+            if item.product_id:
+                product = loaded.get((item.component_type, item.product_id))
+                if item.component_type in PERIPHERAL_TYPES:
+                    peripherals_price += item.product_price or 0
+                else:
+                    components_price += item.product_price or 0
+                if product is not None:
+                    products[item.component_type] = product
+                    total_wattage += getattr(product, "tdp", 0) or 0
+                else:
+                    total_wattage += item.product_tdp or 0
+            slots[item.component_type] = BuildSlot(
+                item.component_type,
+                item.product_id,
+                item.product_name,
+                item.product_price,
+                item.product_tdp,
+                product,
+            )
+
+        # Slots whose product was deleted count as empty
+        selected = set(products)
+        return BuildSnapshot(
+            build_id=self.pk,
+            slots=MappingProxyType(slots),
+            products=MappingProxyType(products),
+            components_price=components_price,
+            peripherals_price=peripherals_price,
+            total_price=components_price + peripherals_price,
+            total_wattage=total_wattage,
+            recommended_wattage=(
+                total_wattage + WATTAGE_HEADROOM if total_wattage > 0 else 0
+            ),
+            selected_count=len(selected),
+            core_selected_count=len(selected.intersection(CORE_TYPES)),
+            is_buildable=selected.issuperset(BUILDABLE_TYPES),
+            is_complete=selected.issuperset(ESSENTIAL_TYPES),
+        )
+
+    @classmethod
+    def compute_totals(cls, build_id):
+        """Aggregate the totals of a build from its items with one query.
+
+        Args:
+            build_id (UUID): Primary key of the build.
+
+        Returns:
+            dict: Values for every TOTAL_FIELDS column.
+        """
+        totals = PCBuilderItem.objects.filter(
+            pc_builder_id=build_id, product_id__isnull=False
+        ).aggregate(
+            total_price=Sum("product_price"),
+            peripherals_price=Sum(
+                "product_price", filter=Q(component_type__in=PERIPHERAL_TYPES)
+            ),
+            total_tdp=Sum("product_tdp"),
+            item_count=Count("id"),
+            essentials=Count(
+                "component_type",
+                filter=Q(component_type__in=ESSENTIAL_TYPES),
+                distinct=True,
+            ),
+            buildable=Count(
+                "component_type",
+                filter=Q(component_type__in=BUILDABLE_TYPES),
+                distinct=True,
+            ),
+        )
+        return {
+            "total_price": totals["total_price"] or Decimal("0"),
+            "peripherals_price": totals["peripherals_price"] or Decimal("0"),
+            "total_tdp": totals["total_tdp"] or 0,
+            "item_count": totals["item_count"],
+            "has_essentials": totals["essentials"] == len(ESSENTIAL_TYPES),
+            "is_buildable": totals["buildable"] == len(BUILDABLE_TYPES),
+        }
+
+    @classmethod
+    def update_totals_for(cls, build_id):
+        """Recompute and store the denormalized totals of a build.
+
+        The build row is locked first, so concurrent item changes to the
+        same build are folded in one after the other and the last update
+        always sees every committed item.
+
+        Args:
+            build_id (UUID): Primary key of the build.
+
+        Returns:
+            dict: The stored values, or None when the build does not exist.
+        """
+        with transaction.atomic():
+            if not cls.objects.select_for_update().filter(pk=build_id).exists():
+                return None
+            totals = cls.compute_totals(build_id)
+            cls.objects.filter(pk=build_id).update(**totals)
+        return totals
+
+    def update_totals(self):
+        """Recompute the stored totals and refresh them on this instance."""
+        totals = self.update_totals_for(self.pk)
+        for field, value in (totals or {}).items():
+            setattr(self, field, value)
+
     @property
     def get_total_price(self):
-        """Calculate total price of all components in the build.
-
-        Sums up the prices of all components that have been selected
-        for this PC build configuration.
+        """Total price of all components in the build.
 
         Returns:
-            decimal.Decimal: Total price of all components, or 0 if no components.
+            decimal.Decimal: Stored total_price.
         """
-        items = self.pcbuilderitem_set.all()
-        total = sum(item.product_price for item in items if item.product_id)
-        return total
+        return self.total_price
 
     @property
     def get_item_count(self):
-        """Get count of components with products assigned.
-
-        Counts only the components that have actual products selected,
-        not empty component slots.
+        """Count of components with products assigned.
 
         Returns:
-            int: Number of components with products assigned.
+            int: Stored item_count.
         """
-        items = self.pcbuilderitem_set.all()
-        return sum(1 for item in items if item.product_id)
+        return self.item_count
 
     @property
     def get_recommended_wattage(self):
         """Calculate recommended power supply wattage.
 
-        Calculates the total TDP (Thermal Design Power) of all components
-        and adds 100W buffer for safety and future upgrades.
+        Adds a 100W buffer for safety and future upgrades to the stored
+        total TDP.
 
         Returns:
             int: Recommended wattage (total TDP + 100W), or 0 if no components.
         """
-        items = self.pcbuilderitem_set.all()
-        total_tdp = sum(item.product_tdp or 0 for item in items if item.product_id)
-        return total_tdp + 100 if total_tdp > 0 else 0
+        return self.total_tdp + WATTAGE_HEADROOM if self.total_tdp > 0 else 0
 
     @property
     def is_complete(self):
         """Check if all essential components are selected.
 
-        Verifies that the build contains all the essential components
-        needed for a functional PC: CPU, Motherboard, RAM, and Power Supply.
+        The essential components are CPU, Motherboard, RAM and Power Supply.
 
         Returns:
-            bool: True if all essential components are present, False otherwise.
+            bool: Stored has_essentials flag.
         """
-        essential_categories = ["CPU", "Motherboard", "RAM", "Power Supply"]
-        return all(
-            self.pcbuilderitem_set.filter(component_type=category).exists()
-            and self.pcbuilderitem_set.get(component_type=category).product_id
-            is not None
-            for category in essential_categories
-        )
+        return self.has_essentials
 
 
 class PCBuilderItem(models.Model):
@@ -238,3 +505,68 @@ class PCBuilderItem(models.Model):
         preventing duplicate components in a single build.
         """
         unique_together = ("pc_builder", "component_type")
+
+
+@receiver(post_save)
+def sync_compatibility_matrix(sender, instance, **kwargs):
+    """
+    Refresh a saved catalog product in the compatibility matrix.
+    Args:
+        sender (Model): Model class of the saved instance
+        instance (Model): The instance that was saved
+        **kwargs: Additional keyword arguments from the signal
+    Note:
+        The matrix is only updated once the transaction commits, and only
+        in categories it has already loaded; the others read the product
+        when they are first used.
+    """
+    if sender in PRODUCT_CATEGORIES:
+        from .matrix import compatibility_matrix
+
+        transaction.on_commit(lambda: compatibility_matrix.add_product(instance))
+
+
+@receiver(post_delete)
+def remove_from_compatibility_matrix(sender, instance, **kwargs):
+    """
+    Drop a deleted catalog product from the compatibility matrix.
+    Args:
+        sender (Model): Model class of the deleted instance
+        instance (Model): The instance that was deleted
+        **kwargs: Additional keyword arguments from the signal
+    """
+    if sender in PRODUCT_CATEGORIES:
+        from .matrix import compatibility_matrix
+
+        product_id, category = instance.pk, PRODUCT_CATEGORIES[sender]
+        transaction.on_commit(
+            lambda: compatibility_matrix.remove_product(product_id, category)
+        )
+
+
+@receiver(post_save, sender=PCBuilderItem)
+def update_build_totals_on_save(sender, instance, **kwargs):
+    """
+    Refresh the denormalized totals of the build a saved item belongs to.
+    Args:
+        sender (Model): PCBuilderItem
+        instance (PCBuilderItem): The item that was saved
+        **kwargs: Additional keyword arguments from the signal
+    """
+    PCBuilder.update_totals_for(instance.pc_builder_id)
+
+
+@receiver(post_delete, sender=PCBuilderItem)
+def update_build_totals_on_delete(sender, instance, **kwargs):
+    """
+    Refresh the denormalized totals of the build a deleted item belonged to.
+    Args:
+        sender (Model): PCBuilderItem
+        instance (PCBuilderItem): The item that was deleted
+        **kwargs: Additional keyword arguments from the signal
+    Note:
+        Items deleted along with their build are skipped.
+    """
+    if isinstance(kwargs.get("origin"), PCBuilder):
+        return
+    PCBuilder.update_totals_for(instance.pc_builder_id)
@@ -0,0 +1,726 @@
+"""
+PDF quotes for PC builds.
+
+A quote is built in two steps. ``build_quote`` turns a loaded build into a
+``Quote``: plain, picklable data holding everything the document shows.
+``render_quote`` lays that data out with ReportLab. The SHA-256 of the
+quote is its key, so two requests for the same build contents (name,
+product IDs, prices, specifications, compatibility notes and date) share
+one document.
+
+``QuoteRenderer`` keeps rendered documents in a directory on disk, named
+by key, and renders missing ones in a pool of worker processes. Request
+threads only wait a bounded time for a render, so a burst of downloads
+cannot tie up every web worker with ReportLab. Concurrent requests for the
+same key wait on the same render.
+
+Nothing at module level imports Django models, so worker processes can
+import this module without setting up Django.
+
+Classes:
+    Quote: Contents of a build quote
+    QuoteRenderer: Disk cache and process pool for rendered quotes
+
+Functions:
+    build_quote: Describe a loaded build as a Quote
+    quote_key: Content hash of a Quote
+    render_quote: Render a Quote to PDF bytes
+    render_timed: Render a Quote and measure how long it took
+    warm_worker: Process pool initializer that builds the styles
+
+Attributes:
+    quote_renderer (QuoteRenderer): Shared instance
+
+Example:
+    from PCBuilderApp.pdf import build_quote, quote_key, quote_renderer
+
+    quote = build_quote(pc_build, snapshot)
+    future = quote_renderer.submit(quote_key(quote), quote)
+    path = future.result(timeout=3)
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+
+
+# Bump when the layout changes so documents cached by older code are not served
+QUOTE_LAYOUT_VERSION = 1
+
+# Order of the component table rows
+COMPONENT_ORDER = [
+    "CPU",
+    "Cooler",
+    "Motherboard",
+    "RAM",
+    "GPU",
+    "SSD",
+    "HDD",
+    "Power Supply",
+    "Casing",
+    "Monitor",
+    "Keyboard",
+    "Mouse",
+    "Headphone",
+]
+
+ESSENTIAL_COMPONENTS = ["CPU", "Motherboard", "RAM", "Power Supply", "Casing"]
+
+Quote = namedtuple(
+    "Quote",
+    [
+        "title",
+        "name",
+        "generated_on",
+        "total_price",
+        "components",
+        "recommended_wattage",
+        "specs",
+        "issues",
+        "missing",
+        "logo_path",
+    ],
+)
+Quote.__doc__ = """
+Contents of a build quote.
+
+``components`` is a list of (component type, product ID, product name,
+price) tuples in table order; prices are strings so the quote is exact and
+JSON-serializable. ``specs`` holds (label, text) pairs for the performance
+section.
+"""
+
+
+@lru_cache(maxsize=1)
+def find_logo():
+    """
+    Return the path of the TechReform logo, or None if there is none.
+
+    Returns:
+        str: Path of the first logo file found in the static folders.
+    """
+    folders = [os.path.join(settings.BASE_DIR, "static")]
+    if getattr(settings, "STATIC_ROOT", None):
+        folders.append(settings.STATIC_ROOT)
+    for folder in folders:
+        for relative in [
+            ("base", "images", "logo.png"),
+            ("index", "images", "logo.png"),
+            ("index", "img", "logo.png"),
+            ("theme", "img", "logo.png"),
+        ]:
+            path = os.path.join(folder, *relative)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def _with_details(product, details):
+    """Format "Brand Model (detail, detail)" with the non-empty details."""
+    details = [str(detail) for detail in details if detail]
+    text = f"{product.brand} {product.model} "
+    return text + (f"({', '.join(details)})" if details else "")
+
+
+def _specs(components):
+    """Return the (label, text) lines of the performance section."""
+    specs = []
+    if "CPU" in components:
+        cpu = components["CPU"]
+        specs.append(
+            (
+                "Processor",
+                _with_details(
+                    cpu,
+                    [
+                        getattr(cpu, "cores", None) and f"{cpu.cores} cores",
+                        getattr(cpu, "threads", None) and f"{cpu.threads} threads",
+                        getattr(cpu, "boost_frequency", None)
+                        and f"{cpu.boost_frequency} GHz",
+                    ],
+                ),
+            )
+        )
+    if "Cooler" in components:
+        cooler = components["Cooler"]
+        specs.append(("CPU Cooler", f"{cooler.brand} {cooler.model}"))
+    if "Motherboard" in components:
+        mobo = components["Motherboard"]
+        specs.append(
+            (
+                "Motherboard",
+                _with_details(
+                    mobo,
+                    [getattr(mobo, "chipset", None), getattr(mobo, "form_factor", None)],
+                ),
+            )
+        )
+    if "RAM" in components:
+        ram = components["RAM"]
+        specs.append(
+            (
+                "Memory",
+                _with_details(
+                    ram,
+                    [
+                        getattr(ram, "memory_capacity", None),
+                        getattr(ram, "frequency", None),
+                    ],
+                ),
+            )
+        )
+    if "GPU" in components:
+        gpu = components["GPU"]
+        specs.append(
+            ("Graphics", _with_details(gpu, [getattr(gpu, "vram_capacity", None)]))
+        )
+
+    storage = []
+    if "SSD" in components:
+        ssd = components["SSD"]
+        storage.append(
+            _with_details(
+                ssd,
+                [getattr(ssd, "storage_capacity", None), getattr(ssd, "interface", None)],
+            )
+        )
+    if "HDD" in components:
+        hdd = components["HDD"]
+        storage.append(
+            _with_details(
+                hdd, [getattr(hdd, "storage_capacity", None), getattr(hdd, "rpm", None)]
+            )
+        )
+    if storage:
+        specs.append(("Storage", " + ".join(storage)))
+
+    if "Power Supply" in components:
+        psu = components["Power Supply"]
+        specs.append(
+            (
+                "Power Supply",
+                _with_details(
+                    psu,
+                    [
+                        getattr(psu, "wattage", None) and f"{psu.wattage}W",
+                        getattr(psu, "efficiency", None),
+                    ],
+                ),
+            )
+        )
+    if "Casing" in components:
+        case = components["Casing"]
+        specs.append(("Case", f"{case.brand} {case.model}"))
+    return specs
+
+
+def build_quote(pc_build, snapshot, generated_on=None):
+    """
+    Describe a loaded build as a Quote.
+
+    Args:
+        pc_build (PCBuilder): The build, for its name.
+        snapshot (BuildSnapshot): The loaded build.
+        generated_on (date, optional): Date printed on the quote; today by
+            default. It is part of the key, so cached quotes are redone daily.
+
+    Returns:
+        Quote: Contents of the document.
+    """
+    from .compatibility import CompatibilityEngine
+
+    components = snapshot.selected()
+    generated_on = generated_on or date.today()
+    return Quote(
+        title=f"TechReform PC Build - {pc_build.name if pc_build.name else 'Custom Build'}",
+        name=pc_build.name if pc_build.name else "Custom PC Build",
+        generated_on=generated_on.isoformat(),
+        total_price=str(snapshot.total_price),
+        components=[
+            (
+                component_type,
+                str(components[component_type].pk),
+                f"{components[component_type].brand} {components[component_type].model}",
+                str(components[component_type].price)
+                if components[component_type].price
+                else None,
+            )
+            for component_type in COMPONENT_ORDER
+            if component_type in components
+        ],
+        recommended_wattage=snapshot.recommended_wattage,
+        specs=_specs(components),
+        issues=list(CompatibilityEngine(components).check_build()),
+        missing=[name for name in ESSENTIAL_COMPONENTS if name not in components],
+        logo_path=find_logo(),
+    )
+
+
+def quote_key(quote):
+    """
+    Return the content hash of a quote.
+
+    Args:
+        quote (Quote): Quote to hash.
+
+    Returns:
+        str: Hex SHA-256 of the quote and the layout version.
+    """
+    payload = json.dumps(
+        [QUOTE_LAYOUT_VERSION, quote._asdict()], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _styles():
+    """Build the paragraph styles and brand colors once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import mm
+
+    styles = getSampleStyleSheet()
+
+    # TechReform brand colors, matching the website
+    palette = {
+        "blue": colors.HexColor("#0052D4"),  # Primary brand color
+        "light_blue": colors.HexColor("#65A7FB"),  # Secondary brand color
+        "dark": colors.HexColor("#333333"),  # Text color
+        "light_gray": colors.HexColor("#F5F5F5"),  # Background color
+        "accent": colors.HexColor("#FF6B21"),  # Accent/highlight color
+        "success": colors.HexColor("#4CAF50"),  # Success/compatible color
+        "error": colors.HexColor("#D32F2F"),  # Error/warning color
+    }
+
+    # wordWrap="CJK" wraps long component names; allowWidows/allowOrphans=0
+    # keep single words off their own lines
+    return palette, {
+        "title": ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Title"],
+            fontSize=24,
+            alignment=TA_CENTER,
+            spaceAfter=6 * mm,
+            textColor=palette["blue"],
+            fontName="Helvetica-Bold",
+            wordWrap="CJK",
+        ),
+        "subtitle": ParagraphStyle(
+            "CustomSubtitle",
+            parent=styles["Heading2"],
+            fontSize=16,
+            spaceBefore=6 * mm,
+            spaceAfter=3 * mm,
+            textColor=palette["blue"],
+            borderPadding=5,
+            borderWidth=0,
+            borderRadius=3,
+            borderColor=palette["light_blue"],
+            backColor=palette["light_gray"],
+            wordWrap="CJK",
+        ),
+        "normal": ParagraphStyle(
+            "CustomNormal",
+            parent=styles["Normal"],
+            fontSize=10,
+            leading=14,
+            spaceAfter=3 * mm,
+            textColor=palette["dark"],
+            wordWrap="CJK",
+            allowWidows=0,
+            allowOrphans=0,
+        ),
+        "info": ParagraphStyle(
+            "CustomInfo",
+            parent=styles["Normal"],
+            fontSize=10,
+            backColor=colors.HexColor("#E5F3FF"),
+            borderColor=palette["light_blue"],
+            borderWidth=1,
+            borderPadding=8,
+            borderRadius=5,
+            spaceAfter=4 * mm,
+            textColor=palette["dark"],
+            wordWrap="CJK",
+        ),
+        "warning": ParagraphStyle(
+            "CustomWarning",
+            parent=styles["Normal"],
+            fontSize=10,
+            textColor=palette["error"],
+            leftIndent=5 * mm,
+            wordWrap="CJK",
+        ),
+        "compatible": ParagraphStyle(
+            "CustomCompatible",
+            parent=styles["Normal"],
+            fontSize=10,
+            textColor=palette["success"],
+            wordWrap="CJK",
+        ),
+        "footer": ParagraphStyle(
+            "CustomFooter",
+            parent=styles["Normal"],
+            fontSize=8,
+            textColor=colors.gray,
+            alignment=TA_CENTER,
+            fontName="Helvetica-Oblique",
+            wordWrap="CJK",
+        ),
+        "price": ParagraphStyle(
+            "PriceStyle",
+            parent=styles["Normal"],
+            fontSize=14,
+            textColor=palette["accent"],
+            alignment=TA_RIGHT,
+            fontName="Helvetica-Bold",
+            wordWrap="CJK",
+        ),
+        "component": ParagraphStyle(
+            "ComponentStyle",
+            parent=styles["Normal"],
+            fontSize=10,
+            textColor=palette["dark"],
+            wordWrap="CJK",
+            leading=12,
+            allowWidows=0,
+            allowOrphans=0,
+        ),
+    }
+
+
+def _add_page_number(canvas, doc):
+    """Draw the page number in the bottom right corner."""
+    from reportlab.lib import colors
+    from reportlab.lib.units import mm
+
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawRightString(
+        doc.pagesize[0] - 20 * mm, 15 * mm, f"Page {canvas.getPageNumber()}"
+    )
+    canvas.restoreState()
+
+
+def render_quote(quote):
+    """
+    Render a quote as an A4 PDF document.
+
+    Args:
+        quote (Quote): Contents of the document.
+
+    Returns:
+        bytes: The PDF document.
+    """
+    from decimal import Decimal
+
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import (
+        HRFlowable,
+        Image,
+        Paragraph,
+        SimpleDocTemplate,
+        Spacer,
+        Table,
+        TableStyle,
+    )
+
+    palette, styles = _styles()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=15 * mm,
+        leftMargin=15 * mm,
+        topMargin=20 * mm,
+        bottomMargin=20 * mm,
+        title=quote.title,
+    )
+    elements = []
+
+    # Logo, or a text title if there is no logo file
+    if quote.logo_path:
+        logo = Image(quote.logo_path, width=150, height=45)
+        logo.hAlign = "CENTER"
+        elements.append(logo)
+    else:
+        elements.append(Paragraph("TechReform BD", styles["title"]))
+    elements.append(Spacer(1, 5 * mm))
+    elements.append(
+        HRFlowable(
+            width="100%",
+            thickness=1,
+            color=palette["blue"],
+            spaceBefore=2 * mm,
+            spaceAfter=5 * mm,
+        )
+    )
+
+    # Build title, date and total price
+    generated_on = date.fromisoformat(quote.generated_on)
+    elements.append(Paragraph(quote.name, styles["title"]))
+    elements.append(
+        Paragraph(
+            f"Generated on: {generated_on.strftime('%B %d, %Y')}", styles["normal"]
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total Price: {Decimal(quote.total_price):,.2f} Tk", styles["price"]
+        )
+    )
+    elements.append(Spacer(1, 3 * mm))
+
+    # Component table
+    table_data = [["Component", "Specification", "Price"]]
+    for component_type, _, name, price in quote.components:
+        table_data.append(
+            [
+                component_type,
+                Paragraph(name, styles["component"]),
+                f"{Decimal(price):,.2f} Tk" if price else "N/A",
+            ]
+        )
+    # Widths in points, with most of the space for the component name
+    components_table = Table(table_data, colWidths=[75, 285, 70], repeatRows=1)
+    components_table.setStyle(
+        TableStyle(
+            [
+                # Header row
+                ("BACKGROUND", (0, 0), (-1, 0), palette["blue"]),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                # Alternate row colors for better readability
+                ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+                (
+                    "ROWBACKGROUNDS",
+                    (0, 1),
+                    (-1, -1),
+                    [colors.white, palette["light_gray"]],
+                ),
+                # Borders
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+                ("BOX", (0, 0), (-1, -1), 1, palette["light_blue"]),
+                # Text alignment
+                ("ALIGN", (0, 0), (0, -1), "LEFT"),
+                ("ALIGN", (2, 0), (2, -1), "RIGHT"),
+                ("VALIGN", (1, 1), (1, -1), "TOP"),
+                # Padding
+                ("TOPPADDING", (0, 0), (-1, -1), 8),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+            ]
+        )
+    )
+    elements.append(Spacer(1, 5 * mm))
+    elements.append(Paragraph("System Components", styles["subtitle"]))
+    elements.append(Spacer(1, 2 * mm))
+    elements.append(components_table)
+    elements.append(Spacer(1, 5 * mm))
+
+    # Power consumption and system specifications
+    elements.append(
+        Paragraph(
+            f"<b>Estimated Power Consumption:</b> {quote.recommended_wattage}W",
+            styles["info"],
+        )
+    )
+    elements.append(Paragraph("System Performance", styles["subtitle"]))
+    if quote.specs:
+        specs_text = "".join(f"<b>{label}:</b> {text}<br/>" for label, text in quote.specs)
+        elements.append(Paragraph(specs_text, styles["normal"]))
+
+    # Compatibility analysis
+    elements.append(Paragraph("Compatibility Analysis", styles["subtitle"]))
+    if quote.issues:
+        for issue in quote.issues:
+            elements.append(Paragraph(f"⚠️ {issue}", styles["warning"]))
+    else:
+        elements.append(
+            Paragraph("✅ All components are compatible.", styles["compatible"])
+        )
+
+    # Recommendations for missing essential components
+    if quote.missing:
+        elements.append(Spacer(1, 5 * mm))
+        elements.append(Paragraph("Build Recommendations", styles["subtitle"]))
+        recommendations = "To complete your build, consider adding the following essential components:<br/>"
+        for missing in quote.missing:
+            recommendations += f"• {missing}<br/>"
+        elements.append(Paragraph(recommendations, styles["normal"]))
+
+    # Footer
+    elements.append(Spacer(1, 10 * mm))
+    elements.append(
+        HRFlowable(
+            width="100%",
+            thickness=1,
+            color=colors.lightgrey,
+            spaceBefore=2 * mm,
+            spaceAfter=5 * mm,
+        )
+    )
+    footer_text = f"© {generated_on.year} TechReform BD • www.techreformbd.com • All prices valid at time of generation"
+    elements.append(Paragraph(footer_text, styles["footer"]))
+
+    doc.build(elements, onFirstPage=_add_page_number, onLaterPages=_add_page_number)
+    return buffer.getvalue()
+
+
+def warm_worker():
+    """Build the styles and load the fonts before a worker's first render."""
+    render_quote(Quote("", "", date.today().isoformat(), "0", [], 0, [], [], [], None))
+
+
+def render_timed(quote):
+    """
+    Render a quote and measure how long it took.
+
+    Args:
+        quote (Quote): Contents of the document.
+
+    Returns:
+        tuple: (PDF bytes, render time in seconds).
+    """
+    started = time.perf_counter()
+    pdf = render_quote(quote)
+    return pdf, time.perf_counter() - started
+
+
+def _render_to_file(quote, path):
+    """Render a quote into ``path``; runs in a worker process."""
+    pdf = render_quote(quote)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write under a temporary name and rename, so readers never see half a file
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(pdf)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+
+class QuoteRenderer:
+    """
+    Rendered quotes on disk, with a process pool for the missing ones.
+
+    Documents live in ``settings.BUILD_PDF_CACHE_DIR`` as
+    ``<key[:2]>/<key>.pdf``. The pool has ``settings.BUILD_PDF_WORKERS``
+    processes and is started on first use. Workers are spawned rather than
+    forked, since the web process may be running other threads.
+
+    Methods:
+        path(key): File a quote is stored in.
+        cached(key): That file, if the quote has been rendered.
+        submit(key, quote): Future resolving to the file of a quote.
+        shutdown(): Stop the worker processes.
+    """
+
+    def __init__(self, directory=None, max_workers=None):
+        self._directory = directory
+        self._max_workers = max_workers
+        self._lock = threading.RLock()
+        self._executor = None
+        self._pending = {}
+
+    @property
+    def directory(self):
+        return self._directory or getattr(
+            settings,
+            "BUILD_PDF_CACHE_DIR",
+            os.path.join(settings.BASE_DIR, "var", "build-pdfs"),
+        )
+
+    def path(self, key):
+        """
+        Return the file a quote is stored in.
+
+        Args:
+            key (str): Key from quote_key().
+
+        Returns:
+            str: Path of the PDF file.
+        """
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def cached(self, key):
+        """
+        Return the file of a rendered quote.
+
+        Args:
+            key (str): Key from quote_key().
+
+        Returns:
+            str: Path of the PDF file, or None if it was not rendered yet.
+        """
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def _pool(self):
+        if self._executor is None:
+            workers = self._max_workers or getattr(settings, "BUILD_PDF_WORKERS", 2)
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, key, quote):
+        """
+        Render a quote in a worker process unless it is already on disk.
+
+        Args:
+            key (str): Key from quote_key().
+            quote (Quote): Contents of the document.
+
+        Returns:
+            Future: Resolves to the path of the PDF file.
+        """
+        path = self.cached(key)
+        if path is not None:
+            future = Future()
+            future.set_result(path)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pool().submit(_render_to_file, quote, self.path(key))
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+            return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def shutdown(self):
+        """Stop the worker processes; the pool restarts on the next submit."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+quote_renderer = QuoteRenderer()
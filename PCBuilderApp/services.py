@@ -0,0 +1,250 @@
+"""
+Set-based build mutations for the PCBuilderApp.
+
+Every operation that touches many component slots at once runs a constant
+number of queries inside one transaction, whatever the size of the build:
+slot initialization is a single ``INSERT ... ON CONFLICT DO NOTHING``,
+clearing is one ``UPDATE``, copying a build is one ``bulk_create``, and
+moving a build into the cart is an upsert (one ``UPDATE`` for products
+already in the cart, one ``bulk_create`` for the rest). Moving a build into
+the cart also holds the stock of its products like every other cart entry
+point, which reads each product row once (CartApp.reservations).
+
+Bulk writes bypass the PCBuilderItem signals, so every function here keeps
+the denormalized PCBuilder totals current itself.
+
+Functions:
+    initialize_slots: Create the missing empty slots of a build
+    assign_slots: Set or clear several slots at once
+    clear_build: Empty every slot of a build
+    copy_build: Save a build's selected components as a new build
+    load_build: Replace a build's components with another build's
+    add_build_to_cart: Add the selected components of a build to a cart
+
+Example:
+    from PCBuilderApp import services
+
+    saved = services.copy_build(current, user=request.user, name="Gaming rig")
+    services.load_build(saved, current)
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PCBuilder, PCBuilderItem
+
+
+# The PCBuilderItem columns that describe the selected product
+ITEM_FIELDS = ("product_id", "product_name", "product_price", "product_tdp")
+
+SlotValue = namedtuple("SlotValue", ITEM_FIELDS)
+SlotValue.__doc__ = """
+Product details stored in a build slot.
+"""
+
+EMPTY_TOTALS = {
+    "total_price": Decimal("0"),
+    "peripherals_price": Decimal("0"),
+    "total_tdp": 0,
+    "item_count": 0,
+    "has_essentials": False,
+    "is_buildable": False,
+}
+
+
+def initialize_slots(pc_build):
+    """
+    Create an empty slot for every component type the build lacks.
+
+    A single insert that skips existing (pc_builder, component_type) rows,
+    so concurrent first requests cannot create duplicates or fail.
+
+    Args:
+        pc_build (PCBuilder): Build to initialize.
+    """
+    PCBuilderItem.objects.bulk_create(
+        [
+            PCBuilderItem(pc_builder=pc_build, component_type=component_type)
+            for component_type, _ in PCBuilderItem.COMPONENT_CHOICES
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def assign_slots(pc_build, values):
+    """
+    Set or clear several slots of a build at once.
+
+    Args:
+        pc_build (PCBuilder): Build to change.
+        values (dict): Component type -> SlotValue, or None to clear the
+            slot. Slots not mentioned are left alone.
+    """
+    with transaction.atomic():
+        items = {
+            item.component_type: item
+            for item in PCBuilderItem.objects.select_for_update().filter(
+                pc_builder=pc_build, component_type__in=list(values)
+            )
+        }
+        changed, missing = [], []
+        for component_type, value in values.items():
+            item = items.get(component_type)
+            if item is None:
+                item = PCBuilderItem(pc_builder=pc_build, component_type=component_type)
+                missing.append(item)
+            else:
+                changed.append(item)
+            for field in ITEM_FIELDS:
+                setattr(item, field, getattr(value, field) if value else None)
+        if changed:
+            PCBuilderItem.objects.bulk_update(changed, ITEM_FIELDS)
+        if missing:
+            PCBuilderItem.objects.bulk_create(missing)
+        pc_build.update_totals()
+
+
+def clear_build(pc_build):
+    """
+    Empty every slot of a build, keeping the slots themselves.
+
+    Args:
+        pc_build (PCBuilder): Build to clear.
+    """
+    with transaction.atomic():
+        PCBuilderItem.objects.filter(pc_builder=pc_build).update(
+            **dict.fromkeys(ITEM_FIELDS)
+        )
+        PCBuilder.objects.filter(pk=pc_build.pk).update(**EMPTY_TOTALS)
+    for field, value in EMPTY_TOTALS.items():
+        setattr(pc_build, field, value)
+
+
+def copy_build(source, **fields):
+    """
+    Save the selected components of a build as a new build.
+
+    Args:
+        source (PCBuilder): Build to copy.
+        **fields: Field values of the new build, e.g. user and name.
+
+    Returns:
+        PCBuilder: The new build.
+    """
+    with transaction.atomic():
+        items = list(
+            PCBuilderItem.objects.filter(pc_builder=source, product_id__isnull=False)
+        )
+        saved = PCBuilder.objects.create(**fields)
+        PCBuilderItem.objects.bulk_create(
+            PCBuilderItem(
+                pc_builder=saved,
+                component_type=item.component_type,
+                **{field: getattr(item, field) for field in ITEM_FIELDS},
+            )
+            for item in items
+        )
+        saved.update_totals()
+    return saved
+
+
+def load_build(source, target):
+    """
+    Replace the components of a build with those of another build.
+
+    Args:
+        source (PCBuilder): Build to load, e.g. a saved build.
+        target (PCBuilder): Build to overwrite, e.g. the current build.
+    """
+    values = {
+        component_type: None for component_type, _ in PCBuilderItem.COMPONENT_CHOICES
+    }
+    for item in PCBuilderItem.objects.filter(pc_builder=source, product_id__isnull=False):
+        values[item.component_type] = SlotValue(
+            *(getattr(item, field) for field in ITEM_FIELDS)
+        )
+    assign_slots(target, values)
+
+
+def add_build_to_cart(snapshot, cart):
+    """
+    Add the selected components of a build to a cart.
+
+    Components already in the cart get their quantity raised by one with a
+    single UPDATE; the others are inserted with one bulk_create. The cart
+    row is locked for the duration, so concurrent transfers into the same
+    cart cannot insert the same product twice. The cart's new quantities
+    are held with CartApp.reservations.hold_cart first, so either every
+    component is added and held or, if one is short, nothing changes.
+
+    Args:
+        snapshot (BuildSnapshot): Loaded build; slots whose product no
+            longer exists are skipped.
+        cart (Cart): Cart to add to.
+
+    Returns:
+        int: Number of components added.
+
+    Raises:
+        OutOfStock: A component has less available stock than the cart
+            would then hold.
+    """
+    from CartApp.models import Cart, CartItem
+    from CartApp.reservations import hold_cart
+
+    slots = [
+        slot
+        for slot in snapshot.slots.values()
+        if slot.product_id and slot.product is not None
+    ]
+    if not slots:
+        return 0
+
+    def matching(keys):
+        condition = Q()
+        for product_id, category in keys:
+            condition |= Q(product_id=product_id, product_category=category)
+        return CartItem.objects.filter(condition, cart=cart)
+
+    keys = {(slot.product_id, slot.component_type) for slot in slots}
+    with transaction.atomic():
+        Cart.objects.select_for_update().filter(pk=cart.pk).exists()
+        in_cart = {
+            (product_id, category): quantity
+            for product_id, category, quantity in matching(keys).values_list(
+                "product_id", "product_category", "quantity"
+            )
+        }
+        hold_cart(
+            cart,
+            [
+                (category, product_id, in_cart.get((product_id, category), 0) + 1)
+                for product_id, category in keys
+            ],
+            replace=False,
+        )
+        existing = set(in_cart)
+        if existing:
+            matching(existing).update(
+                quantity=F("quantity") + 1, updated_at=timezone.now()
+            )
+        CartItem.objects.bulk_create(
+            CartItem(
+                cart=cart,
+                product_id=slot.product_id,
+                product_category=slot.component_type,
+                quantity=1,
+                price=(
+                    slot.product_price
+                    if slot.product_price is not None
+                    else slot.product.price
+                ),
+            )
+            for slot in slots
+            if (slot.product_id, slot.component_type) not in existing
+        )
+    return len(slots)
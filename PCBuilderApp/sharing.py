@@ -0,0 +1,193 @@
+"""
+Stateless share links for PC builds.
+
+A share token carries the build itself: the (component type, product ID)
+pairs of its selected components, packed into bytes, signed and written
+in base62 so the token fits in a URL path without escaping. Opening a
+share link decodes the token and loads the products in one batch, one
+query per category. It creates no PCBuilder or PCBuilderItem rows. The
+rows are only written when the visitor forks the build into their own.
+
+Token layout, before base62:
+
+    version (1 byte) | (type index (1 byte), product UUID (16 bytes))* | MAC
+
+The type index is the position of the component type in
+PCBuilderItem.COMPONENT_CHOICES, and the MAC is a truncated HMAC of the
+rest keyed by SECRET_KEY. The leading version byte is never zero, so the
+base62 integer keeps every byte. Tokens of an unknown version, with a bad
+MAC or with an unknown type index raise ``signing.BadSignature``.
+
+Functions:
+    encode_build: Token for a list of (component type, product ID) pairs
+    decode_build: The pairs of a token
+    share_token: Token for a loaded build
+    shared_snapshot: Read-only BuildSnapshot of a token
+
+Example:
+    from PCBuilderApp.sharing import share_token, shared_snapshot
+
+    token = share_token(pc_build.snapshot())
+    snapshot = shared_snapshot(token, loader=get_product_loader(request))
+"""
+
+import uuid
+
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from ProductsApp.catalog import ProductLoader
+
+from .models import PCBuilder, PCBuilderItem
+
+
+TOKEN_VERSION = 1
+
+# Bytes of HMAC kept in a token; 64 bits is plenty against guessing
+MAC_SIZE = 8
+
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_DIGITS = {character: value for value, character in enumerate(ALPHABET)}
+
+COMPONENT_TYPES = [
+    component_type for component_type, _ in PCBuilderItem.COMPONENT_CHOICES
+]
+_TYPE_INDEXES = {
+    component_type: index for index, component_type in enumerate(COMPONENT_TYPES)
+}
+
+_SALT = "PCBuilderApp.sharing"
+
+
+def _base62(data):
+    """Encode bytes whose first byte is non-zero as base62."""
+    number = int.from_bytes(data, "big")
+    digits = []
+    while number:
+        number, digit = divmod(number, 62)
+        digits.append(ALPHABET[digit])
+    return "".join(reversed(digits))
+
+
+def _unbase62(text):
+    """Decode base62 into bytes, or raise BadSignature."""
+    number = 0
+    for character in text:
+        digit = _DIGITS.get(character)
+        if digit is None:
+            raise signing.BadSignature("Share token contains an invalid character")
+        number = number * 62 + digit
+    return number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+def _mac(payload):
+    return salted_hmac(_SALT, payload, algorithm="sha256").digest()[:MAC_SIZE]
+
+
+def encode_build(components):
+    """
+    Encode the components of a build as a share token.
+
+    Args:
+        components (iterable): (component type, product ID) pairs. Product
+            IDs may be UUIDs or strings.
+
+    Returns:
+        str: Signed base62 token.
+    """
+    payload = bytearray([TOKEN_VERSION])
+    for component_type, product_id in sorted(
+        components, key=lambda pair: _TYPE_INDEXES[pair[0]]
+    ):
+        payload.append(_TYPE_INDEXES[component_type])
+        payload += uuid.UUID(str(product_id)).bytes
+    return _base62(bytes(payload) + _mac(bytes(payload)))
+
+
+def decode_build(token):
+    """
+    Decode a share token.
+
+    Args:
+        token (str): Token from encode_build().
+
+    Returns:
+        list: (component type, product UUID) pairs.
+
+    Raises:
+        signing.BadSignature: The token is malformed, of an unknown version
+            or was not signed with this site's SECRET_KEY.
+    """
+    data = _unbase62(token)
+    payload, mac = data[:-MAC_SIZE], data[-MAC_SIZE:]
+    if not payload or not constant_time_compare(mac, _mac(payload)):
+        raise signing.BadSignature("Share token signature does not match")
+    if payload[0] != TOKEN_VERSION or (len(payload) - 1) % 17:
+        raise signing.BadSignature("Unsupported share token")
+
+    components = []
+    for offset in range(1, len(payload), 17):
+        index = payload[offset]
+        if index >= len(COMPONENT_TYPES):
+            raise signing.BadSignature("Share token names an unknown component")
+        product_id = uuid.UUID(bytes=payload[offset + 1 : offset + 17])
+        components.append((COMPONENT_TYPES[index], product_id))
+    return components
+
+
+def share_token(snapshot):
+    """
+    Return the share token of a loaded build.
+
+    Args:
+        snapshot (BuildSnapshot): The build; only components whose product
+            still exists are shared.
+
+    Returns:
+        str: Signed base62 token.
+    """
+    return encode_build(
+        (component_type, product.pk)
+        for component_type, product in snapshot.products.items()
+    )
+
+
+def shared_snapshot(token, loader=None):
+    """
+    Load the build in a share token without touching any build rows.
+
+    Products are loaded in one batch and priced at their current price;
+    components whose product no longer exists are left out.
+
+    Args:
+        token (str): Token from share_token().
+        loader (ProductLoader, optional): Loader used to fetch products,
+            typically the one bound to the current request.
+
+    Returns:
+        BuildSnapshot: Read-only build whose build_id is None.
+
+    Raises:
+        signing.BadSignature: The token is invalid.
+    """
+    loader = loader or ProductLoader()
+    components = decode_build(token)
+    products = loader.load_many(components)
+
+    build = PCBuilder(id=None)
+    items = []
+    for component_type, product_id in components:
+        product = products.get((component_type, product_id))
+        if product is None:
+            continue
+        items.append(
+            PCBuilderItem(
+                pc_builder=build,
+                component_type=component_type,
+                product_id=product.pk,
+                product_name=f"{product.brand} {product.model}",
+                product_price=product.price,
+                product_tdp=getattr(product, "tdp", None),
+            )
+        )
+    return build.snapshot(loader=loader, items=items)
@@ -1,3 +1,1201 @@
-from django.test import TestCase
+"""
+Test cases for PCBuilderApp.
 
-# Create your tests here.
+Compatibility rule engine:
+    Checks every declared rule in both directions, the whole-build check,
+    and that evaluating a 10k candidate list stays fast. Set
+    COMPATIBILITY_BENCHMARK=1 to print the evaluation times.
+
+    The ORM form of the rules is checked against the Python evaluation on
+    seeded products: both must select exactly the same candidates.
+
+Compatibility matrix:
+    The class bitsets must select the same candidates as the engine's pair
+    rules, and follow product saves and deletes without a reload: once the
+    transaction commits in the same process, and through the periodic
+    refresh for deletes and bulk inserts made by other processes.
+
+Build totals:
+    The denormalized totals on PCBuilder follow item saves, deletes and
+    bulk clears, and a saved-build list reads them with a single query.
+
+Build services:
+    Slot initialization, clearing, copying and moving a build into the cart
+    run the same number of queries for a one-part build as for a full one,
+    and the cart transfer raises the quantity of products already in it,
+    holds the stock of every component and adds nothing when one is short.
+    A snapshot, and the builder page showing it, take one query per
+    category of selected products on top of a fixed number; the page only
+    writes slots when the build lacks some.
+
+Share links:
+    Tokens round-trip and reject tampering; opening a share link creates no
+    build rows, and forking copies the components into the current build.
+
+PDF quotes:
+    A quote's key follows the build contents, the export serves the cached
+    document with an ETag and answers a matching If-None-Match with 304, and
+    a render that takes longer than BUILD_PDF_WAIT answers 202 until done.
+    render_build_quotes writes one quote per selected build, into a zip
+    archive or a directory, and reports the render time of each.
+
+Automatic builds:
+    The branch-and-bound search must find the same best score as trying
+    every combination of a small catalog, and its builds must pass the rule
+    engine. Candidate tables follow product saves, deletes and sell-outs
+    without a full reload. AUTOBUILD_SEED_SIZE sets the products per
+    category of the timing test (default 1000), which times warm searches
+    and the first search after a product save and a checkout;
+    COMPATIBILITY_BENCHMARK=1 prints the times.
+"""
+
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from decimal import Decimal
+from io import StringIO
+
+from django.db import connection
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ProductsApp.caching import catalog_cache
+from ProductsApp.inventory import OutOfStock, decrement_stock
+from CartApp.models import Cart, CartItem
+from CartApp.reservations import hold
+from ProductsApp.models import (
+    PRODUCT_MODELS,
+    CPU,
+    HDD,
+    RAM,
+    SSD,
+    Casing,
+    Cooler,
+    GPU,
+    Motherboard,
+    PowerSupply,
+)
+
+from .autobuild import (
+    CANDIDATE_FIELDS,
+    AutoBuilder,
+    apply_auto_build,
+    candidate_catalog,
+)
+from .compatibility import POWER_HEADROOM, CompatibilityEngine, annotate
+from .matrix import CompatibilityMatrix
+from . import services
+from .models import PCBuilder, PCBuilderItem
+from .pdf import build_quote, quote_key, quote_renderer
+from .sharing import decode_build, encode_build, share_token
+
+
+BENCHMARK = os.environ.get("COMPATIBILITY_BENCHMARK") == "1"
+AUTOBUILD_SEED_SIZE = int(os.environ.get("AUTOBUILD_SEED_SIZE", "1000"))
+
+SOCKETS = ["LGA 1200", "LGA 1700", "LGA 1851", "AM4", "AM5", "TR4"]
+RAM_TYPES = ["DDR3", "DDR4", "DDR5"]
+FORM_FACTORS = ["ATX", "Micro-ATX", "Mini-ITX", "E-ATX"]
+
+
+def make(model, **fields):
+    """Build an unsaved product with a price."""
+    return model(brand="Test", model="Part", price=Decimal("1000"), **fields)
+
+
+class CompatibilityEngineTests(SimpleTestCase):
+    """
+    Rule engine behaviour over unsaved product instances.
+    """
+
+    def test_socket_rule_both_directions(self):
+        cpu = make(CPU, socket="AM5", tdp=105)
+        board = make(Motherboard, socket="AM4", memory_type="DDR4")
+
+        self.assertEqual(
+            CompatibilityEngine({"Motherboard": board}).check("CPU", cpu),
+            ["Socket mismatch: CPU uses AM5 but motherboard has AM4"],
+        )
+        self.assertEqual(
+            CompatibilityEngine({"CPU": cpu}).check("Motherboard", board),
+            ["Socket mismatch: Motherboard has AM4 but CPU uses AM5"],
+        )
+
+    def test_memory_type_rule(self):
+        board = make(Motherboard, socket="AM5", memory_type="DDR5")
+        engine = CompatibilityEngine({"Motherboard": board})
+
+        issues = engine.evaluate(
+            "RAM", [make(RAM, ram_type="DDR5"), make(RAM, ram_type="DDR4")]
+        )
+
+        self.assertEqual(issues[0], [])
+        self.assertEqual(
+            issues[1],
+            ["Memory type mismatch: RAM is DDR4 but motherboard supports DDR5"],
+        )
+
+    def test_form_factor_rule_uses_supported_sizes(self):
+        engine = CompatibilityEngine({"Casing": make(Casing, form_factor="ATX")})
+
+        issues = engine.evaluate(
+            "Motherboard",
+            [
+                make(Motherboard, form_factor="Micro-ATX"),
+                make(Motherboard, form_factor="Mini-ITX"),
+                make(Motherboard, form_factor="E-ATX"),
+            ],
+        )
+
+        self.assertEqual(issues[:2], [[], []])
+        self.assertEqual(
+            issues[2],
+            ["Form factor mismatch: Motherboard is E-ATX but case supports ATX"],
+        )
+
+    def test_cooler_socket_support(self):
+        engine = CompatibilityEngine({"CPU": make(CPU, socket="LGA 1700")})
+
+        issues = engine.evaluate(
+            "Cooler",
+            [
+                make(Cooler, socket_support="AM4, AM5, LGA1700"),
+                make(Cooler, socket_support="AM4, AM5"),
+            ],
+        )
+
+        self.assertEqual(issues[0], [])
+        self.assertEqual(
+            issues[1],
+            ["Socket mismatch: Cooler supports AM4, AM5 but CPU uses LGA 1700"],
+        )
+
+    def test_power_supply_wattage(self):
+        engine = CompatibilityEngine(
+            {"CPU": make(CPU, tdp=125), "GPU": make(GPU, tdp=285)}
+        )
+
+        issues = engine.evaluate(
+            "Power Supply",
+            [make(PowerSupply, wattage=650), make(PowerSupply, wattage=450)],
+        )
+
+        self.assertEqual(issues[0], [])
+        self.assertEqual(
+            issues[1],
+            [
+                "Insufficient wattage: Your components need at least 510W, "
+                "but this PSU provides 450W"
+            ],
+        )
+
+    def test_candidate_exceeding_selected_power_supply(self):
+        engine = CompatibilityEngine(
+            {"CPU": make(CPU, tdp=125), "Power Supply": make(PowerSupply, wattage=550)}
+        )
+
+        issues = engine.evaluate("GPU", [make(GPU, tdp=200), make(GPU, tdp=450)])
+
+        self.assertEqual(issues[0], [])
+        self.assertEqual(len(issues[1]), 1)
+        self.assertIn("550W", issues[1][0])
+
+    def test_check_build_reports_each_rule_once(self):
+        engine = CompatibilityEngine(
+            {
+                "CPU": make(CPU, socket="AM5", tdp=105),
+                "Motherboard": make(
+                    Motherboard, socket="AM4", memory_type="DDR4", form_factor="ATX"
+                ),
+                "RAM": make(RAM, ram_type="DDR4"),
+                "Casing": make(Casing, form_factor="Mini-ITX"),
+                "Power Supply": make(PowerSupply, wattage=150),
+            }
+        )
+
+        issues = engine.check_build()
+
+        self.assertEqual(len(issues), 3)
+        self.assertTrue(issues[0].startswith("Socket mismatch: CPU uses AM5"))
+        self.assertTrue(issues[1].startswith("Form factor mismatch"))
+        self.assertTrue(issues[2].startswith("Insufficient wattage"))
+        self.assertEqual(len(engine.check_build(include_power=False)), 2)
+
+    def test_annotate(self):
+        engine = CompatibilityEngine({"CPU": make(CPU, socket="AM5")})
+        boards = [make(Motherboard, socket="AM5"), make(Motherboard, socket="AM4")]
+
+        annotate(boards, engine.evaluate("Motherboard", boards))
+
+        self.assertTrue(boards[0].is_compatible)
+        self.assertFalse(boards[1].is_compatible)
+        self.assertEqual(len(boards[1].compatibility_issues), 1)
+
+    def test_evaluate_10k_candidates(self):
+        rng = random.Random(12)
+        selected = {
+            "CPU": make(CPU, socket="AM5", tdp=105),
+            "RAM": make(RAM, ram_type="DDR5"),
+            "Casing": make(Casing, form_factor="Micro-ATX"),
+            "Power Supply": make(PowerSupply, wattage=750),
+        }
+        boards = [
+            make(
+                Motherboard,
+                socket=rng.choice(SOCKETS),
+                memory_type=rng.choice(RAM_TYPES),
+                form_factor=rng.choice(FORM_FACTORS),
+                tdp=rng.randrange(10, 80),
+            )
+            for _ in range(10000)
+        ]
+
+        started = time.perf_counter()
+        issues = CompatibilityEngine(selected).evaluate("Motherboard", boards)
+        elapsed = time.perf_counter() - started
+
+        if BENCHMARK:
+            print(f"\n{elapsed * 1000:8.2f} ms  10k motherboards")
+
+        self.assertEqual(len(issues), len(boards))
+        for board, board_issues in zip(boards[:500], issues):
+            expected = (
+                (board.socket != "AM5")
+                + (board.memory_type != "DDR5")
+                + (board.form_factor not in ("Micro-ATX", "Mini-ITX"))
+            )
+            self.assertEqual(len(board_issues), expected)
+        # Generous bound: the column-wise pass takes a few milliseconds
+        self.assertLess(elapsed, 0.5)
+
+
+def seed_catalog():
+    """Create random CPUs, motherboards, cases, coolers and power supplies."""
+    rng = random.Random(13)
+    CPU.objects.bulk_create(
+        make(CPU, socket=rng.choice(SOCKETS), tdp=rng.choice([None, 65, 125, 250]))
+        for _ in range(200)
+    )
+    Motherboard.objects.bulk_create(
+        make(
+            Motherboard,
+            socket=rng.choice(SOCKETS),
+            memory_type=rng.choice(RAM_TYPES),
+            form_factor=rng.choice(FORM_FACTORS),
+        )
+        for _ in range(200)
+    )
+    Casing.objects.bulk_create(
+        make(Casing, form_factor=rng.choice(FORM_FACTORS)) for _ in range(100)
+    )
+    Cooler.objects.bulk_create(
+        make(Cooler, socket_support=", ".join(rng.sample(SOCKETS + ["LGA1700"], 3)))
+        for _ in range(100)
+    )
+    PowerSupply.objects.bulk_create(
+        make(PowerSupply, wattage=rng.choice([None, 300, 450, 650, 850]))
+        for _ in range(100)
+    )
+
+
+class CompatibleFilterTests(TestCase):
+    """
+    compatible_filter() selects the products evaluate() finds no issues with.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog()
+
+    def assertFilterMatchesEvaluate(self, engine, candidate_type, model):
+        products = list(model.objects.all())
+        issues = engine.evaluate(candidate_type, products)
+        expected = {
+            product.pk
+            for product, product_issues in zip(products, issues)
+            if not product_issues
+        }
+        selected = set(
+            model.objects.filter(
+                engine.compatible_filter(candidate_type, model)
+            ).values_list("pk", flat=True)
+        )
+        self.assertEqual(selected, expected)
+        self.assertTrue(0 < len(expected) < len(products))
+
+    def test_filters_match_evaluation(self):
+        engine = CompatibilityEngine(
+            {
+                "CPU": make(CPU, socket="LGA 1700", tdp=125),
+                "Motherboard": make(
+                    Motherboard,
+                    socket="LGA 1700",
+                    memory_type="DDR5",
+                    form_factor="Micro-ATX",
+                ),
+                "GPU": make(GPU, tdp=220),
+                "Power Supply": make(PowerSupply, wattage=650),
+            }
+        )
+
+        self.assertFilterMatchesEvaluate(engine, "Casing", Casing)
+        self.assertFilterMatchesEvaluate(engine, "Cooler", Cooler)
+        self.assertFilterMatchesEvaluate(engine, "Power Supply", PowerSupply)
+
+        engine = CompatibilityEngine(
+            {
+                "Motherboard": make(Motherboard, socket="AM5", memory_type="DDR5"),
+                "Casing": make(Casing, form_factor="ATX"),
+                "Cooler": make(Cooler, socket_support="AM4, AM5, LGA1700"),
+                "Power Supply": make(PowerSupply, wattage=450),
+            }
+        )
+
+        self.assertFilterMatchesEvaluate(engine, "CPU", CPU)
+        self.assertFilterMatchesEvaluate(engine, "Motherboard", Motherboard)
+
+
+class CompatibilityMatrixTests(TestCase):
+    """
+    CompatibilityMatrix agrees with evaluate() on the class-based rules.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog()
+
+    def setUp(self):
+        self.matrix = CompatibilityMatrix()
+
+    def assertMatrixMatchesEvaluate(self, selected, candidate_type, model):
+        # No power supply is selected: the power rule is not part of the matrix
+        products = list(model.objects.filter(is_available=True))
+        issues = CompatibilityEngine(selected).evaluate(candidate_type, products)
+        expected = {
+            product.pk
+            for product, product_issues in zip(products, issues)
+            if not product_issues
+        }
+        self.assertEqual(
+            set(self.matrix.valid_ids(candidate_type, selected)), expected
+        )
+        self.assertEqual(self.matrix.count(candidate_type, selected), len(expected))
+        self.assertTrue(0 < len(expected) < len(products))
+
+    def test_matrix_matches_evaluation(self):
+        selected = {
+            "CPU": make(CPU, socket="LGA 1700", tdp=125),
+            "Motherboard": make(
+                Motherboard, socket="LGA 1700", memory_type="DDR5", form_factor="Micro-ATX"
+            ),
+        }
+        self.assertMatrixMatchesEvaluate(selected, "Casing", Casing)
+        self.assertMatrixMatchesEvaluate(selected, "Cooler", Cooler)
+
+        selected = {
+            "Motherboard": make(Motherboard, socket="AM5", memory_type="DDR5"),
+            "Casing": make(Casing, form_factor="ATX"),
+            "Cooler": make(Cooler, socket_support="AM4, AM5, LGA1700"),
+        }
+        self.assertMatrixMatchesEvaluate(selected, "CPU", CPU)
+        self.assertMatrixMatchesEvaluate(selected, "Motherboard", Motherboard)
+
+    def test_incremental_updates(self):
+        selected = {"CPU": make(CPU, socket="TR4")}
+        before = set(self.matrix.valid_ids("Motherboard", selected))
+
+        board = Motherboard.objects.create(
+            brand="Test", model="New", price=Decimal("1000"), socket="TR4"
+        )
+        self.matrix.add_product(board)
+        self.assertEqual(
+            set(self.matrix.valid_ids("Motherboard", selected)), before | {board.pk}
+        )
+
+        board.socket = "AM5"
+        self.matrix.add_product(board)
+        self.assertEqual(set(self.matrix.valid_ids("Motherboard", selected)), before)
+
+        board.socket = "TR4"
+        board.is_available = False
+        self.matrix.add_product(board)
+        self.assertEqual(set(self.matrix.valid_ids("Motherboard", selected)), before)
+        self.assertIn(
+            board.pk, self.matrix.valid_ids("Motherboard", selected, available_only=False)
+        )
+
+        self.matrix.remove_product(board.pk, "Motherboard")
+        self.assertNotIn(
+            board.pk, self.matrix.valid_ids("Motherboard", selected, available_only=False)
+        )
+
+    def test_new_class_extends_cached_rows(self):
+        selected = {"CPU": make(CPU, socket="AM5")}
+        before = self.matrix.count("Cooler", selected)
+
+        cooler = Cooler.objects.create(
+            brand="Test", model="New", price=Decimal("1000"), socket_support="AM5, SP5"
+        )
+        self.matrix.add_product(cooler)
+
+        self.assertEqual(self.matrix.count("Cooler", selected), before + 1)
+
+    @override_settings(PRODUCT_SEARCH_REFRESH_INTERVAL=0)
+    def test_refresh_drops_products_deleted_elsewhere(self):
+        # self.matrix gets no signals, like the matrix of another worker
+        selected = {"CPU": make(CPU, socket="AM5")}
+        boards = list(Motherboard.objects.filter(socket="AM5", is_available=True))
+        before = self.matrix.count("Motherboard", selected)
+        self.assertGreater(before, 1)
+
+        boards[0].delete()
+        self.assertEqual(self.matrix.count("Motherboard", selected), before - 1)
+        self.assertNotIn(boards[0].pk, self.matrix.valid_ids("Motherboard", selected))
+
+        bulk = Motherboard(brand="Test", model="Bulk", price=Decimal("1000"), socket="AM5")
+        Motherboard.objects.bulk_create([bulk])
+        self.assertEqual(self.matrix.count("Motherboard", selected), before)
+
+    def test_receivers_wait_for_commit(self):
+        from .matrix import compatibility_matrix
+
+        selected = {"CPU": make(CPU, socket="TR4")}
+        compatibility_matrix.clear()
+        self.addCleanup(compatibility_matrix.clear)
+        before = compatibility_matrix.count("Motherboard", selected)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            board = Motherboard.objects.create(
+                brand="Test", model="New", price=Decimal("1000"), socket="TR4"
+            )
+        self.assertEqual(compatibility_matrix.count("Motherboard", selected), before)
+        for callback in callbacks:
+            callback()
+        after = compatibility_matrix.count("Motherboard", selected)
+        self.assertEqual(after, before + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            board.delete()
+        self.assertEqual(compatibility_matrix.count("Motherboard", selected), before)
+
+
+def seed_build_catalog(rng, size):
+    """Create ``size`` in-stock products per auto-build category."""
+
+    def part(model, **fields):
+        return model(
+            brand="Test",
+            model="Part",
+            price=Decimal(rng.randrange(2000, 60000)),
+            stock=rng.randrange(1, 20),
+            **fields,
+        )
+
+    sockets = ["LGA 1700", "AM4", "AM5"]
+    CPU.objects.bulk_create(
+        part(
+            CPU,
+            socket=rng.choice(sockets),
+            cores=rng.choice([4, 6, 8, 12, 16]),
+            boost_frequency=rng.choice([3.8, 4.4, 5.0, 5.6]),
+            processor_graphics=rng.choice([None, "Radeon Graphics", "UHD 770"]),
+            tdp=rng.choice([65, 105, 125]),
+        )
+        for _ in range(size)
+    )
+    Motherboard.objects.bulk_create(
+        part(
+            Motherboard,
+            socket=rng.choice(sockets),
+            memory_type=rng.choice(["DDR4", "DDR5"]),
+            form_factor=rng.choice(FORM_FACTORS),
+            tdp=rng.choice([None, 30, 50]),
+        )
+        for _ in range(size)
+    )
+    RAM.objects.bulk_create(
+        part(
+            RAM,
+            ram_type=rng.choice(["DDR4", "DDR5"]),
+            memory_capacity=rng.choice(["8 GB", "16 GB", "32 GB"]),
+            frequency=rng.choice(["3200 MHz", "5600 MHz", "6000 MHz"]),
+            tdp=5,
+        )
+        for _ in range(size)
+    )
+    GPU.objects.bulk_create(
+        part(
+            GPU,
+            cores=rng.choice([2048, 3584, 5888, 9728]),
+            core_clock=rng.choice([1.5, 1.9, 2.3]),
+            tdp=rng.choice([75, 170, 220, 320]),
+        )
+        for _ in range(size)
+    )
+    SSD.objects.bulk_create(
+        part(SSD, storage_capacity=rng.choice(["500 GB", "1 TB", "2 TB"]), tdp=5)
+        for _ in range(size // 2 or 1)
+    )
+    HDD.objects.bulk_create(
+        part(HDD, storage_capacity=rng.choice(["1 TB", "2 TB", "4 TB"]), tdp=8)
+        for _ in range(size // 2 or 1)
+    )
+    PowerSupply.objects.bulk_create(
+        part(PowerSupply, wattage=rng.choice([450, 550, 650, 750, 850, 1000]))
+        for _ in range(size)
+    )
+    Casing.objects.bulk_create(
+        part(Casing, form_factor=rng.choice(FORM_FACTORS)) for _ in range(size)
+    )
+    Cooler.objects.bulk_create(
+        part(Cooler, socket_support=", ".join(rng.sample(sockets, 2)))
+        for _ in range(size)
+    )
+    # bulk_create bypasses the signals that invalidate cached candidates
+    catalog_cache.bump()
+
+
+class AutoBuilderTests(TestCase):
+    """
+    AutoBuilder finds the best compatible build within the budget.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_build_catalog(random.Random(15), 4)
+
+    def setUp(self):
+        candidate_catalog.clear()
+
+    def brute_force(self, builder, budget):
+        """Best score over every compatible combination of the catalog."""
+        # builder.run() has prepared the score scale and power supply lookup
+        tables = candidate_catalog.candidates(CANDIDATE_FIELDS)
+        score = builder.score
+        storage = tables["SSD"] + tables["HDD"]
+        best = -1.0
+        for cpu, board, ram, gpu, disk, case, cooler in itertools.product(
+            tables["CPU"],
+            tables["Motherboard"],
+            tables["RAM"],
+            tables["GPU"],
+            storage,
+            tables["Casing"],
+            tables["Cooler"],
+        ):
+            parts = (cpu, board, ram, gpu, disk, case, cooler)
+            price = sum(part.price for part in parts)
+            if price > budget:
+                continue
+            supply = builder.power_supply_for(sum(part.tdp for part in parts))
+            if supply is None or price + supply.price > budget:
+                continue
+            engine = CompatibilityEngine(
+                {part.category: self.instance(part) for part in parts}
+            )
+            if engine.check_build(include_power=False):
+                continue
+            best = max(best, score(cpu) + score(ram) + score(gpu) + score(disk))
+        return best
+
+    def instance(self, candidate):
+        model = {
+            "CPU": CPU,
+            "Motherboard": Motherboard,
+            "RAM": RAM,
+            "GPU": GPU,
+            "SSD": SSD,
+            "HDD": HDD,
+            "Casing": Casing,
+            "Cooler": Cooler,
+            "Power Supply": PowerSupply,
+        }[candidate.category]
+        return make(model, tdp=candidate.tdp, **candidate.spec)
+
+    def test_matches_exhaustive_search(self):
+        for budget in (Decimal("120000"), Decimal("200000"), Decimal("400000")):
+            with self.subTest(budget=budget):
+                builder = AutoBuilder(budget, "gaming")
+                result = builder.run()
+                best = self.brute_force(builder, budget)
+                if best < 0:
+                    self.assertIsNone(result)
+                    continue
+                self.assertTrue(result.exhaustive)
+                self.assertAlmostEqual(result.score, best, places=3)
+                self.assertLessEqual(result.total_price, budget)
+                self.assertEqual(
+                    CompatibilityEngine(
+                        {
+                            component_type: self.instance(part)
+                            for component_type, part in result.parts.items()
+                        }
+                    ).check_build(),
+                    [],
+                )
+
+    def test_pinned_part_and_office_build(self):
+        gpu = GPU.objects.order_by("price").first()
+        result = AutoBuilder(Decimal("400000"), "gaming", pinned={"GPU": gpu}).run()
+        self.assertEqual(result.parts["GPU"].pk, gpu.pk)
+
+        result = AutoBuilder(Decimal("400000"), "office").run()
+        self.assertNotIn("GPU", result.parts)
+        self.assertTrue(result.parts["CPU"].spec["processor_graphics"])
+        self.assertGreaterEqual(
+            result.parts["Power Supply"].spec["wattage"],
+            result.total_tdp - result.parts["Power Supply"].tdp + POWER_HEADROOM,
+        )
+
+    def test_candidates_refresh_incrementally(self):
+        tables = candidate_catalog.candidates(["GPU"])
+        by_id = {candidate.pk: candidate for candidate in tables["GPU"]}
+        gpus = list(GPU.objects.filter(pk__in=by_id).order_by("price"))
+        self.assertEqual(len(gpus), len(by_id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gpus[0].price = Decimal("1234")
+            gpus[0].save()
+            gpus[1].delete()
+            decrement_stock([("GPU", gpus[2].pk, gpus[2].stock)])
+        with self.captureOnCommitCallbacks(execute=True):
+            added = GPU.objects.create(
+                brand="Test", model="New", price=Decimal("5000"), stock=1, tdp=100
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            refreshed = candidate_catalog.candidates(["GPU"])["GPU"]
+        # Changed rows, eligible count, eligible IDs; no full reload
+        self.assertEqual(len(queries), 3, [query["sql"] for query in queries])
+        by_id = {candidate.pk: candidate for candidate in refreshed}
+        self.assertEqual(by_id[gpus[0].pk].price, Decimal("1234"))
+        self.assertNotIn(gpus[1].pk, by_id)
+        self.assertNotIn(gpus[2].pk, by_id)
+        self.assertIn(added.pk, by_id)
+        eligible = GPU.objects.filter(is_available=True, stock__gt=0)
+        self.assertEqual(set(by_id), set(eligible.values_list("pk", flat=True)))
+
+        # Nothing changed for the candidates: derived data is kept
+        frontier = candidate_catalog.prepared("test", ("GPU",), lambda tables: object())
+        catalog_cache.bump("GPU")
+        self.assertIs(
+            candidate_catalog.prepared("test", ("GPU",), lambda tables: object()),
+            frontier,
+        )
+
+    def test_apply_writes_items(self):
+        build = PCBuilder.objects.create(session_id="auto")
+        result = AutoBuilder(Decimal("400000"), "office").run()
+
+        apply_auto_build(build, result)
+
+        snapshot = build.snapshot()
+        self.assertEqual(snapshot.total_price, result.total_price)
+        self.assertIsNone(snapshot.product("GPU"))
+        self.assertEqual(snapshot.product("CPU").pk, result.parts["CPU"].pk)
+
+
+class AutoBuilderTimingTests(TestCase):
+    """
+    Searches over a large catalog stay interactive, warm or after a change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_build_catalog(random.Random(16), AUTOBUILD_SEED_SIZE)
+
+    def search(self, budget):
+        started = time.perf_counter()
+        result = AutoBuilder(Decimal(budget), "gaming").run()
+        elapsed = time.perf_counter() - started
+        self.assertIsNotNone(result)
+        self.assertTrue(result.exhaustive)
+        return elapsed
+
+    def test_search_time(self):
+        candidate_catalog.clear()
+        self.search(150000)  # loads the candidates
+
+        timings = [self.search(budget) for budget in (80000, 150000, 300000, 600000)]
+
+        # The first search after a product save or a checkout refreshes the
+        # changed category instead of reloading it
+        gpu = GPU.objects.filter(stock__gt=1).order_by("price").last()
+        with self.captureOnCommitCallbacks(execute=True):
+            gpu.price -= 1
+            gpu.save()
+        refreshed = [self.search(150000)]
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock([("GPU", gpu.pk, 1)])
+        refreshed.append(self.search(150000))
+
+        if BENCHMARK:
+            print(
+                f"\n{max(timings) * 1000:8.2f} ms  auto build, "
+                f"{max(refreshed) * 1000:8.2f} ms  after a change, "
+                f"{AUTOBUILD_SEED_SIZE} products per category"
+            )
+        self.assertLess(max(timings), 0.2)
+        self.assertLess(max(refreshed), 0.2)
+
+
+class BuildTotalsTests(TestCase):
+    """
+    PCBuilder total columns stay in step with the build's items.
+    """
+
+    def setUp(self):
+        self.build = PCBuilder.objects.create(session_id="totals")
+
+    def select(self, component_type, price, tdp=None):
+        item, _ = PCBuilderItem.objects.get_or_create(
+            pc_builder=self.build, component_type=component_type
+        )
+        item.product_id = uuid.uuid4()
+        item.product_name = component_type
+        item.product_price = Decimal(price)
+        item.product_tdp = tdp
+        item.save()
+        return item
+
+    def totals(self):
+        self.build.refresh_from_db()
+        return {field: getattr(self.build, field) for field in PCBuilder.TOTAL_FIELDS}
+
+    def test_item_changes_update_totals(self):
+        for component_type, price, tdp in [
+            ("CPU", "30000", 125),
+            ("Motherboard", "20000", 30),
+            ("RAM", "8000", 5),
+            ("Power Supply", "9000", None),
+            ("Mouse", "1500", None),
+        ]:
+            self.select(component_type, price, tdp)
+        PCBuilderItem.objects.create(pc_builder=self.build, component_type="GPU")
+
+        self.assertEqual(
+            self.totals(),
+            {
+                "total_price": Decimal("68500"),
+                "peripherals_price": Decimal("1500"),
+                "total_tdp": 160,
+                "item_count": 5,
+                "has_essentials": True,
+                "is_buildable": False,
+            },
+        )
+        self.assertEqual(self.build.get_recommended_wattage, 260)
+
+        self.select("Casing", "6000")
+        self.assertTrue(self.totals()["is_buildable"])
+
+        PCBuilderItem.objects.get(pc_builder=self.build, component_type="RAM").delete()
+        totals = self.totals()
+        self.assertEqual(totals["total_price"], Decimal("66500"))
+        self.assertFalse(totals["has_essentials"])
+        self.assertFalse(self.build.is_complete)
+
+    def test_bulk_clear_and_build_delete(self):
+        self.select("CPU", "30000", 125)
+        self.build.pcbuilderitem_set.update(product_id=None, product_price=None)
+        self.build.update_totals()
+
+        self.assertEqual(self.build.item_count, 0)
+        self.assertEqual(self.totals()["total_price"], Decimal("0"))
+
+        self.select("GPU", "50000", 220)
+        self.build.delete()
+        self.assertFalse(PCBuilder.objects.filter(session_id="totals").exists())
+
+    def test_saved_build_list_is_one_query(self):
+        for index in range(5):
+            build = PCBuilder.objects.create(session_id=f"saved{index}", name=f"B{index}")
+            PCBuilderItem.objects.create(
+                pc_builder=build,
+                component_type="CPU",
+                product_id=uuid.uuid4(),
+                product_price=Decimal(1000 * (5 - index)),
+            )
+
+        with self.assertNumQueries(1):
+            builds = list(
+                PCBuilder.objects.filter(name__isnull=False).order_by("total_price")
+            )
+            summary = [
+                (build.get_total_price, build.get_item_count, build.is_complete)
+                for build in builds
+            ]
+
+        self.assertEqual([price for price, _, _ in summary], sorted(p for p, _, _ in summary))
+        self.assertEqual({count for _, count, _ in summary}, {1})
+
+
+class BuildServiceTests(TestCase):
+    """
+    Set-based build mutations run a constant number of queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = {
+            category: model.objects.create(
+                brand="Test", model=category, price=Decimal("1000"), stock=10
+            )
+            for category, model in PRODUCT_MODELS.items()
+        }
+
+    def build(self, categories, session_id):
+        build = PCBuilder.objects.create(session_id=session_id)
+        services.initialize_slots(build)
+        services.assign_slots(
+            build,
+            {
+                category: services.SlotValue(
+                    self.products[category].pk, category, Decimal("1000"), 10
+                )
+                for category in categories
+            },
+        )
+        return build
+
+    def count_queries(self, operation, categories):
+        """Run an operation on a fresh build and return how many queries it took."""
+        build = self.build(categories, f"queries-{len(categories)}")
+        snapshot = build.snapshot()
+        with CaptureQueriesContext(connection) as context:
+            operation(build, snapshot)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, operation):
+        self.assertEqual(
+            self.count_queries(operation, ["CPU", "GPU"]),
+            self.count_queries(operation, list(PRODUCT_MODELS)),
+        )
+
+    def test_initialize_slots(self):
+        build = PCBuilder.objects.create(session_id="init")
+        PCBuilderItem.objects.create(pc_builder=build, component_type="CPU")
+
+        with self.assertNumQueries(1):
+            services.initialize_slots(build)
+        services.initialize_slots(build)
+
+        self.assertEqual(
+            build.pcbuilderitem_set.count(), len(PCBuilderItem.COMPONENT_CHOICES)
+        )
+
+    def test_snapshot_and_builder_page(self):
+        # One query for the items plus one per category of selected products
+        for categories in (["CPU", "GPU"], list(PRODUCT_MODELS)):
+            build = self.build(categories, f"snapshot-{len(categories)}")
+            with self.assertNumQueries(1 + len(categories)):
+                snapshot = build.snapshot()
+            self.assertEqual(set(snapshot.products), set(categories))
+
+        def page_queries(categories):
+            user = User.objects.create_user(f"builder-{len(categories)}")
+            build = self.build(categories, f"page-{len(categories)}")
+            PCBuilder.objects.filter(pk=build.pk).update(user=user, session_id=None)
+            self.client.force_login(user)
+            self.client.get(reverse("pc_builder"))
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse("pc_builder"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.context["recommended_wattage"],
+                build.snapshot().recommended_wattage,
+            )
+            return len(context.captured_queries)
+
+        # Adding slots only adds the product batch of their categories
+        few, all_categories = ["CPU", "GPU"], list(PRODUCT_MODELS)
+        self.assertEqual(
+            page_queries(all_categories) - page_queries(few),
+            len(all_categories) - len(few),
+        )
+
+    def test_builder_page_only_writes_missing_slots(self):
+        user = User.objects.create_user("slots")
+        build = PCBuilder.objects.create(user=user)
+        PCBuilderItem.objects.create(pc_builder=build, component_type="CPU")
+        self.client.force_login(user)
+
+        self.client.get(reverse("pc_builder"))
+        self.assertEqual(
+            build.pcbuilderitem_set.count(), len(PCBuilderItem.COMPONENT_CHOICES)
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse("pc_builder"))
+        self.assertFalse(
+            [query for query in context.captured_queries if "INSERT" in query["sql"]]
+        )
+
+    def test_clear_copy_and_load(self):
+        self.assertConstantQueries(lambda build, _: services.clear_build(build))
+        self.assertConstantQueries(
+            lambda build, _: services.copy_build(build, name="Copy")
+        )
+
+        source = self.build(["CPU", "GPU", "Mouse"], "source")
+        saved = services.copy_build(source, name="Saved")
+        self.assertEqual(saved.item_count, 3)
+        self.assertEqual(saved.total_price, Decimal("3000"))
+
+        target = self.build(["RAM", "SSD"], "target")
+        services.load_build(saved, target)
+        target.refresh_from_db()
+        self.assertEqual(
+            set(
+                target.pcbuilderitem_set.filter(product_id__isnull=False).values_list(
+                    "component_type", flat=True
+                )
+            ),
+            {"CPU", "GPU", "Mouse"},
+        )
+        self.assertEqual((target.item_count, target.total_price), (3, Decimal("3000")))
+
+        services.clear_build(source)
+        source.refresh_from_db()
+        self.assertEqual((source.item_count, source.total_price), (0, Decimal("0")))
+        self.assertFalse(source.pcbuilderitem_set.filter(product_id__isnull=False).exists())
+
+    def test_add_build_to_cart(self):
+        def add_to_new_cart(build, snapshot):
+            cart = Cart.objects.create(session_id=f"cart-{build.pk}")
+            CartItem.objects.create(
+                cart=cart,
+                product_id=self.products["CPU"].pk,
+                product_category="CPU",
+                price=Decimal("1000"),
+            )
+            services.add_build_to_cart(snapshot, cart)
+
+        # Constant apart from the stock hold, which reads each product row once
+        few, all_categories = ["CPU", "GPU"], list(PRODUCT_MODELS)
+        self.assertEqual(
+            self.count_queries(add_to_new_cart, all_categories)
+            - self.count_queries(add_to_new_cart, few),
+            len(all_categories) - len(few),
+        )
+
+        cart = Cart.objects.create(session_id="cart")
+        CartItem.objects.create(
+            cart=cart,
+            product_id=self.products["CPU"].pk,
+            product_category="CPU",
+            quantity=2,
+            price=Decimal("1000"),
+        )
+        build = self.build(["CPU", "GPU", "RAM"], "cart-build")
+
+        self.assertEqual(services.add_build_to_cart(build.snapshot(), cart), 3)
+        self.assertEqual(
+            dict(cart.cartitem_set.values_list("product_category", "quantity")),
+            {"CPU": 3, "GPU": 1, "RAM": 1},
+        )
+        self.assertEqual(
+            dict(cart.stockreservation_set.values_list("product_category", "quantity")),
+            {"CPU": 3, "GPU": 1, "RAM": 1},
+        )
+
+    def test_add_build_to_cart_short_stock(self):
+        other = Cart.objects.create(session_id="other")
+        hold(other, "GPU", self.products["GPU"].pk, 10)
+        cart = Cart.objects.create(session_id="cart")
+        build = self.build(["CPU", "GPU"], "short-build")
+
+        with self.assertRaises(OutOfStock):
+            services.add_build_to_cart(build.snapshot(), cart)
+        self.assertFalse(cart.cartitem_set.exists())
+        self.assertFalse(cart.stockreservation_set.exists())
+
+        user = User.objects.create_user("short")
+        PCBuilder.objects.filter(pk=build.pk).update(user=user, session_id=None)
+        self.client.force_login(user)
+        response = self.client.get(reverse("add_build_to_cart"), follow=True)
+        self.assertRedirects(response, reverse("pc_builder"))
+        self.assertIn("Not enough stock", str(list(response.context["messages"])[0]))
+        self.assertFalse(CartItem.objects.filter(cart__user=user).exists())
+
+
+class BuildPdfTests(TestCase):
+    """
+    PDF quotes are content-addressed, cached on disk and rendered off-request.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.settings_override = override_settings(BUILD_PDF_CACHE_DIR=cls.cache_dir)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        quote_renderer.shutdown()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user("quoter", password="secret")
+        self.client.force_login(self.user)
+        self.cpu = CPU.objects.create(
+            brand="Test", model="Quote CPU", price=Decimal("30000"), socket="AM5", tdp=105
+        )
+        self.build = PCBuilder.objects.create(user=self.user, name="Quote build")
+        services.assign_slots(
+            self.build,
+            {"CPU": services.SlotValue(self.cpu.pk, "Quote CPU", self.cpu.price, 105)},
+        )
+        self.url = reverse("export_saved_build_pdf", args=[self.build.pk])
+
+    def key(self):
+        return quote_key(build_quote(self.build, self.build.snapshot()))
+
+    def test_key_follows_build_contents(self):
+        key = self.key()
+        self.assertEqual(self.key(), key)
+
+        self.cpu.price = Decimal("29000")
+        self.cpu.save()
+        repriced = self.key()
+        self.assertNotEqual(repriced, key)
+
+        self.build.name = "Renamed build"
+        self.assertNotEqual(self.key(), repriced)
+
+    def test_export_is_cached_and_conditional(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        response.close()
+
+        etag = response["ETag"]
+        self.assertEqual(etag, f'"{self.key()}"')
+        self.assertIsNotNone(quote_renderer.cached(self.key()))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.cpu.price = Decimal("25000")
+        self.cpu.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        response.close()
+
+    @override_settings(BUILD_PDF_WAIT=0)
+    def test_slow_render_answers_accepted(self):
+        self.build.name = "Pending build"
+        self.build.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Retry-After"], "2")
+
+        quote = build_quote(self.build, self.build.snapshot())
+        quote_renderer.submit(quote_key(quote), quote).result(timeout=60)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_render_build_quotes_command(self):
+        other = PCBuilder.objects.create(user=self.user, name="Second build")
+        PCBuilder.objects.create(session_id="unsaved")
+
+        output = os.path.join(self.cache_dir, "quotes.zip")
+        stdout = StringIO()
+        call_command("render_build_quotes", output=output, workers=2, stdout=stdout)
+
+        with zipfile.ZipFile(output) as archive:
+            names = sorted(archive.namelist())
+            self.assertTrue(archive.read(names[0]).startswith(b"%PDF"))
+        self.assertEqual(
+            names,
+            sorted([f"quote-build-{self.build.pk}.pdf", f"second-build-{other.pk}.pdf"]),
+        )
+        report = stdout.getvalue()
+        self.assertIn("Rendered 2 quotes", report)
+        self.assertIn(str(self.build.pk), report)
+
+        directory = os.path.join(self.cache_dir, "quotes")
+        call_command(
+            "render_build_quotes",
+            str(other.pk),
+            output=directory,
+            workers=1,
+            stdout=StringIO(),
+        )
+        self.assertEqual(os.listdir(directory), [f"second-build-{other.pk}.pdf"])
+
+
+class ShareLinkTests(TestCase):
+    """
+    Share tokens encode the build; opening one writes nothing.
+    """
+
+    def setUp(self):
+        self.cpu = CPU.objects.create(
+            brand="Test", model="Shared CPU", price=Decimal("30000"), socket="AM5", tdp=105
+        )
+        self.board = Motherboard.objects.create(
+            brand="Test",
+            model="Shared Board",
+            price=Decimal("20000"),
+            socket="AM4",
+            memory_type="DDR4",
+            form_factor="ATX",
+        )
+        self.token = encode_build([("Motherboard", self.board.pk), ("CPU", self.cpu.pk)])
+
+    def test_token_round_trip_and_tampering(self):
+        self.assertEqual(
+            decode_build(self.token),
+            [("CPU", self.cpu.pk), ("Motherboard", self.board.pk)],
+        )
+        self.assertTrue(self.token.isalnum())
+
+        tampered = self.token[:-1] + ("0" if self.token[-1] != "0" else "1")
+        for token in [tampered, self.token + "-", "", "abc"]:
+            with self.assertRaises(signing.BadSignature):
+                decode_build(token)
+
+    def test_shared_build_creates_no_rows(self):
+        response = self.client.get(reverse("shared_build", args=[self.token]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Shared CPU")
+        self.assertEqual(response.context["snapshot"].total_price, Decimal("50000"))
+        self.assertTrue(response.context["compatibility_issues"])
+        self.assertFalse(PCBuilder.objects.exists())
+        self.assertFalse(PCBuilderItem.objects.exists())
+
+        response = self.client.get(reverse("shared_build", args=["tampered"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_fork_and_share_url(self):
+        response = self.client.post(reverse("fork_shared_build", args=[self.token]))
+        self.assertRedirects(response, reverse("pc_builder"), fetch_redirect_response=False)
+
+        build = PCBuilder.objects.get()
+        self.assertEqual(build.item_count, 2)
+        self.assertEqual(build.total_price, Decimal("50000"))
+        self.assertEqual(share_token(build.snapshot()), self.token)
+
+        response = self.client.get(reverse("pc_builder"))
+        self.assertEqual(
+            response.context["share_url"],
+            "http://testserver" + reverse("shared_build", args=[self.token]),
+        )
@@ -8,7 +8,9 @@ components and managing their saved builds.
 The URL patterns include:
 - PC builder interface and component selection
 - Build management (save, load, delete, clear)
+- Automatic builds for a budget and use case
 - Cart integration for purchasing builds
+- Stateless share links and forking them into a build
 - PDF export functionality for build specifications
 
 All views are implemented in the corresponding views.py module.
@@ -22,6 +24,7 @@ urlpatterns = [
     path("", views.pc_builder, name="pc_builder"),
     # Build management operations
     path("clear/", views.clear_build, name="clear_build"),
+    path("auto-build/", views.auto_build, name="auto_build"),
     # Component selection routes
     # Note: Storage route must be before the generic component route to avoid conflicts
     path("select/storage/", views.select_storage, name="select_storage"),
@@ -49,6 +52,9 @@ urlpatterns = [
         views.add_build_to_cart,
         name="add_saved_build_to_cart",
     ),
+    # Share links, decoded without touching the database until forked
+    path("share/<str:token>/", views.shared_build, name="shared_build"),
+    path("share/<str:token>/fork/", views.fork_shared_build, name="fork_shared_build"),
     # PDF export functionality
     path("export-pdf/", views.export_build_pdf, name="export_build_pdf"),
     path(
@@ -21,12 +21,15 @@ View Categories:
         - my_builds: User's saved build list
         - build_detail: Detailed view of a specific build
         - share_build: Share build configuration with others
+        - shared_build: Read-only build decoded from a share link
+        - fork_shared_build: Copy a shared build into the current build
         - export_build: Export build as PDF or other formats
 
     Compatibility Views:
         - check_compatibility: Validate component compatibility
         - get_compatibility_warnings: AJAX compatibility checking
         - component_recommendations: Suggest compatible components
+        - auto_build: Fill the build automatically for a budget and use case
 
 Key Features:
     - Real-time compatibility checking
@@ -79,9 +82,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db import models
-from django.db.models import Q
-from decimal import Decimal
+from django.db.models import F
+from decimal import Decimal, InvalidOperation
 import json
 import uuid
 from .models import PCBuilder, PCBuilderItem
@@ -100,13 +102,40 @@ from ProductsApp.models import (
     Mouse,
     Headphone,
 )
+from ProductsApp.registry import product_registry
+from ProductsApp.catalog import get_product_loader
+from ProductsApp.inventory import OutOfStock
+from ProductsApp.search import search_queryset
+from ProductsApp.facets import facet_index
+from .compatibility import CompatibilityEngine, annotate
+from .matrix import compatibility_matrix
+from .autobuild import USE_CASES, AutoBuilder, apply_auto_build
+from .pdf import build_quote, quote_key, quote_renderer
+from .sharing import share_token, shared_snapshot
+from . import services
 from django.contrib import messages
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.http import HttpResponse
-from io import BytesIO
-import os
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.http import parse_etags
 from django.conf import settings
-from datetime import datetime
+
+
+# Database orderings for the component selection sort options
+COMPONENT_SORTS = {
+    "price_asc": (F("price").asc(nulls_first=True), "created_at", "id"),
+    "price_desc": (F("price").desc(nulls_last=True), "created_at", "id"),
+    "name_asc": ("brand", "model", "id"),
+    "newest": (F("created_at").desc(nulls_last=True), "id"),
+}
+
+# Orderings for the saved builds list, on the stored build totals
+SAVED_BUILD_SORTS = {
+    "newest": ("-created_at", "id"),
+    "price_asc": ("total_price", "-created_at"),
+    "price_desc": ("-total_price", "-created_at"),
+}
 
 
 def pc_builder(request):
@@ -140,17 +169,23 @@ def pc_builder(request):
         compatibility_status (dict): Compatibility check results with status and issues
         power_status (dict): PSU adequacy status (good/warning/critical/not_selected)
         total_wattage (int): Sum of all component TDP values
-        recommended_wattage (int): Recommended PSU wattage (total + 100W buffer)
-        share_url (str): Absolute URL for sharing the current build
+        recommended_wattage (int): Recommended PSU wattage (total plus
+            WATTAGE_HEADROOM, 0 when nothing draws power)
+        share_url (str): Absolute share link that encodes the current
+            components (PCBuilderApp.sharing); opening it creates no rows
     """
-    # Get or create a PC builder instance
-    pc_build = get_or_create_pc_builder(request)
+    # Get or create a PC builder instance; anonymous builds may stay virtual
+    pc_build = get_or_create_pc_builder(request, create=False)
 
-    # Initialize the PC builder with empty component slots if it's new
-    initialize_pc_builder(pc_build)
+    # Load every item once and all selected products in one batch per category
+    snapshot = pc_build.snapshot(loader=get_product_loader(request))
 
-    # Create a build object with proper structure for the template
-    build = {}
+    # Create the empty component slots of a saved build that lacks some, e.g.
+    # one that was just created; a complete build is not written to
+    if not pc_build._state.adding and len(snapshot.slots) < len(
+        PCBuilderItem.COMPONENT_CHOICES
+    ):
+        initialize_pc_builder(pc_build)
 
     # Map component types to template attributes
     component_map = {
@@ -169,29 +204,15 @@ def pc_builder(request):
         "Headphone": "headphone",
     }
 
-    # Get all components for each category
-    for component_type, attr_name in component_map.items():
-        builder_item = pc_build.pcbuilderitem_set.filter(
-            component_type=component_type
-        ).first()
-        if builder_item and builder_item.product_id:
-            build[attr_name] = builder_item.get_product()
-        else:
-            build[attr_name] = None
+    # Create a build object with proper structure for the template
+    build = {
+        attr_name: snapshot.product(component_type)
+        for component_type, attr_name in component_map.items()
+    }
 
     # Calculate build information
-    components_price = sum(
-        item.product_price or 0
-        for item in pc_build.pcbuilderitem_set.all()
-        if item.product_id
-        and item.component_type not in ["Keyboard", "Mouse", "Headphone"]
-    )
-
-    peripherals_price = sum(
-        item.product_price or 0
-        for item in pc_build.pcbuilderitem_set.all()
-        if item.product_id and item.component_type in ["Keyboard", "Mouse", "Headphone"]
-    )
+    components_price = snapshot.components_price
+    peripherals_price = snapshot.peripherals_price
 
     # Calculate assembly fee (example: 5% of components price)
     assembly_fee = (
@@ -201,40 +222,9 @@ def pc_builder(request):
     # Calculate total price
     total_price = components_price + peripherals_price + assembly_fee
 
-    # Check if the build is complete enough to purchase
-    is_buildable = all(
-        build[attr] is not None
-        for attr in ["cpu", "motherboard", "ram", "power_supply", "casing"]
-    )
-
     # Calculate completion percentage and essential components count
-    core_components = [
-        "cpu",
-        "cpu_cooler",
-        "motherboard",
-        "ram",
-        "ssd",
-        "hdd",
-        "gpu",
-        "power_supply",
-        "casing",
-    ]
-    essential_components = [
-        "cpu",
-        "cpu_cooler",
-        "motherboard",
-        "ram",
-        "ssd",
-        "hdd",
-        "gpu",
-        "power_supply",
-        "casing",
-    ]
-
-    completed_components = sum(1 for c in core_components if build[c] is not None)
-    essential_components_selected = sum(
-        1 for c in essential_components if build[c] is not None
-    )
+    completed_components = snapshot.core_selected_count
+    essential_components_selected = snapshot.core_selected_count
     completion_percentage = int((completed_components / 8) * 100)
 
     # Check compatibility - initialize with appropriate status based on component selection
@@ -242,33 +232,15 @@ def pc_builder(request):
     total_wattage = 0
     recommended_wattage = 0
 
-    # Check if any components are selected at all
-    has_components = any(build[attr] is not None for attr in component_map.values())
-
-    if not has_components:
+    if not snapshot.products:
         compatibility_status = {"status": "not_checked", "issues": []}
         power_status = {"status": "not_checked"}
     else:
-        # CPU and Motherboard compatibility check
-        if build["cpu"] and build["motherboard"]:
-            if build["cpu"].socket != build["motherboard"].socket:
-                compatibility_issues.append(
-                    f"CPU socket ({build['cpu'].socket}) doesn't match motherboard socket ({build['motherboard'].socket})"
-                )
-
-        # RAM and Motherboard compatibility check
-        if build["ram"] and build["motherboard"]:
-            if build["ram"].ram_type != build["motherboard"].memory_type:
-                compatibility_issues.append(
-                    f"RAM type ({build['ram'].ram_type}) doesn't match motherboard memory type ({build['motherboard'].memory_type})"
-                )
-
-        # Case and Motherboard compatibility check
-        if build["casing"] and build["motherboard"]:
-            if build["motherboard"].form_factor not in build["casing"].form_factor:
-                compatibility_issues.append(
-                    f"Form factor mismatch: Motherboard is {build['motherboard'].form_factor} but case supports {build['casing'].form_factor}"
-                )
+        # Socket, memory type, form factor and cooler checks; the power
+        # supply is reported separately through power_status
+        compatibility_issues = CompatibilityEngine(snapshot.selected()).check_build(
+            include_power=False
+        )
 
         # Set compatibility status based on issues found
         if compatibility_issues:
@@ -279,28 +251,29 @@ def pc_builder(request):
         else:
             compatibility_status = {"status": "compatible", "issues": []}
 
-        # Calculate total power consumption
-        total_wattage = sum(
-            getattr(component, "tdp", 0) or 0
-            for component in build.values()
-            if component is not None
-        )
-        # Add 100W buffer for recommended wattage
-        recommended_wattage = total_wattage + 100
+        # Total power consumption, plus WATTAGE_HEADROOM for recommended wattage
+        total_wattage = snapshot.total_wattage
+        recommended_wattage = snapshot.recommended_wattage
 
-        # Check power supply adequacy if present
+        # Check power supply adequacy if present; an unknown wattage counts as 0
         if build["power_supply"]:
-            if build["power_supply"].wattage < recommended_wattage * 0.8:
+            psu_wattage = build["power_supply"].wattage or 0
+            if psu_wattage < recommended_wattage * 0.8:
                 power_status = {"status": "critical"}
-            elif build["power_supply"].wattage < recommended_wattage:
+            elif psu_wattage < recommended_wattage:
                 power_status = {"status": "warning"}
             else:
                 power_status = {"status": "good"}
         else:
             power_status = {"status": "not_selected"}
 
-    # Generate share URL
-    share_url = request.build_absolute_uri()
+    # Share links carry the components themselves, see PCBuilderApp.sharing
+    if snapshot.products:
+        share_url = request.build_absolute_uri(
+            reverse("shared_build", args=[share_token(snapshot)])
+        )
+    else:
+        share_url = request.build_absolute_uri()
 
     context = {
         "build": build,
@@ -309,7 +282,7 @@ def pc_builder(request):
         "assembly_fee": assembly_fee,
         "total_price": total_price,
         "discounts": Decimal("0"),  # Add discount logic if needed
-        "is_buildable": is_buildable,
+        "is_buildable": snapshot.is_buildable,
         "completion_percentage": completion_percentage,
         "essential_components_selected": essential_components_selected,  # Added this line to pass count to template
         "compatibility_status": compatibility_status,
@@ -317,12 +290,13 @@ def pc_builder(request):
         "total_wattage": total_wattage,
         "recommended_wattage": recommended_wattage,
         "share_url": share_url,
+        "use_cases": USE_CASES.values(),
     }
 
     return render(request, "pcbuilder/pc-builder.html", context)
 
 
-def get_or_create_pc_builder(request):
+def get_or_create_pc_builder(request, create=True):
     """
     Get existing PC builder instance or create a new one for the current user/session.
 
@@ -333,6 +307,9 @@ def get_or_create_pc_builder(request):
 
     Args:
         request (HttpRequest): The HTTP request object containing user and session data.
+        create (bool): Whether a missing anonymous build may be created. Views that
+            only read the build pass False; with VIRTUAL_ANONYMOUS_STATE on they then
+            get an unsaved, empty build and neither the session nor any row is written.
 
     Returns:
         PCBuilder: The PC builder instance associated with the current user or session.
@@ -349,6 +326,14 @@ def get_or_create_pc_builder(request):
         pc_build = PCBuilder.objects.filter(user=request.user, name=None).first()
         if not pc_build:
             pc_build = PCBuilder.objects.create(user=request.user)
+    elif not create and getattr(settings, "VIRTUAL_ANONYMOUS_STATE", True):
+        # Read-only view: the build stays virtual until a component is added
+        session_id = request.session.get("pc_builder_session_id")
+        pc_build = None
+        if session_id:
+            pc_build = PCBuilder.objects.filter(session_id=session_id, name=None).first()
+        if not pc_build:
+            pc_build = PCBuilder(session_id=session_id)
     else:
         # Use session for anonymous users
         session_id = request.session.get("pc_builder_session_id")
@@ -378,8 +363,8 @@ def clear_build(request):
         HttpResponseRedirect: Redirects to the PC builder page after clearing.
 
     Side Effects:
-        - For authenticated users: Resets all PCBuilderItem fields to None
-        - For anonymous users: Removes build-related session data
+        - Resets all PCBuilderItem fields to None with a single update
+        - For anonymous users: Also removes build-related session data
         - Displays success message to user
         - Only processes POST requests, ignores other HTTP methods
 
@@ -389,18 +374,10 @@ def clear_build(request):
         - Any session keys starting with 'build_'
     """
     if request.method == "POST":
-        if request.user.is_authenticated:
-            # Get the current build for logged-in user
-            build = get_or_create_pc_builder(request)
-            if build:
-                # Clear all components by resetting all PCBuilderItems
-                for item in build.pcbuilderitem_set.all():
-                    item.product_id = None
-                    item.product_name = None
-                    item.product_price = None
-                    item.product_tdp = None
-                    item.save()
-        else:
+        # Empty every component slot with a single update
+        services.clear_build(get_or_create_pc_builder(request))
+
+        if not request.user.is_authenticated:
             # Clear session data for anonymous users
             if "build_id" in request.session:
                 del request.session["build_id"]
@@ -418,6 +395,157 @@ def clear_build(request):
     return redirect("pc_builder")
 
 
+def auto_build(request):
+    """
+    Fill the current PC build automatically for a budget and use case.
+
+    Runs the AutoBuilder search over the live catalog and writes the best
+    compatible build it finds into the user's current build.
+
+    Args:
+        request (HttpRequest): The HTTP request object. Must be a POST request.
+
+    Returns:
+        HttpResponseRedirect: Redirects to the PC builder page.
+
+    Request Data (Form):
+        budget (str): Maximum price of the build in taka.
+        use_case (str): 'gaming', 'workstation' or 'office'.
+        keep_selected (str, optional): 'on' to keep the components already
+            in the build and complete the build around them.
+
+    Side Effects:
+        - Sets every core component slot to the chosen part, or clears it
+          (e.g. the GPU for an office build on integrated graphics)
+        - Keeps the monitor and peripherals
+        - Displays a success or error message
+
+    Notes:
+        - Kept components count towards the budget
+        - Non-POST requests redirect without changing the build
+    """
+    if request.method != "POST":
+        return redirect("pc_builder")
+
+    use_case = request.POST.get("use_case", "gaming")
+    try:
+        budget = Decimal(request.POST.get("budget", "").replace(",", "").strip())
+    except InvalidOperation:
+        budget = None
+    if budget is None or not budget.is_finite() or budget <= 0:
+        messages.error(request, "Please enter a valid budget.")
+        return redirect("pc_builder")
+    if use_case not in USE_CASES:
+        messages.error(request, "Please choose a use case.")
+        return redirect("pc_builder")
+
+    pc_build = get_or_create_pc_builder(request)
+    pinned = {}
+    if request.POST.get("keep_selected") == "on":
+        pinned = pc_build.snapshot(loader=get_product_loader(request)).selected()
+
+    result = AutoBuilder(budget, use_case, pinned=pinned).run()
+    if result is None:
+        messages.error(
+            request,
+            f"No compatible {USE_CASES[use_case].label.lower()} build fits a "
+            f"budget of ৳{budget:,.0f}.",
+        )
+        return redirect("pc_builder")
+
+    initialize_pc_builder(pc_build)
+    apply_auto_build(pc_build, result)
+    messages.success(
+        request,
+        f"{USE_CASES[use_case].label} build for ৳{result.total_price:,.0f} "
+        f"added to your PC builder.",
+    )
+    return redirect("pc_builder")
+
+
+def shared_build(request, token):
+    """
+    Display a build from a share link, read-only.
+
+    The build is decoded from the token and its products loaded in one
+    batch; no PCBuilder or PCBuilderItem rows are read or created.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        token (str): Share token from PCBuilderApp.sharing.
+
+    Returns:
+        HttpResponse: Rendered shared build page.
+
+    Context Variables:
+        components (list): (component label, product) pairs in slot order
+        snapshot (BuildSnapshot): The decoded build with its totals
+        compatibility_issues (list): Problems found by the rule engine
+        token (str): The share token, for the fork form
+
+    Raises:
+        Http404: The token is malformed or not signed by this site.
+    """
+    try:
+        snapshot = shared_snapshot(token, loader=get_product_loader(request))
+    except signing.BadSignature:
+        raise Http404("Invalid share link")
+
+    components = [
+        (label, snapshot.product(component_type))
+        for component_type, label in PCBuilderItem.COMPONENT_CHOICES
+        if snapshot.product(component_type) is not None
+    ]
+    context = {
+        "components": components,
+        "snapshot": snapshot,
+        "compatibility_issues": CompatibilityEngine(snapshot.selected()).check_build(),
+        "token": token,
+    }
+    return render(request, "pcbuilder/shared-build.html", context)
+
+
+def fork_shared_build(request, token):
+    """
+    Copy a shared build into the visitor's current build.
+
+    This is the only point where a share link writes rows: the current build
+    is created if needed and its components replaced by the shared ones.
+
+    Args:
+        request (HttpRequest): The HTTP request object. Must be a POST request.
+        token (str): Share token from PCBuilderApp.sharing.
+
+    Returns:
+        HttpResponseRedirect: Redirects to the PC builder page, or back to the
+            shared build for non-POST requests.
+
+    Raises:
+        Http404: The token is malformed or not signed by this site.
+    """
+    if request.method != "POST":
+        return redirect("shared_build", token=token)
+
+    try:
+        snapshot = shared_snapshot(token, loader=get_product_loader(request))
+    except signing.BadSignature:
+        raise Http404("Invalid share link")
+
+    pc_build = get_or_create_pc_builder(request)
+    initialize_pc_builder(pc_build)
+    # Replace every slot, clearing the ones the shared build leaves empty
+    values = dict.fromkeys(
+        component_type for component_type, _ in PCBuilderItem.COMPONENT_CHOICES
+    )
+    for component_type, slot in snapshot.slots.items():
+        values[component_type] = services.SlotValue(
+            slot.product_id, slot.product_name, slot.product_price, slot.product_tdp
+        )
+    services.assign_slots(pc_build, values)
+    messages.success(request, "The shared build is now your current build.")
+    return redirect("pc_builder")
+
+
 def initialize_pc_builder(pc_build):
     """
     Initialize PC builder with empty component slots for all component types.
@@ -438,15 +566,9 @@ def initialize_pc_builder(pc_build):
         - Only creates items that don't already exist to avoid duplicates
         - Component types are derived from PCBuilderItem.COMPONENT_CHOICES
         - Each PCBuilderItem starts empty and ready for product assignment
+        - A single insert that skips the slots that already exist
     """
-    for component_type, _ in PCBuilderItem.COMPONENT_CHOICES:
-        # Check if item already exists
-        if not PCBuilderItem.objects.filter(
-            pc_builder=pc_build, component_type=component_type
-        ).exists():
-            PCBuilderItem.objects.create(
-                pc_builder=pc_build, component_type=component_type
-            )
+    services.initialize_slots(pc_build)
 
 
 def select_component(request, component_type):
@@ -492,18 +614,19 @@ def select_component(request, component_type):
         is_compatible (bool): Whether product is compatible with selected components
 
     Compatibility Checks:
-        - CPU ↔ Motherboard: Socket matching
-        - RAM ↔ Motherboard: Memory type matching
-        - Power Supply: Wattage adequacy (total TDP + 100W buffer)
-        - Casing ↔ Motherboard: Form factor compatibility
+        The rules declared in PCBuilderApp.compatibility: socket, memory
+        type, form factor, cooler socket support and power supply wattage.
+        With the compatibility filter on they are applied as ORM filters, so
+        filtering, sorting and pagination all run in the database; the
+        per-product issue messages are only computed for the page shown.
 
     Notes:
         - Handles component type mapping (e.g., 'CPU Cooler' → 'Cooler')
         - Filters products by is_available=True
-        - Applies search across brand, model, and description fields
+        - Applies search through the product search index (ProductsApp.search)
         - Supports component-specific filtering by technical specifications
     """
-    pc_build = get_or_create_pc_builder(request)
+    pc_build = get_or_create_pc_builder(request, create=False)
 
     # Map the URL component type to the actual model type
     # This helps handle cases like "CPU Cooler" mapping to "Cooler" model
@@ -533,14 +656,9 @@ def select_component(request, component_type):
     }
 
     # Get all selected components to determine compatibility
-    selected_components = {}
-    for c_type in component_models.keys():
-        try:
-            item = PCBuilderItem.objects.get(pc_builder=pc_build, component_type=c_type)
-            if item.product_id:
-                selected_components[c_type] = item.get_product()
-        except PCBuilderItem.DoesNotExist:
-            pass
+    snapshot = pc_build.snapshot(loader=get_product_loader(request))
+    selected_components = snapshot.selected()
+    engine = CompatibilityEngine(selected_components)
 
     # Get search query, sort choice, and compatibility filter preference
     search_query = request.GET.get("search", "")
@@ -554,6 +672,7 @@ def select_component(request, component_type):
 
     products = []
     current_selection = None
+    compatible_count = None
 
     # Initialize filter variables
     sockets = []
@@ -571,11 +690,7 @@ def select_component(request, component_type):
 
         # Apply search filter if provided
         if search_query:
-            queryset = queryset.filter(
-                models.Q(brand__icontains=search_query)
-                | models.Q(model__icontains=search_query)
-                | models.Q(description__icontains=search_query)
-            )
+            queryset = search_queryset(queryset, model_component_type, search_query)
 
         # Apply component-specific filters
         if model_component_type == "CPU" and selected_socket:
@@ -595,141 +710,40 @@ def select_component(request, component_type):
             queryset = queryset.filter(ram_type=selected_ram_type)
 
         # Get the current selection for this component type
-        try:
-            # For CPU Cooler, we need to look up using the display component type
-            # This maps back to how the component is stored in PCBuilderItem
-            lookup_component_type = (
-                component_type if component_type != "CPU Cooler" else "Cooler"
-            )
-            builder_item = PCBuilderItem.objects.get(
-                pc_builder=pc_build, component_type=lookup_component_type
-            )
-            current_selection = (
-                builder_item.get_product() if builder_item.product_id else None
-            )
-        except PCBuilderItem.DoesNotExist:
-            current_selection = None
-
-        # Process products and add compatibility information
-        products = list(queryset)
-
-        # Add stock status and compatibility status to all products
-        for product in products:
-            # Add stock status
-            if product.stock > 10:
-                product.stock_status = "In Stock"
-            elif product.stock > 0:
-                product.stock_status = "Low Stock"
-            else:
-                product.stock_status = "Out of Stock"
-
-            # Check compatibility for each product
-            product.compatibility_issues = []
-
-            # CPU compatibility with Motherboard
-            if model_component_type == "CPU" and "Motherboard" in selected_components:
-                motherboard = selected_components["Motherboard"]
-                if product.socket != motherboard.socket:
-                    product.compatibility_issues.append(
-                        f"Socket mismatch: CPU uses {product.socket} but motherboard has {motherboard.socket}"
-                    )
-
-            # Motherboard compatibility with CPU
-            elif model_component_type == "Motherboard" and "CPU" in selected_components:
-                cpu = selected_components["CPU"]
-                if cpu.socket != product.socket:
-                    product.compatibility_issues.append(
-                        f"Socket mismatch: Motherboard has {product.socket} but CPU uses {cpu.socket}"
-                    )
-
-            # RAM compatibility with Motherboard
-            elif model_component_type == "RAM" and "Motherboard" in selected_components:
-                motherboard = selected_components["Motherboard"]
-                if product.ram_type != motherboard.memory_type:
-                    product.compatibility_issues.append(
-                        f"Memory type mismatch: RAM is {product.ram_type} but motherboard supports {motherboard.memory_type}"
-                    )
-
-            # Motherboard compatibility with RAM
-            elif model_component_type == "Motherboard" and "RAM" in selected_components:
-                ram = selected_components["RAM"]
-                if ram.ram_type != product.memory_type:
-                    product.compatibility_issues.append(
-                        f"Memory type mismatch: Motherboard supports {product.memory_type} but RAM is {ram.ram_type}"
-                    )
-
-            # Power Supply compatibility check
-            elif model_component_type == "Power Supply":
-                total_tdp = sum(
-                    getattr(comp, "tdp", 0) or 0
-                    for comp in selected_components.values()
-                )
-                # Add 100W buffer
-                recommended_wattage = total_tdp + 100
-                if product.wattage < recommended_wattage:
-                    product.compatibility_issues.append(
-                        f"Insufficient wattage: Your components need at least {recommended_wattage}W, but this PSU provides {product.wattage}W"
-                    )
-
-            # Case compatibility with Motherboard
-            elif (
-                model_component_type == "Casing"
-                and "Motherboard" in selected_components
-            ):
-                motherboard = selected_components["Motherboard"]
-                if motherboard.form_factor not in product.form_factor:
-                    product.compatibility_issues.append(
-                        f"Form factor mismatch: Case supports {product.form_factor} but motherboard is {motherboard.form_factor}"
-                    )
-
-            # Motherboard compatibility with Case
-            elif (
-                model_component_type == "Motherboard"
-                and "Casing" in selected_components
-            ):
-                case = selected_components["Casing"]
-                if product.form_factor not in case.form_factor:
-                    product.compatibility_issues.append(
-                        f"Form factor mismatch: Motherboard is {product.form_factor} but case supports {case.form_factor}"
-                    )
+        # For CPU Cooler, we need to look up using the display component type
+        # This maps back to how the component is stored in PCBuilderItem
+        lookup_component_type = (
+            component_type if component_type != "CPU Cooler" else "Cooler"
+        )
+        current_selection = snapshot.product(lookup_component_type)
 
-            # Set compatibility status
-            product.is_compatible = len(product.compatibility_issues) == 0
+        # How many available products fit the rest of the build
+        if selected_components:
+            compatible_count = compatibility_matrix.count(
+                model_component_type, selected_components
+            )
 
-        # If compatibility filter is enabled, filter out incompatible products
+        # Keep only compatible products, filtered in the database
         if compatibility_filtered:
-            products = [p for p in products if p.is_compatible]
+            queryset = queryset.filter(
+                engine.compatible_filter(model_component_type, model)
+            )
 
         # Apply sorting
-        if current_sort == "price_asc":
-            products = sorted(products, key=lambda x: x.price or 0)
-        elif current_sort == "price_desc":
-            products = sorted(products, key=lambda x: x.price or 0, reverse=True)
-        elif current_sort == "name_asc":
-            products = sorted(products, key=lambda x: f"{x.brand} {x.model}")
-        elif current_sort == "newest":
-            products = sorted(
-                products,
-                key=lambda x: x.created_at
-                if hasattr(x, "created_at")
-                else datetime.now(),
-                reverse=True,
-            )
+        queryset = queryset.order_by(
+            *COMPONENT_SORTS.get(current_sort, ("created_at", "id"))
+        )
+        products = queryset
 
-        # Get filters for the dropdown menus
+        # Get filters for the dropdown menus from the facet bitmaps
         if model_component_type == "CPU" or model_component_type == "Motherboard":
-            # Get distinct socket values from the model
-            sockets = model.objects.values_list("socket", flat=True).distinct()
+            sockets = facet_index.values(model_component_type, "socket")
 
         if model_component_type == "Motherboard" or model_component_type == "Casing":
-            # Get distinct form factor values
-            form_factors = model.objects.values_list(
-                "form_factor", flat=True
-            ).distinct()
+            form_factors = facet_index.values(model_component_type, "form_factor")
 
         if model_component_type == "RAM":
-            # Get distinct RAM types
-            ram_types = model.objects.values_list("ram_type", flat=True).distinct()
+            ram_types = facet_index.values(model_component_type, "ram_type")
 
         # For Cooler, get available socket support values
         if model_component_type == "Cooler":
@@ -741,6 +755,23 @@ def select_component(request, component_type):
     page_number = request.GET.get("page", 1)
     page_obj = paginator.get_page(page_number)
 
+    # Stock and compatibility details are only needed for the page shown
+    page_obj.object_list = list(page_obj.object_list)
+    for product in page_obj.object_list:
+        # Add stock status
+        if product.stock > 10:
+            product.stock_status = "In Stock"
+        elif product.stock > 0:
+            product.stock_status = "Low Stock"
+        else:
+            product.stock_status = "Out of Stock"
+
+    if page_obj.object_list:
+        annotate(
+            page_obj.object_list,
+            engine.evaluate(model_component_type, page_obj.object_list),
+        )
+
     # Map some component types to a more user-friendly display name
     display_component_type = component_type
 
@@ -760,6 +791,7 @@ def select_component(request, component_type):
         "has_compatibility_check": bool(
             selected_components
         ),  # Indicates if compatibility checking is relevant
+        "compatible_count": compatible_count,
     }
 
     return render(request, "pcbuilder/pc-builder-select.html", context)
@@ -864,22 +896,15 @@ def add_component_to_build(request):
 
             # Handle 'Storage' component type which could be either SSD or HDD
             if component_type == "Storage":
-                # Try to determine if this is an SSD or HDD based on form submission or URL
-                # Check if the ID exists in SSD model, if not, try HDD
-                try:
-                    SSD.objects.get(id=product_id)
-                    component_type = "SSD"
-                except SSD.DoesNotExist:
-                    try:
-                        HDD.objects.get(id=product_id)
-                        component_type = "HDD"
-                    except HDD.DoesNotExist:
-                        return JsonResponse(
-                            {
-                                "status": "error",
-                                "message": f"Storage product with ID {product_id} not found",
-                            }
-                        )
+                # Resolve whether the ID belongs to an SSD or an HDD
+                component_type = product_registry.resolve(product_id)
+                if component_type not in ("SSD", "HDD"):
+                    return JsonResponse(
+                        {
+                            "status": "error",
+                            "message": f"Storage product with ID {product_id} not found",
+                        }
+                    )
 
             if component_type not in component_models:
                 return JsonResponse(
@@ -918,6 +943,9 @@ def add_component_to_build(request):
             builder_item.product_tdp = product.tdp
             builder_item.save()
 
+            # The item signal has updated the stored totals
+            pc_build.refresh_from_db(fields=PCBuilder.TOTAL_FIELDS)
+
             # Return updated build information
             return JsonResponse(
                 {
@@ -1050,6 +1078,7 @@ def remove_component_from_build(request, component_type):
                         return redirect("pc_builder")
 
                 # Handle successful removal
+                pc_build.refresh_from_db(fields=PCBuilder.TOTAL_FIELDS)
                 if request.headers.get(
                     "X-Requested-With"
                 ) == "XMLHttpRequest" or "application/json" in request.headers.get(
@@ -1079,6 +1108,7 @@ def remove_component_from_build(request, component_type):
                 builder_item.product_price = None
                 builder_item.product_tdp = None
                 builder_item.save()
+                pc_build.refresh_from_db(fields=PCBuilder.TOTAL_FIELDS)
 
                 # Check if it's an AJAX request
                 if request.headers.get(
@@ -1130,7 +1160,7 @@ def remove_component_from_build(request, component_type):
     return redirect("pc_builder")
 
 
-def check_compatibility(pc_build, new_component_type, new_product):
+def check_compatibility(pc_build, new_component_type, new_product, snapshot=None):
     """
     Check hardware compatibility between a new component and existing build components.
 
@@ -1145,18 +1175,25 @@ def check_compatibility(pc_build, new_component_type, new_product):
                                  (e.g., 'CPU', 'Motherboard', 'RAM').
         new_product (Model): The product model instance being added to the build.
                             Should have relevant technical specifications.
+        snapshot (BuildSnapshot, optional): Already loaded build contents;
+                            loaded from ``pc_build`` when omitted.
 
     Returns:
         list: A list of compatibility issue messages (strings). Empty list if
               no compatibility issues are found.
 
     Compatibility Checks Performed:
+        The rules declared in PCBuilderApp.compatibility.RULES:
+
         CPU ↔ Motherboard:
             - Socket type matching (e.g., LGA1700, AM4)
 
         RAM ↔ Motherboard:
             - Memory type compatibility (e.g., DDR4, DDR5)
 
+        CPU ↔ Cooler:
+            - CPU socket listed in the cooler's socket_support
+
         Power Supply:
             - Wattage adequacy check (total component TDP + 100W buffer)
 
@@ -1165,10 +1202,11 @@ def check_compatibility(pc_build, new_component_type, new_product):
 
     Technical Specifications Used:
         - CPU: socket, tdp
+        - Cooler: socket_support, tdp
         - Motherboard: socket, memory_type, form_factor, tdp
         - RAM: ram_type, tdp
         - Power Supply: wattage
-        - Casing: form_factor (should contain supported form factors)
+        - Casing: form_factor (largest supported motherboard form factor)
         - Other components: tdp (for power calculation)
 
     Notes:
@@ -1178,72 +1216,13 @@ def check_compatibility(pc_build, new_component_type, new_product):
         - Excludes the new component from existing component analysis
         - Returns descriptive error messages for user understanding
     """
-    compatibility_issues = []
-
     # Get all currently selected components
-    selected_components = {}
-    for item in pc_build.pcbuilderitem_set.all():
-        if item.product_id and item.component_type != new_component_type:
-            selected_components[item.component_type] = item.get_product()
-
-    # CPU and Motherboard compatibility check
-    if new_component_type == "CPU" and "Motherboard" in selected_components:
-        motherboard = selected_components["Motherboard"]
-        if new_product.socket != motherboard.socket:
-            compatibility_issues.append(
-                f"Socket mismatch: CPU uses {new_product.socket} but motherboard has {motherboard.socket}"
-            )
-
-    elif new_component_type == "Motherboard" and "CPU" in selected_components:
-        cpu = selected_components["CPU"]
-        if cpu.socket != new_product.socket:
-            compatibility_issues.append(
-                f"Socket mismatch: Motherboard has {new_product.socket} but CPU uses {new_product.socket}"
-            )
-
-    # RAM and Motherboard compatibility check
-    if new_component_type == "RAM" and "Motherboard" in selected_components:
-        motherboard = selected_components["Motherboard"]
-        if new_product.ram_type != motherboard.memory_type:
-            compatibility_issues.append(
-                f"Memory type mismatch: RAM is {new_product.ram_type} but motherboard supports {motherboard.memory_type}"
-            )
-
-    elif new_component_type == "Motherboard" and "RAM" in selected_components:
-        ram = selected_components["RAM"]
-        if ram.ram_type != new_product.memory_type:
-            compatibility_issues.append(
-                f"Memory type mismatch: Motherboard supports {new_product.memory_type} but RAM is {ram.ram_type}"
-            )
-
-    # Power supply wattage check for all components
-    if new_component_type == "Power Supply":
-        total_tdp = sum(
-            getattr(comp, "tdp", 0) or 0 for comp in selected_components.values()
-        )
-        # Add 100W buffer
-        recommended_wattage = total_tdp + 100
-        if new_product.wattage < recommended_wattage:
-            compatibility_issues.append(
-                f"Insufficient wattage: Your components need at least {recommended_wattage}W, but this PSU provides {new_product.wattage}W"
-            )
-
-    # Case and Motherboard compatibility check
-    if new_component_type == "Casing" and "Motherboard" in selected_components:
-        motherboard = selected_components["Motherboard"]
-        if motherboard.form_factor not in new_product.form_factor:
-            compatibility_issues.append(
-                f"Form factor mismatch: Case supports {new_product.form_factor} but motherboard is {motherboard.form_factor}"
-            )
-
-    elif new_component_type == "Motherboard" and "Casing" in selected_components:
-        case = selected_components["Casing"]
-        if new_product.form_factor not in case.form_factor:
-            compatibility_issues.append(
-                f"Form factor mismatch: Motherboard is {new_product.form_factor} but case supports {case.form_factor}"
-            )
+    snapshot = snapshot or pc_build.snapshot()
+    selected_components = snapshot.selected(exclude=new_component_type)
 
-    return compatibility_issues
+    return CompatibilityEngine(selected_components).check(
+        new_component_type, new_product
+    )
 
 
 @login_required
@@ -1296,23 +1275,11 @@ def save_pc_build(request):
         # Get the current build
         current_build = get_or_create_pc_builder(request)
 
-        # Create a new saved build with the provided name
-        saved_build = PCBuilder.objects.create(
-            user=request.user, name=build_name, is_public=is_public
+        # Copy the selected components into a new saved build
+        services.copy_build(
+            current_build, user=request.user, name=build_name, is_public=is_public
         )
 
-        # Copy all components from current build to saved build
-        for item in current_build.pcbuilderitem_set.all():
-            if item.product_id:
-                PCBuilderItem.objects.create(
-                    pc_builder=saved_build,
-                    component_type=item.component_type,
-                    product_id=item.product_id,
-                    product_name=item.product_name,
-                    product_price=item.product_price,
-                    product_tdp=item.product_tdp,
-                )
-
         messages.success(request, f"Build '{build_name}' saved successfully!")
         return redirect("pc_builder")
 
@@ -1342,7 +1309,10 @@ def my_saved_builds(request):
     Query Details:
         - Filters by user=request.user to show only current user's builds
         - Excludes current working builds by requiring name__isnull=False
-        - Orders by -created_at for reverse chronological display
+        - Orders by -created_at for reverse chronological display, or by
+          the stored total_price with ?sort=price_asc / price_desc
+        - Totals, item counts and completeness are columns on PCBuilder,
+          so the whole list is a single query
 
     Notes:
         - Only shows saved builds, not the current working build
@@ -1350,11 +1320,12 @@ def my_saved_builds(request):
         - Each build in the list includes all associated components and metadata
         - Template can access build details like name, creation date, total price
     """
+    current_sort = request.GET.get("sort", "newest")
     builds = PCBuilder.objects.filter(user=request.user, name__isnull=False).order_by(
-        "-created_at"
+        *SAVED_BUILD_SORTS.get(current_sort, SAVED_BUILD_SORTS["newest"])
     )
 
-    context = {"builds": builds}
+    context = {"builds": builds, "current_sort": current_sort}
 
     return render(request, "pcbuilder/my-saved-builds.html", context)
 
@@ -1405,23 +1376,8 @@ def load_saved_build(request, build_id):
     # Get or create the current build
     current_build = get_or_create_pc_builder(request)
 
-    # Clear the current build
-    current_build.pcbuilderitem_set.all().update(
-        product_id=None, product_name=None, product_price=None, product_tdp=None
-    )
-
-    # Copy components from saved build to current build
-    for item in saved_build.pcbuilderitem_set.all():
-        if item.product_id:
-            current_item, created = PCBuilderItem.objects.get_or_create(
-                pc_builder=current_build, component_type=item.component_type
-            )
-
-            current_item.product_id = item.product_id
-            current_item.product_name = item.product_name
-            current_item.product_price = item.product_price
-            current_item.product_tdp = item.product_tdp
-            current_item.save()
+    # Replace the current build's components with the saved ones
+    services.load_build(saved_build, current_build)
 
     messages.success(request, f"Build '{saved_build.name}' loaded successfully!")
     return redirect("pc_builder")
@@ -1503,10 +1459,11 @@ def add_build_to_cart(request, build_id=None):
         - Prevents adding out-of-stock items (stock <= 0)
         - Reports all out-of-stock items in error message
         - Fails entire operation if any component is unavailable
+        - Holds the new cart quantities like add_to_cart (CartApp.reservations)
 
     Cart Behavior:
-        - Creates new CartItem if component not in cart
-        - Increments quantity by 1 if component already in cart
+        - Creates new CartItems for components not in cart with one insert
+        - Increments quantity by 1 for components already in cart with one update
         - Sets product_category to component_type for proper categorization
         - Uses current product price from PCBuilderItem
 
@@ -1514,6 +1471,8 @@ def add_build_to_cart(request, build_id=None):
         - Build not found: Returns 404 error
         - Build belongs to different user: Returns 404 error (for saved builds)
         - Out of stock components: Shows error and redirects to PC builder
+        - Stock held by other carts: Shows error and redirects to PC builder;
+          nothing is added
         - Empty build: Shows warning message
         - User not authenticated: Redirects to login (handled by decorator)
 
@@ -1541,12 +1500,12 @@ def add_build_to_cart(request, build_id=None):
     cart = get_cart(request)
 
     # Check if any component is out of stock
-    out_of_stock = []
-    for item in pc_build.pcbuilderitem_set.all():
-        if item.product_id:
-            product = item.get_product()
-            if product and product.stock <= 0:
-                out_of_stock.append(f"{item.product_name}")
+    snapshot = pc_build.snapshot(loader=get_product_loader(request))
+    out_of_stock = [
+        slot.product_name
+        for slot in snapshot.slots.values()
+        if slot.product is not None and slot.product.stock <= 0
+    ]
 
     if out_of_stock:
         messages.error(
@@ -1555,34 +1514,17 @@ def add_build_to_cart(request, build_id=None):
         )
         return redirect("pc_builder")
 
-    # Add each component to the cart
-    added_count = 0
-    for item in pc_build.pcbuilderitem_set.all():
-        if item.product_id:
-            product = item.get_product()
-            if product:
-                # Check if already in cart
-                from CartApp.models import CartItem
-
-                try:
-                    cart_item = CartItem.objects.get(
-                        cart=cart,
-                        product_id=item.product_id,
-                        product_category=item.component_type,
-                    )
-                    # Update quantity if already in cart
-                    cart_item.quantity += 1
-                    cart_item.save()
-                except CartItem.DoesNotExist:
-                    # Create new cart item
-                    CartItem.objects.create(
-                        cart=cart,
-                        product_id=item.product_id,
-                        product_category=item.component_type,
-                        quantity=1,
-                        price=item.product_price,
-                    )
-                added_count += 1
+    # Add every component with one upsert; fails if other carts hold the stock
+    try:
+        added_count = services.add_build_to_cart(snapshot, cart)
+    except OutOfStock as error:
+        product = snapshot.product(error.category)
+        name = f"{product.brand} {product.model}" if product else "A component"
+        messages.error(
+            request,
+            f"Cannot add to cart. Not enough stock available for {name}.",
+        )
+        return redirect("pc_builder")
 
     if added_count > 0:
         messages.success(request, f"{added_count} components added to your cart!")
@@ -1611,7 +1553,9 @@ def export_build_pdf(request, build_id=None):
                                  For anonymous users, always uses current build.
 
     Returns:
-        HttpResponse: PDF file download response with appropriate headers, or
+        HttpResponse: PDF file download response with appropriate headers, a
+                     304 if the client already has this document, a 202 page
+                     that reloads itself while the document is rendering, or
                      redirect to PC builder on error.
 
     PDF Content Structure:
@@ -1655,580 +1599,64 @@ def export_build_pdf(request, build_id=None):
         - Falls back to "TechReform_PC_Build" for unnamed builds
         - Includes .pdf extension automatically
 
+    Caching:
+        - Documents are keyed by a hash of their contents (build name,
+          product IDs, prices, specifications, compatibility notes, date)
+          and stored on disk (settings.BUILD_PDF_CACHE_DIR)
+        - The key is sent as the ETag; a matching If-None-Match gets a 304
+        - Missing documents are rendered in a process pool
+          (settings.BUILD_PDF_WORKERS); the request waits up to
+          settings.BUILD_PDF_WAIT seconds before answering 202
+
     Notes:
-        - PDF generation is memory-intensive for large builds
+        - Rendering runs outside the web process, since it is memory-intensive
         - Includes live pricing at time of generation
         - Contains disclaimer about price validity
         - Supports both single and multi-page layouts
         - Optimized for printing and digital sharing
     """
     try:
-        # Import required modules
-        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-        from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import (
-            SimpleDocTemplate,
-            Paragraph,
-            Spacer,
-            Image,
-            Table,
-            TableStyle,
-            HRFlowable,
-        )
-        from reportlab.lib import colors
-        from reportlab.lib.units import mm
-        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-
         # Determine which build to use
         if build_id and request.user.is_authenticated:
             # Use a saved build
             pc_build = get_object_or_404(PCBuilder, id=build_id, user=request.user)
         else:
             # Use the current build
-            pc_build = get_or_create_pc_builder(request)
+            pc_build = get_or_create_pc_builder(request, create=False)
 
-        # Create a PDF
-        buffer = BytesIO()
-
-        # Use A4 for a standard international page size
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=15 * mm,
-            leftMargin=15 * mm,
-            topMargin=20 * mm,
-            bottomMargin=20 * mm,
-            title=f"TechReform PC Build - {pc_build.name if pc_build.name else 'Custom Build'}",
-        )
+        # Describe the document; its hash names the cached file and the ETag
+        snapshot = pc_build.snapshot(loader=get_product_loader(request))
+        quote = build_quote(pc_build, snapshot)
+        key = quote_key(quote)
+        etag = f'"{key}"'
 
-        # Container for the 'Flowable' objects
-        elements = []
-
-        # Define styles
-        styles = getSampleStyleSheet()
-
-        # Define TechReform brand colors
-        # Main colors from the website
-        tech_blue = colors.HexColor("#0052D4")  # Primary brand color
-        tech_light_blue = colors.HexColor("#65A7FB")  # Secondary brand color
-        tech_dark = colors.HexColor("#333333")  # Text color
-        tech_light_gray = colors.HexColor("#F5F5F5")  # Background color
-        tech_accent = colors.HexColor("#FF6B21")  # Accent/highlight color
-        tech_success = colors.HexColor("#4CAF50")  # Success/compatible color
-        tech_error = colors.HexColor("#D32F2F")  # Error/warning color
-
-        # Custom styles with TechReform website colors and proper text wrapping
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Title"],
-            fontSize=24,
-            alignment=TA_CENTER,
-            spaceAfter=6 * mm,
-            textColor=tech_blue,
-            fontName="Helvetica-Bold",
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        subtitle_style = ParagraphStyle(
-            "CustomSubtitle",
-            parent=styles["Heading2"],
-            fontSize=16,
-            spaceBefore=6 * mm,
-            spaceAfter=3 * mm,
-            textColor=tech_blue,
-            borderPadding=5,
-            borderWidth=0,
-            borderRadius=3,
-            borderColor=tech_light_blue,
-            backColor=tech_light_gray,
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        normal_style = ParagraphStyle(
-            "CustomNormal",
-            parent=styles["Normal"],
-            fontSize=10,
-            leading=14,
-            spaceAfter=3 * mm,
-            textColor=tech_dark,
-            wordWrap="CJK",  # Enable proper text wrapping
-            allowWidows=0,  # Prevent single words on their own line
-            allowOrphans=0,  # Prevent single words at start of paragraph
-        )
-
-        info_style = ParagraphStyle(
-            "CustomInfo",
-            parent=styles["Normal"],
-            fontSize=10,
-            backColor=colors.HexColor("#E5F3FF"),
-            borderColor=tech_light_blue,
-            borderWidth=1,
-            borderPadding=8,
-            borderRadius=5,
-            spaceAfter=4 * mm,
-            textColor=tech_dark,
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        warning_style = ParagraphStyle(
-            "CustomWarning",
-            parent=styles["Normal"],
-            fontSize=10,
-            textColor=tech_error,
-            leftIndent=5 * mm,
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        compatible_style = ParagraphStyle(
-            "CustomCompatible",
-            parent=styles["Normal"],
-            fontSize=10,
-            textColor=tech_success,
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        footer_style = ParagraphStyle(
-            "CustomFooter",
-            parent=styles["Normal"],
-            fontSize=8,
-            textColor=colors.gray,
-            alignment=TA_CENTER,
-            fontName="Helvetica-Oblique",
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        price_style = ParagraphStyle(
-            "PriceStyle",
-            parent=styles["Normal"],
-            fontSize=14,
-            textColor=tech_accent,
-            alignment=TA_RIGHT,
-            fontName="Helvetica-Bold",
-            wordWrap="CJK",  # Enable proper text wrapping
-        )
-
-        component_style = ParagraphStyle(
-            "ComponentStyle",
-            parent=styles["Normal"],
-            fontSize=10,
-            textColor=tech_dark,
-            wordWrap="CJK",  # Enable proper text wrapping
-            leading=12,  # Slightly tighter line spacing
-            allowWidows=0,  # Prevent single words on their own line
-            allowOrphans=0,  # Prevent single words at start of paragraph
-        )
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
 
-        # Add logo - Safely handle the case where STATIC_ROOT might be None
+        # Render in a worker process, waiting a bounded time for the result
+        future = quote_renderer.submit(key, quote)
         try:
-            # First try to find the logo in the static folder
-            base_dir = settings.BASE_DIR  # This should always be defined
-            possible_logo_paths = [
-                os.path.join(base_dir, "static", "base", "images", "logo.png"),
-                os.path.join(base_dir, "static", "index", "images", "logo.png"),
-                os.path.join(base_dir, "static", "index", "img", "logo.png"),
-                os.path.join(base_dir, "static", "theme", "img", "logo.png"),
-            ]
-
-            # Check if STATIC_ROOT is defined and add it as a possible location
-            if hasattr(settings, "STATIC_ROOT") and settings.STATIC_ROOT:
-                possible_logo_paths.append(
-                    os.path.join(settings.STATIC_ROOT, "base", "images", "logo.png")
-                )
-                possible_logo_paths.append(
-                    os.path.join(settings.STATIC_ROOT, "index", "images", "logo.png")
-                )
-                possible_logo_paths.append(
-                    os.path.join(settings.STATIC_ROOT, "index", "img", "logo.png")
-                )
-                possible_logo_paths.append(
-                    os.path.join(settings.STATIC_ROOT, "theme", "img", "logo.png")
-                )
-
-            # Try each path until we find the logo
-            logo_found = False
-            for logo_path in possible_logo_paths:
-                if os.path.exists(logo_path):
-                    logo = Image(logo_path, width=150, height=45)
-                    logo.hAlign = "CENTER"
-                    elements.append(logo)
-                    logo_found = True
-                    break
-
-            # If no logo is found, use a text title instead
-            if not logo_found:
-                elements.append(Paragraph("TechReform BD", title_style))
-        except Exception as e:
-            # If there's any issue with the logo, fall back to text
-            print(f"Logo loading error: {str(e)}")
-            elements.append(Paragraph("TechReform BD", title_style))
-
-        # Add a separator line after logo
-        elements.append(Spacer(1, 5 * mm))
-        elements.append(
-            HRFlowable(
-                width="100%",
-                thickness=1,
-                color=tech_blue,
-                spaceBefore=2 * mm,
-                spaceAfter=5 * mm,
-            )
-        )
-
-        # Add build title with date
-        from datetime import datetime
-
-        build_title = pc_build.name if pc_build.name else "Custom PC Build"
-        current_date = datetime.now().strftime("%B %d, %Y")
-        elements.append(Paragraph(build_title, title_style))
-        elements.append(Paragraph(f"Generated on: {current_date}", normal_style))
-
-        # Add total price with prominence
-        total_price = pc_build.get_total_price
-        elements.append(Paragraph(f"Total Price: {total_price:,.2f} Tk", price_style))
-        elements.append(Spacer(1, 3 * mm))
-
-        # Get all components by type for the component table
-        table_data = [["Component", "Specification", "Price"]]
-
-        components_data = []
-        for item in pc_build.pcbuilderitem_set.all():
-            if item.product_id:
-                product = item.get_product()
-                if product:
-                    # Store component data for table
-                    components_data.append(
-                        {
-                            "type": item.component_type,
-                            "name": f"{product.brand} {product.model}",
-                            "price": product.price,
-                        }
-                    )
-
-        # Sort components in logical order
-        component_order = [
-            "CPU",
-            "Cooler",
-            "Motherboard",
-            "RAM",
-            "GPU",
-            "SSD",
-            "HDD",
-            "Power Supply",
-            "Casing",
-            "Monitor",
-            "Keyboard",
-            "Mouse",
-            "Headphone",
-        ]
-
-        # Add components to table in order
-        for comp_type in component_order:
-            for comp in components_data:
-                if comp["type"] == comp_type:
-                    # Wrap component names in Paragraph objects for text wrapping
-                    name_paragraph = Paragraph(comp["name"], component_style)
-
-                    table_data.append(
-                        [
-                            comp_type,
-                            name_paragraph,
-                            f"{comp['price']:,.2f} Tk" if comp["price"] else "N/A",
-                        ]
-                    )
-
-        # Create the table with styling - adjusted column widths for text wrapping
-        col_widths = [
-            75,
-            285,
-            70,
-        ]  # Width in points, with more space for component name
-        components_table = Table(table_data, colWidths=col_widths, repeatRows=1)
-
-        # Style the table with TechReform website colors
-        table_style = TableStyle(
-            [
-                # Header row
-                ("BACKGROUND", (0, 0), (-1, 0), tech_blue),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                # Alternate row colors for better readability
-                ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, tech_light_gray]),
-                # Borders
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
-                ("BOX", (0, 0), (-1, -1), 1, tech_light_blue),
-                # Text alignment
-                ("ALIGN", (0, 0), (0, -1), "LEFT"),  # Component type column
-                ("ALIGN", (2, 0), (2, -1), "RIGHT"),  # Price column alignment
-                ("VALIGN", (1, 1), (1, -1), "TOP"),  # Align wrapped text to top
-                # Padding
-                ("TOPPADDING", (0, 0), (-1, -1), 8),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-
-        components_table.setStyle(table_style)
-        elements.append(Spacer(1, 5 * mm))
-        elements.append(Paragraph("System Components", subtitle_style))
-        elements.append(Spacer(1, 2 * mm))
-        elements.append(components_table)
-        elements.append(Spacer(1, 5 * mm))
-
-        # Power consumption info box
-        power_text = (
-            f"<b>Estimated Power Consumption:</b> {pc_build.get_recommended_wattage}W"
-        )
-        elements.append(Paragraph(power_text, info_style))
-
-        # System specifications
-        elements.append(Paragraph("System Performance", subtitle_style))
-
-        # Get components by type for detailed specs
-        components_by_type = {}
-        for item in pc_build.pcbuilderitem_set.all():
-            if item.product_id:
-                product = item.get_product()
-                if product:
-                    components_by_type[item.component_type] = product
-
-        # Create specifications with detailed info
-        specs_text = ""
-        if "CPU" in components_by_type:
-            cpu = components_by_type["CPU"]
-            cpu_details = []
-            if hasattr(cpu, "cores") and cpu.cores:
-                cpu_details.append(f"{cpu.cores} cores")
-            if hasattr(cpu, "threads") and cpu.threads:
-                cpu_details.append(f"{cpu.threads} threads")
-            if hasattr(cpu, "boost_frequency") and cpu.boost_frequency:
-                cpu_details.append(f"{cpu.boost_frequency} GHz")
-            cpu_specs = f"{cpu.brand} {cpu.model} " + (
-                f"({', '.join(cpu_details)})" if cpu_details else ""
-            )
-            specs_text += f"<b>Processor:</b> {cpu_specs}<br/>"
-
-        if "Cooler" in components_by_type:
-            cooler = components_by_type["Cooler"]
-            specs_text += f"<b>CPU Cooler:</b> {cooler.brand} {cooler.model}<br/>"
-
-        if "Motherboard" in components_by_type:
-            mobo = components_by_type["Motherboard"]
-            mobo_details = []
-            if hasattr(mobo, "chipset") and mobo.chipset:
-                mobo_details.append(f"{mobo.chipset}")
-            if hasattr(mobo, "form_factor") and mobo.form_factor:
-                mobo_details.append(f"{mobo.form_factor}")
-            mobo_specs = f"{mobo.brand} {mobo.model} " + (
-                f"({', '.join(mobo_details)})" if mobo_details else ""
-            )
-            specs_text += f"<b>Motherboard:</b> {mobo_specs}<br/>"
-
-        if "RAM" in components_by_type:
-            ram = components_by_type["RAM"]
-            ram_details = []
-            if hasattr(ram, "memory_capacity") and ram.memory_capacity:
-                ram_details.append(f"{ram.memory_capacity}")
-            if hasattr(ram, "frequency") and ram.frequency:
-                ram_details.append(f"{ram.frequency}")
-            ram_specs = f"{ram.brand} {ram.model} " + (
-                f"({', '.join(ram_details)})" if ram_details else ""
-            )
-            specs_text += f"<b>Memory:</b> {ram_specs}<br/>"
-
-        if "GPU" in components_by_type:
-            gpu = components_by_type["GPU"]
-            gpu_details = []
-            if hasattr(gpu, "vram_capacity") and gpu.vram_capacity:
-                gpu_details.append(f"{gpu.vram_capacity}")
-            gpu_specs = f"{gpu.brand} {gpu.model} " + (
-                f"({', '.join(gpu_details)})" if gpu_details else ""
-            )
-            specs_text += f"<b>Graphics:</b> {gpu_specs}<br/>"
-
-        storage_specs = []
-        if "SSD" in components_by_type:
-            ssd = components_by_type["SSD"]
-            ssd_details = []
-            if hasattr(ssd, "storage_capacity") and ssd.storage_capacity:
-                ssd_details.append(f"{ssd.storage_capacity}")
-            if hasattr(ssd, "interface") and ssd.interface:
-                ssd_details.append(f"{ssd.interface}")
-            ssd_specs = f"{ssd.brand} {ssd.model} " + (
-                f"({', '.join(ssd_details)})" if ssd_details else ""
-            )
-            storage_specs.append(ssd_specs)
-
-        if "HDD" in components_by_type:
-            hdd = components_by_type["HDD"]
-            hdd_details = []
-            if hasattr(hdd, "storage_capacity") and hdd.storage_capacity:
-                hdd_details.append(f"{hdd.storage_capacity}")
-            if hasattr(hdd, "rpm") and hdd.rpm:
-                hdd_details.append(f"{hdd.rpm}")
-            hdd_specs = f"{hdd.brand} {hdd.model} " + (
-                f"({', '.join(hdd_details)})" if hdd_details else ""
-            )
-            storage_specs.append(hdd_specs)
-
-        if storage_specs:
-            specs_text += f"<b>Storage:</b> {' + '.join(storage_specs)}<br/>"
-
-        if "Power Supply" in components_by_type:
-            psu = components_by_type["Power Supply"]
-            psu_details = []
-            if hasattr(psu, "wattage") and psu.wattage:
-                psu_details.append(f"{psu.wattage}W")
-            if hasattr(psu, "efficiency") and psu.efficiency:
-                psu_details.append(f"{psu.efficiency}")
-            psu_specs = f"{psu.brand} {psu.model} " + (
-                f"({', '.join(psu_details)})" if psu_details else ""
-            )
-            specs_text += f"<b>Power Supply:</b> {psu_specs}<br/>"
-
-        if "Casing" in components_by_type:
-            case = components_by_type["Casing"]
-            specs_text += f"<b>Case:</b> {case.brand} {case.model}<br/>"
-
-        if specs_text:
-            elements.append(Paragraph(specs_text, normal_style))
-
-        # Compatibility Analysis
-        elements.append(Paragraph("Compatibility Analysis", subtitle_style))
-
-        # Check for compatibility issues
-        compatibility_issues = []
-
-        # CPU and Motherboard compatibility check
-        cpu_item = pc_build.pcbuilderitem_set.filter(component_type="CPU").first()
-        motherboard_item = pc_build.pcbuilderitem_set.filter(
-            component_type="Motherboard"
-        ).first()
-
-        if (
-            cpu_item
-            and cpu_item.product_id
-            and motherboard_item
-            and motherboard_item.product_id
-        ):
-            cpu = cpu_item.get_product()
-            motherboard = motherboard_item.get_product()
-
-            if cpu and motherboard and cpu.socket != motherboard.socket:
-                compatibility_issues.append(
-                    f"⚠️ Socket mismatch: CPU uses {cpu.socket} but motherboard has {motherboard.socket}"
-                )
-
-        # RAM and Motherboard compatibility check
-        ram_item = pc_build.pcbuilderitem_set.filter(component_type="RAM").first()
-        if (
-            ram_item
-            and ram_item.product_id
-            and motherboard_item
-            and motherboard_item.product_id
-        ):
-            ram = ram_item.get_product()
-            motherboard = motherboard_item.get_product()
-
-            if ram and motherboard and ram.ram_type != motherboard.memory_type:
-                compatibility_issues.append(
-                    f"⚠️ Memory type mismatch: RAM is {ram.ram_type} but motherboard supports {motherboard.memory_type}"
-                )
-
-        # Case and Motherboard compatibility check
-        case_item = pc_build.pcbuilderitem_set.filter(component_type="Casing").first()
-        if (
-            case_item
-            and case_item.product_id
-            and motherboard_item
-            and motherboard_item.product_id
-        ):
-            case = case_item.get_product()
-            motherboard = motherboard_item.get_product()
-
-            if case and motherboard and motherboard.form_factor not in case.form_factor:
-                compatibility_issues.append(
-                    f"⚠️ Form factor mismatch: Motherboard is {motherboard.form_factor} but case supports {case.form_factor}"
-                )
-
-        # Power supply check
-        power_item = pc_build.pcbuilderitem_set.filter(
-            component_type="Power Supply"
-        ).first()
-        if power_item and power_item.product_id:
-            power = power_item.get_product()
-            recommended = pc_build.get_recommended_wattage
-
-            if power.wattage < recommended:
-                compatibility_issues.append(
-                    f"⚠️ Insufficient power: Your build requires at least {recommended}W but your power supply provides {power.wattage}W"
-                )
+            path = future.result(timeout=getattr(settings, "BUILD_PDF_WAIT", 3))
+        except TimeoutError:
+            response = render(request, "pcbuilder/pdf-pending.html", status=202)
+            response["Refresh"] = "2"
+            response["Retry-After"] = "2"
+            return response
 
-        # Display compatibility analysis
-        if compatibility_issues:
-            for issue in compatibility_issues:
-                elements.append(Paragraph(issue, warning_style))
-        else:
-            elements.append(
-                Paragraph("✅ All components are compatible.", compatible_style)
-            )
-
-        # Add recommendations section if there are missing components
-        essential_components = ["CPU", "Motherboard", "RAM", "Power Supply", "Casing"]
-        missing_essential = [
-            comp for comp in essential_components if comp not in components_by_type
-        ]
-
-        if missing_essential:
-            elements.append(Spacer(1, 5 * mm))
-            elements.append(Paragraph("Build Recommendations", subtitle_style))
-            recommendations = "To complete your build, consider adding the following essential components:<br/>"
-            for missing in missing_essential:
-                recommendations += f"• {missing}<br/>"
-            elements.append(Paragraph(recommendations, normal_style))
-
-        # Add a professional footer
-        elements.append(Spacer(1, 10 * mm))
-        elements.append(
-            HRFlowable(
-                width="100%",
-                thickness=1,
-                color=colors.lightgrey,
-                spaceBefore=2 * mm,
-                spaceAfter=5 * mm,
-            )
-        )
-        current_year = datetime.now().year
-        footer_text = f"© {current_year} TechReform BD • www.techreformbd.com • All prices valid at time of generation"
-        elements.append(Paragraph(footer_text, footer_style))
-
-        # Add page numbers
-        def add_page_number(canvas, doc):
-            canvas.saveState()
-            canvas.setFont("Helvetica", 8)
-            canvas.setFillColor(colors.grey)
-            page_num = f"Page {canvas.getPageNumber()}"
-            canvas.drawRightString(doc.pagesize[0] - 20 * mm, 15 * mm, page_num)
-            canvas.restoreState()
-
-        # Build the PDF with page numbers
-        doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
-
-        # Get the PDF data
-        pdf = buffer.getvalue()
-        buffer.close()
-
-        # Create response
-        response = HttpResponse(content_type="application/pdf")
         filename = (
             pc_build.name.replace(" ", "_") if pc_build.name else "TechReform_PC_Build"
         )
-        response["Content-Disposition"] = f'attachment; filename="{filename}.pdf"'
-        response.write(pdf)
-
+        response = FileResponse(
+            open(path, "rb"),
+            as_attachment=True,
+            filename=f"{filename}.pdf",
+            content_type="application/pdf",
+        )
+        response["ETag"] = etag
+        # The URL serves whatever the build currently holds; revalidate each time
+        response["Cache-Control"] = "private, no-cache"
         return response
 
     except Exception as e:
@@ -2303,33 +1731,11 @@ def select_storage(request):
         - Supports both authenticated and anonymous users
         - Debug logging included for troubleshooting product queries
     """
-    pc_build = get_or_create_pc_builder(request)
+    pc_build = get_or_create_pc_builder(request, create=False)
 
     # Get all selected components to determine compatibility
-    selected_components = {}
-    component_models = {
-        "CPU": CPU,
-        "Cooler": Cooler,
-        "Motherboard": Motherboard,
-        "RAM": RAM,
-        "SSD": SSD,
-        "HDD": HDD,
-        "GPU": GPU,
-        "Power Supply": PowerSupply,
-        "Casing": Casing,
-        "Monitor": Monitor,
-        "Keyboard": Keyboard,
-        "Mouse": Mouse,
-        "Headphone": Headphone,
-    }
-
-    for c_type in component_models.keys():
-        try:
-            item = PCBuilderItem.objects.get(pc_builder=pc_build, component_type=c_type)
-            if item.product_id:
-                selected_components[c_type] = item.get_product()
-        except PCBuilderItem.DoesNotExist:
-            pass
+    snapshot = pc_build.snapshot(loader=get_product_loader(request))
+    selected_components = snapshot.selected()
 
     # Get search query, sort choice, and compatibility filter preference
     search_query = request.GET.get("search", "")
@@ -2356,11 +1762,7 @@ def select_storage(request):
 
         # Apply search filter if provided
         if search_query:
-            ssd_queryset = ssd_queryset.filter(
-                Q(brand__icontains=search_query)
-                | Q(model__icontains=search_query)
-                | Q(description__icontains=search_query)
-            )
+            ssd_queryset = search_queryset(ssd_queryset, "SSD", search_query)
 
         for ssd in ssd_queryset:
             # Make sure the storage type is marked
@@ -2376,11 +1778,7 @@ def select_storage(request):
 
         # Apply search filter if provided
         if search_query:
-            hdd_queryset = hdd_queryset.filter(
-                Q(brand__icontains=search_query)
-                | Q(model__icontains=search_query)
-                | Q(description__icontains=search_query)
-            )
+            hdd_queryset = search_queryset(hdd_queryset, "HDD", search_query)
 
         for hdd in hdd_queryset:
             # Make sure the storage type is marked
@@ -2429,22 +1827,8 @@ def select_storage(request):
         )
 
     # Get current SSD and HDD selections
-    current_ssd = None
-    current_hdd = None
-
-    try:
-        ssd_item = PCBuilderItem.objects.get(pc_builder=pc_build, component_type="SSD")
-        if ssd_item.product_id:
-            current_ssd = ssd_item.get_product()
-    except PCBuilderItem.DoesNotExist:
-        pass
-
-    try:
-        hdd_item = PCBuilderItem.objects.get(pc_builder=pc_build, component_type="HDD")
-        if hdd_item.product_id:
-            current_hdd = hdd_item.get_product()
-    except PCBuilderItem.DoesNotExist:
-        pass
+    current_ssd = snapshot.product("SSD")
+    current_hdd = snapshot.product("HDD")
 
     # Pagination
     paginator = Paginator(products, 12)  # 12 products per page
@@ -0,0 +1,350 @@
+"""
+Versioned cache for catalog listing pages in the ProductsApp.
+
+Listing pages (product list, featured, new arrivals, deals) are the same for
+every visitor with the same query parameters. This module caches the data
+behind them: the products on the requested page, the pagination numbers and,
+for the product list, the facet counts. Templates are still rendered per
+request because the surrounding layout (navigation, cart, CSRF token) is
+user specific.
+
+Cache keys:
+    A key only covers the query parameters a view names as affecting its
+    listing, so unrelated or made-up parameters share the cached page. The
+    ``page`` parameter is reduced to a page number within the listing's
+    page count before it becomes part of the key, and the page is stored
+    under the number actually shown; a junk or out-of-range page number
+    therefore never creates an entry of its own.
+
+Invalidation:
+    Every category has a generation counter in the cache. Cache keys embed
+    the generations of the categories a page depends on (its own category,
+    or all of them for cross-category pages), so bumping a counter makes
+    every page of that category unreachable at once. Nothing is deleted;
+    orphaned entries age out through the backend's own eviction.
+
+    The ProductsApp model signals bump the saved or deleted product's
+    category once the surrounding transaction commits. Bulk operations that
+    bypass the signals (queryset.update(), bulk_create, raw SQL) must call
+    ``catalog_cache.bump()`` themselves, as warm_product_registry does.
+
+Backends:
+    The cache alias comes from ``settings.CATALOG_CACHE_ALIAS`` ("catalog").
+    With the default in-memory backend each worker process has its own
+    counters, so a change is only seen at once by the process that made it.
+    settings therefore keep pages in the in-memory backend for a minute
+    only (``CATALOG_CACHE_TIMEOUT``); use the Redis or file-based backend
+    when running several workers to cache them for a day.
+
+Classes:
+    CatalogCache: Generation counters and cached listing pages
+
+Attributes:
+    catalog_cache (CatalogCache): Shared instance
+
+Example:
+    from ProductsApp.caching import catalog_cache
+
+    payload = catalog_cache.get_or_set(
+        "deals", request.GET, build_payload, allowed=("sort",)
+    )
+"""
+
+import hashlib
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PRODUCT_MODELS
+
+
+GENERATION_KEY = "catalog:gen:{}"
+
+
+def generation_key(category):
+    """Return the cache key of a category's generation counter."""
+    # Memcached and some Redis tooling dislike spaces ("Power Supply")
+    return GENERATION_KEY.format(category.replace(" ", "_"))
+
+
+# New arrivals are products created within this window
+NEW_ARRIVALS_WINDOW = timedelta(days=30)
+
+
+def normalize_params(params, allowed=()):
+    """
+    Return a canonical, hashable form of request query parameters.
+
+    Only the allowed parameters are kept. Parameter order, repeated values
+    in a different order and empty values do not produce different cache
+    keys.
+
+    Args:
+        params (QueryDict): Usually ``request.GET``.
+        allowed (iterable): Names of the parameters that change the listing.
+
+    Returns:
+        tuple: Sorted (name, sorted values) pairs.
+    """
+    normalized = []
+    for name in sorted(set(allowed)):
+        values = sorted({value.strip() for value in params.getlist(name) if value.strip()})
+        if values:
+            normalized.append((name, tuple(values)))
+    return tuple(normalized)
+
+
+def page_number(value):
+    """
+    Return a requested page number as a positive int.
+
+    Args:
+        value (str): Usually ``request.GET.get("page")``; may be None.
+
+    Returns:
+        int: The page number, or 1 for missing, junk or non-positive values.
+    """
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def recent_cutoff(now=None):
+    """
+    Return the creation cutoff for "new" products, rounded to the hour.
+
+    Rounding keeps time-dependent listings cacheable: within one hour every
+    request uses the same cutoff and therefore the same cache key.
+
+    Args:
+        now (datetime, optional): Current time, defaults to timezone.now().
+
+    Returns:
+        datetime: Start of the new arrivals window.
+    """
+    now = now or timezone.now()
+    return now.replace(minute=0, second=0, microsecond=0) - NEW_ARRIVALS_WINDOW
+
+
+class _CachedObjectList:
+    """Sized stand-in for a paginated object list restored from the cache."""
+
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+
+def page_payload(page):
+    """
+    Reduce a Page to picklable data.
+
+    Args:
+        page (Page): Page whose object_list holds product instances.
+
+    Returns:
+        dict: Products, page number, page size and total count. Callers may
+        add further keys, e.g. facet counts.
+    """
+    return {
+        "products": list(page.object_list),
+        "number": page.number,
+        "per_page": page.paginator.per_page,
+        "count": page.paginator.count,
+    }
+
+
+def restore_page(payload):
+    """
+    Rebuild a Page from ``page_payload`` data without touching the database.
+
+    Args:
+        payload (dict): Data returned by page_payload.
+
+    Returns:
+        Page: Page with working has_next, page_range and friends.
+    """
+    paginator = Paginator(_CachedObjectList(payload["count"]), payload["per_page"])
+    return Page(payload["products"], payload["number"], paginator)
+
+
+class CatalogCache:
+    """
+    Cache of catalog listing data keyed on per-category generations.
+
+    Methods:
+        generations(categories): Return the current counter of each category.
+        bump(*categories): Invalidate every cached page of the categories.
+        bump_on_commit(category): Bump once the current transaction commits.
+        key(view, params, allowed, categories, extra, page): Build a
+            versioned cache key.
+        get_or_set(view, params, build, allowed, categories, extra): Read
+            through, one entry per page number actually shown.
+        clear(): Drop every cached entry.
+    """
+
+    def __init__(self, alias=None):
+        self._alias = alias
+
+    @property
+    def cache(self):
+        """The configured cache backend."""
+        return caches[self._alias or getattr(settings, "CATALOG_CACHE_ALIAS", "catalog")]
+
+    @property
+    def timeout(self):
+        """Lifetime of cached pages in seconds."""
+        return getattr(settings, "CATALOG_CACHE_TIMEOUT", 86400)
+
+    # ------------------------------------------------------------------
+    # Generations
+    # ------------------------------------------------------------------
+
+    def generations(self, categories=None):
+        """
+        Return the generation counter of each category.
+
+        Missing counters (first use, or evicted) start at the current time in
+        nanoseconds rather than zero, so a restarted counter never repeats a
+        value that an older cached page was stored under.
+
+        Args:
+            categories (iterable, optional): PRODUCT_MODELS keys; all
+                categories when None.
+
+        Returns:
+            dict: Maps category to its generation.
+        """
+        categories = list(PRODUCT_MODELS if categories is None else categories)
+        keys = {generation_key(category): category for category in categories}
+        found = self.cache.get_many(list(keys))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            for key in missing:
+                self.cache.add(key, time.time_ns(), timeout=None)
+            # Another process may have won the race to add the counter
+            found.update(self.cache.get_many(missing))
+        return {keys[key]: found.get(key, 0) for key in keys}
+
+    def bump(self, *categories):
+        """
+        Invalidate every cached page that depends on the given categories.
+
+        Args:
+            *categories (str): PRODUCT_MODELS keys; all categories when empty.
+        """
+        for category in categories or PRODUCT_MODELS:
+            key = generation_key(category)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, time.time_ns(), timeout=None)
+
+    def bump_on_commit(self, category):
+        """
+        Bump a category now and again after the current transaction commits.
+
+        The bump after the commit is the one that matters: a concurrent
+        request could otherwise cache the pre-commit rows under the new
+        generation. Outside a transaction the change is already visible and
+        one bump is enough.
+
+        Args:
+            category (str): PRODUCT_MODELS key of the changed product.
+        """
+        if transaction.get_connection().in_atomic_block:
+            self.bump(category)
+        transaction.on_commit(lambda: self.bump(category))
+
+    # ------------------------------------------------------------------
+    # Pages
+    # ------------------------------------------------------------------
+
+    def key(self, view, params, allowed=(), categories=None, extra=(), page=None):
+        """
+        Build the cache key of a listing page.
+
+        Args:
+            view (str): Name of the listing view.
+            params (QueryDict): Request query parameters.
+            allowed (iterable): Parameters that change the listing, besides
+                the page number.
+            categories (iterable, optional): Categories the page depends on;
+                all categories when None.
+            extra (tuple): Further values the page depends on, e.g. a time
+                cutoff.
+            page (int or str, optional): Page number, or "pages" for the
+                listing's page count; the key of the listing itself if None.
+
+        Returns:
+            str: Cache key.
+        """
+        generations = self.generations(categories)
+        state = repr(
+            (
+                sorted(generations.items()),
+                normalize_params(params, allowed),
+                tuple(extra),
+            )
+        )
+        digest = hashlib.sha1(state.encode()).hexdigest()
+        key = f"catalog:page:{view}:{digest}"
+        return key if page is None else f"{key}:{page}"
+
+    def get_or_set(self, view, params, build, allowed=(), categories=None, extra=()):
+        """
+        Return cached listing data, building and storing it on a miss.
+
+        The requested page number is clamped to the page count cached with
+        the listing. On a miss the payload is stored under the page number
+        it shows, which the paginator may have clamped further.
+
+        Args:
+            view (str): Name of the listing view.
+            params (QueryDict): Request query parameters.
+            build (callable): Called with the page number on a miss; returns
+                a picklable page_payload() dict.
+            allowed (iterable): Parameters that change the listing, besides
+                ``page``; all others are ignored.
+            categories (iterable, optional): Categories the page depends on.
+            extra (tuple): Further values the page depends on.
+
+        Returns:
+            dict: The cached or freshly built payload.
+        """
+        listing = self.key(view, params, allowed, categories, extra)
+        page = page_number(params.get("page"))
+        page_count = self.cache.get(f"{listing}:pages")
+        if page_count is not None:
+            page = min(page, page_count)
+
+        payload = self.cache.get(f"{listing}:{page}")
+        if payload is None:
+            payload = build(page)
+            page_count = max(math.ceil(payload["count"] / payload["per_page"]), 1)
+            self.cache.set_many(
+                {
+                    f"{listing}:pages": page_count,
+                    f"{listing}:{payload['number']}": payload,
+                },
+                self.timeout,
+            )
+        return payload
+
+    def clear(self):
+        """Drop every entry of the catalog cache."""
+        self.cache.clear()
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,371 @@
+"""
+Catalog listing helpers for the ProductsApp.
+
+Listing pages (all products, featured, new arrivals, deals) span all thirteen
+product tables. Instead of loading every table into memory, they select and
+paginate rows from the narrow ProductIndex table and then load only the
+products that actually appear on the requested page.
+
+Cart, wishlist, compare and PC builder items only store a category and a
+product ID. ProductLoader turns a list of such pairs into products with at
+most one ``id__in`` query per category, and remembers every product it has
+loaded so the same product is never fetched twice during a request.
+
+Text searches cannot use ProductIndex (it has no description column), so
+they run as one filtered, ordered query per category. MergedQuerySetList
+k-way merges those querysets lazily, so a page only ever reads
+``offset + limit`` rows from each category.
+
+Classes:
+    ProductLoader: Batch product loader with an identity map
+    MergedQuerySetList: Paginator-compatible k-way merge of ordered querysets
+
+Functions:
+    get_product_loader: Return the loader bound to the current request
+    search_product_tables: Build the merged search results for product_list
+    paginate_search_hits: Sort, paginate and hydrate search engine hits
+    hydrate_index_entries: Replace ProductIndex rows with their products
+    paginate_index: Paginate a ProductIndex queryset and hydrate the page
+"""
+
+import heapq
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PRODUCT_MODELS
+
+
+# Alternative spellings of category names used by item models
+CATEGORY_ALIASES = {
+    "PowerSupply": "Power Supply",
+    "CPU Cooler": "Cooler",
+}
+
+
+def normalize_category(category):
+    """Map a category alias (e.g. 'PowerSupply') to its PRODUCT_MODELS key."""
+    return CATEGORY_ALIASES.get(category, category)
+
+
+class ProductLoader:
+    """
+    Batch product loader with an identity map.
+
+    Products are requested as (category, product_id) pairs. Pairs that have
+    not been seen before are grouped by category and fetched with a single
+    ``id__in`` query per category; every loaded product (and every miss) is
+    remembered, so repeated requests for the same pair are free.
+
+    Methods:
+        load_many(pairs): Return a dict mapping pairs to products.
+        load(category, product_id): Return a single product or None.
+        attach(items, category_attr, id_attr, target_attr): Set the loaded
+            product as an attribute on each item.
+    """
+
+    def __init__(self):
+        self._identity_map = {}
+
+    @staticmethod
+    def _key(category, product_id):
+        """Return the identity map key for a pair, or None if it is invalid."""
+        category = normalize_category(category)
+        if category not in PRODUCT_MODELS or not product_id:
+            return None
+        if not isinstance(product_id, uuid.UUID):
+            try:
+                product_id = uuid.UUID(str(product_id))
+            except (TypeError, ValueError, AttributeError):
+                return None
+        return category, product_id
+
+    def load_many(self, pairs):
+        """
+        Load the products for a list of (category, product_id) pairs.
+
+        Args:
+            pairs (iterable): (category, product_id) tuples. Product IDs may
+                be UUIDs or strings; categories may use known aliases.
+
+        Returns:
+            dict: Maps each valid input pair, as given, to its product or None
+            when the product does not exist.
+        """
+        pairs = list(pairs)
+        missing = defaultdict(set)
+        for category, product_id in pairs:
+            key = self._key(category, product_id)
+            if key is not None and key not in self._identity_map:
+                missing[key[0]].add(key[1])
+
+        for category, product_ids in missing.items():
+            model = PRODUCT_MODELS[category]
+            for product_id in product_ids:
+                self._identity_map[(category, product_id)] = None
+            for product in model.objects.filter(id__in=product_ids):
+                self._identity_map[(category, product.id)] = product
+
+        result = {}
+        for category, product_id in pairs:
+            key = self._key(category, product_id)
+            if key is not None:
+                result[(category, product_id)] = self._identity_map[key]
+        return result
+
+    def load(self, category, product_id):
+        """
+        Load a single product through the identity map.
+
+        Args:
+            category (str): Product category.
+            product_id (UUID or str): Product primary key.
+
+        Returns:
+            Model instance or None: The product, or None if not found.
+        """
+        return self.load_many([(category, product_id)]).get((category, product_id))
+
+    def attach(
+        self, items, category_attr="product_category", id_attr="product_id", target_attr="product"
+    ):
+        """
+        Load the products referenced by a list of items and attach them.
+
+        Args:
+            items (iterable): Objects holding a category and a product ID.
+            category_attr (str): Name of the item attribute holding the category.
+            id_attr (str): Name of the item attribute holding the product ID.
+            target_attr (str): Attribute the loaded product (or None) is set on.
+
+        Returns:
+            list: The items, in their original order.
+        """
+        items = list(items)
+        pairs = [(getattr(item, category_attr), getattr(item, id_attr)) for item in items]
+        products = self.load_many(pairs)
+        for item, pair in zip(items, pairs):
+            setattr(item, target_attr, products.get(pair))
+        return items
+
+
+def get_product_loader(request):
+    """
+    Return the ProductLoader bound to a request, creating it on first use.
+
+    Views and context processors that share a request share the loader, so
+    a product loaded by one of them is not fetched again by another.
+
+    Args:
+        request (HttpRequest): Current request, or None for a fresh loader.
+
+    Returns:
+        ProductLoader: Request-scoped loader.
+    """
+    if request is None:
+        return ProductLoader()
+    loader = getattr(request, "_product_loader", None)
+    if loader is None:
+        loader = ProductLoader()
+        request._product_loader = loader
+    return loader
+
+
+class MergedQuerySetList:
+    """
+    Read-only sequence over several ordered querysets, merged by a sort key.
+
+    Each queryset must already be ordered consistently with ``key``. Slicing
+    the list fetches at most ``stop`` rows from every queryset and merges
+    them with heapq.merge, which keeps items with equal keys in queryset
+    order. This makes it a drop-in object_list for Django's Paginator.
+
+    Args:
+        querysets (list): Ordered querysets, in tie-breaking order.
+        key (callable): Sort key applied to the fetched instances.
+        reverse (bool): True if the querysets are ordered descending.
+    """
+
+    def __init__(self, querysets, key, reverse=False):
+        self.querysets = list(querysets)
+        self.key = key
+        self.reverse = reverse
+        self._count = None
+
+    def count(self):
+        """Return the total number of rows across all querysets."""
+        if self._count is None:
+            self._count = sum(queryset.count() for queryset in self.querysets)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count())
+            if start >= stop:
+                return []
+            merged = heapq.merge(
+                *(queryset[:stop] for queryset in self.querysets),
+                key=self.key,
+                reverse=self.reverse,
+            )
+            return list(islice(merged, start, stop, step))
+
+        if index < 0:
+            index += self.count()
+        items = self[index : index + 1]
+        if not items:
+            raise IndexError("MergedQuerySetList index out of range")
+        return items[0]
+
+
+def search_product_tables(category, search_query, sort_by, product_ids=None):
+    """
+    Search brand, model and description across the product tables in SQL.
+
+    Every category is searched with its own ``icontains`` query, ordered in
+    the database, and the results are merged lazily. The order matches the
+    original in-memory search: categories in PRODUCT_MODELS order, or by
+    price with ties kept in category order.
+
+    Args:
+        category (str): Optional category filter, None for all categories.
+        search_query (str): Case-insensitive text to look for.
+        sort_by (str): 'featured', 'price_low_high', 'price_high_low',
+            'newest' or 'best_rated'.
+        product_ids (iterable or QuerySet, optional): Only return these
+            products, e.g. the matches of the selected facets; a values("pk")
+            queryset is applied as a subquery.
+
+    Returns:
+        MergedQuerySetList: Matching products, ready for a Paginator.
+    """
+    condition = (
+        Q(brand__icontains=search_query)
+        | Q(model__icontains=search_query)
+        | Q(description__icontains=search_query)
+    )
+    if sort_by == "newest":
+        condition &= Q(created_at__gte=timezone.now() - timedelta(days=30))
+    if product_ids is not None:
+        condition &= Q(id__in=product_ids)
+
+    if sort_by == "price_low_high":
+        ordering = (F("price").asc(nulls_first=True), "created_at", "id")
+    elif sort_by == "price_high_low":
+        ordering = (F("price").desc(nulls_last=True), "created_at", "id")
+    else:
+        ordering = ("created_at", "id")
+
+    querysets = []
+    ranks = {}
+    for rank, (category_name, model) in enumerate(PRODUCT_MODELS.items()):
+        if category == category_name or category is None:
+            querysets.append(model.objects.filter(condition).order_by(*ordering))
+            ranks[model] = rank
+
+    if sort_by in ("price_low_high", "price_high_low"):
+        return MergedQuerySetList(
+            querysets,
+            key=lambda product: (product.price is not None, product.price or 0),
+            reverse=sort_by == "price_high_low",
+        )
+    return MergedQuerySetList(querysets, key=lambda product: ranks[type(product)])
+
+
+def paginate_search_hits(hits, sort_by, page, per_page=12, loader=None):
+    """
+    Sort and paginate search engine hits, then hydrate only the page.
+
+    Hits are already in relevance order, which is kept for the default
+    sort. Price sorts are stable, so equally priced products stay in
+    relevance order.
+
+    Args:
+        hits (SearchResults): Ranked results from ProductsApp.search.
+        sort_by (str): Sorting option as accepted by product_list.
+        page: Requested page number.
+        per_page (int): Number of products per page.
+        loader (ProductLoader, optional): Loader used to hydrate the page.
+
+    Returns:
+        Page: Django Page whose object_list holds product instances.
+    """
+    if sort_by == "price_low_high":
+        hits = hits.sorted_by_price()
+    elif sort_by == "price_high_low":
+        hits = hits.sorted_by_price(descending=True)
+    elif sort_by == "newest":
+        hits = hits.created_since(timezone.now() - timedelta(days=30))
+
+    paginator = Paginator(hits, per_page)
+
+    try:
+        products = paginator.page(page)
+    except PageNotAnInteger:
+        products = paginator.page(1)
+    except EmptyPage:
+        products = paginator.page(paginator.num_pages)
+
+    loader = loader or ProductLoader()
+    pairs = [(hit.category, hit.product_id) for hit in products.object_list]
+    loaded = loader.load_many(pairs)
+    products.object_list = [loaded[pair] for pair in pairs if loaded.get(pair) is not None]
+    return products
+
+
+def hydrate_index_entries(entries, loader=None):
+    """
+    Load the concrete products behind a list of ProductIndex rows.
+
+    Products are fetched with one ``id__in`` query per category present in
+    ``entries`` and returned in the same order as the entries.
+
+    Args:
+        entries (iterable): ProductIndex instances.
+        loader (ProductLoader, optional): Loader to use, typically the one
+            bound to the current request.
+
+    Returns:
+        list: Product instances in entry order. Entries whose product no
+        longer exists are skipped.
+    """
+    loader = loader or ProductLoader()
+    pairs = [(entry.category, entry.product_id) for entry in entries]
+    products = loader.load_many(pairs)
+    return [products[pair] for pair in pairs if products.get(pair) is not None]
+
+
+def paginate_index(queryset, page, per_page=12, loader=None):
+    """
+    Paginate a ProductIndex queryset and hydrate only the selected page.
+
+    Args:
+        queryset (QuerySet): Ordered ProductIndex queryset.
+        page: Requested page number, usually straight from ``request.GET``.
+        per_page (int): Number of products per page.
+        loader (ProductLoader, optional): Loader used to hydrate the page.
+
+    Returns:
+        Page: Django Page whose object_list holds product instances. Invalid
+        page numbers fall back to the first page, out-of-range numbers to the
+        last page.
+    """
+    paginator = Paginator(queryset, per_page)
+
+    try:
+        products = paginator.page(page)
+    except PageNotAnInteger:
+        products = paginator.page(1)
+    except EmptyPage:
+        products = paginator.page(paginator.num_pages)
+
+    products.object_list = hydrate_index_entries(products.object_list, loader)
+    return products
@@ -0,0 +1,540 @@
+"""
+Precomputed facet counts for catalog filtering in the ProductsApp.
+
+Filter sidebars show, for every filterable attribute of a category, how many
+products each value would leave given the filters that are already applied.
+Instead of running a GROUP BY per attribute on every request, this module
+keeps one bitmap (a Python int used as a bitset) per attribute value and
+category, and answers counts with bitwise ANDs and popcounts.
+
+Faceted attributes:
+    brand, socket, chipset, ram_type, form_factor, interface and panel_type
+    (whichever the category's model has), plus price buckets.
+
+Counting rules:
+    Values selected within one attribute are OR-ed, attributes are AND-ed.
+    The counts of an attribute ignore that attribute's own selection, so a
+    sidebar still shows how many products the other values would add.
+
+Index lifecycle:
+    - A category is loaded with a single query the first time it is used.
+    - Product saves and deletes in the same process update the bitmaps
+      incrementally through the ProductsApp model signals, once their
+      transaction commits.
+    - Every ``settings.PRODUCT_SEARCH_REFRESH_INTERVAL`` seconds a lookup
+      re-reads the products of that category whose ``updated_at`` moved,
+      which picks up changes made by other worker processes.
+
+Classes:
+    FacetIndex: Per-category attribute bitmaps with filtered counts
+
+Functions:
+    parse_selection: Read facet selections from request parameters
+    selection_filter: The SQL condition equivalent to a facet selection
+    toggle_query: Build the query string that toggles one facet value
+
+Attributes:
+    facet_index (FacetIndex): Shared index instance
+
+Example:
+    from ProductsApp.facets import facet_index
+
+    groups = facet_index.counts("CPU", {"socket": {"AM5"}})
+    sockets = facet_index.values("Motherboard", "socket")
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.humanize.templatetags.humanize import intcomma
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PRODUCT_MODELS, PRODUCT_CATEGORIES
+
+
+FACET_FIELDS = (
+    "brand",
+    "socket",
+    "chipset",
+    "ram_type",
+    "form_factor",
+    "interface",
+    "panel_type",
+)
+
+# Query parameter names of all facets, price buckets included
+FACET_PARAMS = FACET_FIELDS + ("price",)
+
+FACET_LABELS = {
+    "brand": "Brand",
+    "socket": "Socket",
+    "chipset": "Chipset",
+    "ram_type": "RAM Type",
+    "form_factor": "Form Factor",
+    "interface": "Interface",
+    "panel_type": "Panel Type",
+    "price": "Price",
+}
+
+# Selections matching more products than this are filtered in SQL with
+# selection_filter() rather than through a list of matching IDs
+MAX_ID_LIST = 500
+
+# Upper bounds (exclusive) of the price buckets, in taka
+PRICE_BUCKET_EDGES = (5000, 10000, 20000, 40000, 80000)
+
+
+def _price_buckets():
+    """Return (key, label, low, high) for every price bucket, cheapest first."""
+    buckets = []
+    low = None
+    for high in PRICE_BUCKET_EDGES + (None,):
+        key = f"{low or 0}-{high or ''}"
+        if low is None:
+            label = f"Under ৳{intcomma(high)}"
+        elif high is None:
+            label = f"৳{intcomma(low)}+"
+        else:
+            label = f"৳{intcomma(low)} - ৳{intcomma(high)}"
+        buckets.append((key, label, low, high))
+        low = high
+    return buckets
+
+
+PRICE_BUCKETS = _price_buckets()
+PRICE_BUCKET_LABELS = {key: label for key, label, low, high in PRICE_BUCKETS}
+
+
+def price_bucket(price):
+    """
+    Return the key of the price bucket a price falls into.
+
+    Args:
+        price (Decimal): Product price, may be None.
+
+    Returns:
+        str or None: Bucket key such as '5000-10000', or None without a price.
+    """
+    if price is None:
+        return None
+    for key, label, low, high in PRICE_BUCKETS:
+        if high is None or price < high:
+            return key
+    return None
+
+
+def _bitmap(docs):
+    """Build a bitset with the given document numbers set."""
+    docs = list(docs)
+    if not docs:
+        return 0
+    buffer = bytearray(max(docs) // 8 + 1)
+    for doc in docs:
+        buffer[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class _CategoryFacets:
+    """Bitmaps for the products of one category; guarded by FacetIndex's lock."""
+
+    def __init__(self, model):
+        self.model = model
+        model_fields = {field.name for field in model._meta.get_fields()}
+        self.fields = [field for field in FACET_FIELDS if field in model_fields]
+        self.facets = self.fields + ["price"]
+        self.product_ids = []  # document -> product_id or None
+        self.doc_numbers = {}  # product_id -> document
+        self.doc_values = []  # document -> tuple of (facet, value)
+        self.free_docs = []
+        self.bitmaps = {facet: {} for facet in self.facets}
+        self.live = 0
+        self.available = 0
+        self.refreshed_at = None
+        self.last_refresh_check = 0.0
+
+    def columns(self):
+        return ["id", "is_available", "price"] + self.fields
+
+    def load(self, rows):
+        """Build all bitmaps at once from ``columns()`` value rows."""
+        members = {facet: {} for facet in self.facets}
+        live, available = [], []
+        for row in rows:
+            doc = len(self.product_ids)
+            product_id, is_available, price = row[0], row[1], row[2]
+            values = self._values(price, row[3:])
+            self.product_ids.append(product_id)
+            self.doc_numbers[product_id] = doc
+            self.doc_values.append(values)
+            live.append(doc)
+            if is_available:
+                available.append(doc)
+            for facet, value in values:
+                members[facet].setdefault(value, []).append(doc)
+
+        self.live = _bitmap(live)
+        self.available = _bitmap(available)
+        for facet, values in members.items():
+            self.bitmaps[facet] = {
+                value: _bitmap(docs) for value, docs in values.items()
+            }
+
+    def _values(self, price, field_values):
+        values = tuple(
+            (field, value)
+            for field, value in zip(self.fields, field_values)
+            if value not in (None, "")
+        )
+        bucket = price_bucket(price)
+        if bucket is not None:
+            values += (("price", bucket),)
+        return values
+
+    def add(self, product_id, is_available, price, field_values):
+        """Add or refresh one product."""
+        self.remove(product_id)
+        if self.free_docs:
+            doc = self.free_docs.pop()
+            self.product_ids[doc] = product_id
+            self.doc_values[doc] = ()
+        else:
+            doc = len(self.product_ids)
+            self.product_ids.append(product_id)
+            self.doc_values.append(())
+        bit = 1 << doc
+        values = self._values(price, field_values)
+        self.doc_numbers[product_id] = doc
+        self.doc_values[doc] = values
+        self.live |= bit
+        if is_available:
+            self.available |= bit
+        for facet, value in values:
+            bitmaps = self.bitmaps[facet]
+            bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def remove(self, product_id):
+        """Drop one product."""
+        doc = self.doc_numbers.pop(product_id, None)
+        if doc is None:
+            return
+        mask = ~(1 << doc)
+        self.live &= mask
+        self.available &= mask
+        for facet, value in self.doc_values[doc]:
+            bitmaps = self.bitmaps[facet]
+            remaining = bitmaps.get(value, 0) & mask
+            if remaining:
+                bitmaps[value] = remaining
+            else:
+                bitmaps.pop(value, None)
+        self.product_ids[doc] = None
+        self.doc_values[doc] = ()
+        self.free_docs.append(doc)
+
+    def base(self, product_ids, available_only):
+        """Bitmap of the products any count or match starts from."""
+        base = self.available if available_only else self.live
+        if product_ids is not None:
+            doc_numbers = self.doc_numbers
+            base &= _bitmap(
+                doc_numbers[product_id]
+                for product_id in product_ids
+                if product_id in doc_numbers
+            )
+        return base
+
+    def selection_mask(self, facet, values):
+        """OR of the bitmaps of the selected values of one facet."""
+        bitmaps = self.bitmaps[facet]
+        mask = 0
+        for value in values:
+            mask |= bitmaps.get(value, 0)
+        return mask
+
+
+class FacetIndex:
+    """
+    In-memory facet bitmaps for every product category.
+
+    Each category keeps a bitmap of its live products, of its available
+    products and of every (attribute, value) pair. Products are numbered
+    densely per category; a number freed by a deleted product is reused.
+
+    Methods:
+        counts(category, selected, product_ids, available_only): Filtered
+            facet counts, ready for a sidebar.
+        values(category, facet, available_only): Distinct values of a facet.
+        matching_ids(category, selected, product_ids, available_only):
+            Product IDs matching a facet selection.
+        add_product(product) / remove_product(product_id, category): Keep
+            the bitmaps current.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._categories = {}
+
+    def clear(self):
+        """Drop all loaded categories; they are reloaded on next use."""
+        with self._lock:
+            self._categories = {}
+
+    def _category(self, category):
+        """Return the loaded facets of a category, loading or refreshing them."""
+        model = PRODUCT_MODELS[category]
+        facets = self._categories.get(category)
+        if facets is None:
+            with self._lock:
+                facets = self._categories.get(category)
+                if facets is None:
+                    facets = _CategoryFacets(model)
+                    started_at = timezone.now()
+                    facets.load(model.objects.values_list(*facets.columns()))
+                    facets.refreshed_at = started_at
+                    facets.last_refresh_check = time.monotonic()
+                    self._categories[category] = facets
+            return facets
+
+        interval = getattr(settings, "PRODUCT_SEARCH_REFRESH_INTERVAL", 60)
+        if time.monotonic() - facets.last_refresh_check >= interval:
+            with self._lock:
+                started_at = timezone.now()
+                changed = model.objects.filter(
+                    updated_at__gte=facets.refreshed_at
+                ).values_list(*facets.columns())
+                for row in changed:
+                    facets.add(row[0], row[1], row[2], row[3:])
+                facets.refreshed_at = started_at
+                facets.last_refresh_check = time.monotonic()
+        return facets
+
+    def add_product(self, product):
+        """
+        Add or refresh a product in its category, if that category is loaded.
+
+        Args:
+            product (BaseProduct): Saved instance of one of PRODUCT_MODELS.
+        """
+        category = PRODUCT_CATEGORIES[type(product)]
+        with self._lock:
+            facets = self._categories.get(category)
+            if facets is not None:
+                facets.add(
+                    product.pk,
+                    product.is_available,
+                    product.price,
+                    [getattr(product, field) for field in facets.fields],
+                )
+
+    def remove_product(self, product_id, category):
+        """
+        Remove a product from its category, if that category is loaded.
+
+        Args:
+            product_id (UUID): Primary key of the product.
+            category (str): Category of the product.
+        """
+        with self._lock:
+            facets = self._categories.get(category)
+            if facets is not None:
+                facets.remove(product_id)
+
+    def counts(self, category, selected=None, product_ids=None, available_only=False):
+        """
+        Count the products per facet value, given the current selection.
+
+        Args:
+            category (str): Category key of PRODUCT_MODELS.
+            selected (dict, optional): Maps facet names to sets of selected
+                values.
+            product_ids (iterable, optional): Restrict counts to these
+                products, e.g. the matches of a search.
+            available_only (bool): Count only available products.
+
+        Returns:
+            list: One dict per facet with ``field``, ``label`` and
+            ``options``; each option has ``value``, ``label``, ``count`` and
+            ``selected``. Values without matching products are left out
+            unless they are selected.
+        """
+        selected = selected or {}
+        with self._lock:
+            facets = self._category(category)
+            base = facets.base(product_ids, available_only)
+            masks = {
+                facet: facets.selection_mask(facet, values)
+                for facet, values in selected.items()
+                if values and facet in facets.bitmaps
+            }
+
+            groups = []
+            for facet in facets.facets:
+                mask = base
+                for other, other_mask in masks.items():
+                    if other != facet:
+                        mask &= other_mask
+                chosen = selected.get(facet, ())
+                options = []
+                for value, bitmap in facets.bitmaps[facet].items():
+                    count = (bitmap & mask).bit_count()
+                    if count or value in chosen:
+                        options.append(
+                            {
+                                "value": value,
+                                "label": PRICE_BUCKET_LABELS.get(value, value)
+                                if facet == "price"
+                                else value,
+                                "count": count,
+                                "selected": value in chosen,
+                            }
+                        )
+                if facet == "price":
+                    order = list(PRICE_BUCKET_LABELS)
+                    options.sort(key=lambda option: order.index(option["value"]))
+                else:
+                    options.sort(key=lambda option: str(option["value"]).lower())
+                if options:
+                    groups.append(
+                        {"field": facet, "label": FACET_LABELS[facet], "options": options}
+                    )
+            return groups
+
+    def values(self, category, facet, available_only=False):
+        """
+        Return the distinct values of a facet, sorted.
+
+        Args:
+            category (str): Category key of PRODUCT_MODELS.
+            facet (str): Facet name, e.g. 'socket'.
+            available_only (bool): Only values of available products.
+
+        Returns:
+            list: Values that at least one product has.
+        """
+        with self._lock:
+            facets = self._category(category)
+            base = facets.available if available_only else facets.live
+            return sorted(
+                value
+                for value, bitmap in facets.bitmaps.get(facet, {}).items()
+                if bitmap & base
+            )
+
+    def matching_ids(self, category, selected, product_ids=None, available_only=False):
+        """
+        Return the IDs of the products matching a facet selection.
+
+        Args:
+            category (str): Category key of PRODUCT_MODELS.
+            selected (dict): Maps facet names to sets of selected values.
+            product_ids (iterable, optional): Restrict matches to these products.
+            available_only (bool): Only match available products.
+
+        Returns:
+            list: Product IDs, in no particular order.
+        """
+        with self._lock:
+            facets = self._category(category)
+            mask = facets.base(product_ids, available_only)
+            for facet, values in selected.items():
+                if values and facet in facets.bitmaps:
+                    mask &= facets.selection_mask(facet, values)
+
+            matches = []
+            ids = facets.product_ids
+            while mask:
+                low = mask & -mask
+                matches.append(ids[low.bit_length() - 1])
+                mask ^= low
+            return matches
+
+
+def parse_selection(params, category):
+    """
+    Read the facet values selected in request parameters.
+
+    Each facet is passed under its own name and may repeat, e.g.
+    ``?category=CPU&socket=AM5&socket=AM4&price=10000-20000``.
+
+    Args:
+        params (QueryDict): Request GET parameters.
+        category (str): Category whose facets are accepted.
+
+    Returns:
+        dict: Maps facet names to sets of selected values; empty for unknown
+        categories.
+    """
+    model = PRODUCT_MODELS.get(category)
+    if model is None:
+        return {}
+    model_fields = {field.name for field in model._meta.get_fields()}
+    names = [field for field in FACET_FIELDS if field in model_fields] + ["price"]
+    selected = {}
+    for name in names:
+        values = {value for value in params.getlist(name) if value}
+        if name == "price":
+            values &= set(PRICE_BUCKET_LABELS)
+        if values:
+            selected[name] = values
+    return selected
+
+
+def selection_filter(selected):
+    """
+    Build the SQL condition that matches the same products as a selection.
+
+    Used instead of ``FacetIndex.matching_ids`` when a selection matches
+    too many products to pass their IDs to the database.
+
+    Args:
+        selected (dict): Facet selection from parse_selection().
+
+    Returns:
+        Q: Condition on the fields of the category's product model.
+    """
+    condition = Q()
+    for facet, values in selected.items():
+        if facet != "price":
+            condition &= Q(**{f"{facet}__in": values})
+            continue
+        buckets = Q()
+        for key, label, low, high in PRICE_BUCKETS:
+            if key in values:
+                bucket = Q(price__isnull=False)
+                if low is not None:
+                    bucket &= Q(price__gte=low)
+                if high is not None:
+                    bucket &= Q(price__lt=high)
+                buckets |= bucket
+        condition &= buckets
+    return condition
+
+
+def toggle_query(params, field, value):
+    """
+    Build the query string that selects or deselects one facet value.
+
+    The page number is dropped so the toggled listing starts at page one.
+
+    Args:
+        params (QueryDict): Current request GET parameters.
+        field (str): Facet name.
+        value (str): Facet value to toggle.
+
+    Returns:
+        str: URL-encoded query string without the leading '?'.
+    """
+    params = params.copy()
+    params.pop("page", None)
+    values = params.getlist(field)
+    if value in values:
+        values.remove(value)
+    else:
+        values.append(value)
+    params.setlist(field, values)
+    return params.urlencode()
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,96 @@
+"""
+Race-free stock changes for catalog products.
+
+Checkout used to read a product's stock, compare it in Python and save the
+whole product row with the lowered number. Two concurrent checkouts could
+both pass the check and sell the same unit twice. ``decrement_stock`` takes
+stock with one conditional UPDATE per product instead:
+
+    UPDATE ... SET stock = stock - n WHERE id = ... AND stock >= n
+
+The database applies the check and the write as one step, so stock can
+never go below zero, and only the stock column is written. If any product
+lacks the stock, OutOfStock is raised and every decrement of the call is
+rolled back; callers run it inside their own transaction so the order rows
+written alongside are rolled back too.
+
+The UPDATEs bypass the model signals, so the ProductIndex copy of the stock
+is lowered the same way and the cached listing pages of the affected
+categories are invalidated once the transaction commits.
+
+Classes:
+    OutOfStock: A product has less stock than requested
+
+Functions:
+    decrement_stock: Take stock for a list of order lines
+
+Example:
+    from ProductsApp.inventory import OutOfStock, decrement_stock
+
+    with transaction.atomic():
+        order = Order.objects.create(...)
+        decrement_stock([("CPU", cpu_id, 2), ("GPU", gpu_id, 1)])
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .caching import catalog_cache
+from .models import PRODUCT_MODELS, ProductIndex
+
+
+class OutOfStock(Exception):
+    """
+    A product does not have the stock an order asks for.
+
+    Attributes:
+        category (str): Category of the product, a key of PRODUCT_MODELS.
+        product_id (UUID): Primary key of the product.
+        quantity (int): Units that were requested.
+    """
+
+    def __init__(self, category, product_id, quantity):
+        self.category = category
+        self.product_id = product_id
+        self.quantity = quantity
+        super().__init__(
+            f"Not enough stock for {category} {product_id} ({quantity} requested)"
+        )
+
+
+def decrement_stock(lines):
+    """
+    Take stock for every line, or for none of them.
+
+    Quantities of the same product are added up first. Products are updated
+    in (category, ID) order, so concurrent calls lock rows in the same order
+    and cannot deadlock each other.
+
+    Args:
+        lines (iterable): (category, product ID, quantity) triples.
+
+    Raises:
+        OutOfStock: A product is missing or has less stock than requested;
+            no stock has been taken.
+    """
+    quantities = defaultdict(int)
+    for category, product_id, quantity in lines:
+        quantities[(category, str(product_id))] += quantity
+
+    with transaction.atomic():
+        for (category, product_id), quantity in sorted(quantities.items()):
+            model = PRODUCT_MODELS.get(category)
+            updated = model is not None and model.objects.filter(
+                pk=product_id, stock__gte=quantity
+            ).update(stock=F("stock") - quantity)
+            if not updated:
+                raise OutOfStock(category, product_id, quantity)
+            ProductIndex.objects.filter(product_id=product_id).update(
+                stock=Greatest(F("stock") - quantity, 0)
+            )
+
+    for category in {category for category, _ in quantities}:
+        catalog_cache.bump_on_commit(category)
@@ -0,0 +1,39 @@
+"""
+Management command to build and persist the product search index.
+
+Server processes load the persisted file when they start instead of
+indexing the whole catalog themselves. build.sh runs this on every deploy;
+run it again after bulk imports.
+
+Usage:
+    python manage.py build_search_index
+    python manage.py build_search_index --output /tmp/products.idx
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ProductsApp.search import search_engine
+
+
+class Command(BaseCommand):
+    help = "Build the in-process product search index and save it to disk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="File to write (defaults to settings.PRODUCT_SEARCH_INDEX_PATH)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = search_engine.build()
+        path = search_engine.save(options["output"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} products in {elapsed:.2f}s and saved to {path}"
+            )
+        )
@@ -0,0 +1,82 @@
+"""
+Management command to rebuild and warm the product registry.
+
+The product registry (ProductsApp.registry) maps product UUIDs to their
+category. Its persisted side is the ProductIndex table, which model signals
+keep in sync for ordinary saves and deletes. Bulk imports, raw SQL and
+queryset.update() bypass those signals; this command re-synchronizes the
+table from the product tables in bulk, invalidates the cached catalog pages
+and then loads the mapping.
+
+Usage:
+    python manage.py warm_product_registry
+    python manage.py warm_product_registry --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ProductsApp.caching import catalog_cache
+from ProductsApp.models import PRODUCT_MODELS, ProductIndex
+from ProductsApp.registry import product_registry
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ProductIndex registry table from the product tables and warm it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of index rows written per INSERT statement",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        update_fields = [
+            field.name
+            for field in ProductIndex._meta.concrete_fields
+            if not field.primary_key
+        ]
+
+        with transaction.atomic():
+            seen_ids = set()
+            for category, model in PRODUCT_MODELS.items():
+                rows = []
+                for product in model.objects.iterator(chunk_size=batch_size):
+                    rows.append(
+                        ProductIndex(
+                            product_id=product.pk, **ProductIndex.values_for(product)
+                        )
+                    )
+                    seen_ids.add(product.pk)
+
+                ProductIndex.objects.bulk_create(
+                    rows,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=["product_id"],
+                    update_fields=update_fields,
+                )
+                self.stdout.write(f"{category}: {len(rows)} products")
+
+            # Drop rows whose product no longer exists
+            stale_ids = list(
+                set(ProductIndex.objects.values_list("product_id", flat=True))
+                - seen_ids
+            )
+            for start in range(0, len(stale_ids), batch_size):
+                chunk = stale_ids[start : start + batch_size]
+                ProductIndex.objects.filter(product_id__in=chunk).delete()
+
+        # Cached listing pages may predate the rows written above
+        catalog_cache.bump()
+
+        count = product_registry.warm()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Product registry warmed with {count} products "
+                f"({len(stale_ids)} stale entries removed)"
+            )
+        )
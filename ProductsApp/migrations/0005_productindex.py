@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:29
+
+from django.db import migrations, models
+
+
+# Mirrors ProductsApp.models.PRODUCT_MODELS at the time of this migration
+INDEXED_MODELS = [
+    ("CPU", "CPU"),
+    ("Cooler", "Cooler"),
+    ("Motherboard", "Motherboard"),
+    ("RAM", "RAM"),
+    ("SSD", "SSD"),
+    ("HDD", "HDD"),
+    ("GPU", "GPU"),
+    ("Power Supply", "PowerSupply"),
+    ("Casing", "Casing"),
+    ("Monitor", "Monitor"),
+    ("Keyboard", "Keyboard"),
+    ("Mouse", "Mouse"),
+    ("Headphone", "Headphone"),
+]
+
+
+def backfill_product_index(apps, schema_editor):
+    """
+    Populate ProductIndex from the existing product tables.
+    """
+    ProductIndex = apps.get_model("ProductsApp", "ProductIndex")
+    for rank, (category, model_name) in enumerate(INDEXED_MODELS):
+        model = apps.get_model("ProductsApp", model_name)
+        rows = [
+            ProductIndex(
+                product_id=product.id,
+                category=category,
+                category_rank=rank,
+                name=product.name,
+                brand=product.brand,
+                model=product.model,
+                price=product.price,
+                regular_price=product.regular_price,
+                is_featured=product.is_featured,
+                is_new_arrival=product.is_new_arrival,
+                is_on_sale=product.is_on_sale,
+                stock=product.stock,
+                is_available=product.is_available,
+                created_at=product.created_at,
+            )
+            for product in model.objects.iterator()
+        ]
+        ProductIndex.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductsApp', '0004_casing_is_new_arrival_casing_is_on_sale_casing_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductIndex',
+            fields=[
+                ('product_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(choices=[('CPU', 'CPU'), ('Cooler', 'Cooler'), ('Motherboard', 'Motherboard'), ('RAM', 'RAM'), ('SSD', 'SSD'), ('HDD', 'HDD'), ('GPU', 'GPU'), ('Power Supply', 'Power Supply'), ('Casing', 'Casing'), ('Monitor', 'Monitor'), ('Keyboard', 'Keyboard'), ('Mouse', 'Mouse'), ('Headphone', 'Headphone')], help_text='Category of the product', max_length=50)),
+                ('category_rank', models.PositiveSmallIntegerField(default=0, help_text='Display order of the category')),
+                ('name', models.CharField(blank=True, max_length=200, null=True)),
+                ('brand', models.CharField(blank=True, max_length=50, null=True)),
+                ('model', models.CharField(blank=True, max_length=100, null=True)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('regular_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('is_new_arrival', models.BooleanField(default=False)),
+                ('is_on_sale', models.BooleanField(default=False)),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('is_available', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Product Index Entry',
+                'verbose_name_plural': 'Product Index',
+                'indexes': [models.Index(fields=['category_rank', 'created_at', 'product_id'], name='productindex_default_idx'), models.Index(fields=['category', 'created_at'], name='productindex_cat_created_idx'), models.Index(fields=['category', 'price'], name='productindex_cat_price_idx'), models.Index(fields=['price'], name='productindex_price_idx'), models.Index(fields=['created_at'], name='productindex_created_idx'), models.Index(fields=['is_featured', 'category_rank', 'created_at'], name='productindex_featured_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_product_index, migrations.RunPython.noop),
+    ]
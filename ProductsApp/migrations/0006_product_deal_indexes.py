@@ -0,0 +1,135 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:46
+
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import F, Q
+
+
+# Mirrors ProductsApp.models.PRODUCT_MODELS at the time of this migration
+PRODUCT_MODEL_NAMES = [
+    "CPU",
+    "Cooler",
+    "Motherboard",
+    "RAM",
+    "SSD",
+    "HDD",
+    "GPU",
+    "PowerSupply",
+    "Casing",
+    "Monitor",
+    "Keyboard",
+    "Mouse",
+    "Headphone",
+]
+
+DEAL_CONDITION = Q(regular_price__gt=0, price__lt=F("regular_price"))
+
+
+def backfill_discounts(apps, schema_editor):
+    """
+    Derive is_on_sale from the prices and fill the ProductIndex discounts.
+    """
+    for model_name in PRODUCT_MODEL_NAMES:
+        model = apps.get_model("ProductsApp", model_name)
+        model.objects.filter(DEAL_CONDITION).update(is_on_sale=True)
+        model.objects.exclude(DEAL_CONDITION).update(is_on_sale=False)
+
+    ProductIndex = apps.get_model("ProductsApp", "ProductIndex")
+    ProductIndex.objects.exclude(DEAL_CONDITION).update(
+        is_on_sale=False, discount_amount=0, discount_percent=0
+    )
+    deals = list(ProductIndex.objects.filter(DEAL_CONDITION))
+    for entry in deals:
+        entry.is_on_sale = True
+        entry.discount_amount = entry.regular_price - entry.price
+        entry.discount_percent = round(
+            100 * entry.discount_amount / entry.regular_price, 2
+        )
+    ProductIndex.objects.bulk_update(
+        deals, ["is_on_sale", "discount_amount", "discount_percent"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductsApp', '0005_productindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productindex',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='productindex',
+            name='discount_percent',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name='casing',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='casing_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cooler',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='cooler_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cpu',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='cpu_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gpu',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='gpu_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hdd',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='hdd_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='headphone',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='headphone_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='keyboard',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='keyboard_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='monitor_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='motherboard_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='mouse_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='powersupply',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='powersupply_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(condition=models.Q(('discount_amount__gt', 0)), fields=['category_rank', 'created_at', 'product_id'], name='productindex_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(condition=models.Q(('discount_amount__gt', 0)), fields=['-discount_percent', 'product_id'], name='productindex_deal_pct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(condition=models.Q(('discount_amount__gt', 0)), fields=['-discount_amount', 'product_id'], name='productindex_deal_amt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ram',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='ram_deal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ssd',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('regular_price'), '-', models.F('price')), descending=True), condition=models.Q(('price__lt', models.F('regular_price')), ('regular_price__gt', 0)), name='ssd_deal_idx'),
+        ),
+        migrations.RunPython(backfill_discounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,261 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductsApp', '0006_product_deal_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productindex',
+            name='productindex_cat_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productindex',
+            name='productindex_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productindex',
+            name='productindex_featured_idx',
+        ),
+        migrations.AddIndex(
+            model_name='casing',
+            index=models.Index(fields=['is_available', 'price'], name='casing_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casing',
+            index=models.Index(fields=['created_at', 'id'], name='casing_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casing',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='casing_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casing',
+            index=models.Index(fields=['updated_at'], name='casing_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cooler',
+            index=models.Index(fields=['is_available', 'price'], name='cooler_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cooler',
+            index=models.Index(fields=['created_at', 'id'], name='cooler_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cooler',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='cooler_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cooler',
+            index=models.Index(fields=['updated_at'], name='cooler_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cpu',
+            index=models.Index(fields=['is_available', 'price'], name='cpu_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cpu',
+            index=models.Index(fields=['created_at', 'id'], name='cpu_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cpu',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='cpu_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cpu',
+            index=models.Index(fields=['updated_at'], name='cpu_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cpu',
+            index=models.Index(fields=['is_available', 'socket'], name='cpu_avail_socket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gpu',
+            index=models.Index(fields=['is_available', 'price'], name='gpu_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gpu',
+            index=models.Index(fields=['created_at', 'id'], name='gpu_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gpu',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='gpu_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gpu',
+            index=models.Index(fields=['updated_at'], name='gpu_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hdd',
+            index=models.Index(fields=['is_available', 'price'], name='hdd_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hdd',
+            index=models.Index(fields=['created_at', 'id'], name='hdd_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hdd',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='hdd_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hdd',
+            index=models.Index(fields=['updated_at'], name='hdd_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='headphone',
+            index=models.Index(fields=['is_available', 'price'], name='headphone_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='headphone',
+            index=models.Index(fields=['created_at', 'id'], name='headphone_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='headphone',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='headphone_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='headphone',
+            index=models.Index(fields=['updated_at'], name='headphone_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='keyboard',
+            index=models.Index(fields=['is_available', 'price'], name='keyboard_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='keyboard',
+            index=models.Index(fields=['created_at', 'id'], name='keyboard_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='keyboard',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='keyboard_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='keyboard',
+            index=models.Index(fields=['updated_at'], name='keyboard_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['is_available', 'price'], name='monitor_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['created_at', 'id'], name='monitor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='monitor_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monitor',
+            index=models.Index(fields=['updated_at'], name='monitor_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(fields=['is_available', 'price'], name='motherboard_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(fields=['created_at', 'id'], name='motherboard_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='motherboard_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(fields=['updated_at'], name='motherboard_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(fields=['is_available', 'socket'], name='motherboard_avail_socket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motherboard',
+            index=models.Index(fields=['is_available', 'form_factor'], name='motherboard_avail_form_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['is_available', 'price'], name='mouse_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['created_at', 'id'], name='mouse_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='mouse_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouse',
+            index=models.Index(fields=['updated_at'], name='mouse_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='powersupply',
+            index=models.Index(fields=['is_available', 'price'], name='powersupply_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='powersupply',
+            index=models.Index(fields=['created_at', 'id'], name='powersupply_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='powersupply',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='powersupply_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='powersupply',
+            index=models.Index(fields=['updated_at'], name='powersupply_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(fields=['category', 'category_rank', 'created_at', 'product_id'], name='productindex_cat_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(fields=['price', 'category_rank', 'created_at', 'product_id'], name='productindex_price_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['category_rank', 'created_at', 'product_id'], name='productindex_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ram',
+            index=models.Index(fields=['is_available', 'price'], name='ram_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ram',
+            index=models.Index(fields=['created_at', 'id'], name='ram_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ram',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='ram_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ram',
+            index=models.Index(fields=['updated_at'], name='ram_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ram',
+            index=models.Index(fields=['is_available', 'ram_type'], name='ram_avail_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ssd',
+            index=models.Index(fields=['is_available', 'price'], name='ssd_avail_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ssd',
+            index=models.Index(fields=['created_at', 'id'], name='ssd_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ssd',
+            index=models.Index(fields=['price', 'created_at', 'id'], name='ssd_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ssd',
+            index=models.Index(fields=['updated_at'], name='ssd_updated_idx'),
+        ),
+    ]
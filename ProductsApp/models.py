@@ -62,12 +62,47 @@ Note:
     compatibility and data consistency.
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 import uuid
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 
 # Base model for shared attributes
+# A product is a deal when it sells below a known regular price. Shared by the
+# per-table partial indexes, ProductQuerySet.deals() and the is_on_sale flag.
+DEAL_CONDITION = Q(regular_price__gt=0, price__lt=F("regular_price"))
+
+
+def discount_for(price, regular_price):
+    """
+    Return the discount of a price against its regular price.
+    Args:
+        price (Decimal): Current selling price, may be None.
+        regular_price (Decimal): Regular price, may be None.
+    Returns:
+        tuple: (amount, percent) as Decimals, (0, 0) when not discounted.
+    """
+    if regular_price and regular_price > 0 and price is not None and price < regular_price:
+        amount = regular_price - price
+        return amount, round(100 * amount / regular_price, 2)
+    return 0, 0
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    QuerySet for the concrete product models.
+    Methods:
+        deals(): Products selling below their regular price.
+    """
+
+    def deals(self):
+        """Return the products matching DEAL_CONDITION."""
+        return self.filter(DEAL_CONDITION)
+
+
 class BaseProduct(models.Model):
     """
     Abstract base model for product entities in the e-commerce system.
@@ -90,7 +125,8 @@ class BaseProduct(models.Model):
         updated_at (DateTimeField): Timestamp when the product was last modified, auto-updated.
         is_featured (BooleanField): Flag indicating if product is featured, defaults to False.
         is_new_arrival (BooleanField): Flag indicating if product is a new arrival, defaults to False.
-        is_on_sale (BooleanField): Flag indicating if product is on sale, defaults to False.
+        is_on_sale (BooleanField): Flag indicating if product is on sale; kept
+            in step with DEAL_CONDITION on every save.
         stock (PositiveIntegerField): Available stock quantity, defaults to 0.
         is_available (BooleanField): Product availability status, defaults to True.
     Properties:
@@ -103,6 +139,10 @@ class BaseProduct(models.Model):
         Categories are specifically tailored for computer hardware and peripherals,
         including CPU, GPU, RAM, storage devices, and accessories.
         Warranty choices range from 1 year to lifetime warranty options.
+        Every product table gets the indexes declared in BaseProduct.Meta: a
+        partial expression index on the discount amount covering only deal
+        rows, plus the availability, listing-order and change-polling
+        indexes. Concrete models must inherit BaseProduct.Meta to keep them.
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -193,8 +233,39 @@ class BaseProduct(models.Model):
     def in_stock(self):
         return self.stock > 0 and self.is_available
 
+    objects = ProductQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        # The sale badge follows the prices, so it cannot disagree with deals
+        amount, percent = discount_for(self.price, self.regular_price)
+        self.is_on_sale = amount > 0
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            "price" in update_fields or "regular_price" in update_fields
+        ):
+            kwargs["update_fields"] = set(update_fields) | {"is_on_sale"}
+        super().save(*args, **kwargs)
+
     class Meta:
         abstract = True  # This model won't be created as a table
+        indexes = [
+            models.Index(
+                (F("regular_price") - F("price")).desc(),
+                name="%(class)s_deal_idx",
+                condition=DEAL_CONDITION,
+            ),
+            # Available products by price (PC builder selection, price sorts)
+            models.Index(
+                fields=["is_available", "price"], name="%(class)s_avail_price_idx"
+            ),
+            # Per-table listing and search orderings (ProductsApp.catalog)
+            models.Index(fields=["created_at", "id"], name="%(class)s_created_idx"),
+            models.Index(
+                fields=["price", "created_at", "id"], name="%(class)s_price_idx"
+            ),
+            # Change polling by the search and facet indexes
+            models.Index(fields=["updated_at"], name="%(class)s_updated_idx"),
+        ]
 
 
 class CPU(BaseProduct):
@@ -319,9 +390,12 @@ class CPU(BaseProduct):
         help_text="Integrated graphics (e.g., Intel UHD, AMD Radeon)",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "CPU"
         verbose_name_plural = "CPUs"
+        indexes = BaseProduct.Meta.indexes + [
+            models.Index(fields=["is_available", "socket"], name="cpu_avail_socket_idx"),
+        ]
 
     def __str__(self):
         if self.cores and self.threads and self.boost_frequency:
@@ -461,7 +535,7 @@ class Cooler(BaseProduct):
         help_text="Supported CPU sockets (comma separated)",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Cooler"
         verbose_name_plural = "Coolers"
 
@@ -646,9 +720,17 @@ class Motherboard(BaseProduct):
         help_text="Wi-Fi and Bluetooth support",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Motherboard"
         verbose_name_plural = "Motherboards"
+        indexes = BaseProduct.Meta.indexes + [
+            models.Index(
+                fields=["is_available", "socket"], name="motherboard_avail_socket_idx"
+            ),
+            models.Index(
+                fields=["is_available", "form_factor"], name="motherboard_avail_form_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.socket}) {self.chipset} {self.form_factor}"
@@ -790,9 +872,12 @@ class RAM(BaseProduct):
         help_text="Frequency",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "RAM"
         verbose_name_plural = "RAMs"
+        indexes = BaseProduct.Meta.indexes + [
+            models.Index(fields=["is_available", "ram_type"], name="ram_avail_type_idx"),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.memory_capacity}) {self.ram_type}"
@@ -910,7 +995,7 @@ class SSD(BaseProduct):
         blank=True, null=True, help_text="Write speed in MB/s"
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "SSD"
         verbose_name_plural = "SSDs"
 
@@ -1029,7 +1114,7 @@ class HDD(BaseProduct):
     )
     cache = models.IntegerField(blank=True, null=True, help_text="Cache size in MB")
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "HDD"
         verbose_name_plural = "HDDs"
 
@@ -1239,7 +1324,7 @@ class GPU(BaseProduct):
         help_text="Power connectors",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "GPU"
         verbose_name_plural = "GPUs"
 
@@ -1358,7 +1443,7 @@ class PowerSupply(BaseProduct):
         help_text="Fan size",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Power Supply"
         verbose_name_plural = "Power Supplies"
 
@@ -1533,7 +1618,7 @@ class Casing(BaseProduct):
         help_text="Number of pre-installed fans",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Casing"
         verbose_name_plural = "Casings"
 
@@ -1756,7 +1841,7 @@ class Monitor(BaseProduct):
         help_text="Brightness in cd/m²",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Monitor"
         verbose_name_plural = "Monitors"
 
@@ -1904,7 +1989,7 @@ class Keyboard(BaseProduct):
         help_text="RGB lighting",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Keyboard"
         verbose_name_plural = "Keyboards"
 
@@ -2018,7 +2103,7 @@ class Mouse(BaseProduct):
         null=True,
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Mouse"
         verbose_name_plural = "Mice"
 
@@ -2164,9 +2249,291 @@ class Headphone(BaseProduct):
         help_text="Cable length in meters",
     )
 
-    class Meta:
+    class Meta(BaseProduct.Meta):
         verbose_name = "Headphone"
         verbose_name_plural = "Headphones"
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.headphone_type})"
+
+
+# Category name -> concrete product model, in catalog display order
+PRODUCT_MODELS = {
+    "CPU": CPU,
+    "Cooler": Cooler,
+    "Motherboard": Motherboard,
+    "RAM": RAM,
+    "SSD": SSD,
+    "HDD": HDD,
+    "GPU": GPU,
+    "Power Supply": PowerSupply,
+    "Casing": Casing,
+    "Monitor": Monitor,
+    "Keyboard": Keyboard,
+    "Mouse": Mouse,
+    "Headphone": Headphone,
+}
+
+# Concrete product model -> category name
+PRODUCT_CATEGORIES = {model: category for category, model in PRODUCT_MODELS.items()}
+
+
+class ProductIndexQuerySet(models.QuerySet):
+    """
+    QuerySet for ProductIndex.
+    Methods:
+        deals(sort=None): Deal rows, ordered to match a partial deal index.
+    """
+
+    DEAL_ORDERINGS = {
+        "discount_percent": ("-discount_percent", "product_id"),
+        "discount_amount": ("-discount_amount", "product_id"),
+    }
+
+    def deals(self, sort=None):
+        """
+        Return the rows of discounted products.
+        Args:
+            sort (str, optional): 'discount_percent' or 'discount_amount' to
+                show the biggest discounts first; anything else keeps the
+                default catalog order.
+        Returns:
+            QuerySet: Ordered deal rows.
+        """
+        ordering = self.DEAL_ORDERINGS.get(sort, ProductIndex.DEFAULT_ORDERING)
+        return self.filter(discount_amount__gt=0).order_by(*ordering)
+
+
+class ProductIndex(models.Model):
+    """
+    Denormalized, cross-category listing row for every catalog product.
+    Each concrete product table (CPU, GPU, ...) owns its own rows, so listing
+    pages that span categories used to read all thirteen tables into memory
+    before paginating. This table keeps one narrow row per product with just
+    the columns that listing pages filter and sort on, so a page can be
+    selected with a single indexed query and only the products on that page
+    need to be loaded from their own tables.
+    Attributes:
+        product_id (UUIDField): Primary key of the product in its own table.
+        category (CharField): Category name, a key of PRODUCT_MODELS.
+        category_rank (PositiveSmallIntegerField): Position of the category in
+            PRODUCT_MODELS, used as the default cross-category ordering.
+        name, brand, model (CharField): Copied product identity fields.
+        price, regular_price (DecimalField): Copied pricing fields.
+        is_featured, is_new_arrival, is_on_sale (BooleanField): Copied flags.
+        stock (PositiveIntegerField): Copied stock quantity.
+        is_available (BooleanField): Copied availability flag.
+        created_at (DateTimeField): Creation time of the product itself.
+        discount_amount, discount_percent (DecimalField): Precomputed
+            discount, zero unless the product is a deal. Together with the
+            partial deal indexes they act as a materialized deals view.
+    Note:
+        Rows are kept in sync by the post_save/post_delete receivers below.
+        Bulk ORM operations (queryset.update(), bulk_create()) bypass those
+        signals and must call ProductIndex.sync() or ProductIndex.remove()
+        themselves.
+    """
+
+    product_id = models.UUIDField(primary_key=True, editable=False)
+    category = models.CharField(
+        max_length=50,
+        choices=[(category, category) for category in PRODUCT_MODELS],
+        help_text="Category of the product",
+    )
+    category_rank = models.PositiveSmallIntegerField(
+        default=0, help_text="Display order of the category"
+    )
+    name = models.CharField(max_length=200, blank=True, null=True)
+    brand = models.CharField(max_length=50, blank=True, null=True)
+    model = models.CharField(max_length=100, blank=True, null=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    regular_price = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True
+    )
+    is_featured = models.BooleanField(default=False)
+    is_new_arrival = models.BooleanField(default=False)
+    is_on_sale = models.BooleanField(default=False)
+    stock = models.PositiveIntegerField(default=0)
+    is_available = models.BooleanField(default=True)
+    created_at = models.DateTimeField(blank=True, null=True)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+
+    objects = ProductIndexQuerySet.as_manager()
+
+    # Ordering used by listings that have no explicit sort
+    DEFAULT_ORDERING = ("category_rank", "created_at", "product_id")
+
+    class Meta:
+        verbose_name = "Product Index Entry"
+        verbose_name_plural = "Product Index"
+        indexes = [
+            models.Index(
+                fields=["category_rank", "created_at", "product_id"],
+                name="productindex_default_idx",
+            ),
+            # The listing indexes end in the full DEFAULT_ORDERING so pages
+            # are read in index order without a sort step
+            models.Index(
+                fields=["category", "category_rank", "created_at", "product_id"],
+                name="productindex_cat_order_idx",
+            ),
+            models.Index(fields=["category", "price"], name="productindex_cat_price_idx"),
+            models.Index(
+                fields=["price", "category_rank", "created_at", "product_id"],
+                name="productindex_price_order_idx",
+            ),
+            models.Index(fields=["created_at"], name="productindex_created_idx"),
+            models.Index(
+                fields=["category_rank", "created_at", "product_id"],
+                name="productindex_featured_idx",
+                condition=Q(is_featured=True),
+            ),
+            # Partial indexes over deal rows only, one per deals ordering
+            models.Index(
+                fields=["category_rank", "created_at", "product_id"],
+                name="productindex_deal_idx",
+                condition=Q(discount_amount__gt=0),
+            ),
+            models.Index(
+                fields=["-discount_percent", "product_id"],
+                name="productindex_deal_pct_idx",
+                condition=Q(discount_amount__gt=0),
+            ),
+            models.Index(
+                fields=["-discount_amount", "product_id"],
+                name="productindex_deal_amt_idx",
+                condition=Q(discount_amount__gt=0),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.category}: {self.brand} {self.model}"
+
+    @staticmethod
+    def values_for(product):
+        """
+        Build the index column values for a concrete product instance.
+        Args:
+            product (BaseProduct): Saved instance of one of PRODUCT_MODELS.
+        Returns:
+            dict: Field values for the product's ProductIndex row.
+        """
+        category = PRODUCT_CATEGORIES[type(product)]
+        discount_amount, discount_percent = discount_for(
+            product.price, product.regular_price
+        )
+        return {
+            "category": category,
+            "category_rank": list(PRODUCT_MODELS).index(category),
+            "name": product.name,
+            "brand": product.brand,
+            "model": product.model,
+            "price": product.price,
+            "regular_price": product.regular_price,
+            "is_featured": product.is_featured,
+            "is_new_arrival": product.is_new_arrival,
+            "is_on_sale": discount_amount > 0,
+            "stock": product.stock,
+            "is_available": product.is_available,
+            "created_at": product.created_at,
+            "discount_amount": discount_amount,
+            "discount_percent": discount_percent,
+        }
+
+    @classmethod
+    def sync(cls, product):
+        """
+        Insert or refresh the index row for a product.
+        Args:
+            product (BaseProduct): Saved instance of one of PRODUCT_MODELS.
+        """
+        values = cls.values_for(product)
+        if not cls.objects.filter(product_id=product.pk).update(**values):
+            cls.objects.create(product_id=product.pk, **values)
+
+    @classmethod
+    def remove(cls, product_id):
+        """
+        Drop the index row for a deleted product.
+        Args:
+            product_id (UUID): Primary key of the deleted product.
+        """
+        cls.objects.filter(product_id=product_id).delete()
+
+
+@receiver(post_save)
+def sync_product_index(sender, instance, **kwargs):
+    """
+    Keep ProductIndex in step with saves on any concrete product model.
+    Args:
+        sender (Model): Model class of the saved instance
+        instance (Model): The instance that was saved
+        **kwargs: Additional keyword arguments from the signal
+    Note:
+        Saves on models that are not catalog products are ignored. The
+        index row is written in the save's transaction. The in-process
+        product registry, the search, suggestion and facet indexes are only
+        updated once that transaction commits, so a rolled-back save leaves
+        them untouched, and the category's cached listing pages are
+        invalidated.
+    """
+    if sender in PRODUCT_CATEGORIES:
+        from .caching import catalog_cache
+
+        category = PRODUCT_CATEGORIES[sender]
+        ProductIndex.sync(instance)
+        transaction.on_commit(lambda: _index_saved_product(instance, category))
+        catalog_cache.bump_on_commit(category)
+
+
+def _index_saved_product(instance, category):
+    """Add a committed product save to the in-process indexes."""
+    from .registry import product_registry
+    from .search import search_engine
+    from .suggest import suggestion_index
+    from .facets import facet_index
+
+    product_registry.register(instance.pk, category)
+    if search_engine.is_ready:
+        search_engine.index_product(instance)
+    if suggestion_index.is_ready:
+        suggestion_index.add_product(instance)
+    facet_index.add_product(instance)
+
+
+@receiver(post_delete)
+def remove_product_index(sender, instance, **kwargs):
+    """
+    Drop the ProductIndex row when a catalog product is deleted.
+    Args:
+        sender (Model): Model class of the deleted instance
+        instance (Model): The instance that was deleted
+        **kwargs: Additional keyword arguments from the signal
+    Note:
+        Like sync_product_index, the in-process indexes only drop the
+        product once the delete commits.
+    """
+    if sender in PRODUCT_CATEGORIES:
+        from .caching import catalog_cache
+
+        category = PRODUCT_CATEGORIES[sender]
+        product_id = instance.pk
+        ProductIndex.remove(product_id)
+        transaction.on_commit(lambda: _unindex_deleted_product(product_id, category))
+        catalog_cache.bump_on_commit(category)
+
+
+def _unindex_deleted_product(product_id, category):
+    """Drop a committed product delete from the in-process indexes."""
+    from .registry import product_registry
+    from .search import search_engine
+    from .suggest import suggestion_index
+    from .facets import facet_index
+
+    product_registry.unregister(product_id)
+    if search_engine.is_ready:
+        search_engine.remove_product(product_id, category)
+    if suggestion_index.is_ready:
+        suggestion_index.remove_product(product_id)
+    facet_index.remove_product(product_id, category)
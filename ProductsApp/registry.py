@@ -0,0 +1,178 @@
+"""
+Product ID to category registry for the ProductsApp.
+
+Product primary keys are UUIDs that are unique across all thirteen product
+tables, but nothing in a UUID says which table it lives in. Views that only
+receive a product ID used to probe every table in turn. The registry answers
+"which category does this UUID belong to" without touching the product
+tables at all.
+
+The persisted side of the registry is the ProductIndex table, which is kept
+in sync by the ProductsApp model signals. Each process keeps an in-memory
+copy of the UUID -> category map, loaded in one query on first use and
+updated by the same signals whenever this process commits the creation or
+deletion of a product.
+
+Classes:
+    ProductRegistry: Process-local UUID -> category cache over ProductIndex
+
+Attributes:
+    product_registry (ProductRegistry): Shared registry instance
+
+Example:
+    from ProductsApp.registry import product_registry
+
+    product = product_registry.get_product(product_id)
+    category = product_registry.resolve(product_id)
+"""
+
+import threading
+import uuid
+
+from django.core.exceptions import ValidationError
+
+from .models import PRODUCT_MODELS, ProductIndex
+
+
+class ProductRegistry:
+    """
+    Process-local UUID -> category map backed by the ProductIndex table.
+
+    Lookups are served from memory. The whole map is loaded with a single
+    query the first time it is needed; IDs that are still unknown after that
+    (for example products created by another process) are looked up
+    individually in ProductIndex and cached.
+
+    Methods:
+        warm(): Load every UUID -> category pair from ProductIndex.
+        register(product_id, category): Record a product in the cache.
+        unregister(product_id): Forget a product.
+        resolve(product_id): Return the category of a product, or None.
+        get_model(product_id): Return the product model class, or None.
+        get_product(product_id, category=None): Return the product, or None.
+    """
+
+    def __init__(self):
+        self._categories = {}
+        self._warmed = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(product_id):
+        """Return product_id as a UUID, or None if it is not a valid UUID."""
+        if isinstance(product_id, uuid.UUID):
+            return product_id
+        try:
+            return uuid.UUID(str(product_id))
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def warm(self):
+        """
+        Load the complete UUID -> category map from ProductIndex.
+
+        Returns:
+            int: Number of products in the registry.
+        """
+        categories = dict(ProductIndex.objects.values_list("product_id", "category"))
+        with self._lock:
+            self._categories = categories
+            self._warmed = True
+        return len(categories)
+
+    def register(self, product_id, category):
+        """
+        Record the category of a product.
+
+        Args:
+            product_id (UUID): Primary key of the product.
+            category (str): Category name, a key of PRODUCT_MODELS.
+        """
+        with self._lock:
+            self._categories[self._normalize(product_id)] = category
+
+    def unregister(self, product_id):
+        """
+        Forget a product, e.g. after it has been deleted.
+
+        Args:
+            product_id (UUID): Primary key of the product.
+        """
+        with self._lock:
+            self._categories.pop(self._normalize(product_id), None)
+
+    def clear(self):
+        """Drop the in-memory map; it is reloaded on next use."""
+        with self._lock:
+            self._categories = {}
+            self._warmed = False
+
+    def resolve(self, product_id):
+        """
+        Return the category a product belongs to.
+
+        Args:
+            product_id (UUID or str): Primary key of the product.
+
+        Returns:
+            str or None: Category name, or None for unknown or invalid IDs.
+        """
+        product_id = self._normalize(product_id)
+        if product_id is None:
+            return None
+
+        if not self._warmed:
+            self.warm()
+
+        category = self._categories.get(product_id)
+        if category is None:
+            # Created by another process since this one warmed up
+            category = (
+                ProductIndex.objects.filter(product_id=product_id)
+                .values_list("category", flat=True)
+                .first()
+            )
+            if category is not None:
+                self.register(product_id, category)
+        return category
+
+    def get_model(self, product_id):
+        """
+        Return the model class a product is stored in.
+
+        Args:
+            product_id (UUID or str): Primary key of the product.
+
+        Returns:
+            Model class or None: Product model, or None if unknown.
+        """
+        return PRODUCT_MODELS.get(self.resolve(product_id))
+
+    def get_product(self, product_id, category=None):
+        """
+        Fetch a product with a single query against its own table.
+
+        Args:
+            product_id (UUID or str): Primary key of the product.
+            category (str, optional): Category supplied by the caller. When it
+                names a known category it is used directly; otherwise the
+                category is resolved through the registry.
+
+        Returns:
+            Model instance or None: The product, or None if it does not exist.
+        """
+        model = PRODUCT_MODELS.get(category) or self.get_model(product_id)
+        if model is None:
+            return None
+
+        try:
+            return model.objects.get(id=product_id)
+        except model.DoesNotExist:
+            # Deleted by another process; drop the stale cache entry
+            self.unregister(product_id)
+            return None
+        except (ValidationError, ValueError):
+            return None
+
+
+product_registry = ProductRegistry()
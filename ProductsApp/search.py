@@ -0,0 +1,745 @@
+"""
+In-process full-text product search for the ProductsApp.
+
+This module keeps a tokenized inverted index over every catalog product and
+ranks matches with Okapi BM25, so storefront searches no longer scan the
+product tables with ``icontains``.
+
+Indexed text:
+    - brand, model and name (weighted highest)
+    - key specification fields such as socket, chipset, ram_type,
+      memory_type, interface, form_factor and panel_type
+    - the category name
+    - the description, with HTML tags stripped
+
+Index lifecycle:
+    - Each server process starts loading the index in a background thread
+      when it starts (see TechReform.asgi), from
+      ``settings.PRODUCT_SEARCH_INDEX_PATH`` (written by the
+      ``build_search_index`` management command during the build) or, if no
+      file exists, from the database. Searches made before the index is
+      ready find nothing, and callers fall back to ``icontains`` filters;
+      a request never builds the index itself.
+    - Product saves and deletes in the same process update the index
+      incrementally through the ProductsApp model signals, once their
+      transaction commits.
+    - Every ``settings.PRODUCT_SEARCH_REFRESH_INTERVAL`` seconds a search
+      re-indexes products whose ``updated_at`` moved since the last refresh,
+      which picks up changes made by other worker processes. Products deleted
+      by another process may still match until the index is rebuilt; callers
+      hydrate hits from the database, which drops them.
+
+Classes:
+    ProductSearchEngine: Inverted index with BM25 ranking
+    SearchResults: Lazily materialized list of ranked hits
+
+Functions:
+    tokenize: Split text into lowercase alphanumeric search terms
+    search_queryset: Restrict a product queryset to the best search matches
+
+Attributes:
+    search_engine (ProductSearchEngine): Shared engine instance
+
+Example:
+    from ProductsApp.search import search_engine
+
+    for hit in search_engine.search("ryzen 7 am5")[:10]:
+        print(hit.category, hit.product_id, hit.score)
+"""
+
+import math
+import os
+import pickle
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PRODUCT_MODELS, PRODUCT_CATEGORIES
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TAG_RE = re.compile(r"<[^>]+>")
+
+# Term frequency multipliers per indexed field
+IDENTITY_FIELDS = ("brand", "model", "name")
+SPEC_FIELDS = (
+    "socket",
+    "chipset",
+    "ram_type",
+    "memory_type",
+    "interface",
+    "form_factor",
+    "panel_type",
+    "cooler_type",
+    "processor_graphics",
+    "efficiency",
+    "modularity",
+    "switch_type",
+    "key_type",
+    "mouse_type",
+    "headphone_type",
+    "connection",
+)
+IDENTITY_WEIGHT = 3
+SPEC_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Relative change of the average document length that triggers a full
+# recomputation of the BM25 length normalisation
+NORM_DRIFT = 0.05
+
+# Prefix-expanded terms score at this fraction of an exact match
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_TERMS = 32
+
+# Bump when the persisted format changes
+INDEX_VERSION = 1
+
+SearchHit = namedtuple("SearchHit", "category product_id score price created_at")
+
+
+def tokenize(text):
+    """
+    Split text into lowercase alphanumeric search terms.
+
+    Args:
+        text (str): Text to tokenize; None is treated as empty.
+
+    Returns:
+        list: Terms in the order they appear.
+    """
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def document_terms(product):
+    """
+    Build the weighted term frequencies for a product.
+
+    Args:
+        product (BaseProduct): Instance of one of PRODUCT_MODELS.
+
+    Returns:
+        Counter: Maps each term to its weighted frequency.
+    """
+    terms = Counter()
+    for field in IDENTITY_FIELDS:
+        for term in tokenize(getattr(product, field, None)):
+            terms[term] += IDENTITY_WEIGHT
+    for field in SPEC_FIELDS:
+        for term in tokenize(getattr(product, field, None)):
+            terms[term] += SPEC_WEIGHT
+    for term in tokenize(PRODUCT_CATEGORIES.get(type(product))):
+        terms[term] += SPEC_WEIGHT
+    description = TAG_RE.sub(" ", product.description or "")
+    for term in tokenize(description):
+        terms[term] += DESCRIPTION_WEIGHT
+    return terms
+
+
+class ProductSearchEngine:
+    """
+    Tokenized inverted index over all catalog products, ranked with BM25.
+
+    Documents are numbered densely; a product keeps its document number when
+    it is re-indexed, and the slot is emptied when it is removed. Postings
+    map each term to ``{document: weighted term frequency}``.
+
+    Multi-word queries require every word to match. A word that is not in
+    the vocabulary, and the last word of the query (which is usually still
+    being typed), also match vocabulary terms that start with it, at reduced
+    weight.
+
+    Methods:
+        search(query, categories=None, limit=None): Return ranked results.
+        index_product(product): Add or refresh one product.
+        remove_product(product_id, category): Drop one product.
+        build(): Rebuild the whole index from the database.
+        warm() / warm_in_background(): Load or build the index if needed.
+        save(path=None) / load(path=None): Persist or restore the index.
+        clear(): Drop the index.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = False
+        self._warming = False
+        self._warm_lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # A warm-up thread does not survive the fork; start over if one ran
+        if self._warming:
+            self._lock = threading.RLock()
+            self._warm_lock = threading.Lock()
+            self._warming = False
+            self._ready = False
+            self._reset()
+
+    def _reset(self):
+        self._doc_keys = []  # document -> (category, product_id) or None
+        self._doc_numbers = {}  # (category, product_id) -> document
+        self._doc_terms = []  # document -> tuple of terms
+        self._doc_lengths = []  # document -> weighted length
+        self._doc_meta = []  # document -> (price, created_at)
+        self._free_docs = []
+        self._postings = {}
+        self._total_length = 0
+        self._live_docs = 0
+        self._vocabulary = None
+        self._length_norms = None
+        self._norm_average = None
+        self._refreshed_at = None
+        self._last_refresh_check = 0.0
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    @property
+    def is_ready(self):
+        """True once the index has been loaded or built in this process."""
+        return self._ready
+
+    def __len__(self):
+        return self._live_docs
+
+    def index_product(self, product):
+        """
+        Add a product to the index, replacing any previous version.
+
+        Args:
+            product (BaseProduct): Saved instance of one of PRODUCT_MODELS.
+        """
+        key = (PRODUCT_CATEGORIES[type(product)], product.pk)
+        terms = document_terms(product)
+        meta = (product.price, product.created_at)
+
+        with self._lock:
+            doc = self._doc_numbers.get(key)
+            if doc is not None:
+                self._unindex(doc)
+            elif self._free_docs:
+                doc = self._free_docs.pop()
+            else:
+                doc = len(self._doc_keys)
+                self._doc_keys.append(None)
+                self._doc_terms.append(())
+                self._doc_lengths.append(0)
+                self._doc_meta.append(None)
+
+            for term, frequency in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._vocabulary = None
+                postings[doc] = frequency
+
+            length = sum(terms.values())
+            self._doc_keys[doc] = key
+            self._doc_numbers[key] = doc
+            self._doc_terms[doc] = tuple(terms)
+            self._doc_lengths[doc] = length
+            self._doc_meta[doc] = meta
+            self._total_length += length
+            self._live_docs += 1
+            self._update_norm(doc)
+
+    def remove_product(self, product_id, category=None):
+        """
+        Remove a product from the index.
+
+        Args:
+            product_id (UUID): Primary key of the product.
+            category (str, optional): Category of the product. When omitted
+                every category is checked.
+        """
+        with self._lock:
+            categories = [category] if category else list(PRODUCT_MODELS)
+            for name in categories:
+                doc = self._doc_numbers.get((name, product_id))
+                if doc is not None:
+                    self._unindex(doc)
+                    self._free_docs.append(doc)
+
+    def _unindex(self, doc):
+        """Drop a document's postings and bookkeeping; caller holds the lock."""
+        for term in self._doc_terms[doc]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc, None)
+                if not postings:
+                    del self._postings[term]
+                    self._vocabulary = None
+        self._doc_numbers.pop(self._doc_keys[doc], None)
+        self._total_length -= self._doc_lengths[doc]
+        self._live_docs -= 1
+        self._doc_keys[doc] = None
+        self._doc_terms[doc] = ()
+        self._doc_lengths[doc] = 0
+        self._doc_meta[doc] = None
+
+    def build(self):
+        """
+        Rebuild the whole index from the product tables.
+
+        Returns:
+            int: Number of indexed products.
+        """
+        started_at = timezone.now()
+        with self._lock:
+            self._reset()
+            for model in PRODUCT_MODELS.values():
+                for product in model.objects.iterator(chunk_size=2000):
+                    self.index_product(product)
+            self._refreshed_at = started_at
+            self._last_refresh_check = time.monotonic()
+            self._ready = True
+        return self._live_docs
+
+    def refresh(self):
+        """
+        Re-index products changed since the last build, load or refresh.
+
+        Changed products are passed on to the suggestion index as well.
+
+        Returns:
+            int: Number of re-indexed products.
+        """
+        if self._refreshed_at is None:
+            return 0
+        from .suggest import suggestion_index
+
+        started_at = timezone.now()
+        count = 0
+        for model in PRODUCT_MODELS.values():
+            for product in model.objects.filter(updated_at__gte=self._refreshed_at):
+                self.index_product(product)
+                if suggestion_index.is_ready:
+                    # Suggestions never query the database themselves
+                    suggestion_index.add_product(product)
+                count += 1
+        self._refreshed_at = started_at
+        self._last_refresh_check = time.monotonic()
+        return count
+
+    def clear(self):
+        """Drop the index; it is loaded again by the next warm-up."""
+        with self._lock:
+            self._ready = False
+            self._reset()
+
+    def warm(self):
+        """
+        Load the persisted index, or build it if no usable file exists.
+
+        Does nothing if the index is already loaded.
+
+        Returns:
+            int: Number of indexed products.
+        """
+        with self._lock:
+            if not self._ready and not self.load():
+                self.build()
+            return self._live_docs
+
+    def warm_in_background(self):
+        """
+        Start warm() in a daemon thread, unless the index is ready or loading.
+
+        Returns:
+            bool: True if a thread was started.
+        """
+        with self._warm_lock:
+            if self._ready or self._warming:
+                return False
+            self._warming = True
+        threading.Thread(
+            target=self._warm_thread, name="product-search-warm", daemon=True
+        ).start()
+        return True
+
+    def _warm_thread(self):
+        try:
+            self.warm()
+        finally:
+            self._warming = False
+            connection.close()
+
+    def ensure_ready(self):
+        """
+        Refresh the index periodically, or start loading it if it is not ready.
+
+        Returns:
+            bool: True if the index can answer searches now.
+        """
+        if not self._ready:
+            self.warm_in_background()
+            return False
+
+        interval = getattr(settings, "PRODUCT_SEARCH_REFRESH_INTERVAL", 60)
+        if time.monotonic() - self._last_refresh_check >= interval:
+            self.refresh()
+        return True
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _default_path():
+        return settings.PRODUCT_SEARCH_INDEX_PATH
+
+    def save(self, path=None):
+        """
+        Write the index to disk atomically.
+
+        Args:
+            path (str, optional): Target file, defaults to
+                settings.PRODUCT_SEARCH_INDEX_PATH.
+
+        Returns:
+            str: Path the index was written to.
+        """
+        path = path or self._default_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            state = {
+                "version": INDEX_VERSION,
+                "refreshed_at": self._refreshed_at,
+                "doc_keys": self._doc_keys,
+                "doc_terms": self._doc_terms,
+                "doc_meta": self._doc_meta,
+                "postings": self._postings,
+            }
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as index_file:
+                pickle.dump(state, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        return path
+
+    def load(self, path=None):
+        """
+        Restore the index from disk and pick up changes made since it was saved.
+
+        Args:
+            path (str, optional): Source file, defaults to
+                settings.PRODUCT_SEARCH_INDEX_PATH.
+
+        Returns:
+            bool: True if the index was loaded, False if no usable file exists.
+        """
+        path = path or self._default_path()
+        try:
+            with open(path, "rb") as index_file:
+                state = pickle.load(index_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+        if state.get("version") != INDEX_VERSION:
+            return False
+
+        with self._lock:
+            self._reset()
+            self._doc_keys = state["doc_keys"]
+            self._doc_terms = state["doc_terms"]
+            self._doc_meta = state["doc_meta"]
+            self._postings = state["postings"]
+            self._doc_lengths = [0] * len(self._doc_keys)
+            for term, postings in self._postings.items():
+                for doc, frequency in postings.items():
+                    self._doc_lengths[doc] += frequency
+            for doc, key in enumerate(self._doc_keys):
+                if key is None:
+                    self._free_docs.append(doc)
+                else:
+                    self._doc_numbers[key] = doc
+                    self._live_docs += 1
+            self._total_length = sum(self._doc_lengths)
+            self._refreshed_at = state["refreshed_at"]
+            self._ready = True
+            self.refresh()
+        return True
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _prefix_terms(self, prefix):
+        """Return up to MAX_PREFIX_TERMS vocabulary terms starting with prefix."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        terms = []
+        position = bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and len(terms) < MAX_PREFIX_TERMS:
+            term = vocabulary[position]
+            if not term.startswith(prefix):
+                break
+            if term != prefix:
+                terms.append(term)
+            position += 1
+        return terms
+
+    def _average_length(self):
+        return self._total_length / self._live_docs if self._live_docs else 1
+
+    def _update_norm(self, doc):
+        """Refresh one document's length normalisation after it changed."""
+        norms = self._length_norms
+        if norms is None:
+            return
+        average = self._norm_average
+        if abs(self._average_length() - average) > NORM_DRIFT * average:
+            # The corpus average moved noticeably; recompute everything lazily
+            self._length_norms = None
+            return
+        while len(norms) <= doc:
+            norms.append(K1)
+        norms[doc] = K1 * (1 - B + B * self._doc_lengths[doc] / average)
+
+    def _norms(self):
+        """
+        Per-document BM25 length normalisation.
+
+        Computed against the average document length at the time; single
+        updates reuse that average until it drifts by more than NORM_DRIFT.
+        """
+        if self._length_norms is None:
+            average = self._average_length()
+            self._norm_average = average
+            self._length_norms = [
+                K1 * (1 - B + B * length / average) for length in self._doc_lengths
+            ]
+        return self._length_norms
+
+    def _query_terms(self, token, is_last):
+        """Map the vocabulary terms a query word matches to their weights."""
+        weights = {}
+        if token in self._postings:
+            weights[token] = 1.0
+        if is_last or not weights:
+            for term in self._prefix_terms(token):
+                weights.setdefault(term, PREFIX_WEIGHT)
+        return weights
+
+    def search(self, query, categories=None, limit=None):
+        """
+        Find products matching every word of a query, best matches first.
+
+        Args:
+            query (str): Free-text query.
+            categories (iterable, optional): Restrict hits to these categories.
+            limit (int, optional): Return at most this many hits.
+
+        Returns:
+            SearchResults: Hits sorted by descending BM25 score. SearchHit
+            tuples are only built for the items that are actually read.
+            Empty while the index is still loading.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not self.ensure_ready() or not tokens:
+            return SearchResults(self, [], {})
+
+        with self._lock:
+            norms = self._norms()
+            total_docs = self._live_docs
+            word_terms = [
+                self._query_terms(token, index == len(tokens) - 1)
+                for index, token in enumerate(tokens)
+            ]
+            if not all(word_terms):
+                return SearchResults(self, [], {})
+
+            # Score the most selective word first, then only its candidates
+            word_terms.sort(
+                key=lambda terms: sum(len(self._postings[term]) for term in terms)
+            )
+            scores = None
+            for terms in word_terms:
+                word_scores = {}
+                for term, weight in terms.items():
+                    postings = self._postings[term]
+                    frequency = len(postings)
+                    idf = math.log(1 + (total_docs - frequency + 0.5) / (frequency + 0.5))
+                    factor = weight * idf * (K1 + 1)
+                    if scores is None and not word_scores:
+                        word_scores = {
+                            doc: factor * tf / (tf + norms[doc])
+                            for doc, tf in postings.items()
+                        }
+                        continue
+                    if scores is None or len(postings) <= len(scores):
+                        matches = postings.items()
+                    else:
+                        matches = (
+                            (doc, postings[doc]) for doc in scores if doc in postings
+                        )
+                    for doc, tf in matches:
+                        word_scores[doc] = word_scores.get(doc, 0.0) + (
+                            factor * tf / (tf + norms[doc])
+                        )
+
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {
+                        doc: score + word_scores[doc]
+                        for doc, score in scores.items()
+                        if doc in word_scores
+                    }
+                if not scores:
+                    return SearchResults(self, [], {})
+
+            ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+            if categories:
+                allowed = set(categories)
+                doc_keys = self._doc_keys
+                ranked = [doc for doc in ranked if doc_keys[doc][0] in allowed]
+            if limit is not None:
+                ranked = ranked[:limit]
+
+        return SearchResults(self, ranked, scores)
+
+
+class SearchResults:
+    """
+    Ranked, lazily materialized result list of a ProductSearchEngine query.
+
+    Behaves like a read-only list of SearchHit tuples, but only builds the
+    tuples for the positions that are read, so paginating a query that
+    matches a large part of the catalog stays cheap.
+
+    Methods:
+        sorted_by_price(descending=False): Results re-ordered by price.
+        created_since(moment): Results created at or after a moment.
+        product_ids(): IDs of all matched products.
+        restricted_to(product_ids): Results limited to the given products.
+    """
+
+    def __init__(self, engine, docs, scores):
+        self._engine = engine
+        self._docs = docs
+        self._scores = scores
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __bool__(self):
+        return bool(self._docs)
+
+    def count(self):
+        """Return the number of hits (Paginator compatibility)."""
+        return len(self._docs)
+
+    def _hit(self, doc):
+        key = self._engine._doc_keys[doc]
+        meta = self._engine._doc_meta[doc]
+        if key is None:
+            # Removed after the query ran
+            return SearchHit(None, None, 0.0, None, None)
+        return SearchHit(key[0], key[1], self._scores.get(doc, 0.0), meta[0], meta[1])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._hit(doc) for doc in self._docs[index]]
+        return self._hit(self._docs[index])
+
+    def __iter__(self):
+        for doc in self._docs:
+            yield self._hit(doc)
+
+    def _with_docs(self, docs):
+        return SearchResults(self._engine, docs, self._scores)
+
+    def sorted_by_price(self, descending=False):
+        """
+        Return the results ordered by price, keeping relevance order for ties.
+
+        Products without a price come first in ascending order and last in
+        descending order.
+        """
+        meta = self._engine._doc_meta
+
+        def price_key(doc):
+            price = meta[doc][0] if meta[doc] else None
+            return (price is not None, price or 0)
+
+        return self._with_docs(sorted(self._docs, key=price_key, reverse=descending))
+
+    def product_ids(self):
+        """Return the IDs of all matched products, in rank order."""
+        doc_keys = self._engine._doc_keys
+        return [doc_keys[doc][1] for doc in self._docs if doc_keys[doc]]
+
+    def restricted_to(self, product_ids):
+        """Return the results whose product ID is in ``product_ids``."""
+        product_ids = set(product_ids)
+        doc_keys = self._engine._doc_keys
+        return self._with_docs(
+            [
+                doc
+                for doc in self._docs
+                if doc_keys[doc] and doc_keys[doc][1] in product_ids
+            ]
+        )
+
+    def created_since(self, moment):
+        """Return the results created at or after ``moment``."""
+        meta = self._engine._doc_meta
+        return self._with_docs(
+            [
+                doc
+                for doc in self._docs
+                if meta[doc] and meta[doc][1] and meta[doc][1] >= moment
+            ]
+        )
+
+
+search_engine = ProductSearchEngine()
+
+
+def search_queryset(queryset, category, search_query):
+    """
+    Restrict a product queryset to the products matching a search query.
+
+    Matches come from the search index. Only the best
+    ``settings.PRODUCT_SEARCH_MAX_MATCHES`` are kept, which bounds the list
+    of IDs sent to the database; the caller's ordering then applies to
+    those. Queries the index cannot answer (for example fragments in the
+    middle of a word, or any query while the index is still loading) fall
+    back to the old ``icontains`` filter over brand, model and description.
+
+    Args:
+        queryset (QuerySet): Queryset over one of PRODUCT_MODELS.
+        category (str): Category of the queryset's model.
+        search_query (str): Free-text query.
+
+    Returns:
+        QuerySet: Filtered queryset.
+    """
+    hits = search_engine.search(
+        search_query,
+        categories=[category],
+        limit=getattr(settings, "PRODUCT_SEARCH_MAX_MATCHES", 500),
+    )
+    if hits:
+        return queryset.filter(id__in=[hit.product_id for hit in hits])
+    return queryset.filter(
+        Q(brand__icontains=search_query)
+        | Q(model__icontains=search_query)
+        | Q(description__icontains=search_query)
+    )
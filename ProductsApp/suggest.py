@@ -0,0 +1,427 @@
+"""
+Typo-tolerant search-as-you-type suggestions for the ProductsApp.
+
+The storefront search box asks for suggestions on every keystroke, so the
+lookup has to be answered from memory in a few milliseconds. This module
+keeps a small index over the brand, model and name of every product:
+
+    - a character trie over all terms, used to complete the word that is
+      still being typed ("rtx 40" -> "4060", "4070", "4090")
+    - a trigram index over the same terms, used to find close spellings of
+      words that match nothing ("supr" -> "super", "gefroce" -> "geforce")
+    - term -> product postings, used to intersect the words of a query
+
+The index is loaded from the ProductIndex table with one query on first use
+and kept current by the ProductsApp model signals (committed saves and deletes
+in this process) and by the search engine's periodic refresh (changes made by other
+processes). Answering a suggestion request never touches the database.
+
+Classes:
+    SuggestionIndex: Trie + trigram index over product names
+
+Attributes:
+    suggestion_index (SuggestionIndex): Shared index instance
+
+Example:
+    from ProductsApp.suggest import suggestion_index
+
+    for suggestion in suggestion_index.suggest("rtx 4070 supr"):
+        print(suggestion.label, suggestion.category, suggestion.price)
+"""
+
+import heapq
+import threading
+from collections import Counter, namedtuple
+from itertools import islice
+
+from .models import PRODUCT_CATEGORIES, ProductIndex
+from .search import tokenize
+
+
+# Match weights per query word
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+
+# Prefix completions considered per query word
+MAX_COMPLETIONS = 64
+
+# Fuzzy candidates considered per query word
+MAX_FUZZY_TERMS = 16
+
+# Products scored per query; bounds the work per keystroke for very broad
+# queries, which are ranked among this many of their matches only
+MAX_CANDIDATES = 500
+
+# Words shorter than this are only matched exactly or by prefix
+MIN_FUZZY_LENGTH = 4
+
+DEFAULT_LIMIT = 8
+
+Suggestion = namedtuple("Suggestion", "label category product_id price score")
+
+_Entry = namedtuple("_Entry", "label category product_id price is_available terms")
+
+
+def trigrams(term):
+    """
+    Return the set of padded character trigrams of a term.
+
+    Args:
+        term (str): Lowercase search term.
+
+    Returns:
+        set: Trigrams, including the word boundary ones.
+    """
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(token):
+    """Return the number of typos tolerated in a query word of this length."""
+    if len(token) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def edit_distance(source, target, limit):
+    """
+    Optimal string alignment distance, giving up once it exceeds ``limit``.
+
+    Counts insertions, deletions, substitutions and swaps of two adjacent
+    characters as one edit each.
+
+    Args:
+        source (str): First string.
+        target (str): Second string.
+        limit (int): Largest distance of interest.
+
+    Returns:
+        int: The distance, or ``limit + 1`` if it is larger than ``limit``.
+    """
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    previous_row = None
+    row = list(range(len(target) + 1))
+    for i, source_char in enumerate(source, 1):
+        before_previous, previous_row = previous_row, row
+        row = [i] + [0] * len(target)
+        for j, target_char in enumerate(target, 1):
+            cost = source_char != target_char
+            row[j] = min(
+                previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost
+            )
+            if (
+                before_previous is not None
+                and j > 1
+                and source_char == target[j - 2]
+                and source[i - 2] == target_char
+            ):
+                row[j] = min(row[j], before_previous[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+class _TrieNode:
+    __slots__ = ("children", "term")
+
+    def __init__(self):
+        self.children = {}
+        self.term = None
+
+
+class SuggestionIndex:
+    """
+    In-memory suggestion index over product brand, model and name.
+
+    Every query word must match a product for the product to be suggested.
+    A word matches a term exactly, as a prefix (the last word, or any word
+    that has no exact match), or within one or two typos. Products are
+    ranked by the sum of their match weights; available products and
+    shorter names win ties.
+
+    Methods:
+        suggest(query, limit=8): Return the best Suggestion tuples.
+        add_product(product): Add or refresh one product.
+        remove_product(product_id): Drop one product.
+        build(): Rebuild the index from ProductIndex.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = False
+        self._reset()
+
+    def _reset(self):
+        # Products are numbered densely; small ints hash much faster than UUIDs
+        self._entries = []  # document -> _Entry or None
+        self._doc_numbers = {}  # product_id -> document
+        self._free_docs = []
+        self._postings = {}  # term -> set of documents
+        self._trie = _TrieNode()
+        self._trigrams = {}  # trigram -> set of terms
+
+    @property
+    def is_ready(self):
+        """True once the index has been built in this process."""
+        return self._ready
+
+    def __len__(self):
+        return len(self._doc_numbers)
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def build(self):
+        """
+        Rebuild the whole index from the ProductIndex table.
+
+        Returns:
+            int: Number of indexed products.
+        """
+        rows = ProductIndex.objects.values_list(
+            "product_id", "category", "name", "brand", "model", "price", "is_available"
+        )
+        with self._lock:
+            self._reset()
+            for row in rows.iterator(chunk_size=5000):
+                self._add(*row)
+            self._ready = True
+            return len(self._doc_numbers)
+
+    def ensure_ready(self):
+        """Build the index on first use."""
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.build()
+
+    def add_product(self, product):
+        """
+        Add a product to the index, replacing any previous version.
+
+        Args:
+            product (BaseProduct): Saved instance of one of PRODUCT_MODELS.
+        """
+        with self._lock:
+            self._add(
+                product.pk,
+                PRODUCT_CATEGORIES[type(product)],
+                product.name,
+                product.brand,
+                product.model,
+                product.price,
+                product.is_available,
+            )
+
+    def remove_product(self, product_id):
+        """
+        Remove a product from the index.
+
+        Args:
+            product_id (UUID): Primary key of the product.
+        """
+        with self._lock:
+            self._remove(product_id)
+
+    def _add(self, product_id, category, name, brand, model, price, is_available):
+        """Index one product; caller holds the lock."""
+        self._remove(product_id)
+        label = name or f"{brand} {model}"
+        terms = tuple(dict.fromkeys(tokenize(f"{brand} {model} {name}")))
+        entry = _Entry(label, category, product_id, price, is_available, terms)
+        if self._free_docs:
+            doc = self._free_docs.pop()
+            self._entries[doc] = entry
+        else:
+            doc = len(self._entries)
+            self._entries.append(entry)
+        self._doc_numbers[product_id] = doc
+        for term in terms:
+            docs = self._postings.get(term)
+            if docs is None:
+                docs = self._postings[term] = set()
+                self._add_term(term)
+            docs.add(doc)
+
+    def _remove(self, product_id):
+        """Drop one product; caller holds the lock."""
+        doc = self._doc_numbers.pop(product_id, None)
+        if doc is None:
+            return
+        for term in self._entries[doc].terms:
+            docs = self._postings.get(term)
+            if docs is None:
+                continue
+            docs.discard(doc)
+            if not docs:
+                del self._postings[term]
+                self._remove_term(term)
+        self._entries[doc] = None
+        self._free_docs.append(doc)
+
+    def _add_term(self, term):
+        node = self._trie
+        for char in term:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        node.term = term
+        for gram in trigrams(term):
+            self._trigrams.setdefault(gram, set()).add(term)
+
+    def _remove_term(self, term):
+        path = [self._trie]
+        for char in term:
+            node = path[-1].children.get(char)
+            if node is None:
+                break
+            path.append(node)
+        else:
+            path[-1].term = None
+            # Prune the branches that no longer lead to any term
+            for depth in range(len(term), 0, -1):
+                node = path[depth]
+                if node.children or node.term is not None:
+                    break
+                del path[depth - 1].children[term[depth - 1]]
+        for gram in trigrams(term):
+            terms = self._trigrams.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._trigrams[gram]
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _completions(self, prefix):
+        """Return up to MAX_COMPLETIONS terms starting with prefix, shortest first."""
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        terms = []
+        level = [node]
+        while level and len(terms) < MAX_COMPLETIONS:
+            next_level = []
+            for node in level:
+                if node.term is not None and node.term != prefix:
+                    terms.append(node.term)
+                next_level.extend(node.children.values())
+            level = next_level
+        return terms[:MAX_COMPLETIONS]
+
+    def _fuzzy_terms(self, token, is_last):
+        """Return terms within max_edits(token) typos of the query word."""
+        limit = max_edits(token)
+        if not limit:
+            return []
+        shared = Counter()
+        for gram in trigrams(token):
+            shared.update(self._trigrams.get(gram, ()))
+        # Every edit destroys at most three trigrams
+        threshold = max(1, len(token) - 3 * limit)
+        matches = []
+        for term, count in shared.most_common():
+            if count < threshold or len(matches) >= MAX_FUZZY_TERMS:
+                break
+            if is_last:
+                # The word may still be incomplete; compare with prefixes
+                distance = min(
+                    edit_distance(token, term[:length], limit)
+                    for length in range(len(token) - 1, len(token) + limit + 1)
+                )
+            else:
+                distance = edit_distance(token, term, limit)
+            if distance <= limit:
+                matches.append(term)
+        return matches
+
+    def _word_matches(self, token, is_last):
+        """Map the terms a query word matches to their weights, best first."""
+        weights = {}
+        if token in self._postings:
+            weights[token] = EXACT_WEIGHT
+        if is_last or not weights:
+            for term in self._completions(token):
+                weights.setdefault(term, PREFIX_WEIGHT)
+        if not weights:
+            for term in self._fuzzy_terms(token, is_last):
+                weights.setdefault(term, FUZZY_WEIGHT)
+        return weights
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """
+        Suggest products for a partially typed query.
+
+        Args:
+            query (str): Text typed into the search box so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            list: Suggestion tuples, best first.
+        """
+        self.ensure_ready()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            word_matches = [
+                self._word_matches(token, index == len(tokens) - 1)
+                for index, token in enumerate(tokens)
+            ]
+            if not all(word_matches):
+                return []
+
+            postings = self._postings
+            word_matches.sort(
+                key=lambda matches: sum(len(postings[term]) for term in matches)
+            )
+
+            # Intersect the products of every word, most selective first
+            candidates = None
+            for matches in word_matches:
+                docs = [postings[term] for term in matches]
+                docs = docs[0] if len(docs) == 1 else set().union(*docs)
+                candidates = docs if candidates is None else candidates & docs
+                if not candidates:
+                    return []
+
+            entries = self._entries
+            scores = {}
+            for doc in islice(candidates, MAX_CANDIDATES):
+                terms = entries[doc].terms
+                scores[doc] = sum(
+                    max([matches.get(term, 0.0) for term in terms])
+                    for matches in word_matches
+                )
+
+            best = heapq.nlargest(
+                limit,
+                scores,
+                key=lambda doc: (
+                    scores[doc],
+                    entries[doc].is_available,
+                    -len(entries[doc].label),
+                ),
+            )
+            return [
+                Suggestion(
+                    entries[doc].label,
+                    entries[doc].category,
+                    entries[doc].product_id,
+                    entries[doc].price,
+                    scores[doc],
+                )
+                for doc in best
+            ]
+
+
+suggestion_index = SuggestionIndex()
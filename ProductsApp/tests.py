@@ -1,3 +1,1004 @@
-from django.test import TestCase
+"""
+Test cases for ProductsApp.
 
-# Create your tests here.
+Query plan regression suite:
+    Seeds a catalog of a few thousand products and runs EXPLAIN on every hot
+    listing, PC builder and change-polling query, asserting that each one is
+    answered through an index instead of a full table scan. A schema change
+    that drops or reshapes one of those indexes fails here instead of
+    silently slowing the storefront down. The stock reservation queries are
+    checked the same way in CartApp.
+
+    Runs on SQLite and PostgreSQL. On PostgreSQL sequential scans are
+    disabled for the EXPLAIN, so the assertion is "an index can serve this
+    query" rather than depending on table statistics.
+
+    The catalog size can be raised with the QUERY_PLAN_SEED_SIZE environment
+    variable (products per seeded category); with QUERY_PLAN_BENCHMARK=1 the
+    suite also prints the time each query takes.
+
+Catalog layer:
+    ProductLoader fetches each category once per request and never twice,
+    merged and index-backed pagination keep the cross-category order,
+    ProductIndex rows and the product registry follow saves and deletes,
+    and migration 0005 backfills the index from the product tables.
+
+Stock decrements:
+    Many threads buying the same SKU at once sell exactly the units in
+    stock and never drive it below zero, and an order with one short line
+    takes no stock at all. INVENTORY_THREADS sets the number of buyers.
+
+Search:
+    BM25 ranks brand and model matches above description matches, the last
+    word of a query matches as a prefix, price ordering and ID restriction
+    keep relevance order, and the index survives a save()/load() round trip
+    and follows product saves and deletes. search_queryset keeps only the
+    best PRODUCT_SEARCH_MAX_MATCHES hits, and a process whose index is still
+    loading falls back to icontains filters instead of building the index
+    inside the request.
+
+Suggestions:
+    Search-as-you-type tolerates one typo in a word, ranks exact words over
+    completions, honours the result limit and answers the endpoint with
+    the documented JSON shape.
+
+Facets:
+    A facet's counts ignore its own selection but respect the others and
+    follow product saves, toggle_query round-trips, and the product list
+    filters large selections in SQL with the same result as the ID list.
+
+Catalog cache:
+    Listing pages are served from the cache until a product of their
+    category is saved or checked out; parameters a view does not name and
+    junk or out-of-range page numbers do not create entries of their own.
+
+Index commits:
+    The product registry and the facet index pick up product saves and
+    deletes once their transaction commits, and never those rolled back.
+
+Adding products:
+    The add-product form only accepts a regular price with its On Sale
+    checkbox, and the sale badge follows the two prices.
+"""
+
+import importlib
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+
+from .caching import catalog_cache
+from .catalog import (
+    MergedQuerySetList,
+    ProductLoader,
+    hydrate_index_entries,
+    paginate_index,
+    search_product_tables,
+)
+from .facets import (
+    FACET_PARAMS,
+    facet_index,
+    parse_selection,
+    selection_filter,
+    toggle_query,
+)
+from .inventory import OutOfStock, decrement_stock
+from .models import CPU, GPU, RAM, Motherboard, PowerSupply, ProductIndex
+from .registry import product_registry
+from .search import search_engine, search_queryset
+from .suggest import suggestion_index
+
+
+SEED_SIZE = int(os.environ.get("QUERY_PLAN_SEED_SIZE", "1500"))
+BENCHMARK = os.environ.get("QUERY_PLAN_BENCHMARK") == "1"
+INVENTORY_THREADS = int(os.environ.get("INVENTORY_THREADS", "24"))
+
+SOCKETS = ["AM4", "AM5", "LGA1200", "LGA1700", "LGA1851", "sTR5"]
+RAM_TYPES = ["DDR3", "DDR4", "DDR5"]
+FORM_FACTORS = ["ATX", "Micro-ATX", "Mini-ITX", "E-ATX"]
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN-based checks that hot queries use an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(9)
+
+        def base_fields(index):
+            regular_price = Decimal(rng.randrange(3000, 200000))
+            on_sale = index % 10 == 0
+            return {
+                "brand": rng.choice(["AMD", "Intel", "ASUS", "MSI", "Corsair"]),
+                "model": f"Model {index}",
+                "price": regular_price * Decimal("0.8") if on_sale else regular_price,
+                "regular_price": regular_price,
+                "description": "Seeded product",
+                "is_featured": index % 50 == 0,
+                "is_available": index % 20 != 0,
+                "stock": rng.randrange(0, 40),
+            }
+
+        seeded = [
+            CPU.objects.bulk_create(
+                CPU(socket=SOCKETS[i % len(SOCKETS)], **base_fields(i))
+                for i in range(SEED_SIZE)
+            ),
+            Motherboard.objects.bulk_create(
+                Motherboard(
+                    socket=SOCKETS[i % len(SOCKETS)],
+                    form_factor=FORM_FACTORS[i % len(FORM_FACTORS)],
+                    memory_type=RAM_TYPES[i % len(RAM_TYPES)],
+                    **base_fields(i),
+                )
+                for i in range(SEED_SIZE)
+            ),
+            RAM.objects.bulk_create(
+                RAM(ram_type=RAM_TYPES[i % len(RAM_TYPES)], **base_fields(i))
+                for i in range(SEED_SIZE)
+            ),
+            GPU.objects.bulk_create(GPU(**base_fields(i)) for i in range(SEED_SIZE)),
+        ]
+
+        # bulk_create bypasses the signals that maintain ProductIndex
+        ProductIndex.objects.bulk_create(
+            (
+                ProductIndex(product_id=product.pk, **ProductIndex.values_for(product))
+                for products in seeded
+                for product in products
+            ),
+            batch_size=1000,
+        )
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def explain(self, queryset):
+        """Return the query plan of a queryset as text."""
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        started = time.perf_counter()
+        list(queryset)
+        elapsed = time.perf_counter() - started
+        plan = queryset.explain()
+        if BENCHMARK:
+            print(f"\n{elapsed * 1000:8.2f} ms  {queryset.model.__name__}\n{plan}")
+        return plan
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        """
+        Assert that a queryset does not fall back to a full table scan.
+
+        Args:
+            queryset (QuerySet): Query to explain.
+            index_name (str, optional): Index the plan must mention.
+        """
+        plan = self.explain(queryset)
+        table = queryset.model._meta.db_table
+        if connection.vendor == "postgresql":
+            self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+        else:
+            for line in plan.splitlines():
+                if f"SCAN {table}" in line:
+                    self.assertIn("USING", line, plan)
+        if index_name is not None:
+            self.assertIn(index_name, plan)
+
+    # ------------------------------------------------------------------
+    # Catalog listings (ProductIndex)
+    # ------------------------------------------------------------------
+
+    def test_product_list_default_order(self):
+        self.assertUsesIndex(
+            ProductIndex.objects.order_by(*ProductIndex.DEFAULT_ORDERING)[:12],
+            "productindex_default_idx",
+        )
+
+    def test_product_list_category(self):
+        self.assertUsesIndex(
+            ProductIndex.objects.filter(category="CPU").order_by(
+                *ProductIndex.DEFAULT_ORDERING
+            )[:12],
+            "productindex_cat_order_idx",
+        )
+
+    def test_product_list_price_sort(self):
+        self.assertUsesIndex(
+            ProductIndex.objects.order_by(
+                F("price").asc(nulls_first=True), *ProductIndex.DEFAULT_ORDERING
+            )[:12],
+            "productindex_price_order_idx",
+        )
+
+    def test_featured_products(self):
+        self.assertUsesIndex(
+            ProductIndex.objects.filter(is_featured=True).order_by(
+                *ProductIndex.DEFAULT_ORDERING
+            )[:12],
+            "productindex_featured_idx",
+        )
+
+    def test_new_arrivals(self):
+        self.assertUsesIndex(
+            ProductIndex.objects.filter(
+                created_at__gte=timezone.now() + timedelta(days=1)
+            ).order_by(*ProductIndex.DEFAULT_ORDERING)[:12]
+        )
+
+    def test_deals(self):
+        self.assertUsesIndex(ProductIndex.objects.deals()[:12], "productindex_deal_idx")
+        self.assertUsesIndex(
+            ProductIndex.objects.deals("discount_percent")[:12],
+            "productindex_deal_pct_idx",
+        )
+        self.assertUsesIndex(
+            ProductIndex.objects.deals("discount_amount")[:12],
+            "productindex_deal_amt_idx",
+        )
+
+    def test_registry_lookup(self):
+        product_id = ProductIndex.objects.values_list("product_id", flat=True)[0]
+        self.assertUsesIndex(ProductIndex.objects.filter(product_id=product_id))
+
+    # ------------------------------------------------------------------
+    # Product tables
+    # ------------------------------------------------------------------
+
+    def test_pc_builder_socket_filter(self):
+        self.assertUsesIndex(
+            CPU.objects.filter(is_available=True, socket="AM5"), "cpu_avail_socket_idx"
+        )
+        self.assertUsesIndex(
+            Motherboard.objects.filter(is_available=True, socket="AM5"),
+            "motherboard_avail_socket_idx",
+        )
+
+    def test_pc_builder_form_factor_filter(self):
+        self.assertUsesIndex(
+            Motherboard.objects.filter(is_available=True, form_factor="Mini-ITX"),
+            "motherboard_avail_form_idx",
+        )
+
+    def test_pc_builder_ram_type_filter(self):
+        self.assertUsesIndex(
+            RAM.objects.filter(is_available=True, ram_type="DDR5"), "ram_avail_type_idx"
+        )
+
+    def test_table_search_orderings(self):
+        self.assertUsesIndex(
+            GPU.objects.filter(
+                created_at__gte=timezone.now() + timedelta(days=1)
+            ).order_by("created_at", "id")[:12]
+        )
+        self.assertUsesIndex(
+            GPU.objects.order_by(
+                F("price").asc(nulls_first=True), "created_at", "id"
+            )[:12],
+            "gpu_price_idx",
+        )
+
+    def test_table_deals(self):
+        self.assertUsesIndex(GPU.objects.deals(), "gpu_deal_idx")
+
+    def test_change_polling(self):
+        since = timezone.now() + timedelta(minutes=1)
+        for model in (CPU, GPU, RAM, Motherboard):
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(
+                    model.objects.filter(updated_at__gte=since),
+                    f"{model._meta.model_name}_updated_idx",
+                )
+
+
+class StockDecrementTests(TransactionTestCase):
+    """
+    Conditional stock decrements under concurrent checkouts.
+    """
+
+    def setUp(self):
+        self.cpu = CPU.objects.create(
+            brand="Test", model="Flash Sale CPU", price=Decimal("25000"), stock=10
+        )
+        self.gpu = GPU.objects.create(
+            brand="Test", model="Flash Sale GPU", price=Decimal("90000"), stock=1
+        )
+
+    def test_concurrent_buyers_never_oversell(self):
+        start = threading.Barrier(INVENTORY_THREADS)
+        results = []
+
+        def buy():
+            try:
+                start.wait()
+                # SQLite lets one writer in at a time and may refuse the
+                # others outright; those buyers retry like a client would
+                for _ in range(100):
+                    try:
+                        with transaction.atomic():
+                            decrement_stock([("CPU", self.cpu.pk, 1)])
+                        results.append("sold")
+                        return
+                    except OutOfStock:
+                        results.append("out of stock")
+                        return
+                    except OperationalError:
+                        time.sleep(0.01)
+                results.append("gave up")
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=buy) for _ in range(INVENTORY_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count("sold"), 10)
+        self.assertEqual(results.count("out of stock"), INVENTORY_THREADS - 10)
+        self.cpu.refresh_from_db()
+        self.assertEqual(self.cpu.stock, 0)
+        self.assertEqual(ProductIndex.objects.get(product_id=self.cpu.pk).stock, 0)
+
+    def test_short_line_takes_no_stock(self):
+        with self.assertRaises(OutOfStock) as raised:
+            decrement_stock(
+                [("CPU", self.cpu.pk, 2), ("GPU", self.gpu.pk, 1), ("GPU", self.gpu.pk, 1)]
+            )
+
+        self.assertEqual(raised.exception.product_id, str(self.gpu.pk))
+        self.assertEqual(raised.exception.quantity, 2)
+        self.cpu.refresh_from_db()
+        self.gpu.refresh_from_db()
+        self.assertEqual((self.cpu.stock, self.gpu.stock), (10, 1))
+
+        decrement_stock([("CPU", self.cpu.pk, 2), ("GPU", self.gpu.pk, 1)])
+        self.cpu.refresh_from_db()
+        self.assertEqual(self.cpu.stock, 8)
+        self.assertEqual(ProductIndex.objects.get(product_id=self.gpu.pk).stock, 0)
+
+
+class IndexCommitTests(TestCase):
+    """
+    In-memory product indexes only see saves and deletes that commit.
+    """
+
+    def setUp(self):
+        product_registry.clear()
+        facet_index.clear()
+        self.gpu = GPU.objects.create(
+            brand="Zotac", model="Twin Edge", price=Decimal("60000"), stock=3
+        )
+        product_registry.warm()
+
+    def brand_counts(self):
+        groups = facet_index.counts("GPU")
+        brands = next(group for group in groups if group["field"] == "brand")
+        return {option["value"]: option["count"] for option in brands["options"]}
+
+    def test_rolled_back_save_is_not_indexed(self):
+        self.assertEqual(self.brand_counts(), {"Zotac": 1})
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                phantom = GPU.objects.create(
+                    brand="Palit", model="Phantom", price=Decimal("50000"), stock=1
+                )
+                self.gpu.brand = "Palit"
+                self.gpu.save()
+                raise RuntimeError("checkout failed")
+
+        self.assertEqual(self.brand_counts(), {"Zotac": 1})
+        self.assertIsNone(product_registry.resolve(phantom.pk))
+        self.assertFalse(ProductIndex.objects.filter(product_id=phantom.pk).exists())
+
+    def test_rolled_back_delete_keeps_product(self):
+        product_id = self.gpu.pk
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.gpu.delete()
+                raise RuntimeError("admin action failed")
+
+        self.assertEqual(self.brand_counts(), {"Zotac": 1})
+        self.assertEqual(product_registry.resolve(product_id), "GPU")
+
+    def test_committed_changes_are_indexed(self):
+        self.assertEqual(self.brand_counts(), {"Zotac": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = GPU.objects.create(
+                brand="Palit", model="GameRock", price=Decimal("70000"), stock=2
+            )
+        self.assertEqual(self.brand_counts(), {"Palit": 1, "Zotac": 1})
+        self.assertEqual(product_registry._categories[other.pk], "GPU")
+
+        product_id = self.gpu.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gpu.delete()
+        self.assertEqual(self.brand_counts(), {"Palit": 1})
+        self.assertNotIn(product_id, product_registry._categories)
+
+
+class SearchEngineTests(TestCase):
+    """
+    Ranking and filtering of the in-process search index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gpus = [
+            GPU.objects.create(
+                brand="MSI",
+                model=f"RTX 4060 Ventus {index}",
+                price=Decimal(40000 + index * 1000 * (-1) ** index),
+                stock=5,
+            )
+            for index in range(6)
+        ]
+        cls.ryzen = CPU.objects.create(
+            brand="AMD",
+            model="Ryzen 7 7700X",
+            socket="AM5",
+            price=Decimal("35000"),
+            description="<p>Eight cores for gaming</p>",
+        )
+        cls.core = CPU.objects.create(
+            brand="Intel",
+            model="Core i5 14400F",
+            socket="LGA1700",
+            price=Decimal("25000"),
+            description="<p>Beats a Ryzen 5 in most games</p>",
+        )
+
+    def setUp(self):
+        search_engine.build()
+
+    def tearDown(self):
+        search_engine.clear()
+
+    @override_settings(PRODUCT_SEARCH_MAX_MATCHES=4)
+    def test_search_queryset_keeps_best_matches(self):
+        with self.assertNumQueries(1):
+            matches = list(search_queryset(GPU.objects.all(), "GPU", "ventus"))
+        self.assertEqual(len(matches), 4)
+
+    def test_cold_index_falls_back_without_building(self):
+        search_engine.clear()
+        with mock.patch.object(search_engine, "warm_in_background") as warm:
+            self.assertFalse(search_engine.search("ventus"))
+            matches = search_queryset(GPU.objects.all(), "GPU", "Ventus")
+            self.assertEqual(matches.count(), 6)
+        warm.assert_called()
+        self.assertFalse(search_engine.is_ready)
+
+    def test_identity_matches_rank_first(self):
+        hits = search_engine.search("ryzen")
+        self.assertEqual(hits.product_ids(), [self.ryzen.pk, self.core.pk])
+        self.assertGreater(hits[0].score, hits[1].score)
+        self.assertEqual(hits[0].category, "CPU")
+
+        # Every word has to match
+        self.assertEqual(search_engine.search("ryzen am5").product_ids(), [self.ryzen.pk])
+        self.assertFalse(search_engine.search("ryzen lga1700 radeon"))
+
+    def test_prefix_matching(self):
+        # The last word is usually still being typed
+        self.assertEqual(len(search_engine.search("rtx 40")), 6)
+        # Earlier words only expand when they match no term exactly
+        self.assertEqual(len(search_engine.search("vent 4060")), 6)
+        self.assertEqual(search_engine.search("ryz", categories=["GPU"]).count(), 0)
+        self.assertEqual(len(search_engine.search("msi", limit=2)), 2)
+
+    def test_fragments_fall_back_to_icontains(self):
+        self.assertFalse(search_engine.search("yzen"))
+        matches = search_queryset(CPU.objects.all(), "CPU", "yzen")
+        self.assertEqual(set(matches), {self.ryzen, self.core})
+
+    def test_sorted_by_price(self):
+        hits = search_engine.search("ventus")
+        prices = [hit.price for hit in hits.sorted_by_price()]
+        self.assertEqual(prices, sorted(gpu.price for gpu in self.gpus))
+        prices = [hit.price for hit in hits.sorted_by_price(descending=True)]
+        self.assertEqual(prices, sorted((gpu.price for gpu in self.gpus), reverse=True))
+
+    def test_restricted_to_keeps_rank_order(self):
+        hits = search_engine.search("ryzen")
+        self.assertEqual(
+            hits.restricted_to({self.core.pk, self.gpus[0].pk}).product_ids(),
+            [self.core.pk],
+        )
+        self.assertEqual(
+            hits.restricted_to({self.core.pk, self.ryzen.pk}).product_ids(),
+            hits.product_ids(),
+        )
+
+    def test_save_load_round_trip(self):
+        before = [(hit.product_id, hit.score) for hit in search_engine.search("ryzen")]
+        with tempfile.TemporaryDirectory() as directory:
+            path = search_engine.save(os.path.join(directory, "products.idx"))
+            search_engine.clear()
+            self.assertTrue(search_engine.load(path))
+
+        self.assertEqual(len(search_engine), 8)
+        after = [(hit.product_id, hit.score) for hit in search_engine.search("ryzen")]
+        self.assertEqual(after, before)
+        self.assertFalse(search_engine.load(os.path.join(directory, "missing.idx")))
+
+    def test_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.core.model = "Core Ultra 5 245K"
+            self.core.save()
+        self.assertFalse(search_engine.search("14400f"))
+        self.assertEqual(search_engine.search("ultra").product_ids(), [self.core.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ryzen.delete()
+        self.assertEqual(search_engine.search("ryzen").product_ids(), [self.core.pk])
+        self.assertFalse(search_engine.search("am5"))
+
+
+class CatalogCacheTests(TestCase):
+    """
+    Read-through caching and invalidation of listing pages.
+    """
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.gpu = GPU.objects.create(
+            brand="Gigabyte", model="Eagle", price=Decimal("45000"), stock=4
+        )
+        self.builds = []
+
+    def build(self, page):
+        """Stand-in for a listing of two pages."""
+        self.builds.append(page)
+        return {"products": [], "number": min(page, 2), "per_page": 12, "count": 20}
+
+    def listing(self, query="", categories=("GPU",)):
+        return catalog_cache.get_or_set(
+            "test_list",
+            QueryDict(query),
+            self.build,
+            allowed=("sort",),
+            categories=categories,
+        )
+
+    def test_hit_ignores_other_parameters(self):
+        self.listing("sort=price")
+        self.listing("sort=price&utm_source=mail&x=8f3a")
+        self.assertEqual(self.builds, [1])
+
+        self.listing("sort=discount")
+        self.assertEqual(self.builds, [1, 1])
+
+    def test_page_numbers_are_clamped(self):
+        # The first request past the end is stored as the last page
+        self.assertEqual(self.listing("page=999")["number"], 2)
+        self.assertEqual(self.listing("page=1000")["number"], 2)
+        self.listing("page=2")
+        self.assertEqual(self.builds, [999])
+
+        self.listing("page=abc")
+        self.listing("page=-4")
+        self.listing("page=1")
+        self.assertEqual(self.builds, [999, 1])
+        page_999 = catalog_cache.key("test_list", QueryDict(), categories=["GPU"], page=999)
+        self.assertIsNone(catalog_cache.cache.get(page_999))
+
+    def test_product_save_bumps_its_category(self):
+        self.listing()
+        self.listing(categories=["CPU"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gpu.price = Decimal("42000")
+            self.gpu.save()
+
+        self.listing()
+        self.listing(categories=["CPU"])
+        self.assertEqual(self.builds, [1, 1, 1])
+
+    def test_decrement_stock_bumps_its_category(self):
+        self.listing()
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock([("GPU", self.gpu.pk, 1)])
+        self.listing()
+        self.assertEqual(self.builds, [1, 1])
+
+    def test_listing_views_share_pages(self):
+        url = reverse("product-list")
+        response = self.client.get(url, {"category": "GPU", "page": "abc"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["products"]), [self.gpu])
+
+        with self.assertNumQueries(0):
+            catalog_cache.get_or_set(
+                "product_list",
+                QueryDict("page=7&ref=mail&category=GPU"),
+                self.build,
+                allowed=("search", "sort_by") + FACET_PARAMS,
+                categories=["GPU"],
+                extra=("GPU", None),
+            )
+        self.assertEqual(self.builds, [])
+
+
+class SuggestionTests(TestCase):
+    """
+    Typo-tolerant suggestions and the /search/suggestions/ endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        def gpu(model, price, is_available=True):
+            return GPU.objects.create(
+                brand="NVIDIA",
+                model=model,
+                name=f"GeForce {model}",
+                price=Decimal(price),
+                is_available=is_available,
+            )
+
+        cls.super = gpu("RTX 4070 Super", "78000")
+        cls.plain = gpu("RTX 4070", "65000")
+        cls.ti = gpu("RTX 4070 Ti", "90000", is_available=False)
+        cls.small = gpu("RTX 4060", "42000")
+
+    def setUp(self):
+        suggestion_index.build()
+
+    def labels(self, query, limit=8):
+        return [suggestion.label for suggestion in suggestion_index.suggest(query, limit)]
+
+    def test_one_typo_is_tolerated(self):
+        self.assertEqual(self.labels("rtx 4070 supr"), ["GeForce RTX 4070 Super"])
+        self.assertEqual(self.labels("gefroce 4060"), ["GeForce RTX 4060"])
+        self.assertEqual(self.labels("geforse 4060"), ["GeForce RTX 4060"])
+        # Two typos are too many for a word of this length
+        self.assertEqual(self.labels("gofarce 4060"), [])
+
+    def test_prefix_ranking(self):
+        # Equal matches go to available products first, then shorter names
+        self.assertEqual(
+            self.labels("rtx 4070"),
+            ["GeForce RTX 4070", "GeForce RTX 4070 Super", "GeForce RTX 4070 Ti"],
+        )
+        self.assertEqual(self.labels("geforce 40")[-1], "GeForce RTX 4070 Ti")
+        self.assertEqual(self.labels("geforce 406"), ["GeForce RTX 4060"])
+
+        # An exact word outranks a completion of it
+        GPU.objects.create(
+            brand="NVIDIA", model="RTX 40", name="GeForce RTX 40 Founders Edition"
+        )
+        suggestion_index.build()
+        self.assertEqual(self.labels("rtx 40")[0], "GeForce RTX 40 Founders Edition")
+
+    def test_limit(self):
+        self.assertEqual(len(self.labels("nvidia")), 4)
+        self.assertEqual(len(self.labels("nvidia", limit=2)), 2)
+        self.assertEqual(self.labels(""), [])
+
+    def test_endpoint(self):
+        url = reverse("product_suggestions")
+        response = self.client.get(url, {"q": "  rtx 4070 supr ", "limit": "50"})
+        self.assertEqual(
+            response.json(),
+            {
+                "query": "rtx 4070 supr",
+                "suggestions": [
+                    {
+                        "label": "GeForce RTX 4070 Super",
+                        "category": "GPU",
+                        "price": "78000.00",
+                        "url": reverse("product-detail", args=[self.super.pk]),
+                    }
+                ],
+            },
+        )
+
+        response = self.client.get(url, {"q": "nvidia", "limit": "x"})
+        self.assertEqual(len(response.json()["suggestions"]), 4)
+        response = self.client.get(url, {"q": "nvidia", "limit": "0"})
+        self.assertEqual(len(response.json()["suggestions"]), 1)
+
+
+class FacetTests(TestCase):
+    """
+    Facet counts, selections and the faceted product list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        specs = [
+            ("AMD", "AM5", "32000"),
+            ("AMD", "AM5", "18000"),
+            ("AMD", "AM4", "9000"),
+            ("Intel", "LGA1700", "26000"),
+            ("Intel", "LGA1851", "52000"),
+        ]
+        cls.cpus = [
+            CPU.objects.create(
+                brand=brand,
+                model=f"{brand} {socket} {price}",
+                socket=socket,
+                price=Decimal(price),
+            )
+            for brand, socket, price in specs
+        ]
+
+    def setUp(self):
+        facet_index.clear()
+        catalog_cache.clear()
+
+    def counts(self, selected):
+        return {
+            group["field"]: {
+                option["value"]: option["count"] for option in group["options"]
+            }
+            for group in facet_index.counts("CPU", selected)
+        }
+
+    def test_counts_ignore_own_selection(self):
+        counts = self.counts({"brand": {"AMD"}})
+        self.assertEqual(counts["brand"], {"AMD": 3, "Intel": 2})
+        self.assertEqual(counts["socket"], {"AM4": 1, "AM5": 2})
+
+        counts = self.counts({"brand": {"AMD"}, "price": {"20000-40000"}})
+        self.assertEqual(counts["brand"], {"AMD": 1, "Intel": 1})
+        self.assertEqual(counts["socket"], {"AM5": 1})
+        self.assertEqual(
+            counts["price"], {"5000-10000": 1, "10000-20000": 1, "20000-40000": 1}
+        )
+
+    def test_counts_follow_saves(self):
+        self.assertEqual(self.counts({})["socket"]["AM5"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cpus[2].socket = "AM5"
+            self.cpus[2].save()
+
+        counts = self.counts({"brand": {"AMD"}})
+        self.assertEqual(counts["socket"], {"AM5": 3})
+
+    def test_toggle_query_round_trip(self):
+        params = QueryDict("category=CPU&socket=AM5&page=3", mutable=True)
+        query = toggle_query(params, "socket", "AM4")
+        self.assertEqual(
+            parse_selection(QueryDict(query), "CPU"), {"socket": {"AM5", "AM4"}}
+        )
+        self.assertNotIn("page", QueryDict(query))
+
+        query = toggle_query(QueryDict(query), "socket", "AM5")
+        self.assertEqual(parse_selection(QueryDict(query), "CPU"), {"socket": {"AM4"}})
+        self.assertEqual(QueryDict(query)["category"], "CPU")
+
+    def test_selection_filter_matches_bitmaps(self):
+        selections = [
+            {"brand": {"AMD"}},
+            {"socket": {"AM5", "LGA1851"}},
+            {"price": {"0-5000", "10000-20000", "80000-"}},
+            {"brand": {"Intel"}, "price": {"40000-80000", "20000-40000"}},
+        ]
+        for selected in selections:
+            with self.subTest(selected=selected):
+                matches = CPU.objects.filter(selection_filter(selected))
+                self.assertEqual(
+                    set(matches.values_list("pk", flat=True)),
+                    set(facet_index.matching_ids("CPU", selected)),
+                )
+
+    def test_product_list_large_selection_uses_subquery(self):
+        url = reverse("product-list")
+        params = {"category": "CPU", "brand": "AMD", "sort_by": "price_low_high"}
+        expected = [self.cpus[2], self.cpus[1], self.cpus[0]]
+
+        response = self.client.get(url, params)
+        self.assertEqual(list(response.context["products"]), expected)
+
+        catalog_cache.clear()
+        with mock.patch("ProductsApp.views.MAX_ID_LIST", 1):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+        self.assertEqual(list(response.context["products"]), expected)
+        listing = [query["sql"] for query in queries if "productindex" in query["sql"]]
+        self.assertTrue(listing)
+        for sql in listing:
+            self.assertIn("IN (SELECT", sql)
+            self.assertNotIn(self.cpus[0].pk.hex, sql)
+
+
+class CatalogLayerTests(TestCase):
+    """
+    Shared product loading, pagination and index bookkeeping.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Created in this order, so catalog order within a category follows
+        # the list order
+        cls.cpus = [
+            CPU.objects.create(brand="AMD", model=f"Ryzen {n}", price=Decimal(price))
+            for n, price in [(1, "9000"), (2, "30000"), (3, "12000")]
+        ]
+        cls.gpus = [
+            GPU.objects.create(brand="MSI", model=f"Ventus {n}", price=Decimal(price))
+            for n, price in [(1, "20000"), (2, "10000")]
+        ]
+        cls.psu = PowerSupply.objects.create(
+            brand="Corsair", model="RM750", price=Decimal("11000")
+        )
+
+    def test_loader_identity_map(self):
+        loader = ProductLoader()
+        pairs = [("CPU", cpu.pk) for cpu in self.cpus] + [
+            ("GPU", str(self.gpus[0].pk)),
+            ("PowerSupply", self.psu.pk),
+            ("GPU", uuid.uuid4()),
+            ("CPU", "not-a-uuid"),
+            ("Toaster", self.cpus[0].pk),
+        ]
+        with self.assertNumQueries(3):
+            loaded = loader.load_many(pairs)
+        self.assertEqual(loaded[("CPU", self.cpus[1].pk)], self.cpus[1])
+        self.assertEqual(loaded[("GPU", str(self.gpus[0].pk))], self.gpus[0])
+        self.assertEqual(loaded[("PowerSupply", self.psu.pk)], self.psu)
+        self.assertEqual(len(loaded), 6)
+        self.assertIsNone(loaded[pairs[5]])
+
+        with self.assertNumQueries(0):
+            again = loader.load_many(pairs)
+            self.assertIs(loader.load("CPU", str(self.cpus[0].pk)), again[pairs[0]])
+
+        with self.assertNumQueries(1):
+            loader.load("GPU", self.gpus[1].pk)
+
+    def test_merged_pagination_order(self):
+        products = MergedQuerySetList(
+            [
+                CPU.objects.order_by("price", "id"),
+                GPU.objects.order_by("price", "id"),
+                PowerSupply.objects.order_by("price", "id"),
+            ],
+            key=lambda product: product.price,
+        )
+        expected = sorted(self.cpus + self.gpus + [self.psu], key=lambda p: p.price)
+
+        self.assertEqual(len(products), 6)
+        paginator = Paginator(products, 4)
+        self.assertEqual(list(paginator.page(1)) + list(paginator.page(2)), expected)
+        self.assertEqual(products[-1], expected[-1])
+        with self.assertRaises(IndexError):
+            products[6]
+
+    def test_search_product_tables(self):
+        products = search_product_tables(None, "ryzen", "price_high_low")
+        self.assertEqual(list(products[:3]), [self.cpus[1], self.cpus[2], self.cpus[0]])
+
+        products = search_product_tables(None, "threadripper", "featured")
+        self.assertEqual(list(products[:10]), [])
+        products = search_product_tables("GPU", "ventus", "price_low_high")
+        self.assertEqual(list(products[:10]), [self.gpus[1], self.gpus[0]])
+
+    def test_paginate_index(self):
+        entries = ProductIndex.objects.order_by(*ProductIndex.DEFAULT_ORDERING)
+        expected = self.cpus + self.gpus + [self.psu]
+
+        with self.assertNumQueries(4):
+            # Count, page rows, then one query per category on the page
+            page = paginate_index(entries, 2, per_page=3)
+        self.assertEqual(list(page), expected[3:])
+        first = paginate_index(entries, "junk", per_page=3)
+        self.assertEqual(list(first), expected[:3])
+        self.assertEqual(paginate_index(entries, 99, per_page=3).number, 2)
+
+        # Index rows whose product is gone are skipped
+        rows = list(entries[:2])
+        CPU.objects.filter(pk=self.cpus[0].pk).delete()
+        self.assertEqual(hydrate_index_entries(rows), [self.cpus[1]])
+
+    def test_index_rows_follow_saves_and_deletes(self):
+        row = ProductIndex.objects.get(product_id=self.gpus[0].pk)
+        self.assertEqual((row.category, row.price, row.brand), ("GPU", 20000, "MSI"))
+
+        self.gpus[0].regular_price = Decimal("25000")
+        self.gpus[0].stock = 7
+        self.gpus[0].save()
+        row.refresh_from_db()
+        self.assertEqual(row.stock, 7)
+        self.assertEqual(row.discount_amount, Decimal("5000"))
+        values = ProductIndex.values_for(self.gpus[0])
+        self.assertEqual({field: getattr(row, field) for field in values}, values)
+
+        product_id = self.gpus[0].pk
+        self.gpus[0].delete()
+        self.assertFalse(ProductIndex.objects.filter(product_id=product_id).exists())
+
+    def test_registry_resolve_and_unregister(self):
+        product_registry.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(product_registry.resolve(self.psu.pk), "Power Supply")
+            self.assertEqual(product_registry.resolve(str(self.cpus[0].pk)), "CPU")
+        self.assertIsNone(product_registry.resolve("not-a-uuid"))
+        self.assertEqual(product_registry.get_product(self.gpus[1].pk), self.gpus[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product_id = self.psu.pk
+            self.psu.delete()
+        with self.assertNumQueries(1):
+            # Unknown IDs are looked up once in ProductIndex
+            self.assertIsNone(product_registry.resolve(product_id))
+
+    def test_migration_backfill(self):
+        migration = importlib.import_module("ProductsApp.migrations.0005_productindex")
+        ProductIndex.objects.all().delete()
+
+        migration.backfill_product_index(apps, None)
+
+        rows = ProductIndex.objects.order_by(*ProductIndex.DEFAULT_ORDERING)
+        self.assertEqual(
+            [row.product_id for row in rows],
+            [product.pk for product in self.cpus + self.gpus + [self.psu]],
+        )
+        psu = rows.get(product_id=self.psu.pk)
+        self.assertEqual(
+            (psu.category, psu.brand, psu.price), ("Power Supply", "Corsair", 11000)
+        )
+
+
+class AddProductTests(TestCase):
+    """
+    The On Sale checkbox of the add-product form gates the regular price.
+    """
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("manager"))
+
+    def add(self, **extra):
+        data = {
+            "name": "Ryzen 5",
+            "brand": "AMD",
+            "model": "Ryzen 5",
+            "description": "Six cores",
+            "price": "20000",
+            "stock": "3",
+        }
+        response = self.client.post(
+            reverse("add_product", args=["cpu"]), {**data, **extra}
+        )
+        self.assertRedirects(
+            response, reverse("product_management"), fetch_redirect_response=False
+        )
+        return CPU.objects.get()
+
+    def test_regular_price_with_checkbox(self):
+        cpu = self.add(is_on_sale="on", regular_price="25000")
+        self.assertEqual(cpu.regular_price, Decimal("25000"))
+        self.assertTrue(cpu.is_on_sale)
+
+    def test_regular_price_without_checkbox(self):
+        cpu = self.add(regular_price="25000")
+        self.assertIsNone(cpu.regular_price)
+        self.assertFalse(cpu.is_on_sale)
+
+    def test_checkbox_without_discount(self):
+        cpu = self.add(is_on_sale="on")
+        self.assertFalse(cpu.is_on_sale)
@@ -34,6 +34,11 @@ urlpatterns = [
     path("featured/", views.featured_products, name="featured_products"),
     path("new-arrivals/", views.new_arrivals, name="new_arrivals"),
     path("deals/", views.deals_products, name="deals_products"),
+    path(
+        "search/suggestions/",
+        views.get_product_suggestions,
+        name="product_suggestions",
+    ),
     # Administrative product management URLs
     path("manage-products/", views.product_management, name="product_management"),
     path("add-product/<str:category>/", views.add_product, name="add_product"),
@@ -53,11 +53,11 @@ Dependencies:
 """
 
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import JsonResponse
+from django.urls import reverse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db.models import Q, F
 from django.contrib import messages
-from django.utils import timezone
-from datetime import timedelta
 from decimal import Decimal
 
 # Import from AuthApp
@@ -81,7 +81,27 @@ from .models import (
     Keyboard,
     Mouse,
     Headphone,
+    ProductIndex,
+    PRODUCT_MODELS,
 )
+from .catalog import (
+    paginate_index,
+    paginate_search_hits,
+    get_product_loader,
+    search_product_tables,
+)
+from .search import search_engine
+from .suggest import suggestion_index
+from .facets import (
+    FACET_PARAMS,
+    MAX_ID_LIST,
+    facet_index,
+    parse_selection,
+    selection_filter,
+    toggle_query,
+)
+from .caching import catalog_cache, page_payload, recent_cutoff, restore_page
+from .registry import product_registry
 
 
 # Create your views here.
@@ -166,22 +186,41 @@ def faq(request):
     return render(request, "static/faq.html")
 
 
-def product_list(request):
+def product_list(request, category=None):
     """Display all products with filtering, search, sorting, and pagination functionality.
 
     This view handles the main product listing page with comprehensive
     filtering capabilities including category-based filtering, text search
     across brand/model/description, and multiple sorting options.
 
+    Listings without a search term are selected and paginated from the
+    ProductIndex table in a single query; only the products on the requested
+    page are loaded from their own tables. Searches are answered by the
+    BM25-ranked search index (ProductsApp.search) and shown by relevance
+    unless another sort is chosen; queries the index cannot answer fall back
+    to SQL substring matching against each product table, merged per page.
+
+    Within a category, products can be narrowed by facets (brand, socket,
+    price bucket, ...). Facet matches and sidebar counts come from the
+    in-memory facet bitmaps (ProductsApp.facets), not from GROUP BY queries.
+
+    The page data is cached per page number and normalized listing
+    parameters (ProductsApp.caching); other query parameters are ignored.
+    It is invalidated whenever a product of the listed category changes.
+
     Query Parameters:
         category (str): Filter products by specific category (CPU, GPU, etc.)
         search (str): Search text to filter products by brand, model, or description
         sort_by (str): Sorting option - 'featured', 'price_low_high',
                       'price_high_low', 'newest', 'best_rated'
         page (int): Page number for pagination (12 products per page)
+        brand, socket, chipset, ram_type, form_factor, interface, price
+            (str, repeatable): Facet values to filter by
 
     Args:
         request: HttpRequest object containing request metadata and GET parameters.
+        category (str, optional): Category filter supplied by category_products.
+            Falls back to the ``category`` query parameter.
 
     Returns:
         HttpResponse: Rendered product list template with filtered and paginated products.
@@ -191,94 +230,125 @@ def product_list(request):
         search_query: Current search term
         sort_by: Current sorting option
         current_category: Currently selected category filter
+        facets: Facet groups with per-value counts for the filter sidebar
     """
     # Get category from query parameters
-    category = request.GET.get("category")
+    category = category or request.GET.get("category")
     search_query = request.GET.get("search", "")
     sort_by = request.GET.get("sort_by", "featured")
 
-    # Initialize empty products list
-    products = []
-
-    # Get products based on category filter
-    if category == "CPU" or category is None:
-        products.extend(CPU.objects.all())
-    if category == "Cooler" or category is None:
-        products.extend(Cooler.objects.all())
-    if category == "Motherboard" or category is None:
-        products.extend(Motherboard.objects.all())
-    if category == "RAM" or category is None:
-        products.extend(RAM.objects.all())
-    if category == "SSD" or category is None:
-        products.extend(SSD.objects.all())
-    if category == "HDD" or category is None:
-        products.extend(HDD.objects.all())
-    if category == "GPU" or category is None:
-        products.extend(GPU.objects.all())
-    if category == "Power Supply" or category is None:
-        products.extend(PowerSupply.objects.all())
-    if category == "Casing" or category is None:
-        products.extend(Casing.objects.all())
-    if category == "Monitor" or category is None:
-        products.extend(Monitor.objects.all())
-    if category == "Keyboard" or category is None:
-        products.extend(Keyboard.objects.all())
-    if category == "Mouse" or category is None:
-        products.extend(Mouse.objects.all())
-    if category == "Headphone" or category is None:
-        products.extend(Headphone.objects.all())
-
-    # Search functionality
-    if search_query:
-        filtered_products = []
-        for product in products:
-            # Search in brand, model, or description
-            if (
-                search_query.lower() in product.brand.lower()
-                or search_query.lower() in product.model.lower()
-                or search_query.lower() in product.description.lower()
-            ):
-                filtered_products.append(product)
-        products = filtered_products
-
-    # Sorting functionality
-    if sort_by == "price_low_high":
-        products.sort(key=lambda x: x.price)
-    elif sort_by == "price_high_low":
-        products.sort(key=lambda x: x.price, reverse=True)
-    elif sort_by == "newest":
-        # Assuming BaseProduct has created_at field
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        products = [
-            p
-            for p in products
-            if hasattr(p, "created_at") and p.created_at >= thirty_days_ago
-        ]
-    elif sort_by == "best_rated":
-        # Implement if you have rating functionality
-        pass
-
-    # Pagination
-    page = request.GET.get("page", 1)
-    paginator = Paginator(products, 12)  # 12 products per page
+    def build_listing(page):
+        products, facets = _product_list_data(
+            request, category, search_query, sort_by, page
+        )
+        return {**page_payload(products), "facets": facets}
+
+    listing = catalog_cache.get_or_set(
+        "product_list",
+        request.GET,
+        build_listing,
+        allowed=("search", "sort_by") + FACET_PARAMS,
+        categories=[category] if category in PRODUCT_MODELS else None,
+        extra=(category, recent_cutoff() if sort_by == "newest" else None),
+    )
 
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        products = paginator.page(1)
-    except EmptyPage:
-        products = paginator.page(paginator.num_pages)
+    facets = listing["facets"]
+    for group in facets:
+        for option in group["options"]:
+            option["query"] = toggle_query(request.GET, group["field"], option["value"])
 
     context = {
-        "products": products,
+        "products": restore_page(listing),
         "search_query": search_query,
         "sort_by": sort_by,
         "current_category": category,
+        "facets": facets,
     }
 
     return render(request, "product/product-list.html", context)
 
 
+def _product_list_data(request, category, search_query, sort_by, page):
+    """Select the product_list page and facet counts; see product_list.
+
+    Returns:
+        tuple: (Page of product instances, facet groups without toggle links)
+    """
+    # Facet selection, resolved to product IDs through the facet bitmaps.
+    # SQL filters get a subquery instead when the list would be long.
+    selected_facets = parse_selection(request.GET, category)
+    facet_ids = sql_facet_ids = None
+    if selected_facets:
+        facet_ids = sql_facet_ids = facet_index.matching_ids(category, selected_facets)
+        if len(facet_ids) > MAX_ID_LIST:
+            sql_facet_ids = (
+                PRODUCT_MODELS[category]
+                .objects.filter(selection_filter(selected_facets))
+                .values("pk")
+            )
+
+    # Ranked matches from the in-process search index
+    hits = []
+    if search_query:
+        hits = search_engine.search(
+            search_query, categories=[category] if category else None
+        )
+
+    facets = []
+    if category in PRODUCT_MODELS and (hits or not search_query):
+        facets = facet_index.counts(
+            category,
+            selected_facets,
+            product_ids=hits.product_ids() if hits else None,
+        )
+
+    if hits:
+        if facet_ids is not None:
+            hits = hits.restricted_to(facet_ids)
+        products = paginate_search_hits(
+            hits, sort_by, page, loader=get_product_loader(request)
+        )
+    elif search_query:
+        # Substring matches the index cannot answer: query each product table,
+        # ordered in SQL, and merge the results lazily
+        products = search_product_tables(
+            category, search_query, sort_by, product_ids=sql_facet_ids
+        )
+
+        paginator = Paginator(products, 12)  # 12 products per page
+
+        try:
+            products = paginator.page(page)
+        except PageNotAnInteger:
+            products = paginator.page(1)
+        except EmptyPage:
+            products = paginator.page(paginator.num_pages)
+    else:
+        entries = ProductIndex.objects.all()
+        if category:
+            entries = entries.filter(category=category)
+        if sql_facet_ids is not None:
+            entries = entries.filter(product_id__in=sql_facet_ids)
+
+        # Sorting functionality
+        if sort_by == "price_low_high":
+            entries = entries.order_by(
+                F("price").asc(nulls_first=True), *ProductIndex.DEFAULT_ORDERING
+            )
+        elif sort_by == "price_high_low":
+            entries = entries.order_by(
+                F("price").desc(nulls_last=True), *ProductIndex.DEFAULT_ORDERING
+            )
+        else:
+            if sort_by == "newest":
+                entries = entries.filter(created_at__gte=recent_cutoff())
+            entries = entries.order_by(*ProductIndex.DEFAULT_ORDERING)
+
+        products = paginate_index(entries, page, loader=get_product_loader(request))
+
+    return products, facets
+
+
 def product_detail(request, product_id):
     """Display detailed view of a specific product with related products.
 
@@ -299,32 +369,11 @@ def product_detail(request, product_id):
         related_products: List of up to 4 related products from same category
 
     Note:
-        The view searches through all product model classes sequentially
-        until the product is found, then displays category-specific attributes.
+        The product's category is resolved through the product registry, so
+        the product is loaded with a single query against its own table.
     """
-    # Try to find the product in each model
-    product = None
-    model_classes = [
-        CPU,
-        GPU,
-        RAM,
-        Motherboard,
-        SSD,
-        HDD,
-        PowerSupply,
-        Casing,
-        Monitor,
-        Keyboard,
-        Mouse,
-        Headphone,
-        Cooler,
-    ]    # Try each model class until product is found
-    for model_class in model_classes:
-        try:
-            product = model_class.objects.get(id=product_id)
-            break  # Exit the loop if product is found
-        except model_class.DoesNotExist:
-            continue
+    # Resolve the product's table through the registry, then fetch it once
+    product = product_registry.get_product(product_id)
 
     # If no product found, redirect
     if product is None:
@@ -365,9 +414,9 @@ def category_products(request, category_name):
 def featured_products(request):
     """Display featured products across all categories with pagination.
 
-    This view aggregates featured products from all product model classes
-    and displays them with pagination. Products must have an 'is_featured'
-    field set to True to appear in this listing.
+    Featured products are selected from the ProductIndex table with a single
+    indexed query; only the products on the requested page are loaded from
+    their own tables. The page data is cached until any product changes.
 
     Query Parameters:
         page (int): Page number for pagination (12 products per page)
@@ -381,44 +430,18 @@ def featured_products(request):
     Context Variables:
         products: Paginated featured products queryset
         is_featured: Boolean flag indicating this is featured products view
-
-    Note:
-        Requires 'is_featured' field in your BaseProduct model to function properly.
     """
-    # Combine featured products from all models
-    featured_products = []
-
-    # This would need a 'is_featured' field in your BaseProduct model
-    for model in [
-        CPU,
-        GPU,
-        RAM,
-        Motherboard,
-        SSD,
-        HDD,
-        PowerSupply,
-        Casing,
-        Monitor,
-        Keyboard,
-        Mouse,
-        Headphone,
-        Cooler,
-    ]:
-        if hasattr(model, "objects"):
-            # Filter for featured products if field exists
-            if hasattr(model.objects.model, "is_featured"):
-                featured_products.extend(model.objects.filter(is_featured=True))
-
-    # Pagination
-    page = request.GET.get("page", 1)
-    paginator = Paginator(featured_products, 12)
-
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        products = paginator.page(1)
-    except EmptyPage:
-        products = paginator.page(paginator.num_pages)
+    def build_page(page):
+        entries = ProductIndex.objects.filter(is_featured=True).order_by(
+            *ProductIndex.DEFAULT_ORDERING
+        )
+        return page_payload(
+            paginate_index(entries, page, loader=get_product_loader(request))
+        )
+
+    products = restore_page(
+        catalog_cache.get_or_set("featured_products", request.GET, build_page)
+    )
 
     context = {
         "products": products,
@@ -432,8 +455,7 @@ def new_arrivals(request):
     """Display products added in the last 30 days with pagination.
 
     This view shows recently added products (within the last 30 days)
-    from all product categories. Products must have a 'created_at' field
-    to be included in this listing.
+    from all product categories, selected from the ProductIndex table.
 
     Query Parameters:
         page (int): Page number for pagination (12 products per page)
@@ -449,41 +471,24 @@ def new_arrivals(request):
         is_new_arrivals: Boolean flag indicating this is new arrivals view
 
     Note:
-        Requires 'created_at' field in product models to function properly.
-        Only shows products created within the last 30 days.
+        Only shows products created within the last 30 days. The window
+        starts on the hour so the page can be cached (ProductsApp.caching).
     """
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    new_products = []
-
-    # This requires a created_at field in your BaseProduct model
-    for model in [
-        CPU,
-        GPU,
-        RAM,
-        Motherboard,
-        SSD,
-        HDD,
-        PowerSupply,
-        Casing,
-        Monitor,
-        Keyboard,
-        Mouse,
-        Headphone,
-        Cooler,
-    ]:
-        if hasattr(model, "objects") and hasattr(model.objects.model, "created_at"):
-            new_products.extend(model.objects.filter(created_at__gte=thirty_days_ago))
-
-    # Pagination
-    page = request.GET.get("page", 1)
-    paginator = Paginator(new_products, 12)
-
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        products = paginator.page(1)
-    except EmptyPage:
-        products = paginator.page(paginator.num_pages)
+    cutoff = recent_cutoff()
+
+    def build_page(page):
+        entries = ProductIndex.objects.filter(created_at__gte=cutoff).order_by(
+            *ProductIndex.DEFAULT_ORDERING
+        )
+        return page_payload(
+            paginate_index(entries, page, loader=get_product_loader(request))
+        )
+
+    products = restore_page(
+        catalog_cache.get_or_set(
+            "new_arrivals", request.GET, build_page, extra=(cutoff,)
+        )
+    )
 
     context = {
         "products": products,
@@ -497,11 +502,15 @@ def deals_products(request):
     """Display products that are on sale with pagination.
 
     This view shows products that have a discount (price less than regular_price)
-    from all product categories. Products must have both 'price' and 'regular_price'
-    fields with regular_price being higher than price.
+    from all product categories. Deals are selected and paginated in the
+    database from the precomputed ProductIndex discount columns, using the
+    partial deal indexes; only the products on the page are loaded. The page
+    data is cached until any product changes.
 
     Query Parameters:
         page (int): Page number for pagination (12 products per page)
+        sort (str): 'discount_percent' or 'discount_amount' to show the
+            biggest discounts first; catalog order otherwise
 
     Args:
         request: HttpRequest object containing request metadata.
@@ -512,61 +521,74 @@ def deals_products(request):
     Context Variables:
         products: Paginated deal products queryset
         is_deals: Boolean flag indicating this is deals view
+        sort: Current deals ordering
 
     Note:
-        Requires 'price' and 'regular_price' fields in product models.
         Only shows products where price < regular_price.
     """
-    deal_products = []
-
-    # Check each model for products with discounts
-    for model in [
-        CPU,
-        GPU,
-        RAM,
-        Motherboard,
-        SSD,
-        HDD,
-        PowerSupply,
-        Casing,
-        Monitor,
-        Keyboard,
-        Mouse,
-        Headphone,
-        Cooler,
-    ]:
-        if hasattr(model, "objects"):
-            if hasattr(model.objects.model, "regular_price") and hasattr(
-                model.objects.model, "price"
-            ):
-                # Get products where price is less than regular_price
-                for product in model.objects.all():
-                    if (
-                        hasattr(product, "regular_price")
-                        and product.regular_price
-                        and product.price < product.regular_price
-                    ):
-                        deal_products.append(product)
-
-    # Pagination
-    page = request.GET.get("page", 1)
-    paginator = Paginator(deal_products, 12)
+    sort = request.GET.get("sort", "")
 
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        products = paginator.page(1)
-    except EmptyPage:
-        products = paginator.page(paginator.num_pages)
+    def build_page(page):
+        return page_payload(
+            paginate_index(
+                ProductIndex.objects.deals(sort), page, loader=get_product_loader(request)
+            )
+        )
+
+    products = restore_page(
+        catalog_cache.get_or_set(
+            "deals_products", request.GET, build_page, allowed=("sort",)
+        )
+    )
 
     context = {
         "products": products,
         "is_deals": True,
+        "sort": sort,
     }
 
     return render(request, "product/products.html", context)
 
 
+def get_product_suggestions(request):
+    """Return search-as-you-type product suggestions as JSON.
+
+    Suggestions are answered from the in-memory suggestion index (see
+    ProductsApp.suggest) without querying the database, and tolerate small
+    typos such as "rtx 4070 supr".
+
+    Query Parameters:
+        q (str): Text typed into the search box so far.
+        limit (int): Maximum number of suggestions (default 8, at most 20).
+
+    Args:
+        request: HttpRequest object containing request metadata.
+
+    Returns:
+        JsonResponse: JSON response containing:
+            - query: The query that was answered
+            - suggestions: List of objects with label, category, price and url
+    """
+    query = request.GET.get("q", "").strip()[:100]
+    try:
+        limit = min(max(int(request.GET.get("limit", 8)), 1), 20)
+    except ValueError:
+        limit = 8
+
+    suggestions = []
+    for suggestion in suggestion_index.suggest(query, limit=limit):
+        suggestions.append(
+            {
+                "label": suggestion.label,
+                "category": suggestion.category,
+                "price": str(suggestion.price) if suggestion.price is not None else None,
+                "url": reverse("product-detail", args=[suggestion.product_id]),
+            }
+        )
+
+    return JsonResponse({"query": query, "suggestions": suggestions})
+
+
 def newsletter_subscribe(request):
     """Handle newsletter subscription requests.
 
@@ -1484,8 +1506,9 @@ def add_product(request, category):
 
     Form Handling:
         - Base fields: name, brand, model, description, price, stock, warranty
-        - Feature flags: is_featured, is_new_arrival, is_on_sale
-        - Sale pricing: Handles regular_price when is_on_sale is enabled
+        - Feature flags: is_featured, is_new_arrival
+        - Sale pricing: regular_price is only accepted with the is_on_sale
+          checkbox; the model derives is_on_sale from the two prices
         - Category-specific fields: Dynamically processed based on field configuration
         - Image uploads: Supports up to 5 product images
 
@@ -1553,11 +1576,10 @@ def add_product(request, category):
             # Process feature flags
             is_featured = "is_featured" in request.POST
             is_new_arrival = "is_new_arrival" in request.POST
-            is_on_sale = "is_on_sale" in request.POST
 
-            # Handle sale pricing
+            # Handle sale pricing; save() sets is_on_sale from the prices
             regular_price = None
-            if is_on_sale and "regular_price" in data:
+            if "is_on_sale" in request.POST and "regular_price" in data:
                 regular_price = Decimal(data["regular_price"])
 
             # Create product instance
@@ -1571,7 +1593,6 @@ def add_product(request, category):
                 "warranty": warranty,
                 "is_featured": is_featured,
                 "is_new_arrival": is_new_arrival,
-                "is_on_sale": is_on_sale,
                 "category": display_category,
             }
 
@@ -0,0 +1,178 @@
+"""
+Header counters for the cart, compare list and wishlist.
+
+Every page shows how many items the visitor has in their cart, compare list
+and wishlist. The context processors of the three apps expose these
+counts as lazy objects backed by ``header_counts()``. That function reads
+all four numbers with a single query, the first time a template uses one
+of them, and reuses the result for the rest of the request. A page that
+shows none of them runs no query, and nothing is ever created: a visitor
+without a cart simply has zero items.
+
+Classes:
+    LazyCount: One count, evaluated on first use
+
+Functions:
+    header_counts: Cart, compare and wishlist counts of the current visitor
+    lazy_count: LazyCount for one field of the header counts
+    visitor_filters: Filters that select the visitor's items in each list
+
+Example:
+    from TechReform.counters import header_counts
+
+    counts = header_counts(request)
+    counts.cart_count, counts.cart_total, counts.compare_count
+
+    context = {"cart_count": lazy_count(request, "cart_count")}
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, F, Q, Sum, Value
+from django.utils.functional import SimpleLazyObject, new_method_proxy
+
+
+HeaderCounts = namedtuple(
+    "HeaderCounts", "cart_count cart_total compare_count wishlist_count"
+)
+HeaderCounts.__doc__ = """
+Item counts shown in the site header.
+
+``cart_count`` is the total quantity in the cart and ``cart_total`` its
+price; the other two are numbers of items.
+"""
+
+EMPTY_COUNTS = HeaderCounts(0, Decimal("0.00"), 0, 0)
+
+# Attribute the counts are memoized under on the request
+_REQUEST_ATTRIBUTE = "_header_counts"
+
+
+def visitor_filters(request):
+    """
+    Return the filters that select the visitor's cart, compare and wishlist items.
+
+    Anonymous carts are keyed by the ``cart_session_id`` session value and
+    anonymous compare lists and wishlists by the session key, as in the
+    apps' views. Neither is created here.
+
+    Args:
+        request (HttpRequest): The current request.
+
+    Returns:
+        dict: "cart", "compare" and "wishlist" -> Q on CartItem,
+        CompareItem and WishlistItem, or None when the visitor cannot have
+        that list.
+    """
+    if request.user.is_authenticated:
+        return {
+            "cart": Q(cart__user=request.user),
+            "compare": Q(compare_list__user=request.user),
+            "wishlist": Q(wishlist__user=request.user),
+        }
+
+    cart_session_id = request.session.get("cart_session_id")
+    session_key = request.session.session_key
+    return {
+        "cart": Q(cart__session_id=cart_session_id) if cart_session_id else None,
+        "compare": Q(compare_list__session_id=session_key) if session_key else None,
+        "wishlist": Q(wishlist__session_id=session_key) if session_key else None,
+    }
+
+
+def _scalar(queryset, expression):
+    """Compile an aggregate over a queryset into SQL for a scalar subquery."""
+    queryset = (
+        queryset.order_by()
+        .annotate(_one=Value(1))
+        .values("_one")
+        .annotate(value=expression)
+        .values("value")
+    )
+    return queryset.query.get_compiler(connection=connection).as_sql()
+
+
+def _load(filters):
+    """Read every count in one SELECT of scalar subqueries."""
+    from CartApp.models import CartItem
+    from CompareApp.models import CompareItem
+    from WishlistApp.models import WishlistItem
+
+    subqueries = {}
+    if filters["cart"] is not None:
+        items = CartItem.objects.filter(filters["cart"])
+        subqueries["cart_count"] = _scalar(items, Sum("quantity"))
+        subqueries["cart_total"] = _scalar(items, Sum(F("quantity") * F("price")))
+    if filters["compare"] is not None:
+        subqueries["compare_count"] = _scalar(
+            CompareItem.objects.filter(filters["compare"]), Count("id")
+        )
+    if filters["wishlist"] is not None:
+        subqueries["wishlist_count"] = _scalar(
+            WishlistItem.objects.filter(filters["wishlist"]), Count("id")
+        )
+    if not subqueries:
+        return EMPTY_COUNTS
+
+    columns = ", ".join(f"COALESCE(({sql}), 0)" for sql, _ in subqueries.values())
+    params = [
+        param for _, query_params in subqueries.values() for param in query_params
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {columns}", params)
+        row = cursor.fetchone()
+
+    values = dict(zip(subqueries, row))
+    return HeaderCounts(
+        cart_count=int(values.get("cart_count", 0)),
+        cart_total=Decimal(str(values.get("cart_total", 0))).quantize(Decimal("0.01")),
+        compare_count=int(values.get("compare_count", 0)),
+        wishlist_count=int(values.get("wishlist_count", 0)),
+    )
+
+
+def header_counts(request):
+    """
+    Return the cart, compare and wishlist counts of the current visitor.
+
+    The counts are read with one query on the first call and memoized on
+    the request.
+
+    Args:
+        request (HttpRequest): The current request.
+
+    Returns:
+        HeaderCounts: The visitor's counts; zeros for lists they do not have.
+    """
+    counts = getattr(request, _REQUEST_ATTRIBUTE, None)
+    if counts is None:
+        counts = _load(visitor_filters(request))
+        setattr(request, _REQUEST_ATTRIBUTE, counts)
+    return counts
+
+
+class LazyCount(SimpleLazyObject):
+    """
+    SimpleLazyObject that also proxies ``format()``.
+
+    Templates localize numbers with ``"{:f}".format(value)``, which the
+    plain SimpleLazyObject does not forward to the wrapped number.
+    """
+
+    __format__ = new_method_proxy(format)
+
+
+def lazy_count(request, field):
+    """
+    Return one of the visitor's header counts, read on first use.
+
+    Args:
+        request (HttpRequest): The current request.
+        field (str): A HeaderCounts field, e.g. "cart_count".
+
+    Returns:
+        LazyCount: Lazy proxy of the count.
+    """
+    return LazyCount(lambda: getattr(header_counts(request), field))
@@ -0,0 +1,341 @@
+"""
+Snowflake-style IDs for orders, support tickets and other public numbers.
+
+Order and ticket numbers used to be a timestamp in seconds or a UUID
+prefix. The first collides when two orders are placed in the same second,
+the second can collide and was never retried. This module generates 64-bit
+IDs that are unique across processes without a database round-trip:
+
+    | 41 bits: milliseconds since EPOCH | 10 bits: worker | 12 bits: sequence |
+
+The IDs of one worker increase strictly, and IDs from different workers
+sort by creation time to within a millisecond. Each process can generate
+4096 IDs per millisecond. If a burst uses them up, or the system clock
+steps back, the generator moves on to the next millisecond instead of
+waiting or repeating itself.
+
+Worker IDs:
+    Every process generating IDs needs its own worker ID (0-1023). A process
+    claims the first free one among lock files in ID_WORKER_LOCK_DIR,
+    holding an exclusive lock for as long as it runs. All gunicorn workers
+    on a host thereby get distinct IDs, and a worker that exits frees its
+    slot. A process forked after claiming a slot, e.g. by gunicorn with
+    --preload, claims a new one on its first ID.
+
+    On a single host every worker ID can be claimed. With several hosts,
+    give each host its own range: the ID_WORKER_ID setting is the first
+    worker ID of the host and ID_WORKER_SLOTS the size of its range, e.g.
+    ID_WORKER_ID=0, 32, 64, ... with the default 32 slots. The processes of
+    a host still claim distinct IDs inside its range.
+
+Codes:
+    IDs are written as 13 characters of Crockford base32, zero-padded so
+    that the codes sort like the IDs. The alphabet has no I, L, O or U, and
+    decode() accepts lower case and reads I and L as 1 and O as 0.
+
+Classes:
+    SnowflakeGenerator: Thread-safe ID generator of one process
+    SnowflakeParts: The fields of an ID
+
+Functions:
+    encode: Crockford base32 code of an ID
+    decode: ID of a code
+    normalize_code: A prefixed code as typed by a customer, in canonical form
+    parse: The time, worker and sequence of an ID
+    next_id: Next ID of the shared generator
+    next_code: Next ID of the shared generator as a code
+
+Attributes:
+    id_generator (SnowflakeGenerator): Shared generator
+
+Example:
+    from TechReform.idgen import next_code
+
+    order.order_number = next_code("TR")  # "TR0C3QX7N2R0001"
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+
+# 2024-01-01T00:00:00Z; 41 bits of milliseconds last until 2093
+EPOCH_MS = 1704067200000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CODE_LENGTH = 13
+_DIGITS = {character: value for value, character in enumerate(ALPHABET)}
+_DIGITS.update({"I": 1, "L": 1, "O": 0})
+_LOOK_ALIKES = str.maketrans("ILO", "110")
+
+SnowflakeParts = namedtuple("SnowflakeParts", "created_at worker_id sequence")
+SnowflakeParts.__doc__ = """
+Fields of a snowflake ID.
+
+``created_at`` is an aware UTC datetime with millisecond precision.
+"""
+
+
+def encode(number):
+    """
+    Return the Crockford base32 code of an ID.
+
+    Args:
+        number (int): Non-negative 64-bit ID.
+
+    Returns:
+        str: CODE_LENGTH characters, zero-padded.
+    """
+    characters = []
+    for _ in range(CODE_LENGTH):
+        number, digit = divmod(number, 32)
+        characters.append(ALPHABET[digit])
+    return "".join(reversed(characters))
+
+
+def decode(code):
+    """
+    Return the ID of a code.
+
+    Args:
+        code (str): Code from encode(), without prefix. Case, hyphens and
+            the look-alike letters I, L and O are tolerated.
+
+    Returns:
+        int: The ID.
+
+    Raises:
+        ValueError: The code contains a character outside the alphabet.
+    """
+    number = 0
+    for character in code.upper().replace("-", ""):
+        digit = _DIGITS.get(character)
+        if digit is None:
+            raise ValueError(f"Invalid character {character!r} in ID code")
+        number = number * 32 + digit
+    return number
+
+
+def normalize_code(text, prefix=""):
+    """
+    Return a prefixed code as typed by a customer in its canonical form.
+
+    Applies the same tolerance as decode(): case, spaces and hyphens are
+    ignored and I, L and O after the prefix are read as 1, 1 and 0.
+
+    Args:
+        text (str): The code as typed, e.g. "tr-0c3q x7n2 roool".
+        prefix (str): Prefix the code was generated with, e.g. "TR".
+
+    Returns:
+        str: The code as stored, e.g. "TR0C3QX7N2R0001".
+    """
+    code = "".join(text.split()).replace("-", "").upper()
+    prefix = prefix.upper()
+    if not code.startswith(prefix):
+        prefix = ""
+    return prefix + code[len(prefix):].translate(_LOOK_ALIKES)
+
+
+def parse(number):
+    """
+    Split an ID into its fields.
+
+    Args:
+        number (int): ID from SnowflakeGenerator.next_id().
+
+    Returns:
+        SnowflakeParts: Creation time, worker ID and sequence number.
+    """
+    milliseconds = (number >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return SnowflakeParts(
+        created_at=datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc),
+        worker_id=(number >> SEQUENCE_BITS) & MAX_WORKER_ID,
+        sequence=number & MAX_SEQUENCE,
+    )
+
+
+def _try_lock(handle):
+    """Take an exclusive, non-blocking lock on an open file, or return False."""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        import msvcrt
+
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class SnowflakeGenerator:
+    """
+    Generates unique, time-ordered 64-bit IDs in one process.
+
+    The worker ID is resolved on the first ID, not when the generator is
+    created, so importing this module has no side effects.
+
+    Args:
+        worker_id (int, optional): Fixed worker ID; nothing is claimed.
+        lock_dir (str, optional): Claim a worker slot in this directory
+            instead of ID_WORKER_LOCK_DIR.
+        first_worker_id (int, optional): First worker ID of the range to
+            claim from, instead of ID_WORKER_ID.
+        worker_slots (int, optional): Size of that range, instead of
+            ID_WORKER_SLOTS.
+
+    Methods:
+        next_id(): Return a new ID.
+        next_code(prefix): Return a new ID as a code.
+        worker_id: The worker ID of the current process (property).
+    """
+
+    def __init__(
+        self, worker_id=None, lock_dir=None, first_worker_id=None, worker_slots=None
+    ):
+        self._fixed_worker_id = worker_id
+        self._lock_dir = lock_dir
+        self._first_worker_id = first_worker_id
+        self._worker_slots = worker_slots
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset(self):
+        self._pid = None
+        self._worker_id = None
+        self._slot_file = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _reset_after_fork(self):
+        # The parent keeps its slot; the child claims its own on first use.
+        # The inherited lock file stays open so the parent's lock holds.
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _worker_range(self):
+        """Return the worker IDs this process may claim, as a range."""
+        first = self._first_worker_id
+        if first is None:
+            first = getattr(settings, "ID_WORKER_ID", None)
+        if first is None:
+            return range(MAX_WORKER_ID + 1)
+        slots = self._worker_slots or getattr(settings, "ID_WORKER_SLOTS", 32)
+        first, slots = int(first), int(slots)
+        if first < 0 or slots < 1 or first + slots - 1 > MAX_WORKER_ID:
+            raise ValueError(
+                f"ID worker range {first}-{first + slots - 1} is not within "
+                f"0-{MAX_WORKER_ID}"
+            )
+        return range(first, first + slots)
+
+    def _claim_worker_id(self):
+        if self._fixed_worker_id is not None:
+            return self._fixed_worker_id
+        lock_dir = self._lock_dir or getattr(
+            settings,
+            "ID_WORKER_LOCK_DIR",
+            os.path.join(tempfile.gettempdir(), "techreform-idgen"),
+        )
+        worker_ids = self._worker_range()
+        os.makedirs(lock_dir, exist_ok=True)
+        for worker_id in worker_ids:
+            handle = open(os.path.join(lock_dir, f"worker-{worker_id}.lock"), "a+b")
+            if _try_lock(handle):
+                # Kept open: closing the file would release the slot
+                self._slot_file = handle
+                return worker_id
+            handle.close()
+        raise RuntimeError(
+            f"All ID worker slots {worker_ids.start}-{worker_ids.stop - 1} in "
+            f"{lock_dir} are taken"
+        )
+
+    @property
+    def worker_id(self):
+        """The worker ID of the current process, claimed on first use."""
+        with self._lock:
+            return self._ensure_worker_id()
+
+    def _ensure_worker_id(self):
+        if self._pid != os.getpid():
+            self._reset()
+            self._worker_id = self._claim_worker_id()
+            if not 0 <= self._worker_id <= MAX_WORKER_ID:
+                raise ValueError(f"ID worker ID must be 0-{MAX_WORKER_ID}")
+            self._pid = os.getpid()
+            # A previous owner of the worker ID may have used the current
+            # millisecond; start with the next one
+            self._last_ms = time.time_ns() // 1_000_000 - EPOCH_MS
+            self._sequence = MAX_SEQUENCE
+        return self._worker_id
+
+    def next_id(self):
+        """
+        Return a new ID.
+
+        Returns:
+            int: 64-bit ID, larger than every ID this process returned before.
+        """
+        with self._lock:
+            worker_id = self._ensure_worker_id()
+            now = time.time_ns() // 1_000_000 - EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                # Same millisecond, or the clock stepped back
+                self._sequence += 1
+            else:
+                # Sequence used up: borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+            return (
+                (self._last_ms << (WORKER_BITS + SEQUENCE_BITS))
+                | (worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def next_code(self, prefix=""):
+        """
+        Return a new ID as a code.
+
+        Args:
+            prefix (str): Text put in front of the code, e.g. "TR".
+
+        Returns:
+            str: prefix followed by CODE_LENGTH base32 characters.
+        """
+        return prefix + encode(self.next_id())
+
+
+id_generator = SnowflakeGenerator()
+
+
+def next_id():
+    """Return the next ID of the shared generator."""
+    return id_generator.next_id()
+
+
+def next_code(prefix=""):
+    """Return the next ID of the shared generator as a code with a prefix."""
+    return id_generator.next_code(prefix)
@@ -227,6 +227,58 @@ DATABASES = {
 }
 
 
+# =============================================================================
+# CACHE CONFIGURATION
+# =============================================================================
+# The "catalog" cache holds rendered listing data (ProductsApp.caching).
+# Redis is used when REDIS_URL is set; otherwise a file-based cache when
+# CATALOG_CACHE_DIR is set, else a per-process in-memory cache. Deployments
+# with several worker processes should use Redis or a shared cache directory
+# so that product changes invalidate every worker's pages.
+
+if os.environ.get('REDIS_URL'):
+    CATALOG_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+        'KEY_PREFIX': 'techreform',
+    }
+elif os.environ.get('CATALOG_CACHE_DIR'):
+    CATALOG_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['CATALOG_CACHE_DIR'],
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+else:
+    CATALOG_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'techreform-catalog',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'techreform-default',
+    },
+    'catalog': CATALOG_CACHE,
+}
+
+# Cache alias used for catalog listing pages
+CATALOG_CACHE_ALIAS = 'catalog'
+
+# Lifetime of cached listing pages in seconds. With a shared backend entries
+# are invalidated by product changes, so this only bounds how long unused
+# pages occupy memory. The in-memory backend only sees the invalidations of
+# its own process, so there it also bounds how long other workers serve a
+# page after a price or stock change.
+CATALOG_CACHE_TIMEOUT = int(
+    os.environ.get(
+        'CATALOG_CACHE_TIMEOUT',
+        '60' if CATALOG_CACHE['BACKEND'].endswith('LocMemCache') else '86400',
+    )
+)
+
+
 # =============================================================================
 # PASSWORD VALIDATION CONFIGURATION
 # =============================================================================
@@ -355,3 +407,89 @@ CKEDITOR_CONFIGS = {
         "width": "100%",  # Editor width (responsive)
     },
 }
+
+
+# =============================================================================
+# PRODUCT SEARCH CONFIGURATION
+# =============================================================================
+# In-process full-text search index for the storefront (ProductsApp.search)
+
+# File the search index is persisted to; build it with
+# `python manage.py build_search_index` so workers can load it at startup
+PRODUCT_SEARCH_INDEX_PATH = os.environ.get(
+    "PRODUCT_SEARCH_INDEX_PATH", os.path.join(BASE_DIR, "var", "product_search.idx")
+)
+
+# Seconds between checks for products changed by other processes; also used
+# by the facet bitmaps (ProductsApp.facets)
+PRODUCT_SEARCH_REFRESH_INTERVAL = int(
+    os.environ.get("PRODUCT_SEARCH_REFRESH_INTERVAL", "60")
+)
+
+# Most search matches a PC builder component list is filtered to; keeps the
+# IN (...) list of product IDs well below database parameter limits
+PRODUCT_SEARCH_MAX_MATCHES = int(os.environ.get("PRODUCT_SEARCH_MAX_MATCHES", "500"))
+
+
+# =============================================================================
+# BUILD PDF CONFIGURATION
+# =============================================================================
+# Rendered PC build quotes (PCBuilderApp.pdf), stored by content hash
+
+# Directory the rendered PDFs are kept in; share it between workers
+BUILD_PDF_CACHE_DIR = os.environ.get(
+    "BUILD_PDF_CACHE_DIR", os.path.join(BASE_DIR, "var", "build-pdfs")
+)
+
+# Processes rendering PDFs, per web worker process
+BUILD_PDF_WORKERS = int(os.environ.get("BUILD_PDF_WORKERS", "2"))
+
+# Seconds a request waits for a render before answering "202 Accepted" with
+# a page that reloads itself
+BUILD_PDF_WAIT = float(os.environ.get("BUILD_PDF_WAIT", "3"))
+
+
+# =============================================================================
+# ANONYMOUS VISITOR CONFIGURATION
+# =============================================================================
+# Cart, compare list, wishlist and PC builder state of visitors who are not
+# logged in
+
+# Keep the state of anonymous visitors virtual until they change it: pages
+# that only read it show an empty cart, list or build without creating a
+# session or any rows, so crawlers write nothing. Set to "0" to create the
+# rows on the first page view instead.
+VIRTUAL_ANONYMOUS_STATE = os.environ.get("VIRTUAL_ANONYMOUS_STATE", "1") != "0"
+
+
+# =============================================================================
+# STOCK RESERVATION CONFIGURATION
+# =============================================================================
+# Holds on the stock of products in carts (CartApp.reservations)
+
+# Seconds a cart holds the stock of its products after it last added,
+# changed or checked them out; expired holds are deleted by
+# `python manage.py sweep_reservations`
+CART_RESERVATION_TTL = int(os.environ.get("CART_RESERVATION_TTL", "900"))
+
+
+# =============================================================================
+# ID GENERATION CONFIGURATION
+# =============================================================================
+# Snowflake IDs behind order and ticket numbers (TechReform.idgen)
+
+# Every process claims a free worker ID (0-1023) through a lock file in
+# ID_WORKER_LOCK_DIR. Leave ID_WORKER_ID unset on a single host. With several
+# hosts, set it to the first worker ID of each host's range of
+# ID_WORKER_SLOTS IDs (0, 32, 64, ...); the host's processes then claim
+# distinct IDs inside that range
+ID_WORKER_ID = (
+    int(os.environ["ID_WORKER_ID"]) if os.environ.get("ID_WORKER_ID") else None
+)
+ID_WORKER_SLOTS = int(os.environ.get("ID_WORKER_SLOTS", "32"))
+
+# Directory of the worker slot lock files; must be shared by every process
+# on the host
+ID_WORKER_LOCK_DIR = os.environ.get(
+    "ID_WORKER_LOCK_DIR", os.path.join(BASE_DIR, "var", "idgen")
+)
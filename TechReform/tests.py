@@ -0,0 +1,118 @@
+"""
+Test cases for the TechReform project package.
+
+ID generation:
+    Codes round-trip and sort like their IDs, a single generator returns
+    strictly increasing IDs even when a burst exhausts a millisecond, and
+    several processes claiming worker slots from one lock directory never
+    produce the same ID. With ID_WORKER_ID set, processes still claim
+    distinct IDs, inside the host's range. Typed codes are normalized like
+    decode() reads them. IDGEN_PROCESSES and IDGEN_IDS_PER_PROCESS size the
+    stress test.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from .idgen import (
+    MAX_SEQUENCE,
+    SnowflakeGenerator,
+    decode,
+    encode,
+    normalize_code,
+    parse,
+)
+
+
+IDGEN_PROCESSES = int(os.environ.get("IDGEN_PROCESSES", "8"))
+IDGEN_IDS_PER_PROCESS = int(os.environ.get("IDGEN_IDS_PER_PROCESS", "20000"))
+
+
+def generate_ids(lock_dir, count, start):
+    """Worker process of the stress test: generate count IDs."""
+    generator = SnowflakeGenerator(lock_dir=lock_dir)
+    worker_id = generator.worker_id
+    start.wait()
+    return worker_id, [generator.next_id() for _ in range(count)]
+
+
+class IdGeneratorTests(SimpleTestCase):
+    """
+    Snowflake IDs are unique, ordered and readable.
+    """
+
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir, ignore_errors=True)
+
+    def test_codes_round_trip_and_sort(self):
+        generator = SnowflakeGenerator(worker_id=5)
+        ids = [generator.next_id() for _ in range(1000)]
+        codes = [encode(number) for number in ids]
+
+        self.assertEqual([decode(code) for code in codes], ids)
+        self.assertEqual(sorted(codes), codes)
+        self.assertEqual({len(code) for code in codes}, {13})
+        self.assertEqual(decode(codes[0].lower()), ids[0])
+        self.assertEqual(decode("IO"), decode("10"))
+        self.assertEqual(decode("l"), 1)
+        self.assertEqual(parse(ids[-1]).worker_id, 5)
+        with self.assertRaises(ValueError):
+            decode("TR-U")
+
+    def test_burst_stays_monotonic(self):
+        generator = SnowflakeGenerator(worker_id=1)
+        ids = [generator.next_id() for _ in range(3 * (MAX_SEQUENCE + 1))]
+
+        self.assertTrue(all(a < b for a, b in zip(ids, ids[1:])))
+        self.assertEqual(len({parse(number).worker_id for number in ids}), 1)
+
+    def test_processes_get_distinct_slots(self):
+        first = SnowflakeGenerator(lock_dir=self.lock_dir)
+        second = SnowflakeGenerator(lock_dir=self.lock_dir)
+        self.assertEqual({first.worker_id, second.worker_id}, {0, 1})
+
+    @override_settings(ID_WORKER_ID=64, ID_WORKER_SLOTS=2)
+    def test_host_range_is_shared_by_its_processes(self):
+        first = SnowflakeGenerator(lock_dir=self.lock_dir)
+        second = SnowflakeGenerator(lock_dir=self.lock_dir)
+        self.assertEqual({first.worker_id, second.worker_id}, {64, 65})
+        self.assertEqual(parse(second.next_id()).worker_id, second.worker_id)
+
+        with self.assertRaisesMessage(RuntimeError, "64-65"):
+            SnowflakeGenerator(lock_dir=self.lock_dir).next_id()
+        with self.assertRaises(ValueError):
+            SnowflakeGenerator(
+                lock_dir=self.lock_dir, first_worker_id=1020, worker_slots=8
+            ).worker_id
+
+    def test_normalize_code(self):
+        code = "TR" + encode(SnowflakeGenerator(worker_id=3).next_id())
+        typed = f" {code[:6].lower()}-{code[6:]} ".replace("1", "l").replace("0", "O")
+        self.assertEqual(normalize_code(typed, prefix="TR"), code)
+        self.assertEqual(normalize_code("tr0c3q x7n2 roool", "TR"), "TR0C3QX7N2R0001")
+        # Codes with another prefix are only upper-cased
+        self.assertEqual(normalize_code("tk-0042", "TR"), "TK0042")
+
+    def test_many_processes_never_collide(self):
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            start = manager.Barrier(IDGEN_PROCESSES)
+            with context.Pool(IDGEN_PROCESSES) as pool:
+                results = pool.starmap(
+                    generate_ids,
+                    [(self.lock_dir, IDGEN_IDS_PER_PROCESS, start)] * IDGEN_PROCESSES,
+                )
+
+        worker_ids = [worker_id for worker_id, _ in results]
+        self.assertEqual(len(set(worker_ids)), IDGEN_PROCESSES)
+        all_ids = []
+        for worker_id, ids in results:
+            self.assertTrue(all(a < b for a, b in zip(ids, ids[1:])))
+            self.assertEqual({parse(number).worker_id for number in ids}, {worker_id})
+            all_ids.extend(ids)
+        self.assertEqual(len(set(all_ids)), IDGEN_PROCESSES * IDGEN_IDS_PER_PROCESS)
@@ -3,6 +3,9 @@ WSGI config for TechReform project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Loading the product search index is started here, in the background, so
+that server processes have it ready before their first searches.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
@@ -14,3 +17,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "TechReform.settings")
 
 application = get_wsgi_application()
+
+from ProductsApp.search import search_engine  # noqa: E402
+
+search_engine.warm_in_background()
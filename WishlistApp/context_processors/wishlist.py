@@ -5,7 +5,9 @@ This module provides context processors that make wishlist-related data
 available to all Django templates across the application.
 """
 
-from ..models import WishList, WishlistItem
+from TechReform.counters import lazy_count, visitor_filters
+
+from ..models import WishlistItem
 
 
 def wishlist_processor(request):
@@ -15,8 +17,10 @@ def wishlist_processor(request):
     This function is designed to be used as a Django context processor,
     automatically providing wishlist information to every template rendered
     in the application. It handles both authenticated and anonymous users
-    by creating or retrieving wishlists based on user authentication status
-    or session information.
+    by selecting wishlist items based on user authentication status or
+    session information. Both values are lazy: the count comes from the
+    single header counts query (TechReform.counters) the first time a
+    template reads it, and the items are an unevaluated QuerySet.
 
     Args:
         request (HttpRequest): The Django HTTP request object containing
@@ -31,33 +35,21 @@ def wishlist_processor(request):
     Note:
         - For authenticated users, wishlists are associated with the user account
         - For anonymous users, wishlists are associated with the session ID
-        - A new wishlist is automatically created if one doesn't exist
-        - Session keys are created automatically for anonymous users if needed
+        - Nothing is created; visitors without a wishlist get no items
 
     Example:
         In templates, you can access wishlist data like:
         {{ wishlist_count }} - displays the number of wishlist items
         {% for item in wishlist_items %} - iterates through wishlist items
     """
-    wishlist_count = 0
-    wishlist_items = []
-
-    # Try to get the wishlist for the current user/session
-    if request.user.is_authenticated:
-        # For authenticated users
-        wishlist, created = WishList.objects.get_or_create(user=request.user)
-        wishlist_items = WishlistItem.objects.filter(wishlist=wishlist)
+    wishlist_filter = visitor_filters(request)["wishlist"]
+    if wishlist_filter is None:
+        wishlist_items = WishlistItem.objects.none()
     else:
-        # For anonymous users
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-
-        wishlist, created = WishList.objects.get_or_create(session_id=session_key)
-        wishlist_items = WishlistItem.objects.filter(wishlist=wishlist)
-
-    wishlist_count = wishlist_items.count()
+        wishlist_items = WishlistItem.objects.filter(wishlist_filter)
 
     # Return the context variables
-    return {"wishlist_count": wishlist_count, "wishlist_items": wishlist_items}
+    return {
+        "wishlist_count": lazy_count(request, "wishlist_count"),
+        "wishlist_items": wishlist_items,
+    }
@@ -21,25 +21,14 @@ Key Features:
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
+from django.conf import settings
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from .models import WishList, WishlistItem
-from ProductsApp.models import (
-    CPU,
-    GPU,
-    RAM,
-    SSD,
-    HDD,
-    Motherboard,
-    PowerSupply,
-    Casing,
-    Cooler,
-    Monitor,
-    Keyboard,
-    Mouse,
-    Headphone,
-)
+from ProductsApp.models import PRODUCT_MODELS
+from ProductsApp.registry import product_registry
+from ProductsApp.catalog import get_product_loader
 
 
 def get_product_by_id_and_category(product_id, category):
@@ -66,37 +55,17 @@ def get_product_by_id_and_category(product_id, category):
         CPU, GPU, RAM, SSD, HDD, Power Supply, Casing, Cooler,
         Monitor, Motherboard, Keyboard, Mouse, Headphone
     """
-    if category == "CPU":
-        return get_object_or_404(CPU, id=product_id)
-    elif category == "GPU":
-        return get_object_or_404(GPU, id=product_id)
-    elif category == "RAM":
-        return get_object_or_404(RAM, id=product_id)
-    elif category == "SSD":
-        return get_object_or_404(SSD, id=product_id)
-    elif category == "HDD":
-        return get_object_or_404(HDD, id=product_id)
-    elif category == "Power Supply":
-        return get_object_or_404(PowerSupply, id=product_id)
-    elif category == "Casing":
-        return get_object_or_404(Casing, id=product_id)
-    elif category == "Cooler":
-        return get_object_or_404(Cooler, id=product_id)
-    elif category == "Monitor":
-        return get_object_or_404(Monitor, id=product_id)
-    elif category == "Motherboard":
-        return get_object_or_404(Motherboard, id=product_id)
-    elif category == "Keyboard":
-        return get_object_or_404(Keyboard, id=product_id)
-    elif category == "Mouse":
-        return get_object_or_404(Mouse, id=product_id)
-    elif category == "Headphone":
-        return get_object_or_404(Headphone, id=product_id)
-    else:
+    if category not in PRODUCT_MODELS:
         return None
 
+    # One query against the category's own table
+    product = product_registry.get_product(product_id, category)
+    if product is None:
+        raise Http404("No product matches the given query.")
+    return product
+
 
-def get_wishlist(request):
+def get_wishlist(request, create=True):
     """
     Get or create a wishlist for the current user or session.
 
@@ -108,6 +77,9 @@ def get_wishlist(request):
     Args:
         request (HttpRequest): The Django HTTP request object containing
             user authentication information and session data.
+        create (bool): Whether a missing anonymous wishlist may be created.
+            Read-only views pass False; with VIRTUAL_ANONYMOUS_STATE on they
+            then get an unsaved, empty wishlist and no session is created.
 
     Returns:
         WishList: The wishlist instance for the current user or session.
@@ -124,6 +96,15 @@ def get_wishlist(request):
             wishlist = WishList.objects.get(user=request.user)
         except WishList.DoesNotExist:
             wishlist = WishList.objects.create(user=request.user)
+    elif not create and getattr(settings, "VIRTUAL_ANONYMOUS_STATE", True):
+        # Read-only view: no session or WishList is created until the
+        # visitor adds an item
+        session_id = request.session.session_key
+        wishlist = None
+        if session_id:
+            wishlist = WishList.objects.filter(session_id=session_id).first()
+        if wishlist is None:
+            wishlist = WishList(session_id=session_id)
     else:
         if not request.session.session_key:
             request.session.create()
@@ -384,30 +365,24 @@ def view_wishlist(request):
         wishlist/wishlist.html: The template used to render the wishlist page.
 
     Note:
-        - Automatically creates a wishlist if one doesn't exist
+        - Creates a wishlist for authenticated users if one doesn't exist
         - Handles both authenticated and anonymous users
         - Filters out any wishlist items that reference non-existent products
         - Products retain their original model attributes plus wishlist_item_id
-        - Session keys are created automatically for anonymous users
+        - Anonymous visitors without a wishlist get an empty page and no
+          session or wishlist is created for them
     """
     # Get the wishlist for the current user/session
-    if request.user.is_authenticated:
-        wishlist, created = WishList.objects.get_or_create(user=request.user)
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        wishlist, created = WishList.objects.get_or_create(session_id=session_key)
+    wishlist = get_wishlist(request, create=False)
 
     # Get all items in the wishlist
     wishlist_items = WishlistItem.objects.filter(wishlist=wishlist)
 
     products = []
 
-    # Process the items to get the actual product objects
-    for item in wishlist_items:
-        product = item.get_product()
+    # Load the products for all items in one batch
+    for item in get_product_loader(request).attach(wishlist_items, category_attr="category"):
+        product = item.product
         if product:
             # Add the wishlist item ID to the product for later reference
             product.wishlist_item_id = item.id
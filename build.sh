@@ -20,3 +20,6 @@ python manage.py collectstatic --no-input
 
 # Apply any outstanding database migrations
 python manage.py migrate
+
+# Build the product search index that workers load at startup
+python manage.py build_search_index